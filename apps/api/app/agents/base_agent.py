@@ -6,12 +6,13 @@ import asyncio
 import json
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import AsyncIterator, Dict, List, Optional, Any, Union
 from uuid import UUID, uuid4
-import httpx
 import structlog
 
+from app.core.deadline import apply_deadline_to_request
 from app.domain.credentials import UserCredential, ProviderType
+from app.infra.http_transport import get_http_transport
 from app.services.user_credentials_service import UserCredentialsService
 
 logger = structlog.get_logger(__name__)
@@ -87,10 +88,11 @@ class BaseAgent(ABC):
         self.version = version
         self.credentials_service = credentials_service or UserCredentialsService()
         
-        # HTTP client para requisições externas
-        self.http_client = httpx.AsyncClient(
+        # HTTP client sobre o pool compartilhado (timeouts limitados pelo prazo da execução)
+        self.http_client = get_http_transport().client(
             timeout=30.0,
-            headers={'User-Agent': f'Renum-Agent/{self.agent_id}/{self.version}'}
+            headers={'User-Agent': f'Renum-Agent/{self.agent_id}/{self.version}'},
+            event_hooks={'request': [apply_deadline_to_request]}
         )
         
         # Cache de credenciais
@@ -115,6 +117,37 @@ class BaseAgent(ABC):
         """Executa uma capacidade específica do agente"""
         pass
     
+    async def stream_capability(
+        self,
+        capability_name: str,
+        input_data: Dict[str, Any],
+        user_id: UUID,
+        credential_id: Optional[UUID] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Executa a capacidade emitindo registros (usado pela estratégia streaming).
+        
+        Padrão: executa uma vez e emite os itens de ``records``/``data`` quando
+        forem listas, ou o resultado inteiro como um único registro. Agentes com
+        fontes paginadas devem sobrescrever para manter a memória constante.
+        """
+        result = await self.execute_capability(
+            capability_name=capability_name,
+            input_data=input_data,
+            user_id=user_id,
+            credential_id=credential_id
+        )
+        if not result.success:
+            raise Exception(result.error_message or "Erro desconhecido")
+        
+        for key in ('records', 'data'):
+            if isinstance(result.data.get(key), list):
+                for item in result.data[key]:
+                    yield item if isinstance(item, dict) else {'value': item}
+                return
+        
+        yield result.data
+    
     def has_capability(self, capability_name: str) -> bool:
         """Verifica se o agente tem uma capacidade específica"""
         return any(cap.name == capability_name for cap in self.capabilities)
@@ -236,6 +269,10 @@ class BaseAgent(ABC):
             }
         }
     
+    def get_supported_providers(self) -> List[str]:
+        """Provedores externos acessados pelo agente"""
+        return self._get_supported_providers()
+    
     @abstractmethod
     def _get_supported_providers(self) -> List[str]:
         """Retorna lista de provedores suportados"""
@@ -2,15 +2,18 @@
 Gmail Agent (sa-gmail)
 Agente especializado para operações com Gmail API
 """
+import asyncio
 import base64
 import email
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
-from typing import Dict, List, Optional, Any
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from uuid import UUID
 import json
+import httpx
 
 from app.agents.base_agent import BaseAgent, AgentCapability, AgentExecutionResult
 from app.domain.credentials import ProviderType
@@ -18,6 +21,25 @@ from app.domain.credentials import ProviderType
 class GmailAgent(BaseAgent):
     """Agente para integração com Gmail API"""
     
+    API_BASE_URL = 'https://gmail.googleapis.com/gmail/v1/users/me'
+    
+    # Máximo aceito pela Gmail API por página de messages.list
+    LIST_PAGE_SIZE = 500
+    
+    # Mensagens por página ao emitir read_emails em streaming
+    STREAM_PAGE_SIZE = 100
+    
+    # Requisições simultâneas ao buscar detalhes das mensagens
+    FETCH_CONCURRENCY = 10
+    
+    METADATA_HEADERS = ('Subject', 'From', 'To', 'Date')
+    
+    # Máscaras de campos: só o que _parse_email_message utiliza
+    MESSAGE_FIELDS = {
+        'metadata': 'id,threadId,snippet,payload/headers',
+        'full': 'id,threadId,snippet,payload(mimeType,headers,body/data,parts(mimeType,body/data))'
+    }
+    
     def __init__(self):
         super().__init__(
             agent_id="sa-gmail",
@@ -74,7 +96,13 @@ class GmailAgent(BaseAgent):
                     "properties": {
                         "query": {"type": "string", "description": "Query de busca Gmail"},
                         "max_results": {"type": "integer", "default": 10, "description": "Máximo de emails"},
-                        "include_body": {"type": "boolean", "default": False, "description": "Incluir corpo do email"}
+                        "include_body": {"type": "boolean", "default": False, "description": "Incluir corpo do email"},
+                        "format": {
+                            "type": "string",
+                            "enum": ["minimal", "metadata", "full"],
+                            "description": "minimal: só ids; metadata: cabeçalhos sem corpo; full: com corpo (padrão conforme include_body)"
+                        },
+                        "page_token": {"type": "string", "description": "Continuar a partir de uma página anterior"}
                     }
                 },
                 output_schema={
@@ -96,7 +124,8 @@ class GmailAgent(BaseAgent):
                                 }
                             }
                         },
-                        "total_count": {"type": "integer"}
+                        "total_count": {"type": "integer"},
+                        "next_page_token": {"type": "string"}
                     }
                 },
                 required_credentials=["google"]
@@ -272,6 +301,44 @@ class GmailAgent(BaseAgent):
                 error_message=f"Erro ao enviar email: {str(e)}"
             )
     
+    async def stream_capability(
+        self,
+        capability_name: str,
+        input_data: Dict[str, Any],
+        user_id: UUID,
+        credential_id: Optional[UUID] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """read_emails paginado por pageToken: emite email a email, uma página em memória por vez"""
+        if capability_name != 'read_emails':
+            async for record in super().stream_capability(capability_name, input_data, user_id, credential_id):
+                yield record
+            return
+        
+        page_size = input_data.get('page_size', self.STREAM_PAGE_SIZE)
+        remaining = input_data.get('max_results')
+        page_token = input_data.get('page_token')
+        
+        while remaining is None or remaining > 0:
+            limit = page_size if remaining is None else min(page_size, remaining)
+            page_input = {k: v for k, v in input_data.items() if k not in ('page_size', 'page_token')}
+            page_input['max_results'] = limit
+            if page_token:
+                page_input['page_token'] = page_token
+            
+            result = await self.execute_capability('read_emails', page_input, user_id, credential_id)
+            if not result.success:
+                raise Exception(result.error_message or "Erro ao ler emails")
+            
+            emails = result.data.get('emails', [])
+            for email_info in emails:
+                yield email_info
+            
+            page_token = result.data.get('next_page_token')
+            if not page_token:
+                break
+            if remaining is not None:
+                remaining -= len(emails)
+    
     async def _read_emails(
         self,
         input_data: Dict[str, Any],
@@ -290,64 +357,113 @@ class GmailAgent(BaseAgent):
                 'Authorization': f'Bearer {access_token}'
             }
             
-            # Parâmetros da busca
-            params = {
-                'maxResults': input_data.get('max_results', 10)
+            # Listar ids (seguindo pageToken até max_results)
+            messages = []
+            next_page_token = None
+            async for page, page_token in self._iter_message_pages(
+                headers,
+                query=input_data.get('query'),
+                limit=input_data.get('max_results', 10),
+                page_token=input_data.get('page_token')
+            ):
+                messages.extend(page)
+                next_page_token = page_token
+            
+            message_format = input_data.get('format') or ('full' if input_data.get('include_body', False) else 'minimal')
+            if message_format == 'minimal':
+                # Apenas informações básicas
+                emails = [{'id': msg['id'], 'thread_id': msg['threadId']} for msg in messages]
+            else:
+                emails = await self._fetch_messages(headers, messages, message_format)
+            
+            data = {
+                'emails': emails,
+                'total_count': len(emails)
             }
+            if next_page_token:
+                data['next_page_token'] = next_page_token
             
-            if input_data.get('query'):
-                params['q'] = input_data['query']
+            return AgentExecutionResult(success=True, data=data)
+            
+        except Exception as e:
+            return AgentExecutionResult(
+                success=False,
+                error_message=f"Erro ao ler emails: {str(e)}"
+            )
+    
+    async def _iter_message_pages(
+        self,
+        headers: Dict[str, str],
+        query: Optional[str] = None,
+        limit: Optional[int] = None,
+        page_token: Optional[str] = None
+    ) -> AsyncIterator[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """Emite (mensagens, próximo pageToken) por página de messages.list; sem limite percorre a caixa toda"""
+        remaining = limit
+        
+        while remaining is None or remaining > 0:
+            params = {
+                'maxResults': self.LIST_PAGE_SIZE if remaining is None else min(self.LIST_PAGE_SIZE, remaining),
+                'fields': 'messages(id,threadId),nextPageToken'
+            }
+            if query:
+                params['q'] = query
+            if page_token:
+                params['pageToken'] = page_token
             
-            # Buscar lista de mensagens
             response = await self.http_client.get(
-                'https://gmail.googleapis.com/gmail/v1/users/me/messages',
+                f'{self.API_BASE_URL}/messages',
                 headers=headers,
                 params=params
             )
             
             if response.status_code != 200:
-                return AgentExecutionResult(
-                    success=False,
-                    error_message=f"Erro da Gmail API: {response.status_code}"
-                )
+                raise Exception(f"Erro da Gmail API: {response.status_code}")
             
-            messages_data = response.json()
-            messages = messages_data.get('messages', [])
+            body = response.json()
+            messages = body.get('messages', [])
+            page_token = body.get('nextPageToken')
+            yield messages, page_token
             
-            # Se incluir corpo, buscar detalhes de cada mensagem
-            emails = []
-            if input_data.get('include_body', False):
-                for msg in messages:
-                    msg_response = await self.http_client.get(
-                        f'https://gmail.googleapis.com/gmail/v1/users/me/messages/{msg["id"]}',
-                        headers=headers
+            if not page_token or not messages:
+                break
+            if remaining is not None:
+                remaining -= len(messages)
+    
+    async def _fetch_messages(
+        self,
+        headers: Dict[str, str],
+        messages: List[Dict[str, Any]],
+        message_format: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca os detalhes das mensagens em paralelo (até FETCH_CONCURRENCY
+        simultâneas), preservando a ordem da listagem. ``metadata`` traz só os
+        cabeçalhos usados; ``full`` inclui o corpo. Mensagens que falharem são
+        omitidas.
+        """
+        semaphore = asyncio.Semaphore(self.FETCH_CONCURRENCY)
+        params = [('format', message_format), ('fields', self.MESSAGE_FIELDS[message_format])]
+        if message_format == 'metadata':
+            params.extend(('metadataHeaders', name) for name in self.METADATA_HEADERS)
+        
+        async def fetch(message_id: str) -> Optional[Dict[str, Any]]:
+            try:
+                async with semaphore:
+                    response = await self.http_client.get(
+                        f'{self.API_BASE_URL}/messages/{message_id}',
+                        headers=headers,
+                        params=params
                     )
-                    
-                    if msg_response.status_code == 200:
-                        msg_data = msg_response.json()
-                        email_info = self._parse_email_message(msg_data)
-                        emails.append(email_info)
-            else:
-                # Apenas informações básicas
-                for msg in messages:
-                    emails.append({
-                        'id': msg['id'],
-                        'thread_id': msg['threadId']
-                    })
-            
-            return AgentExecutionResult(
-                success=True,
-                data={
-                    'emails': emails,
-                    'total_count': len(emails)
-                }
-            )
-            
-        except Exception as e:
-            return AgentExecutionResult(
-                success=False,
-                error_message=f"Erro ao ler emails: {str(e)}"
-            )
+            except httpx.HTTPError:
+                # Uma mensagem com falha de rede não derruba a página inteira
+                return None
+            if response.status_code != 200:
+                return None
+            return self._parse_email_message(response.json(), include_body=message_format == 'full')
+        
+        results = await asyncio.gather(*(fetch(msg['id']) for msg in messages))
+        return [email_info for email_info in results if email_info is not None]
     
     async def _create_draft(
         self,
@@ -484,20 +600,22 @@ class GmailAgent(BaseAgent):
         
         return message
     
-    def _parse_email_message(self, msg_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _parse_email_message(self, msg_data: Dict[str, Any], include_body: bool = True) -> Dict[str, Any]:
         """Parse dados da mensagem do Gmail"""
         headers = {h['name']: h['value'] for h in msg_data.get('payload', {}).get('headers', [])}
         
-        return {
+        email_info = {
             'id': msg_data.get('id'),
             'thread_id': msg_data.get('threadId'),
             'subject': headers.get('Subject', ''),
             'from': headers.get('From', ''),
             'to': headers.get('To', '').split(', ') if headers.get('To') else [],
             'date': headers.get('Date', ''),
-            'snippet': msg_data.get('snippet', ''),
-            'body': self._extract_body(msg_data.get('payload', {}))
+            'snippet': msg_data.get('snippet', '')
         }
+        if include_body:
+            email_info['body'] = self._extract_body(msg_data.get('payload', {}))
+        return email_info
     
     def _extract_body(self, payload: Dict[str, Any]) -> str:
         """Extrai corpo da mensagem"""
@@ -11,6 +11,7 @@ from datetime import datetime
 import asyncio
 
 from app.agents.base_agent import BaseAgent, AgentCapability, AgentExecutionResult
+from app.core.deadline import deadline_allows
 from app.domain.credentials import ProviderType
 
 class HTTPGenericAgent(BaseAgent):
@@ -1115,8 +1116,10 @@ class HTTPGenericAgent(BaseAgent):
                         'backoff_seconds': backoff_seconds
                     })
                     
-                    # Se não é a última tentativa, aguardar backoff
+                    # Se não é a última tentativa, aguardar backoff (se o prazo da execução permitir)
                     if attempt < max_retries:
+                        if not deadline_allows(backoff_seconds):
+                            break
                         await asyncio.sleep(backoff_seconds)
                     
                 except Exception as e:
@@ -1129,6 +1132,8 @@ class HTTPGenericAgent(BaseAgent):
                     })
                     
                     if attempt < max_retries:
+                        if not deadline_allows(backoff_seconds):
+                            break
                         await asyncio.sleep(backoff_seconds)
             
             # Todas as tentativas falharam
@@ -2,7 +2,7 @@
 Supabase Agent (sa-supabase)
 Agente especializado para operações com Supabase Database
 """
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 from uuid import UUID
 import json
 
@@ -12,6 +12,9 @@ from app.domain.credentials import ProviderType
 class SupabaseAgent(BaseAgent):
     """Agente para integração com Supabase Database"""
     
+    # Linhas por página ao emitir select_data em streaming
+    STREAM_PAGE_SIZE = 500
+    
     def __init__(self):
         super().__init__(
             agent_id="sa-supabase",
@@ -250,6 +253,42 @@ class SupabaseAgent(BaseAgent):
             await self.log_execution(capability_name, input_data, result, user_id)
             return result
     
+    async def stream_capability(
+        self,
+        capability_name: str,
+        input_data: Dict[str, Any],
+        user_id: UUID,
+        credential_id: Optional[UUID] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """select_data paginado: emite linha a linha, uma página em memória por vez"""
+        if capability_name != 'select_data':
+            async for record in super().stream_capability(capability_name, input_data, user_id, credential_id):
+                yield record
+            return
+        
+        page_size = input_data.get('page_size', self.STREAM_PAGE_SIZE)
+        remaining = input_data.get('limit')
+        offset = input_data.get('offset', 0)
+        
+        while remaining is None or remaining > 0:
+            limit = page_size if remaining is None else min(page_size, remaining)
+            page_input = {k: v for k, v in input_data.items() if k != 'page_size'}
+            page_input.update({'limit': limit, 'offset': offset})
+            
+            result = await self.execute_capability('select_data', page_input, user_id, credential_id)
+            if not result.success:
+                raise Exception(result.error_message or "Erro ao consultar dados")
+            
+            rows = result.data.get('data', [])
+            for row in rows:
+                yield row
+            
+            if len(rows) < limit:
+                break
+            offset += len(rows)
+            if remaining is not None:
+                remaining -= len(rows)
+    
     async def _select_data(
         self,
         input_data: Dict[str, Any],
@@ -2,16 +2,37 @@
 Telegram Agent (sa-telegram)
 Agente especializado para operações com Telegram Bot API
 """
-from typing import Dict, List, Optional, Any
+import asyncio
+import heapq
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from uuid import UUID
 import json
 
+import httpx
+
 from app.agents.base_agent import BaseAgent, AgentCapability, AgentExecutionResult
+from app.core.token_bucket import get_token_bucket
 from app.domain.credentials import ProviderType
+from app.infra.media_relay import MediaDownloadError, MediaTooLargeError, get_media_relay
 
 class TelegramAgent(BaseAgent):
     """Agente para integração com Telegram Bot API"""
     
+    # Limites do Bot API: ~30 msg/s por bot, 1 msg/s por chat, 20 msg/min em grupos
+    BROADCAST_MESSAGES_PER_SECOND = 30
+    PRIVATE_CHAT_INTERVAL_SECONDS = 1.0
+    GROUP_CHAT_INTERVAL_SECONDS = 3.0
+    
+    # Envios simultâneos no broadcast (o ritmo é dado pelos limites acima)
+    BROADCAST_CONCURRENCY = 30
+    
+    # Espera antes de repetir 5xx/erros de conexão (429 usa o retry_after)
+    BROADCAST_RETRY_SECONDS = 1.0
+    
+    BROADCAST_METHODS = {'text': 'sendMessage', 'photo': 'sendPhoto', 'document': 'sendDocument'}
+    BROADCAST_MEDIA_TYPES = ('photo', 'document')
+    
     def __init__(self):
         super().__init__(
             agent_id="sa-telegram",
@@ -61,7 +82,8 @@ class TelegramAgent(BaseAgent):
                         "chat_id": {"type": "string", "description": "ID do chat"},
                         "photo": {"type": "string", "description": "URL da foto ou file_id"},
                         "caption": {"type": "string", "description": "Legenda da foto"},
-                        "parse_mode": {"type": "string", "enum": ["HTML", "Markdown", "MarkdownV2"]}
+                        "parse_mode": {"type": "string", "enum": ["HTML", "Markdown", "MarkdownV2"]},
+                        "upload": {"type": "boolean", "default": False, "description": "Baixar a URL e enviar o arquivo (em vez de o Telegram buscar a URL)"}
                     },
                     "required": ["chat_id", "photo"]
                 },
@@ -85,7 +107,8 @@ class TelegramAgent(BaseAgent):
                         "chat_id": {"type": "string", "description": "ID do chat"},
                         "document": {"type": "string", "description": "URL do documento ou file_id"},
                         "caption": {"type": "string", "description": "Legenda do documento"},
-                        "filename": {"type": "string", "description": "Nome do arquivo"}
+                        "filename": {"type": "string", "description": "Nome do arquivo"},
+                        "upload": {"type": "boolean", "default": False, "description": "Baixar a URL e enviar o arquivo (em vez de o Telegram buscar a URL)"}
                     },
                     "required": ["chat_id", "document"]
                 },
@@ -178,6 +201,85 @@ class TelegramAgent(BaseAgent):
                     }
                 },
                 required_credentials=["telegram"]
+            ),
+            
+            AgentCapability(
+                name="broadcast",
+                description="Enviar mensagens para vários chats respeitando os limites do bot e de cada chat",
+                input_schema={
+                    "type": "object",
+                    "properties": {
+                        "chat_ids": {
+                            "type": "array",
+                            "items": {
+                                "oneOf": [
+                                    {"type": "string"},
+                                    {"type": "integer"},
+                                    {
+                                        "type": "object",
+                                        "properties": {
+                                            "chat_id": {"type": ["string", "integer"]},
+                                            "variables": {"type": "object"}
+                                        },
+                                        "required": ["chat_id"]
+                                    }
+                                ]
+                            },
+                            "description": "Chats de destino (ou objetos com variáveis por chat)"
+                        },
+                        "messages": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "type": {"type": "string", "enum": ["text", "photo", "document"]},
+                                    "text": {"type": "string"},
+                                    "photo": {"type": "string"},
+                                    "document": {"type": "string"},
+                                    "caption": {"type": "string"},
+                                    "parse_mode": {"type": "string", "enum": ["HTML", "Markdown", "MarkdownV2"]}
+                                },
+                                "required": ["type"]
+                            },
+                            "description": "Mensagens enviadas a cada chat, em ordem"
+                        },
+                        "text": {"type": "string", "description": "Atalho: texto (aceita {variavel})"},
+                        "photo": {"type": "string", "description": "Atalho: URL da foto ou file_id"},
+                        "document": {"type": "string", "description": "Atalho: URL do documento ou file_id"},
+                        "caption": {"type": "string", "description": "Legenda da mídia"},
+                        "parse_mode": {"type": "string", "enum": ["HTML", "Markdown", "MarkdownV2"]},
+                        "messages_per_second": {"type": "number", "default": 30, "description": "Limite global do bot"},
+                        "per_chat_interval_seconds": {"type": "number", "description": "Intervalo entre mensagens do mesmo chat"},
+                        "max_retries": {"type": "integer", "default": 3, "description": "Tentativas extras em 429/5xx"}
+                    },
+                    "required": ["chat_ids"]
+                },
+                output_schema={
+                    "type": "object",
+                    "properties": {
+                        "results": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "index": {"type": "integer"},
+                                    "chat_id": {"type": "string"},
+                                    "success": {"type": "boolean"},
+                                    "message_ids": {"type": "array", "items": {"type": "integer"}},
+                                    "attempts": {"type": "integer"},
+                                    "error": {"type": "string"},
+                                    "completed": {"type": "integer"},
+                                    "total": {"type": "integer"}
+                                }
+                            }
+                        },
+                        "total": {"type": "integer"},
+                        "sent": {"type": "integer"},
+                        "failed": {"type": "integer"},
+                        "file_ids": {"type": "object", "description": "file_id de cada mídia enviada por URL"}
+                    }
+                },
+                required_credentials=["telegram"]
             )
         ]
     
@@ -224,6 +326,8 @@ class TelegramAgent(BaseAgent):
                 result = await self._get_updates(input_data, credentials)
             elif capability_name == "get_chat_info":
                 result = await self._get_chat_info(input_data, credentials)
+            elif capability_name == "broadcast":
+                result = await self._broadcast(input_data, credentials)
             else:
                 return AgentExecutionResult(
                     success=False,
@@ -615,7 +719,13 @@ class TelegramAgent(BaseAgent):
             if input_data.get('reply_to_message_id'):
                 payload['reply_to_message_id'] = input_data['reply_to_message_id']
             
-            response = await self.http_client.post(url, json=payload)
+            try:
+                response = await self._post_media(url, payload, 'photo', input_data)
+            except (MediaDownloadError, MediaTooLargeError) as e:
+                return AgentExecutionResult(
+                    success=False,
+                    error_message=str(e)
+                )
             
             if response.status_code == 200:
                 result_data = response.json()
@@ -675,7 +785,13 @@ class TelegramAgent(BaseAgent):
             if input_data.get('reply_to_message_id'):
                 payload['reply_to_message_id'] = input_data['reply_to_message_id']
             
-            response = await self.http_client.post(url, json=payload)
+            try:
+                response = await self._post_media(url, payload, 'document', input_data)
+            except (MediaDownloadError, MediaTooLargeError) as e:
+                return AgentExecutionResult(
+                    success=False,
+                    error_message=str(e)
+                )
             
             if response.status_code == 200:
                 result_data = response.json()
@@ -707,6 +823,33 @@ class TelegramAgent(BaseAgent):
                 error_message=f"Erro ao enviar documento: {str(e)}"
             )
     
+    async def _post_media(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        field: str,
+        input_data: Dict[str, Any]
+    ) -> httpx.Response:
+        """
+        Envia a mídia por referência (URL/file_id, o Telegram busca) ou, com
+        ``upload``, baixa a URL e envia o arquivo em streaming via multipart.
+        """
+        media = str(payload[field])
+        if not input_data.get('upload') or not media.startswith(('http://', 'https://')):
+            return await self.http_client.post(url, json=payload)
+        
+        return await get_media_relay().upload(
+            self.http_client,
+            media,
+            url,
+            field_name=field,
+            filename=input_data.get('filename'),
+            data={
+                key: json.dumps(value) if isinstance(value, bool) else value
+                for key, value in payload.items() if key != field
+            }
+        )
+    
     async def _send_inline_keyboard(
         self,
         input_data: Dict[str, Any],
@@ -919,6 +1062,290 @@ class TelegramAgent(BaseAgent):
                 error_message=f"Erro ao configurar webhook: {str(e)}"
             )
     
+    async def stream_capability(
+        self,
+        capability_name: str,
+        input_data: Dict[str, Any],
+        user_id: UUID,
+        credential_id: Optional[UUID] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """broadcast: emite o resultado de cada chat (com o progresso) assim que concluído"""
+        if capability_name != 'broadcast':
+            async for record in super().stream_capability(capability_name, input_data, user_id, credential_id):
+                yield record
+            return
+        
+        is_valid, error_msg = await self.validate_input(capability_name, input_data)
+        if not is_valid:
+            raise ValueError(error_msg)
+        
+        credentials = await self.get_user_credential(
+            user_id, ProviderType.TELEGRAM, credential_id
+        )
+        if not credentials:
+            raise Exception("Credenciais do Telegram não encontradas")
+        
+        async for result in self._iter_broadcast(input_data, credentials, {}):
+            yield result
+    
+    async def _broadcast(
+        self,
+        input_data: Dict[str, Any],
+        credentials: Dict[str, Any]
+    ) -> AgentExecutionResult:
+        """Enviar para vários chats e agregar os resultados"""
+        try:
+            file_ids: Dict[str, str] = {}
+            results = [result async for result in self._iter_broadcast(input_data, credentials, file_ids)]
+            results.sort(key=lambda result: result['index'])
+            sent = sum(1 for result in results if result['success'])
+            
+            return AgentExecutionResult(
+                success=True,
+                data={
+                    'results': results,
+                    'total': len(results),
+                    'sent': sent,
+                    'failed': len(results) - sent,
+                    'file_ids': file_ids
+                }
+            )
+            
+        except Exception as e:
+            return AgentExecutionResult(
+                success=False,
+                error_message=f"Erro no broadcast: {str(e)}"
+            )
+    
+    async def _iter_broadcast(
+        self,
+        input_data: Dict[str, Any],
+        credentials: Dict[str, Any],
+        file_ids: Dict[str, str]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Agenda o broadcast e emite o resultado de cada chat quando ele termina.
+        
+        Cada chat entra num heap pelo instante em que pode receber a próxima
+        mensagem (intervalo por chat, ou o ``retry_after`` exato de um 429); o
+        despacho também consome uma ficha do token bucket global do bot. Mídia
+        enviada por URL sobe uma única vez: o primeiro envio guarda o
+        ``file_id`` em ``file_ids`` e os demais chats o reutilizam.
+        """
+        bot_token = credentials.get('bot_token')
+        if not bot_token:
+            raise ValueError("Bot token não encontrado")
+        
+        messages = self._broadcast_messages(input_data)
+        if not messages:
+            raise ValueError("Informe 'messages' ou 'text', 'photo' ou 'document'")
+        
+        chats = [chat if isinstance(chat, dict) else {'chat_id': chat} for chat in input_data['chat_ids']]
+        total = len(chats)
+        max_retries = input_data.get('max_retries', 3)
+        chat_interval = input_data.get('per_chat_interval_seconds')
+        bot_bucket = get_token_bucket(
+            f"telegram:{bot_token.split(':')[0]}",
+            input_data.get('messages_per_second') or self.BROADCAST_MESSAGES_PER_SECOND
+        )
+        upload_locks = {value: asyncio.Lock() for value in self._broadcast_media_urls(messages)}
+        
+        loop = asyncio.get_running_loop()
+        heap: List[Tuple[float, int, int]] = [(0.0, index, index) for index in range(total)]
+        states = [{'next': 0, 'retries': 0, 'attempts': 0, 'message_ids': []} for _ in chats]
+        tasks: Dict[asyncio.Task, int] = {}
+        completed = 0
+        
+        try:
+            while heap or tasks:
+                # Despachar chats prontos enquanto houver vaga e ficha global
+                timeout = None
+                while heap and len(tasks) < self.BROADCAST_CONCURRENCY:
+                    now = loop.time()
+                    if heap[0][0] > now:
+                        timeout = heap[0][0] - now
+                        break
+                    wait = bot_bucket.try_acquire()
+                    if wait > 0:
+                        timeout = wait
+                        break
+                    _, _, index = heapq.heappop(heap)
+                    spec = messages[states[index]['next']]
+                    task = asyncio.create_task(
+                        self._broadcast_send(bot_token, chats[index], spec, upload_locks, file_ids)
+                    )
+                    tasks[task] = index
+                
+                if not tasks:
+                    await asyncio.sleep(timeout)
+                    continue
+                
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = tasks.pop(task)
+                    state = states[index]
+                    state['attempts'] += 1
+                    outcome, value = task.result()
+                    
+                    if outcome == 'sent':
+                        state['message_ids'].append(value)
+                        state['next'] += 1
+                        state['retries'] = 0
+                        if state['next'] < len(messages):
+                            interval = chat_interval if chat_interval is not None else self._chat_interval(chats[index]['chat_id'])
+                            heapq.heappush(heap, (loop.time() + interval, index, index))
+                            continue
+                        error = None
+                    elif outcome == 'retry' and state['retries'] < max_retries:
+                        retry_after, error, flood = value
+                        state['retries'] += 1
+                        if flood and state['next'] == 0:
+                            # 429 já no primeiro envio ao chat: limite do bot, não do chat
+                            bot_bucket.pause(retry_after)
+                        heapq.heappush(heap, (loop.time() + retry_after, index, index))
+                        continue
+                    else:
+                        error = value[1] if outcome == 'retry' else value
+                    
+                    completed += 1
+                    result = {
+                        'index': index,
+                        'chat_id': chats[index]['chat_id'],
+                        'success': error is None,
+                        'message_ids': state['message_ids'],
+                        'attempts': state['attempts'],
+                        'completed': completed,
+                        'total': total
+                    }
+                    if error is not None:
+                        result['error'] = error
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def _broadcast_messages(self, input_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Mensagens enviadas a cada chat, em ordem (lista explícita ou atalhos text/photo/document)"""
+        if input_data.get('messages'):
+            return input_data['messages']
+        
+        messages = []
+        for message_type in ('text', 'photo', 'document'):
+            if input_data.get(message_type):
+                message = {'type': message_type, message_type: input_data[message_type]}
+                if message_type != 'text' and input_data.get('caption'):
+                    message['caption'] = input_data['caption']
+                messages.append(message)
+        for message in messages:
+            if input_data.get('parse_mode'):
+                message.setdefault('parse_mode', input_data['parse_mode'])
+        return messages
+    
+    def _broadcast_media_urls(self, messages: List[Dict[str, Any]]) -> List[str]:
+        """Mídias informadas por URL (as que ainda precisam subir uma vez)"""
+        return [
+            message[message['type']] for message in messages
+            if message.get('type') in self.BROADCAST_MEDIA_TYPES
+            and str(message.get(message['type'], '')).startswith(('http://', 'https://'))
+        ]
+    
+    def _chat_interval(self, chat_id: Any) -> float:
+        """Grupos e canais (id negativo ou @username) têm limite por minuto mais baixo"""
+        chat = str(chat_id)
+        if chat.startswith('-') or chat.startswith('@'):
+            return self.GROUP_CHAT_INTERVAL_SECONDS
+        return self.PRIVATE_CHAT_INTERVAL_SECONDS
+    
+    async def _broadcast_send(
+        self,
+        bot_token: str,
+        chat: Dict[str, Any],
+        spec: Dict[str, Any],
+        upload_locks: Dict[str, asyncio.Lock],
+        file_ids: Dict[str, str]
+    ) -> Tuple[str, Any]:
+        """
+        Uma mensagem para um chat. Devolve ('sent', message_id), ('retry',
+        (espera, erro, 429?)) ou ('failed', erro).
+        """
+        message_type = spec.get('type', 'text')
+        media = spec.get(message_type) if message_type in self.BROADCAST_MEDIA_TYPES else None
+        lock = upload_locks.get(media)
+        if lock is None or media in file_ids:
+            return await self._broadcast_post(bot_token, chat, spec, file_ids.get(media, media), None)
+        
+        # Primeiro envio da mídia por URL: os demais aguardam o file_id
+        async with lock:
+            if media in file_ids:
+                return await self._broadcast_post(bot_token, chat, spec, file_ids[media], None)
+            return await self._broadcast_post(bot_token, chat, spec, media, file_ids)
+    
+    async def _broadcast_post(
+        self,
+        bot_token: str,
+        chat: Dict[str, Any],
+        spec: Dict[str, Any],
+        media: Optional[str],
+        file_ids: Optional[Dict[str, str]]
+    ) -> Tuple[str, Any]:
+        message_type = spec.get('type', 'text')
+        variables = chat.get('variables') or {}
+        payload: Dict[str, Any] = {'chat_id': chat['chat_id']}
+        try:
+            if message_type == 'text':
+                payload['text'] = spec['text'].format_map(variables) if variables else spec['text']
+            else:
+                payload[message_type] = media
+                if spec.get('caption'):
+                    payload['caption'] = spec['caption'].format_map(variables) if variables else spec['caption']
+            for option in ('parse_mode', 'disable_notification', 'disable_web_page_preview'):
+                if spec.get(option):
+                    payload[option] = spec[option]
+        except (KeyError, ValueError) as e:
+            return 'failed', f"Mensagem inválida: {str(e)}"
+        
+        method = self.BROADCAST_METHODS.get(message_type)
+        if method is None:
+            return 'failed', f"Tipo de mensagem não suportado: {message_type}"
+        
+        try:
+            response = await self.http_client.post(
+                f"https://api.telegram.org/bot{bot_token}/{method}", json=payload
+            )
+        except httpx.TransportError as e:
+            return 'retry', (self.BROADCAST_RETRY_SECONDS, f"Erro de conexão: {str(e)}", False)
+        
+        try:
+            result_data = response.json()
+        except ValueError:
+            result_data = {}
+        
+        if response.status_code == 200 and result_data.get('ok'):
+            message = result_data.get('result', {})
+            if file_ids is not None:
+                file_id = self._uploaded_file_id(message, message_type)
+                if file_id:
+                    file_ids[spec[message_type]] = file_id
+            return 'sent', message.get('message_id')
+        
+        error = result_data.get('description') or f"Erro da Telegram API: {response.status_code}"
+        if response.status_code == 429:
+            retry_after = (result_data.get('parameters') or {}).get('retry_after', self.BROADCAST_RETRY_SECONDS)
+            return 'retry', (float(retry_after), error, True)
+        if response.status_code >= 500:
+            return 'retry', (self.BROADCAST_RETRY_SECONDS, error, False)
+        return 'failed', error
+    
+    def _uploaded_file_id(self, message: Dict[str, Any], message_type: str) -> Optional[str]:
+        """file_id da mídia recém enviada (foto: maior resolução)"""
+        media = message.get(message_type)
+        if isinstance(media, list):
+            return media[-1].get('file_id') if media else None
+        if isinstance(media, dict):
+            return media.get('file_id')
+        return None
+    
     def _get_supported_providers(self) -> List[str]:
         """Provedores suportados"""
         return ['telegram']
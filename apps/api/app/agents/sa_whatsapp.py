@@ -2,16 +2,46 @@
 WhatsApp Agent (sa-whatsapp)
 Agente especializado para operações com WhatsApp Business API
 """
-from typing import Dict, List, Optional, Any
+import asyncio
+import random
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from uuid import UUID
 import json
 
+import httpx
+import structlog
+
 from app.agents.base_agent import BaseAgent, AgentCapability, AgentExecutionResult
+from app.core.deadline import deadline_allows
+from app.core.token_bucket import TokenBucket, find_token_bucket, get_token_bucket
 from app.domain.credentials import ProviderType
+from app.infra.media_relay import MediaDownloadError, MediaTooLargeError, get_media_relay
+
+logger = structlog.get_logger(__name__)
 
 class WhatsAppAgent(BaseAgent):
     """Agente para integração com WhatsApp Business API"""
     
+    GRAPH_API_URL = 'https://graph.facebook.com/v18.0'
+    
+    # Mensagens/s por número conforme o nível de throughput da conta (Cloud API)
+    THROUGHPUT_RATES = {'STANDARD': 80, 'HIGH': 1000}
+    DEFAULT_MESSAGES_PER_SECOND = 80
+    
+    # Destinatários únicos por 24h de cada tier de mensagens
+    MESSAGING_TIER_LIMITS = {'TIER_50': 50, 'TIER_250': 250, 'TIER_1K': 1000, 'TIER_10K': 10000, 'TIER_100K': 100000}
+    
+    # Envios simultâneos em send_bulk (o ritmo é dado pelo token bucket)
+    BULK_CONCURRENCY = 20
+    
+    # Backoff exponencial (com jitter) para 429/5xx
+    RETRY_BACKOFF_SECONDS = 1.0
+    MAX_RETRY_BACKOFF_SECONDS = 30.0
+    
+    # Códigos de erro da Graph API que indicam limite de taxa (vêm com HTTP 400)
+    RATE_LIMIT_ERROR_CODES = {4, 80007, 130429, 131056}
+    
     def __init__(self):
         super().__init__(
             agent_id="sa-whatsapp",
@@ -74,6 +104,69 @@ class WhatsAppAgent(BaseAgent):
                 required_credentials=["whatsapp_business"]
             ),
             
+            AgentCapability(
+                name="send_bulk",
+                description="Enviar template ou texto para vários destinatários, no ritmo permitido pela conta",
+                input_schema={
+                    "type": "object",
+                    "properties": {
+                        "recipients": {
+                            "type": "array",
+                            "items": {
+                                "oneOf": [
+                                    {"type": "string"},
+                                    {
+                                        "type": "object",
+                                        "properties": {
+                                            "to": {"type": "string"},
+                                            "parameters": {"type": "array", "items": {"type": "string"}},
+                                            "variables": {"type": "object"}
+                                        },
+                                        "required": ["to"]
+                                    }
+                                ]
+                            },
+                            "description": "Números (ou objetos com parâmetros/variáveis por destinatário)"
+                        },
+                        "template_name": {"type": "string", "description": "Nome do template"},
+                        "language_code": {"type": "string", "default": "pt_BR", "description": "Código do idioma"},
+                        "parameters": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Parâmetros do template comuns a todos"
+                        },
+                        "message": {"type": "string", "description": "Texto (sem template); aceita {variavel}"},
+                        "messages_per_second": {"type": "number", "description": "Ritmo; padrão conforme o throughput da conta"},
+                        "max_retries": {"type": "integer", "default": 3, "description": "Tentativas extras em 429/5xx"}
+                    },
+                    "required": ["recipients"]
+                },
+                output_schema={
+                    "type": "object",
+                    "properties": {
+                        "results": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "index": {"type": "integer"},
+                                    "recipient": {"type": "string"},
+                                    "success": {"type": "boolean"},
+                                    "message_id": {"type": "string"},
+                                    "attempts": {"type": "integer"},
+                                    "error": {"type": "string"}
+                                }
+                            }
+                        },
+                        "total": {"type": "integer"},
+                        "sent": {"type": "integer"},
+                        "failed": {"type": "integer"},
+                        "messages_per_second": {"type": "number"}
+                    }
+                },
+                required_credentials=["whatsapp_business"]
+            ),
+            
             AgentCapability(
                 name="send_media_message",
                 description="Enviar mensagem com mídia (imagem, documento, etc.)",
@@ -235,6 +328,8 @@ class WhatsAppAgent(BaseAgent):
                 result = await self._send_text_message(input_data, credentials)
             elif capability_name == "send_template_message":
                 result = await self._send_template_message(input_data, credentials)
+            elif capability_name == "send_bulk":
+                result = await self._send_bulk(input_data, credentials)
             elif capability_name == "send_media_message":
                 result = await self._send_media_message(input_data, credentials)
             elif capability_name == "send_interactive_message":
@@ -346,29 +441,12 @@ class WhatsAppAgent(BaseAgent):
                 'Content-Type': 'application/json'
             }
             
-            template_data = {
-                'name': input_data['template_name'],
-                'language': {
-                    'code': input_data.get('language_code', 'pt_BR')
-                }
-            }
-            
-            # Adicionar parâmetros se fornecidos
-            if input_data.get('parameters'):
-                template_data['components'] = [{
-                    'type': 'body',
-                    'parameters': [
-                        {'type': 'text', 'text': param} 
-                        for param in input_data['parameters']
-                    ]
-                }]
-            
-            payload = {
-                'messaging_product': 'whatsapp',
-                'to': input_data['to'],
-                'type': 'template',
-                'template': template_data
-            }
+            payload = self._build_template_payload(
+                input_data['to'],
+                input_data['template_name'],
+                input_data.get('language_code', 'pt_BR'),
+                input_data.get('parameters')
+            )
             
             response = await self.http_client.post(url, headers=headers, json=payload)
             
@@ -396,6 +474,277 @@ class WhatsAppAgent(BaseAgent):
                 error_message=f"Erro ao enviar template: {str(e)}"
             )
     
+    def _build_template_payload(
+        self,
+        to: str,
+        template_name: str,
+        language_code: str = 'pt_BR',
+        parameters: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Payload de mensagem de template"""
+        template_data = {
+            'name': template_name,
+            'language': {
+                'code': language_code
+            }
+        }
+        
+        # Adicionar parâmetros se fornecidos
+        if parameters:
+            template_data['components'] = [{
+                'type': 'body',
+                'parameters': [
+                    {'type': 'text', 'text': param} 
+                    for param in parameters
+                ]
+            }]
+        
+        return {
+            'messaging_product': 'whatsapp',
+            'to': to,
+            'type': 'template',
+            'template': template_data
+        }
+    
+    async def stream_capability(
+        self,
+        capability_name: str,
+        input_data: Dict[str, Any],
+        user_id: UUID,
+        credential_id: Optional[UUID] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """send_bulk: emite o resultado de cada destinatário assim que concluído"""
+        if capability_name != 'send_bulk':
+            async for record in super().stream_capability(capability_name, input_data, user_id, credential_id):
+                yield record
+            return
+        
+        is_valid, error_msg = await self.validate_input(capability_name, input_data)
+        if not is_valid:
+            raise ValueError(error_msg)
+        
+        credentials = await self.get_user_credential(
+            user_id, ProviderType.WHATSAPP_BUSINESS, credential_id
+        )
+        if not credentials:
+            raise Exception("Credenciais do WhatsApp Business não encontradas")
+        
+        url, headers, bucket = await self._prepare_bulk_send(input_data, credentials)
+        async for result in self._iter_bulk_send(input_data, url, headers, bucket):
+            yield result
+    
+    async def _send_bulk(
+        self,
+        input_data: Dict[str, Any],
+        credentials: Dict[str, Any]
+    ) -> AgentExecutionResult:
+        """Enviar para vários destinatários e agregar os resultados"""
+        try:
+            url, headers, bucket = await self._prepare_bulk_send(input_data, credentials)
+            results = [result async for result in self._iter_bulk_send(input_data, url, headers, bucket)]
+            results.sort(key=lambda result: result['index'])
+            sent = sum(1 for result in results if result['success'])
+            
+            return AgentExecutionResult(
+                success=True,
+                data={
+                    'results': results,
+                    'total': len(results),
+                    'sent': sent,
+                    'failed': len(results) - sent,
+                    'messages_per_second': bucket.rate
+                }
+            )
+            
+        except Exception as e:
+            return AgentExecutionResult(
+                success=False,
+                error_message=f"Erro no envio em massa: {str(e)}"
+            )
+    
+    async def _prepare_bulk_send(
+        self,
+        input_data: Dict[str, Any],
+        credentials: Dict[str, Any]
+    ) -> Tuple[str, Dict[str, str], TokenBucket]:
+        """URL, headers e token bucket do número para um send_bulk"""
+        access_token = credentials.get('access_token')
+        phone_number_id = credentials.get('phone_number_id')
+        if not access_token or not phone_number_id:
+            raise ValueError("Access token ou phone_number_id não encontrados")
+        if not input_data.get('template_name') and not input_data.get('message'):
+            raise ValueError("Informe 'template_name' ou 'message'")
+        
+        url = f"{self.GRAPH_API_URL}/{phone_number_id}/messages"
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/json'
+        }
+        bucket = await self._get_send_bucket(
+            phone_number_id, headers, input_data, credentials, len(input_data['recipients'])
+        )
+        return url, headers, bucket
+    
+    async def _iter_bulk_send(
+        self,
+        input_data: Dict[str, Any],
+        url: str,
+        headers: Dict[str, str],
+        bucket: TokenBucket
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Envia para cada destinatário e emite os resultados na ordem em que
+        terminam. Até BULK_CONCURRENCY envios em andamento; o ritmo é dado pelo
+        token bucket do ``phone_number_id``, compartilhado pelo processo.
+        """
+        recipients = input_data['recipients']
+        max_retries = input_data.get('max_retries', 3)
+        
+        pending = iter(enumerate(recipients))
+        results: asyncio.Queue = asyncio.Queue()
+        
+        async def worker():
+            for index, recipient in pending:
+                to = recipient if isinstance(recipient, str) else recipient.get('to')
+                try:
+                    payload = self._build_bulk_payload(input_data, recipient)
+                    result = await self._post_with_retry(url, headers, payload, bucket, max_retries)
+                except Exception as e:
+                    result = {'success': False, 'attempts': 0, 'error': str(e)}
+                result.update({'index': index, 'recipient': to})
+                await results.put(result)
+        
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(self.BULK_CONCURRENCY, len(recipients)))
+        ]
+        try:
+            for _ in range(len(recipients)):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    
+    def _build_bulk_payload(self, input_data: Dict[str, Any], recipient: Any) -> Dict[str, Any]:
+        """Payload de um destinatário: template (parâmetros próprios ou comuns) ou texto com variáveis"""
+        if isinstance(recipient, str):
+            recipient = {'to': recipient}
+        
+        if input_data.get('template_name'):
+            return self._build_template_payload(
+                recipient['to'],
+                input_data['template_name'],
+                input_data.get('language_code', 'pt_BR'),
+                recipient.get('parameters', input_data.get('parameters'))
+            )
+        
+        message = input_data['message']
+        if recipient.get('variables'):
+            message = message.format_map(recipient['variables'])
+        return {
+            'messaging_product': 'whatsapp',
+            'to': recipient['to'],
+            'type': 'text',
+            'text': {
+                'body': message
+            }
+        }
+    
+    async def _post_with_retry(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+        bucket: TokenBucket,
+        max_retries: int
+    ) -> Dict[str, Any]:
+        """POST no ritmo do bucket, repetindo 429/5xx com backoff (ou Retry-After)"""
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            retry_after = None
+            try:
+                response = await self.http_client.post(url, headers=headers, json=payload)
+                if response.status_code == 200:
+                    message_id = response.json().get('messages', [{}])[0].get('id')
+                    return {'success': True, 'message_id': message_id, 'attempts': attempt + 1}
+                
+                error = f"Erro da WhatsApp API: {response.status_code} - {response.text}"
+                retryable = (
+                    response.status_code == 429
+                    or response.status_code >= 500
+                    or self._graph_error_code(response) in self.RATE_LIMIT_ERROR_CODES
+                )
+                if response.headers.get('Retry-After', '').isdigit():
+                    retry_after = float(response.headers['Retry-After'])
+            except httpx.TransportError as e:
+                error = f"Erro de conexão: {str(e)}"
+                retryable = True
+            
+            if not retryable or attempt >= max_retries:
+                return {'success': False, 'attempts': attempt + 1, 'error': error}
+            
+            backoff = retry_after if retry_after is not None else min(
+                self.RETRY_BACKOFF_SECONDS * (2 ** attempt), self.MAX_RETRY_BACKOFF_SECONDS
+            ) * random.uniform(0.5, 1.0)
+            if not deadline_allows(backoff):
+                return {'success': False, 'attempts': attempt + 1, 'error': error}
+            
+            if retry_after is not None:
+                # Limite da conta: segura todos os envios do número, não só este
+                bucket.pause(retry_after)
+            await asyncio.sleep(backoff)
+            attempt += 1
+    
+    def _graph_error_code(self, response: httpx.Response) -> Optional[int]:
+        try:
+            return response.json().get('error', {}).get('code')
+        except ValueError:
+            return None
+    
+    async def _get_send_bucket(
+        self,
+        phone_number_id: str,
+        headers: Dict[str, str],
+        input_data: Dict[str, Any],
+        credentials: Dict[str, Any],
+        recipient_count: int
+    ) -> TokenBucket:
+        """Token bucket do número: taxa informada, da credencial ou do throughput consultado na Graph API"""
+        key = f"whatsapp:{phone_number_id}"
+        rate = input_data.get('messages_per_second') or credentials.get('messages_per_second')
+        if rate:
+            return get_token_bucket(key, rate)
+        
+        bucket = find_token_bucket(key)
+        if bucket is not None:
+            return bucket
+        
+        rate = self.DEFAULT_MESSAGES_PER_SECOND
+        try:
+            response = await self.http_client.get(
+                f"{self.GRAPH_API_URL}/{phone_number_id}",
+                headers=headers,
+                params={'fields': 'throughput,messaging_limit_tier'}
+            )
+            if response.status_code == 200:
+                account = response.json()
+                level = (account.get('throughput') or {}).get('level')
+                rate = self.THROUGHPUT_RATES.get(level, rate)
+                tier_limit = self.MESSAGING_TIER_LIMITS.get(account.get('messaging_limit_tier'))
+                if tier_limit is not None and recipient_count > tier_limit:
+                    logger.warning(
+                        "Bulk send exceeds the messaging tier",
+                        phone_number_id=phone_number_id,
+                        recipients=recipient_count,
+                        tier_limit=tier_limit
+                    )
+        except httpx.HTTPError as e:
+            logger.warning("WhatsApp throughput lookup failed", phone_number_id=phone_number_id, error=str(e))
+        
+        return get_token_bucket(key, rate)
+    
     async def _send_media_message(
         self,
         input_data: Dict[str, Any],
@@ -625,23 +974,24 @@ class WhatsAppAgent(BaseAgent):
                 'Authorization': f'Bearer {access_token}'
             }
             
-            # Fazer download da mídia primeiro
-            media_response = await self.http_client.get(input_data['media_url'])
-            
-            if media_response.status_code != 200:
+            # Download da mídia direto para o upload, sem carregar o arquivo em memória
+            try:
+                response = await get_media_relay().upload(
+                    self.http_client,
+                    input_data['media_url'],
+                    url,
+                    field_name='file',
+                    filename='media',
+                    content_type=input_data['media_type'],
+                    data={'messaging_product': 'whatsapp'},
+                    headers=headers
+                )
+            except (MediaDownloadError, MediaTooLargeError) as e:
                 return AgentExecutionResult(
                     success=False,
-                    error_message=f"Erro ao baixar mídia: {media_response.status_code}"
+                    error_message=str(e)
                 )
             
-            # Fazer upload para WhatsApp
-            files = {
-                'file': ('media', media_response.content, input_data['media_type']),
-                'messaging_product': (None, 'whatsapp')
-            }
-            
-            response = await self.http_client.post(url, headers=headers, files=files)
-            
             if response.status_code == 200:
                 result_data = response.json()
                 
@@ -7,6 +7,11 @@ from datetime import datetime
 from typing import Dict, Any
 
 from app.infra.suna.client import get_suna_client, SunaClient
+from app.infra.database import get_query_executor
+from app.infra.http_transport import get_http_transport
+from app.services.concurrency_governor import get_concurrency_governor
+from app.services.execution_scheduler import get_execution_scheduler
+from app.services.step_result_cache import get_step_result_cache
 
 router = APIRouter()
 
@@ -54,8 +59,37 @@ async def services_health_check(
             "error": str(e)
         }
     
+    # Métricas da camada de acesso ao Supabase
+    db_metrics = get_query_executor().get_metrics()
+    health_status["services"]["database"] = {
+        "status": "healthy",
+        **db_metrics
+    }
+    
+    # Ocupação e fila dos limites por agente/provedor
+    health_status["services"]["agent_concurrency"] = {
+        "status": "healthy",
+        **get_concurrency_governor().get_metrics()
+    }
+    
+    # Admissão de execuções: ocupação e espera na fila por classe de prioridade
+    health_status["services"]["execution_admission"] = {
+        "status": "healthy",
+        **get_execution_scheduler().get_metrics()
+    }
+    
+    # Pool HTTP de saída: latência, erros e espera por vaga por host
+    health_status["services"]["http_transport"] = {
+        "status": "healthy",
+        **get_http_transport().get_metrics()
+    }
+    
+    health_status["services"]["step_result_cache"] = {
+        "status": "healthy",
+        **get_step_result_cache().get_metrics()
+    }
+    
     # TODO: Adicionar verificações para outros serviços
-    # - Supabase
     # - Redis (se usado)
     # - WebSocket manager
     
@@ -14,9 +14,13 @@ from app.schemas.orchestrator import (
     ChatMessageSchema,
     OrchestratorResponseSchema,
     ExecutionPlanSchema,
-    ExecutionMetricsSchema
+    ExecutionMetricsSchema,
+    CreateWorkflowScheduleSchema,
+    WorkflowScheduleSchema
 )
+from app.domain.schedule import WorkflowSchedule
 from app.services.orchestrator_service import OrchestratorService
+from app.services.workflow_scheduler import WorkflowScheduler, get_workflow_scheduler
 from app.repositories.orchestrator_repository import OrchestratorRepository
 
 router = APIRouter(prefix="/orchestrator", tags=["Orchestrator"])
@@ -208,6 +212,87 @@ async def execute_workflow(
             detail=f"Erro ao executar workflow: {str(e)}"
         )
 
+@router.post("/workflows/{workflow_id}/schedules", response_model=WorkflowScheduleSchema, status_code=status.HTTP_201_CREATED)
+async def create_workflow_schedule(
+    workflow_id: UUID,
+    schedule_data: CreateWorkflowScheduleSchema,
+    orchestrator_service: OrchestratorService = Depends(get_orchestrator_service),
+    scheduler: WorkflowScheduler = Depends(get_workflow_scheduler)
+):
+    """Schedule workflow by cron expression or fixed interval"""
+    try:
+        mock_user_id = UUID("00000000-0000-0000-0000-000000000000")
+        
+        workflow = await orchestrator_service.get_workflow_by_id(workflow_id)
+        if not workflow:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Workflow {workflow_id} não encontrado"
+            )
+        
+        schedule = await scheduler.create_schedule(WorkflowSchedule(
+            workflow_id=workflow_id,
+            user_id=mock_user_id,
+            cron_expression=schedule_data.cron_expression,
+            interval_seconds=schedule_data.interval_seconds,
+            input_data=schedule_data.input_data,
+            jitter_seconds=schedule_data.jitter_seconds,
+            enabled=schedule_data.enabled
+        ))
+        
+        return WorkflowScheduleSchema(**schedule.to_dict())
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao agendar workflow: {str(e)}"
+        )
+
+@router.get("/workflows/{workflow_id}/schedules", response_model=List[WorkflowScheduleSchema])
+async def list_workflow_schedules(
+    workflow_id: UUID,
+    scheduler: WorkflowScheduler = Depends(get_workflow_scheduler)
+):
+    """List schedules of a workflow"""
+    try:
+        schedules = await scheduler.repository.find_schedules_by_workflow(workflow_id)
+        return [WorkflowScheduleSchema(**schedule.to_dict()) for schedule in schedules]
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao listar agendamentos: {str(e)}"
+        )
+
+@router.delete("/schedules/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_workflow_schedule(
+    schedule_id: UUID,
+    scheduler: WorkflowScheduler = Depends(get_workflow_scheduler)
+):
+    """Delete workflow schedule"""
+    try:
+        deleted = await scheduler.delete_schedule(schedule_id)
+        if not deleted:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Agendamento {schedule_id} não encontrado"
+            )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao remover agendamento: {str(e)}"
+        )
+
 @router.get("/runs/{run_id}", response_model=WorkflowRunSchema)
 async def get_workflow_run(
     run_id: UUID,
@@ -3,7 +3,7 @@ Configurações centrais da aplicação.
 """
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 
@@ -67,6 +67,77 @@ class Settings(BaseSettings):
     SANDBOX_BASE_IMAGE: str = "python:3.11-slim"
     SANDBOX_NETWORK_NAME: str = "renum-sandbox"
     
+    # Database Access Configuration
+    DB_EXECUTOR_THREADS: int = 20
+    DB_MAX_IN_FLIGHT_QUERIES: int = 20
+    DB_QUERY_TIMEOUT_SECONDS: float = 10.0
+    
+    # Execution Persistence Configuration
+    EXECUTION_PERSISTENCE_MODE: str = "delta"  # delta | full
+    EXECUTION_FLUSH_INTERVAL_SECONDS: float = 2.0
+    EXECUTION_CHECKPOINT_STEPS: bool = True  # flush imediato ao concluir cada passo
+    
+    # Blob Storage Configuration (payloads grandes fora das linhas de execução)
+    # O diretório precisa ser compartilhado por API e workers (volume comum):
+    # um payload externalizado por um processo é resolvido por outro.
+    BLOB_STORE_PATH: str = "./data/blobs"
+    PAYLOAD_INLINE_THRESHOLD_BYTES: int = 16384
+    BLOB_REF_SIGNING_KEY: str = ""  # vazio: usa JWT_SECRET_KEY
+    
+    # Execution Queue Configuration
+    EXECUTION_QUEUE_ENABLED: bool = False
+    EXECUTION_QUEUE_VISIBILITY_TIMEOUT_SECONDS: int = 60
+    EXECUTION_QUEUE_MAX_ATTEMPTS: int = 3
+    EXECUTION_QUEUE_RETRY_BACKOFF_SECONDS: float = 5.0  # espera antes de reivindicar de novo uma execução devolvida (nack), dobrando a cada tentativa
+    EXECUTION_QUEUE_MAX_RETRY_BACKOFF_SECONDS: float = 300.0
+    EXECUTION_WORKER_CONCURRENCY: int = 4
+    EXECUTION_WORKER_HEARTBEAT_SECONDS: float = 15.0
+    
+    # Execution Admission Configuration (fila justa por classe de prioridade e tenant)
+    EXECUTION_MAX_CONCURRENT: int = 10
+    EXECUTION_PRIORITY_WEIGHTS: Dict[str, int] = {"interactive": 8, "standard": 3, "bulk": 1}
+    EXECUTION_PRIORITY_MAX_SHARE: Dict[str, float] = {"bulk": 0.7}  # vagas livres para interativos sob carga bulk
+    
+    # Workflow Scheduler Configuration (gatilhos cron/intervalo de workflows)
+    WORKFLOW_SCHEDULER_ENABLED: bool = False
+    WORKFLOW_SCHEDULER_MAX_CONCURRENT_DISPATCHES: int = 8
+    WORKFLOW_SCHEDULER_CATCHUP_SPREAD_SECONDS: float = 300.0
+    WORKFLOW_SCHEDULER_DEFAULT_JITTER_SECONDS: float = 5.0
+    WORKFLOW_SCHEDULER_RELOAD_SECONDS: float = 60.0  # busca agendamentos criados/alterados por outras instâncias
+    
+    # Latency Estimator Configuration (duração de planos pelo histórico p50/p95)
+    LATENCY_ESTIMATOR_CACHE_TTL_SECONDS: float = 300.0
+    LATENCY_ESTIMATOR_WINDOW_HOURS: int = 168
+    LATENCY_ESTIMATOR_MIN_SAMPLES: int = 5
+    LATENCY_ESTIMATOR_SAMPLE_SIZE: int = 500
+    
+    # Outbound HTTP Transport Configuration (pool compartilhado por agentes e conectores)
+    HTTP_MAX_CONNECTIONS: int = 200
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20
+    HTTP2_ENABLED: bool = False  # requer o pacote 'h2'
+    HTTP_DRAIN_TIMEOUT_SECONDS: float = 10.0
+    
+    # Media Relay Configuration (download -> upload de mídia em streaming)
+    MEDIA_RELAY_CHUNK_SIZE_BYTES: int = 64 * 1024
+    MEDIA_RELAY_BUFFER_CHUNKS: int = 4
+    MEDIA_RELAY_SPOOL_THRESHOLD_BYTES: int = 8 * 1024 * 1024
+    MEDIA_RELAY_MAX_BYTES: int = 100 * 1024 * 1024
+    
+    # Agent/Provider Concurrency Configuration
+    EXECUTION_DEFAULT_AGENT_CONCURRENCY: int = 5
+    EXECUTION_DEFAULT_PROVIDER_CONCURRENCY: int = 10
+    EXECUTION_PROVIDER_CONCURRENCY: Dict[str, int] = {}
+    
+    # Step Result Cache Configuration
+    STEP_RESULT_CACHE_MAX_ENTRIES: int = 1000
+    STEP_RESULT_CACHE_DEFAULT_TTL_SECONDS: int = 300
+    
+    # Streaming Pipeline Configuration
+    STREAM_PIPELINE_BUFFER_SIZE: int = 100
+    STREAM_PIPELINE_SAMPLE_SIZE: int = 10
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,101 @@
+"""
+Deadline
+Prazo de uma execução propagado (via contextvars) até as chamadas HTTP dos agentes
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+import httpx
+
+
+class DeadlineExceededError(asyncio.TimeoutError):
+    """O prazo da execução terminou antes (ou durante) a operação"""
+
+
+class Deadline:
+    """
+    Instante limite (relógio monotônico) de uma execução.
+
+    Cada chamada usa ``timeout(padrão)``: o menor entre o timeout próprio e o
+    tempo restante. ``extend`` adia o prazo (ex.: tempo em pausa não conta).
+    """
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> 'Deadline':
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def extend(self, seconds: float):
+        self.expires_at += seconds
+
+    def timeout(self, default: Optional[float] = None) -> float:
+        """Timeout efetivo de uma chamada; levanta ``DeadlineExceededError`` se já expirou"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededError("Prazo da execução excedido")
+        return remaining if default is None else min(default, remaining)
+
+    def allows(self, seconds: float) -> bool:
+        """Se ainda há tempo para esperar ``seconds`` (ex.: backoff) e tentar de novo"""
+        return self.remaining() > seconds
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar('execution_deadline', default=None)
+
+
+def get_deadline() -> Optional[Deadline]:
+    """Prazo do contexto atual (herdado pelas tasks criadas dentro dele)"""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Definir o prazo do contexto; um prazo externo mais curto continua valendo"""
+    outer = _current_deadline.get()
+    if deadline is None or (outer is not None and outer.expires_at <= deadline.expires_at):
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def effective_timeout(default: Optional[float] = None) -> Optional[float]:
+    """``default`` limitado pelo prazo atual (sem prazo, retorna ``default``)"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    return deadline.timeout(default)
+
+
+def deadline_allows(seconds: float) -> bool:
+    """Se o prazo atual permite esperar ``seconds`` antes de uma nova tentativa"""
+    deadline = _current_deadline.get()
+    return deadline is None or deadline.allows(seconds)
+
+
+async def apply_deadline_to_request(request: httpx.Request):
+    """Event hook do httpx: limita connect/read/write/pool ao tempo restante"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return
+
+    remaining = deadline.timeout()
+    timeouts = request.extensions.get('timeout') or {}
+    request.extensions['timeout'] = {
+        phase: remaining if timeouts.get(phase) is None else min(timeouts[phase], remaining)
+        for phase in ('connect', 'read', 'write', 'pool')
+    }
@@ -0,0 +1,88 @@
+"""
+Token Bucket
+Ritmo de envio para APIs com limite de taxa (mensagens por segundo por conta/chat)
+"""
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
+
+class TokenBucket:
+    """
+    Balde de fichas: ``rate`` fichas por segundo, acumulando até ``capacity``.
+
+    ``try_acquire`` não bloqueia (devolve quanto esperar) para quem agenda
+    vários baldes ao mesmo tempo; ``acquire`` espera a vez. ``pause`` esvazia
+    o balde até um instante (ex.: ``Retry-After`` de um 429), valendo para
+    todos que compartilham o balde.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self._clock = clock
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def set_rate(self, rate: float, capacity: Optional[float] = None):
+        """Ajustar a taxa (ex.: mudança de tier da conta) sem perder o saldo"""
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self._refill(self._clock())
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = min(self._tokens, self.capacity)
+
+    def pause(self, seconds: float):
+        """Nenhuma ficha até ``seconds`` a partir de agora; depois recomeça do zero"""
+        resume_at = self._clock() + max(0.0, seconds)
+        if resume_at > self._updated:
+            self._tokens = 0.0
+            self._updated = resume_at
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Consome ``tokens`` e devolve 0, ou devolve os segundos até haver saldo"""
+        now = self._clock()
+        if now < self._updated:
+            return self._updated - now + max(0.0, tokens - self._tokens) / self.rate
+        self._refill(now)
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+    async def acquire(self, tokens: float = 1.0):
+        """Aguardar até consumir ``tokens``"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def find_token_bucket(key: str) -> Optional[TokenBucket]:
+    """Balde compartilhado já criado para ``key``, se houver"""
+    return _buckets.get(key)
+
+
+def get_token_bucket(key: str, rate: float, capacity: Optional[float] = None) -> TokenBucket:
+    """
+    Balde compartilhado pelo processo para ``key`` (ex.: ``whatsapp:<phone_number_id>``),
+    de modo que execuções simultâneas da mesma conta dividam o mesmo ritmo.
+    """
+    bucket = _buckets.get(key)
+    if bucket is None:
+        bucket = _buckets[key] = TokenBucket(rate, capacity)
+    elif bucket.rate != rate or (capacity is not None and bucket.capacity != capacity):
+        bucket.set_rate(rate, capacity)
+    return bucket
@@ -0,0 +1,248 @@
+"""
+Condições de passos de execução
+Compilador seguro (sem eval) de expressões condicionais com cache por texto da expressão
+"""
+import ast
+import operator
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Union
+
+# ${variavel} referencia uma chave do contexto de execução
+_PLACEHOLDER = re.compile(r"\$\{([^}]+)\}")
+_NUMBER = re.compile(r"^-?\d+(\.\d+)?$")
+
+# Limite de tamanho de sequências produzidas por repetição ('x' * n, [0] * n)
+_MAX_SEQUENCE_LENGTH = 10_000
+
+
+def _bounded_mul(left: Any, right: Any) -> Any:
+    sequence, times = (left, right) if isinstance(left, (str, bytes, list, tuple)) else (right, left)
+    if isinstance(sequence, (str, bytes, list, tuple)) and isinstance(times, int):
+        if len(sequence) * times > _MAX_SEQUENCE_LENGTH:
+            raise ValueError(f"Sequência maior que {_MAX_SEQUENCE_LENGTH} itens em condição")
+    return operator.mul(left, right)
+
+
+def _numeric_mod(left: Any, right: Any) -> Any:
+    # 'str % args' é formatação; '%0999999999d' alocaria uma string enorme
+    if isinstance(left, (str, bytes)):
+        raise ValueError("Formatação com % não é permitida em condição")
+    return operator.mod(left, right)
+
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _bounded_mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: _numeric_mod
+}
+
+_UNARY_OPERATORS = {
+    ast.Not: operator.not_,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos
+}
+
+_COMPARE_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not
+}
+
+_FUNCTIONS = {
+    'len': len,
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'abs': abs,
+    'min': min,
+    'max': max
+}
+
+_CONSTANTS = {'True': True, 'False': False, 'None': None, 'true': True, 'false': False, 'null': None}
+
+Evaluator = Callable[[Dict[str, Any]], Any]
+
+
+class ConditionSyntaxError(ValueError):
+    """Expressão condicional inválida ou com construções não permitidas"""
+
+
+class _MissingVariable(Exception):
+    pass
+
+
+def _lookup(context: Dict[str, Any], key: str) -> Any:
+    if key not in context:
+        raise _MissingVariable(key)
+
+    value = context[key]
+    # Compatível com a substituição textual antiga: "5" comparava como número
+    if isinstance(value, str) and _NUMBER.match(value):
+        return float(value) if '.' in value else int(value)
+    return value
+
+
+class CompiledCondition:
+    """Condição compilada em uma árvore de closures; avaliação não usa eval"""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.variables: List[str] = []
+
+        # Placeholders viram identificadores; em literais string são interpolados
+        def to_identifier(match: re.Match) -> str:
+            self.variables.append(match.group(1).strip())
+            return f"__var_{len(self.variables) - 1}__"
+
+        source = _PLACEHOLDER.sub(to_identifier, expression).strip()
+        try:
+            tree = ast.parse(source, mode='eval')
+        except SyntaxError as e:
+            raise ConditionSyntaxError(f"Condição inválida '{expression}': {e.msg}") from e
+
+        self._evaluate = self._compile(tree.body)
+
+    def evaluate(self, context: Dict[str, Any]) -> bool:
+        """Avaliar contra o contexto; erros de avaliação liberam o passo (como antes)"""
+        try:
+            return bool(self._evaluate(context))
+        except Exception:
+            return True
+
+    def _compile(self, node: ast.AST) -> Evaluator:
+        if isinstance(node, ast.Constant):
+            return self._compile_constant(node.value)
+
+        if isinstance(node, ast.Name):
+            return self._compile_name(node.id)
+
+        if isinstance(node, ast.BoolOp):
+            operands = [self._compile(value) for value in node.values]
+            if isinstance(node.op, ast.And):
+                return lambda ctx: all(operand(ctx) for operand in operands)
+            return lambda ctx: any(operand(ctx) for operand in operands)
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            op = _UNARY_OPERATORS[type(node.op)]
+            operand = self._compile(node.operand)
+            return lambda ctx: op(operand(ctx))
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            op = _BINARY_OPERATORS[type(node.op)]
+            left, right = self._compile(node.left), self._compile(node.right)
+            return lambda ctx: op(left(ctx), right(ctx))
+
+        if isinstance(node, ast.Compare):
+            return self._compile_compare(node)
+
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            items = [self._compile(item) for item in node.elts]
+            factory = {ast.List: list, ast.Tuple: tuple, ast.Set: set}[type(node)]
+            return lambda ctx: factory(item(ctx) for item in items)
+
+        if isinstance(node, ast.Subscript):
+            value, index = self._compile(node.value), self._compile(node.slice)
+            return lambda ctx: value(ctx)[index(ctx)]
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS and not node.keywords:
+            func = _FUNCTIONS[node.func.id]
+            args = [self._compile(arg) for arg in node.args]
+            return lambda ctx: func(*(arg(ctx) for arg in args))
+
+        raise ConditionSyntaxError(
+            f"Construção não permitida em condição '{self.expression}': {type(node).__name__}"
+        )
+
+    def _compile_constant(self, value: Any) -> Evaluator:
+        if isinstance(value, str) and '__var_' in value:
+            variables = self.variables
+
+            def interpolate(ctx: Dict[str, Any]) -> str:
+                return re.sub(r"__var_(\d+)__", lambda m: str(_lookup(ctx, variables[int(m.group(1))])), value)
+
+            return interpolate
+        return lambda ctx: value
+
+    def _compile_name(self, name: str) -> Evaluator:
+        match = re.fullmatch(r"__var_(\d+)__", name)
+        if match:
+            key = self.variables[int(match.group(1))]
+            return lambda ctx: _lookup(ctx, key)
+
+        if name in _CONSTANTS:
+            constant = _CONSTANTS[name]
+            return lambda ctx: constant
+
+        # Nome simples também referencia o contexto
+        return lambda ctx: _lookup(ctx, name)
+
+    def _compile_compare(self, node: ast.Compare) -> Evaluator:
+        left = self._compile(node.left)
+        comparisons = []
+        for op, comparator in zip(node.ops, node.comparators):
+            if type(op) not in _COMPARE_OPERATORS:
+                raise ConditionSyntaxError(f"Operador não permitido em condição '{self.expression}'")
+            comparisons.append((_COMPARE_OPERATORS[type(op)], self._compile(comparator)))
+
+        def compare(ctx: Dict[str, Any]) -> bool:
+            current = left(ctx)
+            for op, comparator in comparisons:
+                right = comparator(ctx)
+                if not op(current, right):
+                    return False
+                current = right
+            return True
+
+        return compare
+
+
+class _InvalidCondition:
+    """Falha de compilação guardada no cache: a mesma expressão inválida não é reanalisada"""
+
+    __slots__ = ('message',)
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+@lru_cache(maxsize=1024)
+def _compile_cached(expression: str) -> Union[CompiledCondition, _InvalidCondition]:
+    try:
+        return CompiledCondition(expression)
+    except ConditionSyntaxError as e:
+        return _InvalidCondition(str(e))
+
+
+def compile_condition(expression: str) -> CompiledCondition:
+    """Compilar condição (cacheada pelo texto da expressão, inclusive quando inválida)"""
+    compiled = _compile_cached(expression)
+    if isinstance(compiled, _InvalidCondition):
+        raise ConditionSyntaxError(compiled.message)
+    return compiled
+
+
+def evaluate_condition(expression: Optional[str], context: Dict[str, Any]) -> bool:
+    """Avaliar uma condição; condições ausentes ou inválidas liberam o passo"""
+    if not expression:
+        return True
+    try:
+        return compile_condition(expression).evaluate(context)
+    except ConditionSyntaxError:
+        return True
+
+
+def evaluate_conditions(expressions: Iterable[Optional[str]], context: Mapping[str, Any]) -> List[bool]:
+    """Avaliar várias condições contra o mesmo estado do contexto (avaliação síncrona, sem cópia)"""
+    return [evaluate_condition(expression, context) for expression in expressions]
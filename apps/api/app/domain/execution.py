@@ -4,11 +4,15 @@ Entidades de negócio para execução coordenada de múltiplos agentes
 """
 import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, List, Mapping, Optional, Any, Tuple, Union
 from uuid import UUID, uuid4
 from enum import Enum
 import json
 
+from app.domain.conditions import evaluate_condition, evaluate_conditions
+from app.domain.execution_log import ExecutionLogBuffer
+from app.domain.plan_graph import PlanGraph
+
 class ExecutionStatus(Enum):
     """Status de execução"""
     PENDING = "pending"
@@ -34,6 +38,14 @@ class ExecutionStrategy(Enum):
     PIPELINE = "pipeline"
     CONDITIONAL = "conditional"
     HYBRID = "hybrid"
+    BATCH = "batch"
+    STREAMING = "streaming"
+
+class ExecutionPriority(Enum):
+    """Classes de prioridade para admissão de execuções"""
+    INTERACTIVE = "interactive"
+    STANDARD = "standard"
+    BULK = "bulk"
 
 class FailureHandling(Enum):
     """Estratégias de tratamento de falhas"""
@@ -57,7 +69,14 @@ class ExecutionStep:
         retry_delay_seconds: int = 5,
         condition: Optional[str] = None,
         credential_id: Optional[UUID] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        cacheable: bool = False,
+        cache_ttl_seconds: Optional[int] = None,
+        map_over: Optional[str] = None,
+        map_concurrency: int = 5,
+        map_item_key: Optional[str] = None,
+        map_max_failures: Optional[int] = None,
+        inputs: Optional[Dict[str, str]] = None
     ):
         self.step_id = step_id
         self.agent_id = agent_id
@@ -71,6 +90,21 @@ class ExecutionStep:
         self.credential_id = credential_id
         self.metadata = metadata or {}
         
+        # Passos somente leitura podem reutilizar resultados em cache
+        self.cacheable = cacheable
+        self.cache_ttl_seconds = cache_ttl_seconds
+        
+        # Passo map: executa a capacidade uma vez por item da lista referenciada
+        # (chave do contexto ou "<step_id>.<caminho>" no output de um passo)
+        self.map_over = map_over
+        self.map_concurrency = map_concurrency
+        self.map_item_key = map_item_key
+        self.map_max_failures = map_max_failures
+        
+        # Mapeamento explícito campo -> "<step_id>.<caminho>" ou chave do contexto;
+        # sem ele o passo recebe o contexto inteiro (pipeline/condicional)
+        self.inputs = inputs
+        
         # Estado de execução
         self.status = StepStatus.PENDING
         self.started_at: Optional[datetime] = None
@@ -79,35 +113,39 @@ class ExecutionStep:
         self.error_message: Optional[str] = None
         self.execution_time_ms: Optional[int] = None
         self.attempts = 0
+        
+        # Tempo em fila entre ficar pronto e ser despachado pelo escalonador
+        self.wait_time_ms: Optional[int] = None
+    
+    @property
+    def is_map(self) -> bool:
+        """Passo de fan-out sobre uma lista"""
+        return bool(self.map_over)
+    
+    @property
+    def retry_attempts(self) -> int:
+        """Número de novas tentativas já realizadas"""
+        return max(self.attempts - 1, 0)
     
-    def can_execute(self, completed_steps: List[str], context: Dict[str, Any]) -> bool:
+    def can_execute(self, completed_steps: List[str], context: Optional[Dict[str, Any]] = None) -> bool:
         """Verifica se o passo pode ser executado"""
         # Verificar dependências
         if not all(dep in completed_steps for dep in self.depends_on):
             return False
         
         # Verificar condição
-        if self.condition:
+        if self.condition and context is not None:
             return self._evaluate_condition(context)
         
         return True
     
+    def evaluate_condition(self, context: Dict[str, Any]) -> bool:
+        """Avalia a condição do passo contra o contexto"""
+        return self._evaluate_condition(context)
+    
     def _evaluate_condition(self, context: Dict[str, Any]) -> bool:
-        """Avalia condição de execução"""
-        if not self.condition:
-            return True
-        
-        try:
-            # Substituir variáveis no contexto
-            condition = self.condition
-            for key, value in context.items():
-                condition = condition.replace(f"${{{key}}}", str(value))
-            
-            # Avaliação segura de expressões simples
-            # Em produção, usar um parser mais robusto
-            return eval(condition)
-        except:
-            return True
+        """Avalia condição de execução (compilada e cacheada, sem eval)"""
+        return evaluate_condition(self.condition, context)
     
     def start_execution(self):
         """Iniciar execução do passo"""
@@ -144,6 +182,19 @@ class ExecutionStep:
         self.started_at = None
         self.completed_at = None
     
+    def retry_execution(self):
+        """Preparar passo falhado para nova execução"""
+        self.prepare_retry()
+    
+    def reset_for_resume(self):
+        """Voltar a PENDING preservando ``attempts`` (histórico de tentativas)"""
+        self.status = StepStatus.PENDING
+        self.started_at = None
+        self.completed_at = None
+        self.output_data = None
+        self.error_message = None
+        self.execution_time_ms = None
+    
     def skip_execution(self, reason: str):
         """Pular execução"""
         self.status = StepStatus.SKIPPED
@@ -164,12 +215,20 @@ class ExecutionStep:
             'condition': self.condition,
             'credential_id': str(self.credential_id) if self.credential_id else None,
             'metadata': self.metadata,
+            'cacheable': self.cacheable,
+            'cache_ttl_seconds': self.cache_ttl_seconds,
+            'map_over': self.map_over,
+            'map_concurrency': self.map_concurrency,
+            'map_item_key': self.map_item_key,
+            'map_max_failures': self.map_max_failures,
+            'inputs': self.inputs,
             'status': self.status.value,
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'output_data': self.output_data,
             'error_message': self.error_message,
             'execution_time_ms': self.execution_time_ms,
+            'wait_time_ms': self.wait_time_ms,
             'attempts': self.attempts
         }
     
@@ -187,7 +246,14 @@ class ExecutionStep:
             retry_delay_seconds=data.get('retry_delay_seconds', 5),
             condition=data.get('condition'),
             credential_id=UUID(data['credential_id']) if data.get('credential_id') else None,
-            metadata=data.get('metadata', {})
+            metadata=data.get('metadata', {}),
+            cacheable=data.get('cacheable', False),
+            cache_ttl_seconds=data.get('cache_ttl_seconds'),
+            map_over=data.get('map_over'),
+            map_concurrency=data.get('map_concurrency', 5),
+            map_item_key=data.get('map_item_key'),
+            map_max_failures=data.get('map_max_failures'),
+            inputs=data.get('inputs')
         )
         
         # Restaurar estado
@@ -196,6 +262,7 @@ class ExecutionStep:
         step.output_data = data.get('output_data')
         step.error_message = data.get('error_message')
         step.execution_time_ms = data.get('execution_time_ms')
+        step.wait_time_ms = data.get('wait_time_ms')
         
         if data.get('started_at'):
             step.started_at = datetime.fromisoformat(data['started_at'].replace('Z', '+00:00'))
@@ -218,7 +285,9 @@ class ExecutionPlan:
         failure_handling: FailureHandling = FailureHandling.STOP_ON_FAILURE,
         max_parallel_steps: int = 5,
         global_timeout_minutes: int = 60,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        timeout_minutes: Optional[int] = None,
+        priority: ExecutionPriority = ExecutionPriority.STANDARD
     ):
         self.plan_id = plan_id
         self.name = name
@@ -227,9 +296,14 @@ class ExecutionPlan:
         self.strategy = strategy
         self.failure_handling = failure_handling
         self.max_parallel_steps = max_parallel_steps
-        self.global_timeout_minutes = global_timeout_minutes
+        self.global_timeout_minutes = timeout_minutes if timeout_minutes is not None else global_timeout_minutes
+        self.priority = priority
         self.metadata = metadata or {}
         
+        # Grafo (índice, adjacência, ordem topológica) calculado uma vez
+        self._graph: Optional[PlanGraph] = None
+        self._graph_key: Optional[tuple] = None
+        
         # Validar plano
         self._validate()
     
@@ -238,99 +312,97 @@ class ExecutionPlan:
         if not self.steps:
             raise ValueError("Plano deve ter pelo menos um passo")
         
+        graph = self.graph
+        
         # Verificar IDs únicos
-        step_ids = [step.step_id for step in self.steps]
-        if len(step_ids) != len(set(step_ids)):
+        if graph.duplicate_ids:
             raise ValueError("IDs dos passos devem ser únicos")
         
         # Verificar dependências válidas
-        for step in self.steps:
-            for dep in step.depends_on:
-                if dep not in step_ids:
-                    raise ValueError(f"Dependência '{dep}' não encontrada nos passos")
+        if graph.missing_dependencies:
+            _, dep = graph.missing_dependencies[0]
+            raise ValueError(f"Dependência '{dep}' não encontrada nos passos")
         
         # Verificar dependências circulares
-        if self._has_circular_dependencies():
+        if graph.has_cycle:
             raise ValueError("Dependências circulares detectadas")
     
+    @property
+    def graph(self) -> PlanGraph:
+        """Grafo de dependências em cache; recalculado se a lista de passos for trocada ou crescer"""
+        key = (id(self.steps), len(self.steps))
+        if self._graph is None or self._graph_key != key:
+            self._graph = PlanGraph(self.steps)
+            self._graph_key = key
+        return self._graph
+    
+    def reindex(self):
+        """Descartar o grafo em cache após alterar passos ou dependências no lugar"""
+        self._graph = None
+    
     def _has_circular_dependencies(self) -> bool:
         """Verificar dependências circulares"""
-        visited = set()
-        rec_stack = set()
-        
-        def has_cycle(step_id: str) -> bool:
-            visited.add(step_id)
-            rec_stack.add(step_id)
-            
-            step = next((s for s in self.steps if s.step_id == step_id), None)
-            if not step:
-                return False
-            
-            for dep in step.depends_on:
-                if dep not in visited:
-                    if has_cycle(dep):
-                        return True
-                elif dep in rec_stack:
-                    return True
-            
-            rec_stack.remove(step_id)
-            return False
-        
-        for step in self.steps:
-            if step.step_id not in visited:
-                if has_cycle(step.step_id):
-                    return True
-        
-        return False
+        return self.graph.has_cycle
     
     def get_execution_levels(self) -> List[List[str]]:
         """Obter níveis de execução baseados em dependências"""
-        levels = []
-        remaining_steps = {step.step_id: step for step in self.steps}
-        completed_steps = set()
-        
-        while remaining_steps:
-            # Encontrar passos que podem ser executados agora
-            ready_steps = []
-            for step_id, step in remaining_steps.items():
-                if all(dep in completed_steps for dep in step.depends_on):
-                    ready_steps.append(step_id)
-            
-            if not ready_steps:
-                # Deadlock - não deveria acontecer se validação estiver correta
-                break
-            
-            levels.append(ready_steps)
-            
-            # Remover passos prontos
-            for step_id in ready_steps:
-                del remaining_steps[step_id]
-                completed_steps.add(step_id)
-        
-        return levels
+        return [list(level) for level in self.graph.levels]
+    
+    def get_topological_order(self) -> List[str]:
+        """Ordem topológica (Kahn) dos passos"""
+        return list(self.graph.order)
+    
+    def get_critical_path(
+        self,
+        weight: Optional[Callable[[ExecutionStep], float]] = None
+    ) -> Tuple[List[str], float]:
+        """Caminho crítico do plano; peso padrão é o timeout de cada passo"""
+        return self.graph.critical_path(self.steps, weight or (lambda step: step.timeout_seconds))
+    
+    def get_execution_order(self) -> List[List[str]]:
+        """Obter ordem de execução (níveis de dependência)"""
+        return self.get_execution_levels()
+    
+    def get_dependents(self) -> Dict[str, List[str]]:
+        """Obter mapa passo -> passos que dependem dele"""
+        return {step_id: list(dependents) for step_id, dependents in self.graph.dependents.items()}
+    
+    def evaluate_step_conditions(
+        self,
+        steps: List[ExecutionStep],
+        context: Mapping[str, Any]
+    ) -> Dict[str, bool]:
+        """Avaliar as condições de vários passos contra o mesmo snapshot do contexto"""
+        results = evaluate_conditions([step.condition for step in steps], context)
+        return {step.step_id: result for step, result in zip(steps, results)}
+    
+    @property
+    def timeout_minutes(self) -> int:
+        """Timeout global do plano em minutos"""
+        return self.global_timeout_minutes
     
     def get_step(self, step_id: str) -> Optional[ExecutionStep]:
         """Obter passo por ID"""
-        for step in self.steps:
-            if step.step_id == step_id:
-                return step
-        return None
+        position = self.graph.positions.get(step_id)
+        return self.steps[position] if position is not None else None
     
-    def estimate_execution_time(self) -> int:
-        """Estimar tempo de execução em segundos"""
+    def estimate_execution_time(self, durations: Optional[Dict[str, float]] = None) -> int:
+        """
+        Estimar tempo de execução em segundos.
+
+        ``durations`` (step_id -> segundos, ex.: p50 histórico) substitui o
+        timeout dos passos que tiverem estimativa.
+        """
+        durations = durations or {}
+        
+        def duration(step: ExecutionStep) -> float:
+            return durations.get(step.step_id, step.timeout_seconds)
+        
         if self.strategy == ExecutionStrategy.SEQUENTIAL:
-            return sum(step.timeout_seconds for step in self.steps)
+            return int(sum(duration(step) for step in self.steps))
         else:
             # Para execução paralela, usar o caminho mais longo
-            levels = self.get_execution_levels()
-            total_time = 0
-            
-            for level in levels:
-                level_steps = [self.get_step(step_id) for step_id in level]
-                max_time = max(step.timeout_seconds for step in level_steps if step)
-                total_time += max_time
-            
-            return total_time
+            return int(self.get_critical_path(weight=duration)[1])
     
     def to_dict(self) -> Dict[str, Any]:
         """Converter para dicionário"""
@@ -343,6 +415,7 @@ class ExecutionPlan:
             'failure_handling': self.failure_handling.value,
             'max_parallel_steps': self.max_parallel_steps,
             'global_timeout_minutes': self.global_timeout_minutes,
+            'priority': self.priority.value,
             'metadata': self.metadata
         }
     
@@ -360,6 +433,7 @@ class ExecutionPlan:
             failure_handling=FailureHandling(data.get('failure_handling', 'stop_on_failure')),
             max_parallel_steps=data.get('max_parallel_steps', 5),
             global_timeout_minutes=data.get('global_timeout_minutes', 60),
+            priority=ExecutionPriority(data.get('priority', 'standard')),
             metadata=data.get('metadata', {})
         )
 
@@ -585,4 +659,187 @@ class ExecutionRun:
         if data.get('paused_at'):
             run.paused_at = datetime.fromisoformat(data['paused_at'].replace('Z', '+00:00'))
         
-        return run
\ No newline at end of file
+        return run
+
+class MultiAgentExecution:
+    """Execução de um plano multi-agente coordenada pelo ExecutionService"""
+    
+    def __init__(
+        self,
+        execution_id: UUID,
+        user_id: UUID,
+        plan: ExecutionPlan,
+        input_data: Optional[Dict[str, Any]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        created_at: Optional[datetime] = None
+    ):
+        self.execution_id = execution_id
+        self.user_id = user_id
+        self.plan = plan
+        self.input_data = input_data or {}
+        self.context = context or {}
+        self.created_at = created_at or datetime.utcnow()
+        self.updated_at = self.created_at
+        
+        # Estado de execução
+        self.status = ExecutionStatus.PENDING
+        self.started_at: Optional[datetime] = None
+        self.completed_at: Optional[datetime] = None
+        self.error_message: Optional[str] = None
+        
+        # Resultados por passo e logs (buffer circular; antigos vão para o log store)
+        self.results: Dict[str, Any] = {}
+        self.logs = ExecutionLogBuffer()
+        
+        # Métricas do escalonador (não persistidas)
+        self.metrics: Dict[str, Any] = {}
+    
+    @property
+    def execution_logs(self) -> List[Dict[str, Any]]:
+        """Logs recentes em memória (os anteriores são lidos paginados do log store)"""
+        return self.logs.tail()
+    
+    @execution_logs.setter
+    def execution_logs(self, entries: List[Dict[str, Any]]):
+        self.logs.restore(entries)
+    
+    def start(self):
+        """Iniciar execução"""
+        if self.status != ExecutionStatus.PENDING:
+            raise ValueError(f"Execução não pode ser iniciada. Status atual: {self.status.value}")
+        
+        self.status = ExecutionStatus.RUNNING
+        self.started_at = datetime.utcnow()
+        self.updated_at = self.started_at
+        self.add_log("info", "Execução iniciada")
+    
+    def complete(self):
+        """Completar execução"""
+        if self.status != ExecutionStatus.RUNNING:
+            return
+        
+        self.status = ExecutionStatus.COMPLETED
+        self.completed_at = datetime.utcnow()
+        self.updated_at = self.completed_at
+        self.add_log("info", "Execução completada com sucesso")
+    
+    def fail(self, error_message: str):
+        """Falhar execução"""
+        self.status = ExecutionStatus.FAILED
+        self.error_message = error_message
+        self.completed_at = datetime.utcnow()
+        self.updated_at = self.completed_at
+        self.add_log("error", f"Execução falhou: {error_message}")
+    
+    def cancel(self):
+        """Cancelar execução"""
+        if self.status in [ExecutionStatus.COMPLETED, ExecutionStatus.FAILED, ExecutionStatus.CANCELLED]:
+            return
+        
+        self.status = ExecutionStatus.CANCELLED
+        self.completed_at = datetime.utcnow()
+        self.updated_at = self.completed_at
+        self.add_log("warning", "Execução cancelada")
+    
+    def pause(self):
+        """Pausar execução"""
+        if self.status == ExecutionStatus.RUNNING:
+            self.status = ExecutionStatus.PAUSED
+            self.updated_at = datetime.utcnow()
+            self.add_log("info", "Execução pausada")
+    
+    def resume(self):
+        """Retomar execução"""
+        if self.status == ExecutionStatus.PAUSED:
+            self.status = ExecutionStatus.RUNNING
+            self.updated_at = datetime.utcnow()
+            self.add_log("info", "Execução retomada")
+    
+    def restore_checkpoint(self, retry_failed: bool = True, restart_all: bool = False) -> List[str]:
+        """
+        Preparar execução restaurada do banco para rodar novamente.
+        
+        Passos concluídos (checkpoints) são mantidos; passos interrompidos e, com
+        ``retry_failed``, os que falharam voltam a PENDING junto com os
+        dependentes pulados por causa deles. Retorna os passos que serão refeitos.
+        """
+        resumable = [StepStatus.RUNNING, StepStatus.RETRYING]
+        if retry_failed:
+            resumable.append(StepStatus.FAILED)
+        
+        reset = {
+            step.step_id for step in self.plan.steps
+            if restart_all or step.status in resumable
+        }
+        
+        # Dependentes pulados por causa de um passo refeito também voltam
+        changed = True
+        while changed:
+            changed = False
+            for step in self.plan.steps:
+                if (
+                    step.step_id not in reset
+                    and step.status == StepStatus.SKIPPED
+                    and any(dep in reset for dep in step.depends_on)
+                ):
+                    reset.add(step.step_id)
+                    changed = True
+        
+        for step in self.plan.steps:
+            if step.step_id in reset:
+                step.reset_for_resume()
+                self.results.pop(step.step_id, None)
+        
+        self.status = ExecutionStatus.PENDING
+        self.error_message = None
+        self.completed_at = None
+        self.updated_at = datetime.utcnow()
+        
+        return [step.step_id for step in self.plan.steps if step.step_id in reset]
+    
+    def is_cancelled(self) -> bool:
+        """Verificar se a execução foi cancelada"""
+        return self.status == ExecutionStatus.CANCELLED
+    
+    def is_paused(self) -> bool:
+        """Verificar se a execução está pausada"""
+        return self.status == ExecutionStatus.PAUSED
+    
+    def is_finished(self) -> bool:
+        """Verificar se a execução atingiu um estado terminal"""
+        return self.status in [ExecutionStatus.COMPLETED, ExecutionStatus.FAILED, ExecutionStatus.CANCELLED]
+    
+    def add_log(self, level: str, message: str, step_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None):
+        """Adicionar log de execução"""
+        self.logs.append(level, message, step_id, metadata)
+    
+    def add_step_result(self, step_id: str, result: Dict[str, Any]):
+        """Registrar resultado de um passo"""
+        self.results[step_id] = result
+        self.updated_at = datetime.utcnow()
+    
+    def get_progress(self) -> Dict[str, Any]:
+        """Obter progresso da execução"""
+        total_steps = len(self.plan.steps)
+        counts = {status.value: 0 for status in StepStatus}
+        for step in self.plan.steps:
+            counts[step.status.value] += 1
+        
+        finished = counts[StepStatus.COMPLETED.value] + counts[StepStatus.SKIPPED.value] + counts[StepStatus.FAILED.value]
+        
+        return {
+            'total_steps': total_steps,
+            'completed_steps': counts[StepStatus.COMPLETED.value],
+            'failed_steps': counts[StepStatus.FAILED.value],
+            'skipped_steps': counts[StepStatus.SKIPPED.value],
+            'running_steps': counts[StepStatus.RUNNING.value],
+            'percentage': (finished / total_steps) * 100.0 if total_steps else 100.0
+        }
+    
+    def calculate_execution_time(self) -> Optional[int]:
+        """Calcular tempo total de execução em milissegundos"""
+        if not self.started_at:
+            return None
+        
+        end_time = self.completed_at or datetime.utcnow()
+        return int((end_time - self.started_at).total_seconds() * 1000)
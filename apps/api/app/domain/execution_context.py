@@ -0,0 +1,164 @@
+"""
+Execution Context
+Contexto em camadas (copy-on-write) compartilhado pelos passos de uma execução
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from app.domain.execution import ExecutionStep
+
+
+def strip_reference(reference: str) -> str:
+    """``${ref}`` -> ``ref``"""
+    reference = reference.strip()
+    if reference.startswith('${') and reference.endswith('}'):
+        reference = reference[2:-1]
+    return reference
+
+
+def resolve_path(value: Any, path: str, reference: str) -> Any:
+    """Percorrer ``a.b.0`` em dicts/listas a partir de ``value``"""
+    for key in path.split('.') if path else []:
+        if isinstance(value, dict) and key in value:
+            value = value[key]
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            raise ValueError(f"Caminho '{reference}' não encontrado")
+    return value
+
+
+class ScopedContext(Mapping):
+    """
+    Contexto de pipeline/condicional sem cópias a cada passo.
+
+    A base (contexto + input da execução) e o output de cada passo concluído
+    são camadas referenciadas, não copiadas; a camada mais recente prevalece.
+    Um índice ``chave -> camada`` mantém as buscas O(1), e incluir um output
+    custa O(campos do output).
+
+    Passos que declaram ``inputs`` (campo -> ``"<step_id>.<caminho>"`` ou
+    chave do contexto) recebem só os campos consumidos. Quando nenhum passo
+    pendente pode mais ler uma camada (todos declaram ``inputs`` e nenhum a
+    referencia), ela sai do contexto. Passos sem ``inputs`` ou com condição
+    podem ler qualquer chave e mantêm todas as camadas.
+    """
+
+    def __init__(self, base: Mapping, steps: Iterable[ExecutionStep]):
+        self._base = base
+        self._layers: Dict[str, Mapping] = {}
+        self._index: Dict[str, str] = {}
+        self._step_ids = set()
+
+        # Passos pendentes que leem qualquer chave e, dos demais, o que cada um referencia
+        self._open_readers: Set[str] = set()
+        self._reads: Dict[str, Set[str]] = {}
+        self._readers: Dict[str, Set[str]] = {}
+        for step in steps:
+            self._step_ids.add(step.step_id)
+            self._register_reader(step)
+
+    def _register_reader(self, step: ExecutionStep):
+        if step.inputs is None or step.condition:
+            self._open_readers.add(step.step_id)
+            return
+        heads = {strip_reference(reference).partition('.')[0] for reference in step.inputs.values()}
+        self._reads[step.step_id] = heads
+        for head in heads:
+            self._readers.setdefault(head, set()).add(step.step_id)
+
+    # Mapping: visão mesclada (base < outputs em ordem de conclusão)
+
+    def __getitem__(self, key: str) -> Any:
+        layer_id = self._index.get(key)
+        if layer_id is not None:
+            return self._layers[layer_id][key]
+        return self._base[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index or key in self._base
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._index
+        for key in self._base:
+            if key not in self._index:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self._index) + sum(1 for key in self._base if key not in self._index)
+
+    @property
+    def layer_ids(self) -> List[str]:
+        """Passos cujos outputs ainda estão no contexto"""
+        return list(self._layers)
+
+    def push(self, step_id: str, output: Optional[Mapping]):
+        """Incluir o output de um passo como nova camada (sem copiar)"""
+        self._step_ids.add(step_id)
+        if not output:
+            return
+        self._layers.pop(step_id, None)
+        self._layers[step_id] = output
+        for key in output:
+            self._index[key] = step_id
+
+    def step_input(self, step: ExecutionStep, own_input: bool = True) -> Dict[str, Any]:
+        """
+        Input do passo: sem ``inputs``, input próprio + contexto inteiro
+        (comportamento original); com ``inputs``, apenas os campos mapeados.
+        """
+        base = dict(step.input_data) if own_input else {}
+        if step.inputs is None:
+            base.update(self)
+            return base
+
+        for field, reference in step.inputs.items():
+            base[field] = self.resolve(reference)
+        return base
+
+    def resolve(self, reference: str) -> Any:
+        """``<step_id>.<caminho>`` no output de um passo ou ``chave[.caminho]`` no contexto"""
+        reference = strip_reference(reference)
+        head, _, path = reference.partition('.')
+        if head in self._step_ids:
+            if head not in self._layers:
+                raise ValueError(f"Output do passo '{head}' indisponível para '{reference}'")
+            return resolve_path(self._layers[head], path, reference)
+        if head not in self:
+            raise ValueError(f"Campo '{reference}' não encontrado no contexto")
+        return resolve_path(self[head], path, reference)
+
+    def done(self, step_id: str):
+        """Passo concluído/pulado: deixa de ler o contexto; libera camadas sem leitores"""
+        self._open_readers.discard(step_id)
+        for head in self._reads.pop(step_id, ()):
+            readers = self._readers[head]
+            readers.discard(step_id)
+            if not readers:
+                del self._readers[head]
+        if self._open_readers:
+            return
+
+        needed = set()
+        for head in self._readers:
+            if head in self._layers:
+                needed.add(head)
+            if head in self._index:
+                needed.add(self._index[head])
+        for layer_id in [layer_id for layer_id in self._layers if layer_id not in needed]:
+            self._drop(layer_id)
+
+    def _drop(self, layer_id: str):
+        layer = self._layers.pop(layer_id)
+        for key in layer:
+            if self._index.get(key) != layer_id:
+                continue
+            # Chave sombreada por esta camada volta a apontar para a anterior
+            previous = next(
+                (other for other in reversed(self._layers) if key in self._layers[other]),
+                None
+            )
+            if previous is None:
+                del self._index[key]
+            else:
+                self._index[key] = previous
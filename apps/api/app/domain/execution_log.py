@@ -0,0 +1,148 @@
+"""
+Execution Log Buffer
+Buffer circular de logs de execução com descarte para armazenamento append-only
+"""
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+# Entradas mantidas em memória (e na linha da execução) por execução
+DEFAULT_LOG_BUFFER_CAPACITY = 200
+
+# Limite absoluto: acima dele entradas ainda não persistidas são descartadas
+HARD_LIMIT_FACTOR = 5
+
+
+class LogEntry:
+    """Entrada de log compacta (slots, timestamp epoch, metadata opcional)"""
+
+    __slots__ = ('seq', 'timestamp', 'level', 'message', 'step_id', 'metadata')
+
+    def __init__(
+        self,
+        seq: int,
+        level: str,
+        message: str,
+        step_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[float] = None
+    ):
+        self.seq = seq
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.level = level
+        self.message = message
+        self.step_id = step_id
+        self.metadata = metadata or None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'seq': self.seq,
+            'timestamp': datetime.utcfromtimestamp(self.timestamp).isoformat(),
+            'level': self.level,
+            'message': self.message,
+            'step_id': self.step_id,
+            'metadata': self.metadata or {}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], seq: int) -> 'LogEntry':
+        timestamp = data.get('timestamp')
+        if isinstance(timestamp, str):
+            parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            timestamp = parsed.timestamp()
+        return cls(
+            seq=data.get('seq', seq),
+            level=data.get('level', 'info'),
+            message=data.get('message', ''),
+            step_id=data.get('step_id'),
+            metadata=data.get('metadata'),
+            timestamp=timestamp
+        )
+
+
+class ExecutionLogBuffer:
+    """
+    Buffer circular dos logs de uma execução.
+
+    Cada entrada recebe um ``seq`` crescente. O writer persiste as entradas
+    pendentes em lote no armazenamento append-only e avança ``persisted_seq``;
+    só então as mais antigas saem da memória. Se o armazenamento não
+    acompanhar, entradas pendentes acima do limite absoluto são descartadas
+    (contadas em ``dropped``) para manter a memória constante.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_LOG_BUFFER_CAPACITY):
+        self.capacity = max(1, capacity)
+        self._entries: Deque[LogEntry] = deque()
+        self.next_seq = 0
+        self.persisted_seq = 0
+        self.dropped = 0
+
+    def append(
+        self,
+        level: str,
+        message: str,
+        step_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> LogEntry:
+        entry = LogEntry(self.next_seq, level, message, step_id, metadata)
+        self.next_seq += 1
+        self._entries.append(entry)
+        self._trim()
+        return entry
+
+    def _trim(self):
+        while len(self._entries) > self.capacity and self._entries[0].seq < self.persisted_seq:
+            self._entries.popleft()
+        while len(self._entries) > self.capacity * HARD_LIMIT_FACTOR:
+            self._entries.popleft()
+            self.dropped += 1
+        # Entradas descartadas sem persistir não voltam a ser pendentes
+        if self._entries:
+            self.persisted_seq = max(self.persisted_seq, min(self._entries[0].seq, self.next_seq))
+
+    def unpersisted(self) -> List[LogEntry]:
+        """Entradas ainda não gravadas no armazenamento (em ordem)"""
+        return [entry for entry in self._entries if entry.seq >= self.persisted_seq]
+
+    def mark_persisted(self, up_to_seq: int):
+        """Registrar que todas as entradas com ``seq < up_to_seq`` estão no armazenamento"""
+        self.persisted_seq = max(self.persisted_seq, up_to_seq)
+        self._trim()
+
+    @property
+    def first_seq(self) -> int:
+        """Menor ``seq`` ainda em memória"""
+        return self._entries[0].seq if self._entries else self.next_seq
+
+    def page(self, after_seq: int = -1, limit: int = 100) -> List[Dict[str, Any]]:
+        """Entradas em memória com ``seq > after_seq``"""
+        result = []
+        for entry in self._entries:
+            if entry.seq > after_seq:
+                result.append(entry.to_dict())
+                if len(result) >= limit:
+                    break
+        return result
+
+    def tail(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Últimas entradas (no máximo ``capacity``), para a linha da execução"""
+        limit = min(limit or self.capacity, self.capacity)
+        entries = list(self._entries)[-limit:]
+        return [entry.to_dict() for entry in entries]
+
+    def restore(self, entries: Iterable[Dict[str, Any]], next_seq: Optional[int] = None):
+        """Recarregar entradas persistidas (ex.: execução carregada do banco)"""
+        restored = [LogEntry.from_dict(data, seq) for seq, data in enumerate(entries)]
+        self._entries = deque(restored[-self.capacity:])
+        self.next_seq = max(
+            next_seq or 0,
+            (restored[-1].seq + 1) if restored else 0
+        )
+        self.persisted_seq = self.next_seq
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -9,6 +9,8 @@ from enum import Enum
 from typing import Dict, List, Optional, Any, Union
 from uuid import UUID, uuid4
 
+from app.domain.execution_log import ExecutionLogBuffer
+
 
 class ExecutionStrategy(Enum):
     """Estratégias de execução de workflow"""
@@ -302,10 +304,19 @@ class WorkflowExecution:
         
         # Execution state
         self.results: List[Dict[str, Any]] = []
-        self.execution_logs: List[Dict[str, Any]] = []
+        self.logs = ExecutionLogBuffer()
         self.error_message: Optional[str] = None
         self.total_cost: float = 0.0
     
+    @property
+    def execution_logs(self) -> List[Dict[str, Any]]:
+        """Logs recentes em memória (os anteriores ficam no log store)"""
+        return self.logs.tail()
+    
+    @execution_logs.setter
+    def execution_logs(self, entries: List[Dict[str, Any]]):
+        self.logs.restore(entries)
+    
     def start_execution(self):
         """Iniciar execução"""
         self.status = ExecutionStatus.RUNNING
@@ -335,13 +346,7 @@ class WorkflowExecution:
     
     def add_log(self, level: str, message: str, metadata: Optional[Dict[str, Any]] = None):
         """Adicionar log de execução"""
-        log_entry = {
-            'timestamp': datetime.utcnow().isoformat(),
-            'level': level,
-            'message': message,
-            'metadata': metadata or {}
-        }
-        self.execution_logs.append(log_entry)
+        self.logs.append(level, message, metadata=metadata)
     
     def add_step_result(self, step_result: Dict[str, Any]):
         """Adicionar resultado de passo"""
@@ -0,0 +1,91 @@
+"""
+Plan Graph
+Índice e ordenação topológica dos passos de um plano de execução
+"""
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from app.domain.execution import ExecutionStep
+
+
+class PlanGraph:
+    """
+    Grafo de dependências calculado uma única vez para o plano.
+
+    Mantém o índice id → posição, listas de adjacência (dependentes) e a
+    ordenação topológica de Kahn em níveis, tudo em O(V + E). Dentro de cada
+    nível os passos seguem a ordem em que aparecem no plano.
+    """
+
+    def __init__(self, steps: Sequence['ExecutionStep']):
+        self.positions: Dict[str, int] = {}
+        self.duplicate_ids: List[str] = []
+        for position, step in enumerate(steps):
+            if step.step_id in self.positions:
+                self.duplicate_ids.append(step.step_id)
+            else:
+                self.positions[step.step_id] = position
+
+        self.dependents: Dict[str, List[str]] = {step_id: [] for step_id in self.positions}
+        self.missing_dependencies: List[Tuple[str, str]] = []
+        in_degree: Dict[str, int] = {step_id: 0 for step_id in self.positions}
+
+        for step in steps:
+            for dep in step.depends_on:
+                if dep not in self.positions:
+                    self.missing_dependencies.append((step.step_id, dep))
+                    continue
+                self.dependents[dep].append(step.step_id)
+                in_degree[step.step_id] += 1
+
+        self.levels: List[List[str]] = []
+        self.order: List[str] = []
+
+        level = [step_id for step_id, degree in in_degree.items() if degree == 0]
+        while level:
+            level.sort(key=self.positions.__getitem__)
+            self.levels.append(level)
+            self.order.extend(level)
+
+            next_level = []
+            for step_id in level:
+                for dependent_id in self.dependents[step_id]:
+                    in_degree[dependent_id] -= 1
+                    if in_degree[dependent_id] == 0:
+                        next_level.append(dependent_id)
+            level = next_level
+
+        # Passos que nunca chegaram a grau zero fazem parte de (ou dependem de) um ciclo
+        self.has_cycle = len(self.order) < len(self.positions)
+
+    def critical_path(
+        self,
+        steps: Sequence['ExecutionStep'],
+        weight: Callable[['ExecutionStep'], float]
+    ) -> Tuple[List[str], float]:
+        """Caminho mais longo (soma de ``weight``) do início ao fim do plano"""
+        by_id = {step.step_id: step for step in steps}
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+
+        for step_id in self.order:
+            step = by_id[step_id]
+            start, via = 0.0, None
+            for dep in step.depends_on:
+                if dep in finish and finish[dep] > start:
+                    start, via = finish[dep], dep
+            finish[step_id] = start + weight(step)
+            previous[step_id] = via
+
+        if not finish:
+            return [], 0.0
+
+        last = max(finish, key=finish.__getitem__)
+        path = []
+        cursor: Optional[str] = last
+        while cursor is not None:
+            path.append(cursor)
+            cursor = previous[cursor]
+        path.reverse()
+
+        return path, finish[last]
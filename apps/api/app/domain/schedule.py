@@ -0,0 +1,194 @@
+"""
+Workflow Schedule
+Agendamentos (cron ou intervalo) de workflows e cálculo do próximo disparo
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, FrozenSet, Optional
+from uuid import UUID, uuid4
+
+# (nome, mínimo, máximo) dos campos cron: minuto hora dia mês dia-da-semana
+_CRON_FIELDS = (
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day', 1, 31),
+    ('month', 1, 12),
+    ('weekday', 0, 7)
+)
+
+# Próximo disparo procurado no máximo até este horizonte (ex.: 30 de fevereiro nunca ocorre)
+_CRON_SEARCH_YEARS = 5
+
+
+class CronExpression:
+    """
+    Expressão cron de 5 campos (UTC).
+
+    Suporta ``*``, valores, listas (``1,15``), faixas (``1-5``) e passos
+    (``*/15``, ``0-30/10``). Dia-da-semana usa 0 ou 7 para domingo. Como no
+    cron tradicional, se dia do mês e dia da semana forem restritos, basta um
+    deles coincidir.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        parts = self.expression.split()
+        if len(parts) != len(_CRON_FIELDS):
+            raise ValueError(f"Expressão cron deve ter 5 campos: '{expression}'")
+
+        values = [self._parse_field(part, low, high, name) for part, (name, low, high) in zip(parts, _CRON_FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = values
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self._any_day = parts[2] == '*'
+        self._any_weekday = parts[4] == '*'
+
+    @staticmethod
+    def _parse_field(part: str, low: int, high: int, name: str) -> FrozenSet[int]:
+        values = set()
+        for item in part.split(','):
+            step = 1
+            if '/' in item:
+                item, step_text = item.split('/', 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"Passo inválido no campo {name}: '{part}'")
+
+            if item == '*':
+                start, end = low, high
+            elif '-' in item:
+                start, end = (int(value) for value in item.split('-', 1))
+            else:
+                start = int(item)
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end:
+                raise ValueError(f"Valor fora da faixa {low}-{high} no campo {name}: '{part}'")
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """Primeiro instante (minuto cheio) estritamente posterior a ``after``"""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        last_year = moment.year + _CRON_SEARCH_YEARS
+
+        while moment.year <= last_year:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+
+        raise ValueError(f"Expressão cron nunca dispara: '{self.expression}'")
+
+
+class WorkflowSchedule:
+    """Agendamento de um workflow por cron ou intervalo fixo"""
+
+    def __init__(
+        self,
+        workflow_id: UUID,
+        user_id: UUID,
+        cron_expression: Optional[str] = None,
+        interval_seconds: Optional[int] = None,
+        input_data: Optional[Dict[str, Any]] = None,
+        jitter_seconds: int = 0,
+        enabled: bool = True,
+        next_fire_at: Optional[datetime] = None,
+        last_fired_at: Optional[datetime] = None,
+        id: Optional[UUID] = None,
+        created_at: Optional[datetime] = None,
+        updated_at: Optional[datetime] = None
+    ):
+        if bool(cron_expression) == bool(interval_seconds):
+            raise ValueError("Agendamento precisa de cron_expression ou interval_seconds (apenas um)")
+        if interval_seconds is not None and interval_seconds <= 0:
+            raise ValueError("interval_seconds deve ser positivo")
+
+        self.id = id or uuid4()
+        self.workflow_id = workflow_id
+        self.user_id = user_id
+        self.cron_expression = cron_expression
+        self.interval_seconds = interval_seconds
+        self.input_data = input_data or {}
+        self.jitter_seconds = max(0, jitter_seconds)
+        self.enabled = enabled
+        self.last_fired_at = last_fired_at
+        self.created_at = created_at or datetime.utcnow()
+        self.updated_at = updated_at or datetime.utcnow()
+
+        self._cron = CronExpression(cron_expression) if cron_expression else None
+        self.next_fire_at = next_fire_at or (
+            self._cron.next_after(self.created_at) if self._cron
+            else self.created_at + timedelta(seconds=interval_seconds)
+        )
+
+    def next_fire_after(self, after: datetime) -> datetime:
+        """Próximo disparo posterior a ``after`` (intervalos mantêm a fase original)"""
+        if self._cron:
+            return self._cron.next_after(after)
+
+        anchor = self.next_fire_at
+        interval = timedelta(seconds=self.interval_seconds)
+        if anchor > after:
+            return anchor
+        periods = int((after - anchor) / interval) + 1
+        return anchor + periods * interval
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converter para dicionário"""
+        return {
+            'id': str(self.id),
+            'workflow_id': str(self.workflow_id),
+            'user_id': str(self.user_id),
+            'cron_expression': self.cron_expression,
+            'interval_seconds': self.interval_seconds,
+            'input_data': self.input_data,
+            'jitter_seconds': self.jitter_seconds,
+            'enabled': self.enabled,
+            'next_fire_at': self.next_fire_at.isoformat(),
+            'last_fired_at': self.last_fired_at.isoformat() if self.last_fired_at else None,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'WorkflowSchedule':
+        """Criar a partir de dicionário"""
+        return cls(
+            id=UUID(data['id']),
+            workflow_id=UUID(data['workflow_id']),
+            user_id=UUID(data['user_id']),
+            cron_expression=data.get('cron_expression'),
+            interval_seconds=data.get('interval_seconds'),
+            input_data=data.get('input_data') or {},
+            jitter_seconds=data.get('jitter_seconds') or 0,
+            enabled=data.get('enabled', True),
+            next_fire_at=_parse_datetime(data.get('next_fire_at')),
+            last_fired_at=_parse_datetime(data.get('last_fired_at')),
+            created_at=_parse_datetime(data.get('created_at')),
+            updated_at=_parse_datetime(data.get('updated_at'))
+        )
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    # Datas em UTC sem tzinfo, como no restante do domínio
+    if not value:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
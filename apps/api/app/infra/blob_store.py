@@ -0,0 +1,196 @@
+"""
+Blob Store
+Armazenamento endereçado por conteúdo para payloads grandes de execuções
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import re
+import tempfile
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+BLOB_REF_KEY = '$blob'
+BLOB_REF_SIGNATURE_KEY = '$sig'
+
+_DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class BlobNotFoundError(Exception):
+    """Blob referenciado não existe no armazenamento"""
+
+
+def is_valid_digest(digest: Any) -> bool:
+    """SHA-256 em hexadecimal minúsculo (único formato aceito para montar caminhos/chaves)"""
+    return isinstance(digest, str) and _DIGEST_RE.match(digest) is not None
+
+
+class BlobStore(ABC):
+    """Interface de armazenamento de blobs imutáveis endereçados pelo SHA-256 do conteúdo"""
+
+    @abstractmethod
+    async def put(self, data: bytes) -> str:
+        pass
+
+    @abstractmethod
+    async def get(self, digest: str) -> bytes:
+        pass
+
+    @abstractmethod
+    async def exists(self, digest: str) -> bool:
+        pass
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Backend em sistema de arquivos.
+
+    Cada blob é gravado uma única vez, comprimido com zlib, em
+    ``<root>/<ab>/<cd>/<digest>``; conteúdo repetido reaproveita o arquivo.
+    A escrita usa arquivo temporário + ``os.replace`` para nunca expor blobs
+    parciais.
+    """
+
+    def __init__(self, root: Optional[str] = None, compression_level: int = 6):
+        self.root = Path(root or settings.BLOB_STORE_PATH)
+        self.compression_level = compression_level
+
+    def _path(self, digest: str) -> Path:
+        if not is_valid_digest(digest):
+            raise ValueError("Digest de blob inválido")
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    async def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        await asyncio.to_thread(self._write, digest, data)
+        return digest
+
+    def _write(self, digest: str, data: bytes):
+        path = self._path(digest)
+        if path.exists():
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(zlib.compress(data, self.compression_level))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    async def get(self, digest: str) -> bytes:
+        return await asyncio.to_thread(self._read, digest)
+
+    def _read(self, digest: str) -> bytes:
+        try:
+            compressed = self._path(digest).read_bytes()
+        except FileNotFoundError as e:
+            raise BlobNotFoundError(f"Blob '{digest}' não encontrado") from e
+        return zlib.decompress(compressed)
+
+    async def exists(self, digest: str) -> bool:
+        return await asyncio.to_thread(self._path(digest).exists)
+
+
+class PayloadStore:
+    """
+    Externaliza valores JSON grandes para o ``BlobStore``.
+
+    Valores acima de ``inline_threshold_bytes`` (JSON serializado) são
+    substituídos por uma referência ``{"$blob": <sha256>, "size": <bytes>,
+    "$sig": <hmac>}``; valores menores continuam inline. Leitores resolvem
+    referências sob demanda.
+
+    Outputs de agentes não são confiáveis e podem conter um dict com
+    ``"$blob"``: só conta como referência o que traz a assinatura HMAC
+    gerada por este armazenamento (chave compartilhada entre processos) e um
+    digest válido; o resto é dado comum.
+    """
+
+    def __init__(
+        self,
+        blob_store: Optional[BlobStore] = None,
+        inline_threshold_bytes: Optional[int] = None,
+        signing_key: Optional[str] = None
+    ):
+        self.blob_store = blob_store or LocalBlobStore()
+        self.inline_threshold_bytes = (
+            inline_threshold_bytes if inline_threshold_bytes is not None
+            else settings.PAYLOAD_INLINE_THRESHOLD_BYTES
+        )
+        key = signing_key or settings.BLOB_REF_SIGNING_KEY or settings.JWT_SECRET_KEY
+        self._signing_key = key.encode('utf-8')
+        self.stats = {'externalized': 0, 'externalized_bytes': 0, 'resolved': 0}
+
+    def _sign(self, digest: str, size: int) -> str:
+        return hmac.new(self._signing_key, f'{digest}:{size}'.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def is_ref(self, value: Any) -> bool:
+        if not isinstance(value, dict) or set(value) != {BLOB_REF_KEY, 'size', BLOB_REF_SIGNATURE_KEY}:
+            return False
+        digest, size, signature = value[BLOB_REF_KEY], value['size'], value[BLOB_REF_SIGNATURE_KEY]
+        return (
+            is_valid_digest(digest)
+            and isinstance(size, int)
+            and isinstance(signature, str)
+            and hmac.compare_digest(signature, self._sign(digest, size))
+        )
+
+    async def externalize(self, value: Any) -> Any:
+        """Gravar o valor como blob se exceder o limite; retorna o valor ou a referência"""
+        if value is None or self.is_ref(value):
+            return value
+
+        data = json.dumps(value, separators=(',', ':'), default=str).encode('utf-8')
+        if len(data) <= self.inline_threshold_bytes:
+            return value
+
+        digest = await self.blob_store.put(data)
+        self.stats['externalized'] += 1
+        self.stats['externalized_bytes'] += len(data)
+        return {BLOB_REF_KEY: digest, 'size': len(data), BLOB_REF_SIGNATURE_KEY: self._sign(digest, len(data))}
+
+    async def resolve(self, value: Any) -> Any:
+        """Carregar o conteúdo de uma referência (valores inline retornam como estão)"""
+        if not self.is_ref(value):
+            return value
+
+        data = await self.blob_store.get(value[BLOB_REF_KEY])
+        self.stats['resolved'] += 1
+        return json.loads(data)
+
+    async def externalize_field(self, record: Optional[Dict[str, Any]], field: str) -> Optional[Dict[str, Any]]:
+        """Cópia rasa de ``record`` com ``field`` externalizado"""
+        if not isinstance(record, dict) or record.get(field) is None:
+            return record
+        return {**record, field: await self.externalize(record[field])}
+
+    async def resolve_field(self, record: Optional[Dict[str, Any]], field: str) -> Optional[Dict[str, Any]]:
+        """Resolver ``field`` de ``record`` no lugar"""
+        if isinstance(record, dict) and self.is_ref(record.get(field)):
+            record[field] = await self.resolve(record[field])
+        return record
+
+
+_payload_store: Optional[PayloadStore] = None
+
+
+def get_payload_store() -> PayloadStore:
+    """Obter armazenamento global de payloads"""
+    global _payload_store
+    if _payload_store is None:
+        _payload_store = PayloadStore()
+    return _payload_store
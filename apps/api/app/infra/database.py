@@ -0,0 +1,249 @@
+"""
+Camada assíncrona de acesso a dados sobre o cliente síncrono do Supabase.
+
+O cliente ``supabase-py`` usado pelos repositórios é síncrono: cada ``.execute()``
+bloqueia o event loop durante todo o round trip de rede. Este módulo executa as
+queries em um pool de threads dedicado (compartilhando o pool de conexões HTTP
+do cliente), limita queries simultâneas, aplica timeout por query e coleta
+métricas de latência por tabela e operação.
+"""
+import asyncio
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+# Métodos do query builder que definem a operação da query
+_OPERATIONS = ('select', 'insert', 'upsert', 'update', 'delete', 'rpc')
+
+
+class QueryTimeoutError(Exception):
+    """Query excedeu o timeout configurado"""
+
+
+class _OperationStats:
+    """Estatísticas de latência de uma combinação tabela/operação"""
+
+    def __init__(self, sample_size: int = 500):
+        self.count = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.total_wait_ms = 0.0
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+
+    def record(self, latency_ms: float, wait_ms: float, error: bool = False, timeout: bool = False):
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        self.total_wait_ms += wait_ms
+        self.samples.append(latency_ms)
+        if error:
+            self.errors += 1
+        if timeout:
+            self.timeouts += 1
+
+    def _percentile(self, percentile: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(percentile * (len(ordered) - 1))))
+        return ordered[index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'avg_ms': round(self.total_ms / self.count, 2) if self.count else 0.0,
+            'p50_ms': round(self._percentile(0.50), 2),
+            'p95_ms': round(self._percentile(0.95), 2),
+            'max_ms': round(self.max_ms, 2),
+            'avg_wait_ms': round(self.total_wait_ms / self.count, 2) if self.count else 0.0
+        }
+
+
+class QueryExecutor:
+    """Executor compartilhado que tira as queries síncronas do event loop"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        default_timeout_seconds: Optional[float] = None
+    ):
+        self.max_workers = max_workers or settings.DB_EXECUTOR_THREADS
+        self.max_in_flight = max_in_flight or settings.DB_MAX_IN_FLIGHT_QUERIES
+        self.default_timeout_seconds = default_timeout_seconds or settings.DB_QUERY_TIMEOUT_SECONDS
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='supabase-query')
+        self._semaphores: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = weakref.WeakKeyDictionary()
+        self._stats: Dict[str, _OperationStats] = {}
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # Queries que estouraram o timeout mas ainda ocupam uma thread do pool
+        self._timed_out_running = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Um semáforo por event loop (testes e workers podem usar loops distintos)
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def run(
+        self,
+        func: Callable[[], Any],
+        table: str,
+        operation: str,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """Executar ``func`` (ex.: ``builder.execute``) fora do event loop"""
+        timeout = timeout or self.default_timeout_seconds
+        queued_at = time.perf_counter()
+
+        # O slot só é devolvido quando a thread termina: uma query que estourou o
+        # timeout continua rodando no pool e segue contando no limite
+        semaphore = self._get_semaphore()
+        await semaphore.acquire()
+        started_at = time.perf_counter()
+        wait_ms = (started_at - queued_at) * 1000
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._executor, func)
+        except BaseException:
+            semaphore.release()
+            raise
+        self._in_flight += 1
+        timed_out = False
+
+        def release(done: asyncio.Future):
+            self._in_flight -= 1
+            if timed_out:
+                self._timed_out_running -= 1
+            if not done.cancelled():
+                done.exception()  # evita "exception was never retrieved" de queries abandonadas
+            semaphore.release()
+
+        future.add_done_callback(release)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            if not future.done():
+                timed_out = True
+                self._timed_out_running += 1
+            self._record(table, operation, started_at, wait_ms, error=True, timeout=True)
+            logger.warning("Query excedeu timeout", table=table, operation=operation, timeout_seconds=timeout)
+            raise QueryTimeoutError(f"Query em '{table}' ({operation}) excedeu {timeout}s")
+        except Exception:
+            self._record(table, operation, started_at, wait_ms, error=True)
+            raise
+
+        self._record(table, operation, started_at, wait_ms)
+        return result
+
+    def _record(self, table: str, operation: str, started_at: float, wait_ms: float, error: bool = False, timeout: bool = False):
+        latency_ms = (time.perf_counter() - started_at) * 1000
+        key = f"{table}.{operation}"
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _OperationStats()
+            stats.record(latency_ms, wait_ms, error=error, timeout=timeout)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas de latência por tabela/operação"""
+        with self._lock:
+            operations = {key: stats.to_dict() for key, stats in sorted(self._stats.items())}
+        return {
+            'in_flight': self._in_flight,
+            'timed_out_running': self._timed_out_running,
+            'max_in_flight': self.max_in_flight,
+            'max_workers': self.max_workers,
+            'default_timeout_seconds': self.default_timeout_seconds,
+            'operations': operations
+        }
+
+    def reset_metrics(self):
+        with self._lock:
+            self._stats.clear()
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+class AsyncQuery:
+    """Proxy do query builder do Supabase cujo ``execute()`` é awaitable"""
+
+    def __init__(self, executor: QueryExecutor, builder: Any, table: str, operation: Optional[str] = None):
+        self._executor = executor
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            operation = self._operation or (name if name in _OPERATIONS else None)
+            return AsyncQuery(self._executor, attr(*args, **kwargs), self._table, operation)
+
+        return chained
+
+    async def execute(self, timeout: Optional[float] = None) -> Any:
+        return await self._executor.run(
+            self._builder.execute,
+            table=self._table,
+            operation=self._operation or 'select',
+            timeout=timeout
+        )
+
+
+class AsyncSupabase:
+    """Fachada assíncrona de um cliente Supabase síncrono"""
+
+    def __init__(self, client: Any, executor: Optional[QueryExecutor] = None):
+        self.client = client
+        self.executor = executor or get_query_executor()
+
+    def table(self, name: str) -> AsyncQuery:
+        return AsyncQuery(self.executor, self.client.table(name), name)
+
+    def rpc(self, function_name: str, params: Optional[Dict[str, Any]] = None) -> AsyncQuery:
+        return AsyncQuery(self.executor, self.client.rpc(function_name, params or {}), function_name, 'rpc')
+
+    async def run(self, func: Callable[[], Any], table: str, operation: str, timeout: Optional[float] = None) -> Any:
+        """Executar chamada síncrona arbitrária do cliente (ex.: storage, auth)"""
+        return await self.executor.run(func, table, operation, timeout)
+
+
+_query_executor: Optional[QueryExecutor] = None
+
+
+def get_query_executor() -> QueryExecutor:
+    """Obter executor global de queries"""
+    global _query_executor
+    if _query_executor is None:
+        _query_executor = QueryExecutor()
+    return _query_executor
+
+
+def get_async_supabase(client: Any) -> Optional[AsyncSupabase]:
+    """Envolver cliente Supabase síncrono (``None`` se não houver cliente)"""
+    if client is None:
+        return None
+    return AsyncSupabase(client)
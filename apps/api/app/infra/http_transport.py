@@ -0,0 +1,262 @@
+"""
+Transporte HTTP de saída compartilhado pelo processo.
+
+Agentes, conectores e clientes de infraestrutura criavam um ``httpx.AsyncClient``
+próprio (alguns a cada chamada), sem reaproveitar conexões entre si: cada
+chamada curta pagava um novo handshake TCP/TLS. Este módulo mantém um único
+pool de conexões (keep-alive e HTTP/2 opcionais), limita conexões simultâneas
+por host, coleta métricas de latência, erros e espera por vaga por host e
+drena as requisições em andamento no desligamento. Os clientes emprestados
+são leves: cada um guarda só sua configuração (headers, timeout, hooks) e
+fechá-los não fecha o pool.
+"""
+import asyncio
+import time
+import weakref
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+import httpx
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+
+class _HostStats:
+    """Latência, erros e espera por vaga de conexão de um host"""
+
+    def __init__(self, sample_size: int = 500):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+
+    def record(self, latency_ms: float, wait_ms: float, error: bool = False):
+        self.requests += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self.samples.append(latency_ms)
+        if error:
+            self.errors += 1
+
+    def _percentile(self, percentile: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(percentile * (len(ordered) - 1))))
+        return ordered[index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'avg_ms': round(self.total_ms / self.requests, 2) if self.requests else 0.0,
+            'p50_ms': round(self._percentile(0.50), 2),
+            'p95_ms': round(self._percentile(0.95), 2),
+            'max_ms': round(self.max_ms, 2),
+            'avg_pool_wait_ms': round(self.total_wait_ms / self.requests, 2) if self.requests else 0.0,
+            'max_pool_wait_ms': round(self.max_wait_ms, 2)
+        }
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Corpo da resposta que devolve a vaga do host quando é fechado"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._on_close()
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """Transporte entregue aos clientes: mede e limita por host; ``aclose`` não fecha o pool"""
+
+    def __init__(self, manager: 'HttpTransportManager'):
+        self._manager = manager
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._manager._handle(request)
+
+    async def aclose(self):
+        # O pool pertence ao gerenciador (fechado no desligamento da aplicação)
+        pass
+
+
+class HttpTransportManager:
+    """Pool de conexões HTTP de saída único do processo"""
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        max_connections_per_host: Optional[int] = None,
+        http2: Optional[bool] = None
+    ):
+        self.max_connections = max_connections or settings.HTTP_MAX_CONNECTIONS
+        self.max_keepalive_connections = max_keepalive_connections or settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        self.keepalive_expiry = keepalive_expiry or settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        self.max_connections_per_host = max_connections_per_host or settings.HTTP_MAX_CONNECTIONS_PER_HOST
+        self.http2 = settings.HTTP2_ENABLED if http2 is None else http2
+
+        self._transport = transport
+        self._shared = _SharedTransport(self)
+        self._host_semaphores: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]' = weakref.WeakKeyDictionary()
+        self._stats: Dict[str, _HostStats] = {}
+        self._in_flight = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._draining = False
+
+    def _get_transport(self) -> httpx.AsyncBaseTransport:
+        if self._transport is None:
+            http2 = self.http2
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+                    http2 = False
+            self._transport = httpx.AsyncHTTPTransport(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                )
+            )
+        return self._transport
+
+    def client(self, **kwargs: Any) -> httpx.AsyncClient:
+        """
+        Cliente leve sobre o pool compartilhado.
+
+        Aceita os argumentos usuais do ``httpx.AsyncClient`` (``base_url``,
+        ``headers``, ``timeout``, ``event_hooks``...); o transporte é sempre o
+        compartilhado.
+        """
+        kwargs.setdefault('timeout', 30.0)
+        return httpx.AsyncClient(transport=self._shared, **kwargs)
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        # Semáforos por event loop (testes e workers podem usar loops distintos)
+        loop = asyncio.get_running_loop()
+        semaphores = self._host_semaphores.get(loop)
+        if semaphores is None:
+            semaphores = self._host_semaphores[loop] = {}
+        semaphore = semaphores.get(host)
+        if semaphore is None:
+            semaphore = semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return semaphore
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        if self._draining:
+            raise httpx.ConnectError("HTTP transport is shutting down", request=request)
+
+        host = request.url.netloc.decode('ascii', 'replace')
+        stats = self._stats.get(host)
+        if stats is None:
+            stats = self._stats[host] = _HostStats()
+        semaphore = self._host_semaphore(host)
+
+        queued_at = time.perf_counter()
+        await semaphore.acquire()
+        started = time.perf_counter()
+        wait_ms = (started - queued_at) * 1000
+        self._track(stats, 1)
+
+        released = False
+
+        def release(error: bool = False):
+            nonlocal released
+            if released:
+                return
+            released = True
+            semaphore.release()
+            self._track(stats, -1)
+            stats.record((time.perf_counter() - started) * 1000, wait_ms, error)
+
+        try:
+            response = await self._get_transport().handle_async_request(request)
+        except BaseException:
+            release(error=True)
+            raise
+
+        # A vaga fica ocupada até o corpo ser lido/fechado (a conexão continua em uso)
+        error = response.status_code >= 500
+        if response.is_closed:
+            release(error)
+        else:
+            response.stream = _ReleasingStream(response.stream, lambda: release(error))
+        return response
+
+    def _track(self, stats: _HostStats, delta: int):
+        stats.in_flight += delta
+        self._in_flight += delta
+        if self._idle is not None and self._in_flight == 0:
+            self._idle.set()
+
+    async def aclose(self, drain_timeout: Optional[float] = None):
+        """
+        Recusar novas requisições, aguardar as em andamento e fechar o pool.
+
+        Depois de fechado o gerenciador volta a aceitar requisições com um pool
+        novo (ex.: ``lifespan`` reiniciado nos testes ou no reload).
+        """
+        self._draining = True
+        timeout = settings.HTTP_DRAIN_TIMEOUT_SECONDS if drain_timeout is None else drain_timeout
+
+        if self._in_flight:
+            self._idle = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning("HTTP transport closed with requests in flight", in_flight=self._in_flight)
+
+        try:
+            if self._transport is not None:
+                await self._transport.aclose()
+                self._transport = None
+        finally:
+            self._idle = None
+            self._draining = False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Uso do pool e métricas por host"""
+        return {
+            'http2': self.http2,
+            'max_connections': self.max_connections,
+            'max_connections_per_host': self.max_connections_per_host,
+            'in_flight': self._in_flight,
+            'draining': self._draining,
+            'hosts': {host: stats.to_dict() for host, stats in self._stats.items()}
+        }
+
+
+_http_transport: Optional[HttpTransportManager] = None
+
+
+def get_http_transport() -> HttpTransportManager:
+    """Obter o transporte HTTP compartilhado do processo"""
+    global _http_transport
+    if _http_transport is None:
+        _http_transport = HttpTransportManager()
+    return _http_transport
@@ -0,0 +1,221 @@
+"""
+Relay de mídia em streaming: download de uma URL direto para um upload multipart.
+
+Os agentes baixavam a mídia inteira para a memória (``response.content``) e
+só então a reenviavam; alguns vídeos grandes simultâneos bastavam para
+esgotar a memória do worker. Aqui o corpo do download segue em blocos de
+``chunk_size`` para o upload, com no máximo ``buffer_chunks`` blocos em
+trânsito. Quando o tamanho não é conhecido de antemão (sem Content-Length ou
+com Content-Encoding), a mídia passa por um ``SpooledTemporaryFile``: fica
+em memória até ``spool_threshold`` e vai para disco acima disso. Em ambos os
+casos o pico de memória por transferência não depende do tamanho do arquivo.
+"""
+import asyncio
+import os
+import secrets
+import tempfile
+from typing import Any, AsyncIterator, Dict, IO, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+import httpx
+
+from app.core.config import settings
+
+_END = object()
+
+
+class MediaDownloadError(Exception):
+    """A origem da mídia não respondeu com sucesso"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Erro ao baixar mídia: {status_code}")
+        self.status_code = status_code
+
+
+class MediaTooLargeError(Exception):
+    """A mídia excede o tamanho máximo permitido"""
+
+
+class MediaRelay:
+    """Transferência download -> upload multipart com memória limitada"""
+
+    def __init__(
+        self,
+        chunk_size: Optional[int] = None,
+        buffer_chunks: Optional[int] = None,
+        spool_threshold: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.chunk_size = chunk_size or settings.MEDIA_RELAY_CHUNK_SIZE_BYTES
+        self.buffer_chunks = buffer_chunks or settings.MEDIA_RELAY_BUFFER_CHUNKS
+        self.spool_threshold = spool_threshold or settings.MEDIA_RELAY_SPOOL_THRESHOLD_BYTES
+        self.max_bytes = max_bytes or settings.MEDIA_RELAY_MAX_BYTES
+
+    async def upload(
+        self,
+        client: httpx.AsyncClient,
+        source_url: str,
+        upload_url: str,
+        field_name: str,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        spool: bool = False
+    ) -> httpx.Response:
+        """
+        Baixa ``source_url`` e envia como o campo de arquivo ``field_name`` de
+        um POST multipart para ``upload_url`` (demais campos em ``data``).
+
+        ``spool=True`` força a passagem pelo arquivo temporário mesmo com
+        tamanho conhecido (libera a conexão de origem antes do upload).
+        """
+        async with client.stream('GET', source_url) as source:
+            if source.status_code != 200:
+                raise MediaDownloadError(source.status_code)
+
+            length = self._declared_length(source)
+            if length is not None and length > self.max_bytes:
+                raise MediaTooLargeError(f"Mídia com {length} bytes excede o limite de {self.max_bytes}")
+
+            content_type = content_type or source.headers.get('content-type', 'application/octet-stream')
+            filename = filename or self._filename(source_url)
+            boundary, prefix, suffix = self._multipart_envelope(field_name, filename, content_type, data)
+
+            if length is not None and not spool:
+                return await self._post(
+                    client, upload_url, headers, boundary,
+                    self._body(prefix, self._relay_chunks(source, length), suffix),
+                    len(prefix) + length + len(suffix)
+                )
+
+            spool_file = tempfile.SpooledTemporaryFile(max_size=self.spool_threshold)
+            try:
+                length = await self._spool(source, spool_file)
+            except BaseException:
+                spool_file.close()
+                raise
+
+        try:
+            await asyncio.to_thread(spool_file.seek, 0)
+            return await self._post(
+                client, upload_url, headers, boundary,
+                self._body(prefix, self._spooled_chunks(spool_file), suffix),
+                len(prefix) + length + len(suffix)
+            )
+        finally:
+            spool_file.close()
+
+    def _declared_length(self, source: httpx.Response) -> Optional[int]:
+        # Com Content-Encoding o Content-Length é do corpo comprimido, não da mídia
+        if source.headers.get('content-encoding', 'identity') != 'identity':
+            return None
+        length = source.headers.get('content-length', '')
+        return int(length) if length.isdigit() else None
+
+    def _filename(self, source_url: str) -> str:
+        name = os.path.basename(unquote(urlparse(source_url).path))
+        return name or 'media'
+
+    def _multipart_envelope(
+        self,
+        field_name: str,
+        filename: str,
+        content_type: str,
+        data: Optional[Dict[str, Any]]
+    ) -> Tuple[str, bytes, bytes]:
+        """Boundary, bytes antes do conteúdo do arquivo e bytes depois dele"""
+        boundary = secrets.token_hex(16)
+        filename = filename.replace('"', '').replace('\r', '').replace('\n', '')
+        parts = [
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+            for name, value in (data or {}).items()
+        ]
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        )
+        return boundary, ''.join(parts).encode('utf-8'), f'\r\n--{boundary}--\r\n'.encode('utf-8')
+
+    async def _post(
+        self,
+        client: httpx.AsyncClient,
+        upload_url: str,
+        headers: Optional[Dict[str, str]],
+        boundary: str,
+        body: AsyncIterator[bytes],
+        content_length: int
+    ) -> httpx.Response:
+        upload_headers = dict(headers or {})
+        upload_headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        upload_headers['Content-Length'] = str(content_length)
+        return await client.post(upload_url, headers=upload_headers, content=body)
+
+    async def _body(self, prefix: bytes, chunks: AsyncIterator[bytes], suffix: bytes) -> AsyncIterator[bytes]:
+        try:
+            yield prefix
+            async for chunk in chunks:
+                yield chunk
+            yield suffix
+        finally:
+            await chunks.aclose()
+
+    async def _relay_chunks(self, source: httpx.Response, expected: int) -> AsyncIterator[bytes]:
+        """Blocos do download com até ``buffer_chunks`` em trânsito (download e upload se sobrepõem)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.buffer_chunks)
+        errors = []
+
+        async def produce():
+            try:
+                async for chunk in source.aiter_bytes(self.chunk_size):
+                    await queue.put(chunk)
+            except Exception as e:
+                errors.append(e)
+            await queue.put(_END)
+
+        producer = asyncio.create_task(produce())
+        received = 0
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is _END:
+                    break
+                received += len(chunk)
+                if received > expected:
+                    raise httpx.ReadError(f"Download maior que o Content-Length declarado ({expected} bytes)")
+                yield chunk
+            if errors:
+                raise errors[0]
+            if received != expected:
+                raise httpx.ReadError(f"Download incompleto: {received} de {expected} bytes")
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    async def _spool(self, source: httpx.Response, spool_file: IO[bytes]) -> int:
+        """Grava o download no arquivo temporário; devolve o tamanho"""
+        size = 0
+        async for chunk in source.aiter_bytes(self.chunk_size):
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise MediaTooLargeError(f"Mídia excede o limite de {self.max_bytes} bytes")
+            await asyncio.to_thread(spool_file.write, chunk)
+        return size
+
+    async def _spooled_chunks(self, spool_file: IO[bytes]) -> AsyncIterator[bytes]:
+        while True:
+            chunk = await asyncio.to_thread(spool_file.read, self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+_media_relay: Optional[MediaRelay] = None
+
+
+def get_media_relay() -> MediaRelay:
+    """Obter o relay de mídia do processo"""
+    global _media_relay
+    if _media_relay is None:
+        _media_relay = MediaRelay()
+    return _media_relay
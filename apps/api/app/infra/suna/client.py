@@ -11,6 +11,8 @@ from urllib.parse import urljoin
 import asyncio
 from contextlib import asynccontextmanager
 
+from app.infra.http_transport import get_http_transport
+
 # Configurações do Suna Backend
 SUNA_API_URL = "http://157.180.39.41:8000/api"
 SUNA_WS_URL = "ws://157.180.39.41:8000/ws"
@@ -31,7 +33,7 @@ class SunaClient:
             if self.api_key:
                 headers["Authorization"] = f"Bearer {self.api_key}"
             
-            self._client = httpx.AsyncClient(
+            self._client = get_http_transport().client(
                 base_url=self.api_url,
                 headers=headers,
                 timeout=30.0
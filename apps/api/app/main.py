@@ -66,6 +66,15 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to start manifest cache service: {e}")
     
+    # Start workflow scheduler
+    if settings.WORKFLOW_SCHEDULER_ENABLED:
+        try:
+            from app.services.workflow_scheduler import get_workflow_scheduler
+            await get_workflow_scheduler().start()
+            logger.info("Workflow scheduler started")
+        except Exception as e:
+            logger.error(f"Failed to start workflow scheduler: {e}")
+    
     yield
     
     # Encerramento
@@ -87,8 +96,22 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error stopping manifest cache service: {e}")
     
-    # Fecha conexões
+    # Stop workflow scheduler
+    if settings.WORKFLOW_SCHEDULER_ENABLED:
+        try:
+            from app.services.workflow_scheduler import get_workflow_scheduler
+            await get_workflow_scheduler().stop()
+        except Exception as e:
+            logger.error(f"Error stopping workflow scheduler: {e}")
+    
+    # Fecha conexões (drena as requisições de saída em andamento antes de fechar o pool)
     await suna_client.close()
+    
+    from app.infra.http_transport import get_http_transport
+    await get_http_transport().aclose()
+    
+    from app.infra.database import get_query_executor
+    get_query_executor().shutdown(wait=False)
 
 
 # Cria aplicação FastAPI
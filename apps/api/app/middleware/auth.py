@@ -7,11 +7,11 @@ from fastapi import HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 from jwt.exceptions import InvalidTokenError, ExpiredSignatureError
-import httpx
 from datetime import datetime, timezone
 import logging
 
 from app.core.config import get_settings
+from app.infra.http_transport import get_http_transport
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
@@ -36,7 +36,7 @@ class JWTAuthMiddleware:
                 datetime.now(timezone.utc) < self._jwks_cache_expiry):
                 return self._jwks_cache
             
-            async with httpx.AsyncClient() as client:
+            async with get_http_transport().client() as client:
                 response = await client.get(
                     f"{self.supabase_url}/auth/v1/jwks",
                     headers={"apikey": self.supabase_anon_key}
@@ -3,7 +3,6 @@ JWT Authentication Middleware
 Middleware para autenticação JWT com integração Supabase
 """
 import jwt
-import httpx
 import json
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
@@ -12,6 +11,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import structlog
 
 from app.core.config import settings
+from app.infra.http_transport import get_http_transport
 
 logger = structlog.get_logger(__name__)
 
@@ -44,7 +44,7 @@ class JWTAuthMiddleware:
             # Buscar JWKS do Supabase
             jwks_url = f"{self.supabase_url}/auth/v1/jwks"
             
-            async with httpx.AsyncClient() as client:
+            async with get_http_transport().client() as client:
                 response = await client.get(jwks_url, timeout=10.0)
                 response.raise_for_status()
                 
@@ -9,6 +9,7 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID
 
 from app.domain.agent import Agent, AgentCapability, AgentPolicy, AgentDependency
+from app.infra.database import get_async_supabase
 
 
 class AgentRepository:
@@ -16,6 +17,7 @@ class AgentRepository:
     
     def __init__(self, supabase_client=None):
         self.supabase = supabase_client
+        self.db = get_async_supabase(supabase_client)
     
     async def save(self, agent: Agent) -> Agent:
         """Salvar agente no banco de dados"""
@@ -42,7 +44,7 @@ class AgentRepository:
         
         # Upsert no Supabase
         if self.supabase:
-            result = self.supabase.table('agents_registry').upsert(agent_data).execute()
+            result = await self.db.table('agents_registry').upsert(agent_data).execute()
             if result.data:
                 return await self._map_to_domain(result.data[0])
         
@@ -54,7 +56,7 @@ class AgentRepository:
         if not self.supabase:
             return None
         
-        result = self.supabase.table('agents_registry').select('*').eq('id', str(agent_id)).execute()
+        result = await self.db.table('agents_registry').select('*').eq('id', str(agent_id)).execute()
         
         if result.data:
             return await self._map_to_domain(result.data[0])
@@ -71,7 +73,7 @@ class AgentRepository:
         if not self.supabase:
             return None
         
-        query = self.supabase.table('agents_registry').select('*').eq('agent_id', agent_id)
+        query = self.db.table('agents_registry').select('*').eq('agent_id', agent_id)
         
         if version == "latest":
             # Buscar a versão mais recente ativa
@@ -79,13 +81,36 @@ class AgentRepository:
         else:
             query = query.eq('version', version)
         
-        result = query.execute()
+        result = await query.execute()
         
         if result.data:
             return await self._map_to_domain(result.data[0])
         
         return None
     
+    async def find_latest_by_agent_ids(self, agent_ids: List[str]) -> Dict[str, Agent]:
+        """Buscar a versão ativa mais recente de vários agentes em uma única consulta"""
+        
+        if not self.supabase or not agent_ids:
+            return {}
+        
+        result = await (
+            self.db.table('agents_registry')
+            .select('*')
+            .in_('agent_id', sorted(set(agent_ids)))
+            .eq('status', 'active')
+            .order('created_at', desc=True)
+            .execute()
+        )
+        
+        # Linhas ordenadas da mais recente: a primeira de cada agent_id prevalece
+        agents: Dict[str, Agent] = {}
+        for row in result.data:
+            if row['agent_id'] not in agents:
+                agents[row['agent_id']] = await self._map_to_domain(row)
+        
+        return agents
+    
     async def find_all(
         self, 
         status: Optional[str] = None,
@@ -98,7 +123,7 @@ class AgentRepository:
         if not self.supabase:
             return []
         
-        query = self.supabase.table('agents_registry').select('*')
+        query = self.db.table('agents_registry').select('*')
         
         # Aplicar filtros
         if status:
@@ -109,7 +134,7 @@ class AgentRepository:
         
         query = query.order('created_at', desc=True).range(offset, offset + limit - 1)
         
-        result = query.execute()
+        result = await query.execute()
         
         agents = []
         for row in result.data:
@@ -131,8 +156,8 @@ class AgentRepository:
         if not self.supabase:
             return []
         
-        result = (
-            self.supabase.table('agents_registry')
+        result = await (
+            self.db.table('agents_registry')
             .select('*')
             .eq('agent_id', agent_id)
             .order('created_at', desc=True)
@@ -159,7 +184,7 @@ class AgentRepository:
         
         # Busca por nome, descrição ou agent_id
         supabase_query = (
-            self.supabase.table('agents_registry')
+            self.db.table('agents_registry')
             .select('*')
             .or_(f'name.ilike.%{query}%,description.ilike.%{query}%,agent_id.ilike.%{query}%')
         )
@@ -169,7 +194,7 @@ class AgentRepository:
         
         supabase_query = supabase_query.order('created_at', desc=True).limit(limit)
         
-        result = supabase_query.execute()
+        result = await supabase_query.execute()
         
         agents = []
         for row in result.data:
@@ -191,7 +216,7 @@ class AgentRepository:
         if not self.supabase:
             return False
         
-        result = self.supabase.table('agents_registry').delete().eq('id', str(agent_id)).execute()
+        result = await self.db.table('agents_registry').delete().eq('id', str(agent_id)).execute()
         
         return len(result.data) > 0
     
@@ -201,8 +226,8 @@ class AgentRepository:
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('agents_registry')
+        result = await (
+            self.db.table('agents_registry')
             .select('id')
             .eq('id', str(agent_id))
             .limit(1)
@@ -217,8 +242,8 @@ class AgentRepository:
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('agents_registry')
+        result = await (
+            self.db.table('agents_registry')
             .select('id')
             .eq('agent_id', agent_id)
             .eq('version', version)
@@ -7,12 +7,14 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID
 
 from app.domain.credentials import UserCredential, OAuthFlow, ProviderType, CredentialStatus
+from app.infra.database import get_async_supabase
 
 class CredentialsRepository:
     """Repository para acesso aos dados de credenciais no Supabase"""
     
     def __init__(self, supabase_client=None):
         self.supabase = supabase_client
+        self.db = get_async_supabase(supabase_client)
     
     async def save_credential(self, credential: UserCredential) -> UserCredential:
         """Salvar credencial no banco de dados"""
@@ -40,7 +42,7 @@ class CredentialsRepository:
         
         # Upsert no Supabase
         if self.supabase:
-            result = self.supabase.table('user_credentials').upsert(credential_data).execute()
+            result = await self.db.table('user_credentials').upsert(credential_data).execute()
             if result.data:
                 return await self._map_credential_to_domain(result.data[0])
         
@@ -51,8 +53,8 @@ class CredentialsRepository:
         if not self.supabase:
             return None
         
-        result = (
-            self.supabase.table('user_credentials')
+        result = await (
+            self.db.table('user_credentials')
             .select('*')
             .eq('id', str(credential_id))
             .eq('user_id', str(user_id))
@@ -76,7 +78,7 @@ class CredentialsRepository:
             return []
         
         query = (
-            self.supabase.table('user_credentials')
+            self.db.table('user_credentials')
             .select('*')
             .eq('user_id', str(user_id))
         )
@@ -88,7 +90,7 @@ class CredentialsRepository:
             query = query.eq('status', status.value)
         
         query = query.order('created_at', desc=True).range(offset, offset + limit - 1)
-        result = query.execute()
+        result = await query.execute()
         
         credentials = []
         for row in result.data:
@@ -100,8 +102,8 @@ class CredentialsRepository:
         if not self.supabase:
             return None
         
-        result = (
-            self.supabase.table('user_credentials')
+        result = await (
+            self.db.table('user_credentials')
             .select('*')
             .eq('user_id', str(user_id))
             .eq('name', name)
@@ -122,8 +124,8 @@ class CredentialsRepository:
         from datetime import datetime, timedelta
         limit_date = (datetime.utcnow() + timedelta(days=days_ahead)).isoformat()
         
-        result = (
-            self.supabase.table('user_credentials')
+        result = await (
+            self.db.table('user_credentials')
             .select('*')
             .not_.is_('expires_at', 'null')
             .lte('expires_at', limit_date)
@@ -145,8 +147,8 @@ class CredentialsRepository:
         cutoff_date = (datetime.utcnow() - timedelta(hours=max_age_hours)).isoformat()
         
         # Credenciais que nunca foram validadas ou validadas há muito tempo
-        result = (
-            self.supabase.table('user_credentials')
+        result = await (
+            self.db.table('user_credentials')
             .select('*')
             .or_(
                 f'last_validated_at.is.null,last_validated_at.lt.{cutoff_date},status.eq.pending_validation'
@@ -165,8 +167,8 @@ class CredentialsRepository:
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('user_credentials')
+        result = await (
+            self.db.table('user_credentials')
             .update({
                 'status': 'revoked',
                 'updated_at': datetime.utcnow().isoformat(),
@@ -184,8 +186,8 @@ class CredentialsRepository:
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('user_credentials')
+        result = await (
+            self.db.table('user_credentials')
             .select('id')
             .eq('id', str(credential_id))
             .limit(1)
@@ -208,7 +210,7 @@ class CredentialsRepository:
         }
         
         if self.supabase:
-            result = self.supabase.table('oauth_flows').upsert(flow_data).execute()
+            result = await self.db.table('oauth_flows').upsert(flow_data).execute()
             if result.data:
                 return await self._map_oauth_flow_to_domain(result.data[0])
         
@@ -219,8 +221,8 @@ class CredentialsRepository:
         if not self.supabase:
             return None
         
-        result = (
-            self.supabase.table('oauth_flows')
+        result = await (
+            self.db.table('oauth_flows')
             .select('*')
             .eq('state', state)
             .limit(1)
@@ -236,8 +238,8 @@ class CredentialsRepository:
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('oauth_flows')
+        result = await (
+            self.db.table('oauth_flows')
             .delete()
             .eq('id', str(flow_id))
             .execute()
@@ -251,8 +253,8 @@ class CredentialsRepository:
             return 0
         
         current_time = datetime.utcnow().isoformat()
-        result = (
-            self.supabase.table('oauth_flows')
+        result = await (
+            self.db.table('oauth_flows')
             .delete()
             .lt('expires_at', current_time)
             .execute()
@@ -272,8 +274,8 @@ class CredentialsRepository:
             }
         
         # Query para estatísticas básicas
-        result = (
-            self.supabase.table('user_credentials')
+        result = await (
+            self.db.table('user_credentials')
             .select('status, provider')
             .eq('user_id', str(user_id))
             .execute()
@@ -2,42 +2,60 @@
 Repository for multi-agent execution data access
 Camada de infraestrutura para acesso aos dados de execuções no Supabase
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 
-from app.domain.execution import MultiAgentExecution, ExecutionPlan, ExecutionStatus
+from app.domain.execution import MultiAgentExecution, ExecutionPlan, ExecutionStep, ExecutionStatus
+from app.infra.blob_store import PayloadStore, get_payload_store
+from app.infra.database import get_async_supabase
+
+# Colunas das listagens: sem results/execution_logs (detalhes são carregados por ID)
+EXECUTION_SUMMARY_COLUMNS = (
+    'id, user_id, plan_data, input_data, context, status, started_at, '
+    'completed_at, error_message, created_at, updated_at'
+)
 
 class ExecutionRepository:
     """Repository para acesso aos dados de execuções multi-agente no Supabase"""
     
-    def __init__(self, supabase_client=None):
+    def __init__(self, supabase_client=None, payload_store: Optional[PayloadStore] = None):
         self.supabase = supabase_client
+        self.db = get_async_supabase(supabase_client)
+        # Outputs grandes viram referências a blobs; carregados sob demanda
+        self.payloads = payload_store or get_payload_store()
     
     async def save_execution(self, execution: MultiAgentExecution) -> MultiAgentExecution:
         """Salvar execução no banco de dados"""
+        plan_data = execution.plan.to_dict()
+        plan_data['steps'] = [
+            await self.payloads.externalize_field(step_data, 'output_data')
+            for step_data in plan_data['steps']
+        ]
+        results = {
+            step_id: await self.payloads.externalize_field(result, 'data')
+            for step_id, result in execution.results.items()
+        }
+        
         execution_data = {
             'id': str(execution.execution_id),
             'user_id': str(execution.user_id),
-            'plan_data': execution.plan.to_dict(),
+            'plan_data': plan_data,
             'input_data': execution.input_data,
             'context': execution.context,
             'status': execution.status.value,
             'started_at': execution.started_at.isoformat() if execution.started_at else None,
             'completed_at': execution.completed_at.isoformat() if execution.completed_at else None,
             'error_message': execution.error_message,
-            'results': execution.results,
+            'results': results,
             'execution_logs': execution.execution_logs,
+            'created_at': execution.created_at.isoformat(),
             'updated_at': execution.updated_at.isoformat()
         }
         
-        # Se é nova execução, incluir created_at
-        if not await self.execution_exists(execution.execution_id):
-            execution_data['created_at'] = execution.created_at.isoformat()
-        
-        # Upsert no Supabase
+        # Upsert no Supabase (created_at é estável no domínio, dispensando consulta prévia)
         if self.supabase:
-            result = self.supabase.table('multi_agent_executions').upsert(execution_data).execute()
+            result = await self.db.table('multi_agent_executions').upsert(execution_data).execute()
             if result.data:
                 return await self._map_execution_to_domain(result.data[0])
         
@@ -48,15 +66,16 @@ class ExecutionRepository:
         if not self.supabase:
             return None
         
-        result = (
-            self.supabase.table('multi_agent_executions')
+        result = await (
+            self.db.table('multi_agent_executions')
             .select('*')
             .eq('id', str(execution_id))
             .execute()
         )
         
         if result.data:
-            return await self._map_execution_to_domain(result.data[0])
+            execution = await self._map_execution_to_domain(result.data[0])
+            return await self.load_execution_deltas(execution)
         return None
     
     async def find_executions_by_user(
@@ -71,8 +90,8 @@ class ExecutionRepository:
             return []
         
         query = (
-            self.supabase.table('multi_agent_executions')
-            .select('*')
+            self.db.table('multi_agent_executions')
+            .select(EXECUTION_SUMMARY_COLUMNS)
             .eq('user_id', str(user_id))
         )
         
@@ -80,7 +99,7 @@ class ExecutionRepository:
             query = query.eq('status', status.value)
         
         query = query.order('created_at', desc=True).range(offset, offset + limit - 1)
-        result = query.execute()
+        result = await query.execute()
         
         executions = []
         for row in result.data:
@@ -92,8 +111,8 @@ class ExecutionRepository:
         if not self.supabase:
             return []
         
-        result = (
-            self.supabase.table('multi_agent_executions')
+        result = await (
+            self.db.table('multi_agent_executions')
             .select('*')
             .eq('status', 'running')
             .execute()
@@ -101,7 +120,8 @@ class ExecutionRepository:
         
         executions = []
         for row in result.data:
-            executions.append(await self._map_execution_to_domain(row))
+            execution = await self._map_execution_to_domain(row)
+            executions.append(await self.load_execution_deltas(execution))
         return executions
     
     async def find_executions_by_status(
@@ -114,9 +134,9 @@ class ExecutionRepository:
         if not self.supabase:
             return []
         
-        result = (
-            self.supabase.table('multi_agent_executions')
-            .select('*')
+        result = await (
+            self.db.table('multi_agent_executions')
+            .select(EXECUTION_SUMMARY_COLUMNS)
             .eq('status', status.value)
             .order('created_at', desc=True)
             .range(offset, offset + limit - 1)
@@ -140,9 +160,9 @@ class ExecutionRepository:
         if not self.supabase:
             return []
         
-        result = (
-            self.supabase.table('multi_agent_executions')
-            .select('*')
+        result = await (
+            self.db.table('multi_agent_executions')
+            .select(EXECUTION_SUMMARY_COLUMNS)
             .eq('user_id', str(user_id))
             .gte('created_at', start_date.isoformat())
             .lte('created_at', end_date.isoformat())
@@ -169,8 +189,8 @@ class ExecutionRepository:
             }
         
         # Query para estatísticas básicas
-        result = (
-            self.supabase.table('multi_agent_executions')
+        result = await (
+            self.db.table('multi_agent_executions')
             .select('status, started_at, completed_at')
             .eq('user_id', str(user_id))
             .execute()
@@ -225,8 +245,8 @@ class ExecutionRepository:
         
         cutoff_date = (datetime.utcnow() - timedelta(days=days_old)).isoformat()
         
-        result = (
-            self.supabase.table('multi_agent_executions')
+        result = await (
+            self.db.table('multi_agent_executions')
             .delete()
             .lt('created_at', cutoff_date)
             .in_('status', ['completed', 'failed', 'cancelled'])
@@ -235,13 +255,194 @@ class ExecutionRepository:
         
         return len(result.data)
     
+    async def update_execution_fields(self, execution_id: UUID, fields: Dict[str, Any]) -> None:
+        """Atualizar apenas colunas escalares da execução"""
+        if not self.supabase or not fields:
+            return
+        
+        await (
+            self.db.table('multi_agent_executions')
+            .update(fields)
+            .eq('id', str(execution_id))
+            .execute()
+        )
+    
+    async def append_step_deltas(self, execution_id: UUID, step_records: List[Dict[str, Any]]) -> None:
+        """Anexar snapshots de estado/resultado de passos"""
+        if not self.supabase or not step_records:
+            return
+        
+        rows = [
+            {
+                'execution_id': str(execution_id),
+                'step_id': record['step_id'],
+                'status': record['state'].get('status'),
+                'state': record['state'],
+                'result': await self.payloads.externalize_field(record.get('result'), 'data'),
+                'created_at': datetime.utcnow().isoformat()
+            }
+            for record in step_records
+        ]
+        await self.db.table('multi_agent_execution_steps').insert(rows).execute()
+    
+    async def append_log_deltas(self, execution_id: UUID, log_entries: List[Dict[str, Any]], start_seq: int) -> None:
+        """Anexar novas linhas de log da execução"""
+        if not self.supabase or not log_entries:
+            return
+        
+        rows = [
+            {
+                'execution_id': str(execution_id),
+                'seq': entry.get('seq', start_seq + offset),
+                'level': entry.get('level'),
+                'message': entry.get('message'),
+                'step_id': entry.get('step_id'),
+                'metadata': entry.get('metadata', {}),
+                'logged_at': entry.get('timestamp')
+            }
+            for offset, entry in enumerate(log_entries)
+        ]
+        await self.db.table('multi_agent_execution_logs').insert(rows).execute()
+    
+    async def load_execution_deltas(self, execution: MultiAgentExecution) -> MultiAgentExecution:
+        """Reaplicar deltas anexados (passos e logs) sobre a execução carregada"""
+        if not self.supabase:
+            return execution
+        
+        steps_result = await (
+            self.db.table('multi_agent_execution_steps')
+            .select('step_id, state, result')
+            .eq('execution_id', str(execution.execution_id))
+            .order('id')
+            .execute()
+        )
+        
+        # O último snapshot de cada passo prevalece
+        latest: Dict[str, Dict[str, Any]] = {}
+        for row in steps_result.data:
+            latest[row['step_id']] = row
+        
+        for step_id, row in latest.items():
+            step = execution.plan.get_step(step_id)
+            if not step:
+                continue
+            
+            state = dict(row.get('state') or {})
+            state.update({
+                'agent_id': step.agent_id,
+                'capability_name': step.capability_name,
+                'input_data': step.input_data
+            })
+            restored = ExecutionStep.from_dict(state)
+            step.status = restored.status
+            step.attempts = restored.attempts
+            step.error_message = restored.error_message
+            step.execution_time_ms = restored.execution_time_ms
+            step.wait_time_ms = restored.wait_time_ms
+            step.started_at = restored.started_at
+            step.completed_at = restored.completed_at
+            
+            if row.get('result') is not None:
+                execution.results[step_id] = row['result']
+                step.output_data = row['result'].get('data')
+        
+        # Apenas a cauda dos logs volta para a memória; o restante é lido paginado
+        logs_result = await (
+            self.db.table('multi_agent_execution_logs')
+            .select('seq, level, message, step_id, metadata, logged_at')
+            .eq('execution_id', str(execution.execution_id))
+            .order('seq', desc=True)
+            .limit(execution.logs.capacity)
+            .execute()
+        )
+        
+        if logs_result.data:
+            entries = [self._map_log_row(row) for row in reversed(logs_result.data)]
+            execution.logs.restore(entries, next_seq=entries[-1]['seq'] + 1)
+        
+        return execution
+    
+    async def find_execution_logs(
+        self,
+        execution_id: UUID,
+        after_seq: int = -1,
+        limit: int = 100,
+        level: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Página de logs da execução (ordem de ``seq``, a partir de ``after_seq`` exclusivo)"""
+        if not self.supabase:
+            return []
+        
+        query = (
+            self.db.table('multi_agent_execution_logs')
+            .select('seq, level, message, step_id, metadata, logged_at')
+            .eq('execution_id', str(execution_id))
+            .gt('seq', after_seq)
+        )
+        if level:
+            query = query.eq('level', level)
+        
+        result = await query.order('seq').limit(limit).execute()
+        return [self._map_log_row(row) for row in result.data]
+    
+    @staticmethod
+    def _map_log_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'seq': row.get('seq'),
+            'timestamp': row.get('logged_at'),
+            'level': row.get('level'),
+            'message': row.get('message'),
+            'step_id': row.get('step_id'),
+            'metadata': row.get('metadata') or {}
+        }
+    
+    async def load_payloads(
+        self,
+        execution: MultiAgentExecution,
+        step_ids: Optional[List[str]] = None
+    ) -> MultiAgentExecution:
+        """Resolver referências a blobs nos outputs dos passos (todos ou ``step_ids``)"""
+        for step in execution.plan.steps:
+            if step_ids is not None and step.step_id not in step_ids:
+                continue
+            
+            result = execution.results.get(step.step_id)
+            result_ref = result.get('data') if isinstance(result, dict) else None
+            await self.payloads.resolve_field(result, 'data')
+            
+            if self.payloads.is_ref(step.output_data):
+                if step.output_data == result_ref:
+                    # Mesmo blob do resultado: reaproveitar o valor já carregado
+                    step.output_data = result['data']
+                else:
+                    step.output_data = await self.payloads.resolve(step.output_data)
+        
+        return execution
+    
+    async def get_execution_status(self, execution_id: UUID) -> Optional[ExecutionStatus]:
+        """Obter apenas o status persistido da execução"""
+        if not self.supabase:
+            return None
+        
+        result = await (
+            self.db.table('multi_agent_executions')
+            .select('status')
+            .eq('id', str(execution_id))
+            .limit(1)
+            .execute()
+        )
+        
+        if result.data:
+            return ExecutionStatus(result.data[0]['status'])
+        return None
+    
     async def execution_exists(self, execution_id: UUID) -> bool:
         """Verificar se execução existe"""
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('multi_agent_executions')
+        result = await (
+            self.db.table('multi_agent_executions')
             .select('id')
             .eq('id', str(execution_id))
             .limit(1)
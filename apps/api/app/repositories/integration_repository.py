@@ -9,6 +9,7 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID
 
 from app.domain.integration import Connection, IntegrationAnalytics
+from app.infra.database import get_async_supabase
 
 
 class IntegrationRepository:
@@ -16,6 +17,7 @@ class IntegrationRepository:
     
     def __init__(self, supabase_client=None):
         self.supabase = supabase_client
+        self.db = get_async_supabase(supabase_client)
     
     async def save_connection(self, connection: Connection) -> Connection:
         """Salvar conexão no banco de dados"""
@@ -40,7 +42,7 @@ class IntegrationRepository:
         
         # Upsert no Supabase
         if self.supabase:
-            result = self.supabase.table('tenant_connections').upsert(connection_data).execute()
+            result = await self.db.table('tenant_connections').upsert(connection_data).execute()
             if result.data:
                 return await self._map_connection_to_domain(result.data[0])
         
@@ -52,8 +54,8 @@ class IntegrationRepository:
         if not self.supabase:
             return None
         
-        result = (
-            self.supabase.table('tenant_connections')
+        result = await (
+            self.db.table('tenant_connections')
             .select('*')
             .eq('id', str(connection_id))
             .execute()
@@ -78,7 +80,7 @@ class IntegrationRepository:
             return []
         
         query = (
-            self.supabase.table('tenant_connections')
+            self.db.table('tenant_connections')
             .select('*')
             .eq('tenant_id', str(tenant_id))
         )
@@ -92,7 +94,7 @@ class IntegrationRepository:
         
         query = query.order('created_at', desc=True).range(offset, offset + limit - 1)
         
-        result = query.execute()
+        result = await query.execute()
         
         connections = []
         for row in result.data:
@@ -110,8 +112,8 @@ class IntegrationRepository:
         if not self.supabase:
             return []
         
-        result = (
-            self.supabase.table('tenant_connections')
+        result = await (
+            self.db.table('tenant_connections')
             .select('*')
             .eq('tenant_id', str(tenant_id))
             .eq('service_name', service_name)
@@ -133,8 +135,8 @@ class IntegrationRepository:
         
         now = datetime.utcnow().isoformat()
         
-        result = (
-            self.supabase.table('tenant_connections')
+        result = await (
+            self.db.table('tenant_connections')
             .select('*')
             .lt('expires_at', now)
             .neq('status', 'expired')
@@ -159,8 +161,8 @@ class IntegrationRepository:
         threshold = datetime.utcnow().replace(hour=datetime.utcnow().hour - hours_threshold)
         threshold_iso = threshold.isoformat()
         
-        result = (
-            self.supabase.table('tenant_connections')
+        result = await (
+            self.db.table('tenant_connections')
             .select('*')
             .eq('status', 'active')
             .or_(f'last_validated.is.null,last_validated.lt.{threshold_iso}')
@@ -179,8 +181,8 @@ class IntegrationRepository:
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('tenant_connections')
+        result = await (
+            self.db.table('tenant_connections')
             .delete()
             .eq('id', str(connection_id))
             .execute()
@@ -194,8 +196,8 @@ class IntegrationRepository:
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('tenant_connections')
+        result = await (
+            self.db.table('tenant_connections')
             .select('id')
             .eq('id', str(connection_id))
             .limit(1)
@@ -215,7 +217,7 @@ class IntegrationRepository:
             return 0
         
         query = (
-            self.supabase.table('tenant_connections')
+            self.db.table('tenant_connections')
             .select('id', count='exact')
             .eq('tenant_id', str(tenant_id))
         )
@@ -223,7 +225,7 @@ class IntegrationRepository:
         if status:
             query = query.eq('status', status)
         
-        result = query.execute()
+        result = await query.execute()
         
         return result.count or 0
     
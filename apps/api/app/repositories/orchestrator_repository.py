@@ -12,13 +12,23 @@ from app.domain.orchestrator import (
     Workflow, WorkflowExecution, ConversationSession,
     WorkflowStep, WorkflowConfig, WorkflowStatus, ExecutionStatus
 )
+from app.infra.blob_store import PayloadStore, get_payload_store
+from app.infra.database import get_async_supabase
+
+# Colunas das listagens: sem results/execution_logs (detalhes são carregados por ID)
+WORKFLOW_RUN_SUMMARY_COLUMNS = (
+    'id, workflow_id, user_id, status, input_data, error_message, '
+    'started_at, completed_at, created_at, updated_at'
+)
 
 
 class OrchestratorRepository:
     """Repository para dados do orquestrador no Supabase"""
     
-    def __init__(self, supabase_client=None):
+    def __init__(self, supabase_client=None, payload_store: Optional[PayloadStore] = None):
         self.supabase = supabase_client
+        self.db = get_async_supabase(supabase_client)
+        self.payloads = payload_store or get_payload_store()
     
     # Workflow methods
     
@@ -44,7 +54,7 @@ class OrchestratorRepository:
             workflow_data['created_at'] = workflow.created_at.isoformat()
         
         if self.supabase:
-            result = self.supabase.table('workflows').upsert(workflow_data).execute()
+            result = await self.db.table('workflows').upsert(workflow_data).execute()
             if result.data:
                 return await self._map_workflow_to_domain(result.data[0])
         
@@ -56,8 +66,8 @@ class OrchestratorRepository:
         if not self.supabase:
             return None
         
-        result = (
-            self.supabase.table('workflows')
+        result = await (
+            self.db.table('workflows')
             .select('*')
             .eq('id', str(workflow_id))
             .execute()
@@ -81,7 +91,7 @@ class OrchestratorRepository:
             return []
         
         query = (
-            self.supabase.table('workflows')
+            self.db.table('workflows')
             .select('*')
             .eq('user_id', str(user_id))
         )
@@ -91,7 +101,7 @@ class OrchestratorRepository:
         
         query = query.order('created_at', desc=True).range(offset, offset + limit - 1)
         
-        result = query.execute()
+        result = await query.execute()
         
         workflows = []
         for row in result.data:
@@ -105,8 +115,8 @@ class OrchestratorRepository:
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('workflows')
+        result = await (
+            self.db.table('workflows')
             .delete()
             .eq('id', str(workflow_id))
             .execute()
@@ -120,8 +130,8 @@ class OrchestratorRepository:
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('workflows')
+        result = await (
+            self.db.table('workflows')
             .select('id')
             .eq('id', str(workflow_id))
             .limit(1)
@@ -141,7 +151,10 @@ class OrchestratorRepository:
             'user_id': str(execution.user_id),
             'status': execution.status.value,
             'input_data': execution.input_data,
-            'results': execution.results,
+            'results': [
+                await self.payloads.externalize_field(result, 'output')
+                for result in execution.results
+            ],
             'execution_logs': execution.execution_logs,
             'error_message': execution.error_message,
             'started_at': execution.started_at.isoformat() if execution.started_at else None,
@@ -154,30 +167,92 @@ class OrchestratorRepository:
             execution_data['created_at'] = execution.created_at.isoformat()
         
         if self.supabase:
-            result = self.supabase.table('workflow_runs').upsert(execution_data).execute()
+            result = await self.db.table('workflow_runs').upsert(execution_data).execute()
+            await self._spill_execution_logs(execution)
             if result.data:
                 return await self._map_execution_to_domain(result.data[0])
         
         return execution
     
+    async def _spill_execution_logs(self, execution: WorkflowExecution):
+        """Gravar logs pendentes em workflow_run_logs (a linha guarda só a cauda)"""
+        pending = execution.logs.unpersisted()
+        if not pending:
+            return
+        
+        rows = [
+            {
+                'run_id': str(execution.id),
+                'seq': entry.seq,
+                'level': entry.level,
+                'message': entry.message,
+                'step_id': entry.step_id,
+                'metadata': entry.metadata or {},
+                'logged_at': entry.to_dict()['timestamp']
+            }
+            for entry in pending
+        ]
+        await self.db.table('workflow_run_logs').insert(rows).execute()
+        execution.logs.mark_persisted(pending[-1].seq + 1)
+    
+    async def find_execution_logs(
+        self,
+        execution_id: UUID,
+        after_seq: int = -1,
+        limit: int = 100,
+        level: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Página de logs da execução de workflow (ordem de ``seq``)"""
+        if not self.supabase:
+            return []
+        
+        query = (
+            self.db.table('workflow_run_logs')
+            .select('seq, level, message, step_id, metadata, logged_at')
+            .eq('run_id', str(execution_id))
+            .gt('seq', after_seq)
+        )
+        if level:
+            query = query.eq('level', level)
+        
+        result = await query.order('seq').limit(limit).execute()
+        return [
+            {
+                'seq': row.get('seq'),
+                'timestamp': row.get('logged_at'),
+                'level': row.get('level'),
+                'message': row.get('message'),
+                'step_id': row.get('step_id'),
+                'metadata': row.get('metadata') or {}
+            }
+            for row in result.data
+        ]
+    
     async def find_execution_by_id(self, execution_id: UUID) -> Optional[WorkflowExecution]:
         """Buscar execução por ID"""
         
         if not self.supabase:
             return None
         
-        result = (
-            self.supabase.table('workflow_runs')
+        result = await (
+            self.db.table('workflow_runs')
             .select('*')
             .eq('id', str(execution_id))
             .execute()
         )
         
         if result.data:
-            return await self._map_execution_to_domain(result.data[0])
+            execution = await self._map_execution_to_domain(result.data[0])
+            return await self.load_execution_payloads(execution)
         
         return None
     
+    async def load_execution_payloads(self, execution: WorkflowExecution) -> WorkflowExecution:
+        """Resolver referências a blobs nos outputs dos passos"""
+        for result in execution.results:
+            await self.payloads.resolve_field(result, 'output')
+        return execution
+    
     async def find_executions_by_user(
         self, 
         user_id: UUID,
@@ -191,8 +266,8 @@ class OrchestratorRepository:
             return []
         
         query = (
-            self.supabase.table('workflow_runs')
-            .select('*')
+            self.db.table('workflow_runs')
+            .select(WORKFLOW_RUN_SUMMARY_COLUMNS)
             .eq('user_id', str(user_id))
         )
         
@@ -201,7 +276,7 @@ class OrchestratorRepository:
         
         query = query.order('created_at', desc=True).range(offset, offset + limit - 1)
         
-        result = query.execute()
+        result = await query.execute()
         
         executions = []
         for row in result.data:
@@ -219,9 +294,9 @@ class OrchestratorRepository:
         if not self.supabase:
             return []
         
-        result = (
-            self.supabase.table('workflow_runs')
-            .select('*')
+        result = await (
+            self.db.table('workflow_runs')
+            .select(WORKFLOW_RUN_SUMMARY_COLUMNS)
             .eq('workflow_id', str(workflow_id))
             .order('created_at', desc=True)
             .limit(limit)
@@ -240,8 +315,8 @@ class OrchestratorRepository:
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('workflow_runs')
+        result = await (
+            self.db.table('workflow_runs')
             .select('id')
             .eq('id', str(execution_id))
             .limit(1)
@@ -252,8 +327,10 @@ class OrchestratorRepository:
     
     # Conversation Session methods (in-memory for now)
     
-    def __init__(self, supabase_client=None):
+    def __init__(self, supabase_client=None, payload_store: Optional[PayloadStore] = None):
         self.supabase = supabase_client
+        self.db = get_async_supabase(supabase_client)
+        self.payloads = payload_store or get_payload_store()
         self._sessions: Dict[str, ConversationSession] = {}
     
     async def save_conversation_session(self, session: ConversationSession) -> ConversationSession:
@@ -7,11 +7,14 @@ from datetime import datetime
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 
+from app.infra.database import get_async_supabase
+
 class WorkflowRepository:
     """Repository para acesso aos dados de workflows no Supabase"""
     
     def __init__(self, supabase_client=None):
         self.supabase = supabase_client
+        self.db = get_async_supabase(supabase_client)
     
     async def save_workflow(self, workflow) -> 'Workflow':
         """Salvar workflow no banco de dados"""
@@ -36,7 +39,7 @@ class WorkflowRepository:
         
         # Upsert no Supabase
         if self.supabase:
-            result = self.supabase.table('workflows').upsert(workflow_data).execute()
+            result = await self.db.table('workflows').upsert(workflow_data).execute()
             if result.data:
                 return await self._map_workflow_to_domain(result.data[0])
         
@@ -47,8 +50,8 @@ class WorkflowRepository:
         if not self.supabase:
             return None
         
-        result = (
-            self.supabase.table('workflows')
+        result = await (
+            self.db.table('workflows')
             .select('*')
             .eq('id', str(workflow_id))
             .execute()
@@ -70,7 +73,7 @@ class WorkflowRepository:
             return []
         
         query = (
-            self.supabase.table('workflows')
+            self.db.table('workflows')
             .select('*')
             .eq('user_id', str(user_id))
         )
@@ -79,7 +82,7 @@ class WorkflowRepository:
             query = query.eq('status', status)
         
         query = query.order('created_at', desc=True).range(offset, offset + limit - 1)
-        result = query.execute()
+        result = await query.execute()
         
         workflows = []
         for row in result.data:
@@ -109,7 +112,7 @@ class WorkflowRepository:
         
         # Upsert no Supabase
         if self.supabase:
-            result = self.supabase.table('workflow_runs').upsert(run_data).execute()
+            result = await self.db.table('workflow_runs').upsert(run_data).execute()
             if result.data:
                 return await self._map_workflow_run_to_domain(result.data[0])
         
@@ -120,8 +123,8 @@ class WorkflowRepository:
         if not self.supabase:
             return None
         
-        result = (
-            self.supabase.table('workflow_runs')
+        result = await (
+            self.db.table('workflow_runs')
             .select('*')
             .eq('id', str(run_id))
             .execute()
@@ -143,7 +146,7 @@ class WorkflowRepository:
             return []
         
         query = (
-            self.supabase.table('workflow_runs')
+            self.db.table('workflow_runs')
             .select('*')
             .eq('workflow_id', str(workflow_id))
         )
@@ -152,7 +155,7 @@ class WorkflowRepository:
             query = query.eq('status', status)
         
         query = query.order('created_at', desc=True).range(offset, offset + limit - 1)
-        result = query.execute()
+        result = await query.execute()
         
         runs = []
         for row in result.data:
@@ -164,8 +167,8 @@ class WorkflowRepository:
         if not self.supabase:
             return []
         
-        result = (
-            self.supabase.table('workflow_runs')
+        result = await (
+            self.db.table('workflow_runs')
             .select('*')
             .eq('status', 'running')
             .execute()
@@ -194,8 +197,8 @@ class WorkflowRepository:
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('workflows')
+        result = await (
+            self.db.table('workflows')
             .select('id')
             .eq('id', str(workflow_id))
             .limit(1)
@@ -208,8 +211,8 @@ class WorkflowRepository:
         if not self.supabase:
             return False
         
-        result = (
-            self.supabase.table('workflow_runs')
+        result = await (
+            self.db.table('workflow_runs')
             .select('id')
             .eq('id', str(run_id))
             .limit(1)
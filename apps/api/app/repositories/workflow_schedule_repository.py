@@ -0,0 +1,132 @@
+"""
+Repository for workflow schedules
+Camada de infraestrutura para agendamentos de workflows no Supabase
+"""
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+from uuid import UUID
+
+from app.domain.schedule import WorkflowSchedule
+from app.infra.database import get_async_supabase
+
+
+class WorkflowScheduleRepository:
+    """Repository para agendamentos de workflows (tabela workflow_schedules)"""
+
+    def __init__(self, supabase_client=None):
+        self.supabase = supabase_client
+        self.db = get_async_supabase(supabase_client)
+
+    async def save_schedule(self, schedule: WorkflowSchedule) -> WorkflowSchedule:
+        """Salvar agendamento"""
+        if self.supabase:
+            result = await self.db.table('workflow_schedules').upsert(schedule.to_dict()).execute()
+            if result.data:
+                return WorkflowSchedule.from_dict(result.data[0])
+        return schedule
+
+    async def find_schedule_by_id(self, schedule_id: UUID) -> Optional[WorkflowSchedule]:
+        """Buscar agendamento por ID"""
+        if not self.supabase:
+            return None
+
+        result = await self.db.table('workflow_schedules').select('*').eq('id', str(schedule_id)).execute()
+        return WorkflowSchedule.from_dict(result.data[0]) if result.data else None
+
+    async def find_schedules_by_workflow(self, workflow_id: UUID) -> List[WorkflowSchedule]:
+        """Agendamentos de um workflow"""
+        if not self.supabase:
+            return []
+
+        result = await (
+            self.db.table('workflow_schedules')
+            .select('*')
+            .eq('workflow_id', str(workflow_id))
+            .order('created_at')
+            .execute()
+        )
+        return [WorkflowSchedule.from_dict(row) for row in result.data]
+
+    async def iter_enabled_schedules(self, page_size: int = 1000) -> AsyncIterator[WorkflowSchedule]:
+        """Todos os agendamentos ativos, em páginas (ordem do próximo disparo)"""
+        if not self.supabase:
+            return
+
+        offset = 0
+        while True:
+            result = await (
+                self.db.table('workflow_schedules')
+                .select('*')
+                .eq('enabled', True)
+                .order('next_fire_at')
+                .order('id')
+                .range(offset, offset + page_size - 1)
+                .execute()
+            )
+            for row in result.data:
+                yield WorkflowSchedule.from_dict(row)
+            if len(result.data) < page_size:
+                return
+            offset += page_size
+
+    async def iter_schedules_updated_since(
+        self,
+        since: datetime,
+        page_size: int = 1000
+    ) -> AsyncIterator[WorkflowSchedule]:
+        """Agendamentos (ativos ou não) alterados a partir de ``since``, em páginas"""
+        if not self.supabase:
+            return
+
+        offset = 0
+        while True:
+            result = await (
+                self.db.table('workflow_schedules')
+                .select('*')
+                .gte('updated_at', since.isoformat())
+                .order('updated_at')
+                .order('id')
+                .range(offset, offset + page_size - 1)
+                .execute()
+            )
+            for row in result.data:
+                yield WorkflowSchedule.from_dict(row)
+            if len(result.data) < page_size:
+                return
+            offset += page_size
+
+    async def advance_next_fire(
+        self,
+        schedule_id: UUID,
+        expected_next_fire_at: datetime,
+        next_fire_at: datetime,
+        fired_at: datetime
+    ) -> bool:
+        """
+        Avançar o próximo disparo se ninguém o fez antes (compare-and-set).
+
+        Só o nó que vence a atualização dispara; os demais apenas reagendam.
+        """
+        if not self.supabase:
+            return True
+
+        result = await (
+            self.db.table('workflow_schedules')
+            .update({
+                'next_fire_at': next_fire_at.isoformat(),
+                'last_fired_at': fired_at.isoformat(),
+                'updated_at': fired_at.isoformat()
+            })
+            .eq('id', str(schedule_id))
+            .eq('next_fire_at', expected_next_fire_at.isoformat())
+            .execute()
+        )
+        return bool(result.data)
+
+    async def delete_schedule(self, schedule_id: UUID) -> bool:
+        """Remover agendamento"""
+        if not self.supabase:
+            return False
+
+        result = await self.db.table('workflow_schedules').delete().eq('id', str(schedule_id)).execute()
+        return len(result.data) > 0
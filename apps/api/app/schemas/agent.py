@@ -128,7 +128,7 @@ class UpdateAgentSchema(BaseModel):
     input_schema: Optional[Dict[str, Any]] = None
     policy: Optional[AgentPolicySchema] = None
     dependencies: Optional[List[AgentDependencySchema]] = None
-    status: Optional[str] = Field(None, regex="^(active|inactive|deprecated)$")
+    status: Optional[str] = Field(None, pattern="^(active|inactive|deprecated)$")
 
 
 class AgentSchema(BaseModel):
@@ -127,7 +127,7 @@ class UpdateConnectionSchema(BaseModel):
     service_name: Optional[str] = Field(None, min_length=1, max_length=100)
     credentials: Optional[Dict[str, Any]] = None
     scopes: Optional[List[str]] = None
-    status: Optional[str] = Field(None, regex="^(active|inactive|expired|error)$")
+    status: Optional[str] = Field(None, pattern="^(active|inactive|expired|error)$")
     expires_at: Optional[datetime] = None
 
 
@@ -112,7 +112,7 @@ class UpdateWorkflowSchema(BaseModel):
     description: Optional[str] = None
     steps: Optional[List[WorkflowStepSchema]] = None
     config: Optional[WorkflowConfigSchema] = None
-    status: Optional[str] = Field(None, regex="^(draft|active|inactive|archived)$")
+    status: Optional[str] = Field(None, pattern="^(draft|active|inactive|archived)$")
 
 
 class WorkflowSchema(BaseModel):
@@ -153,6 +153,45 @@ class ExecuteWorkflowSchema(BaseModel):
         }
 
 
+class CreateWorkflowScheduleSchema(BaseModel):
+    """Schema para agendar um workflow (cron ou intervalo fixo)"""
+    
+    cron_expression: Optional[str] = Field(None, max_length=120, description="Expressão cron de 5 campos (UTC)")
+    interval_seconds: Optional[int] = Field(None, gt=0, description="Intervalo fixo entre disparos")
+    input_data: Dict[str, Any] = Field(default_factory=dict, description="Dados de entrada de cada disparo")
+    jitter_seconds: int = Field(default=0, ge=0, le=3600, description="Espalhamento máximo do disparo")
+    enabled: bool = Field(default=True, description="Agendamento ativo")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "cron_expression": "0 9 * * 1-5",
+                "input_data": {"report": "daily"},
+                "jitter_seconds": 30
+            }
+        }
+
+
+class WorkflowScheduleSchema(BaseModel):
+    """Schema completo de agendamento de workflow"""
+    
+    id: UUID
+    workflow_id: UUID
+    user_id: UUID
+    cron_expression: Optional[str]
+    interval_seconds: Optional[int]
+    input_data: Dict[str, Any]
+    jitter_seconds: int
+    enabled: bool
+    next_fire_at: datetime
+    last_fired_at: Optional[datetime]
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 class WorkflowRunStepResult(BaseModel):
     """Schema para resultado de um passo da execução"""
     
@@ -242,6 +281,7 @@ class ExecutionPlanSchema(BaseModel):
     workflow: CreateWorkflowSchema = Field(..., description="Workflow a ser executado")
     estimated_cost: float = Field(default=0.0, description="Custo estimado")
     estimated_duration_minutes: int = Field(default=5, description="Duração estimada")
+    estimated_duration_p95_minutes: Optional[int] = Field(None, description="Duração estimada no pior caso usual (p95)")
     required_connections: List[str] = Field(default_factory=list, description="Conexões necessárias")
     risks: List[str] = Field(default_factory=list, description="Riscos identificados")
     
@@ -183,6 +183,11 @@ class AgentRegistryService:
         
         return await self.agent_repo.find_by_agent_id_and_version(agent_id, version)
     
+    async def get_latest_agents(self, agent_ids: List[str]) -> Dict[str, Agent]:
+        """Get the latest active version of several agents with one lookup"""
+        
+        return await self.agent_repo.find_latest_by_agent_ids(agent_ids)
+    
     async def get_agent_versions(self, agent_id: str) -> List[Agent]:
         """Get all versions of a specific agent"""
         
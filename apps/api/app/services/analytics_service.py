@@ -135,14 +135,15 @@ class MetricsCollector:
         else:
             self.memory_counters[counter_key] += increment
     
-    async def get_metric_stats(
+    async def get_metric_values(
         self,
         metric_name: str,
         start_time: datetime,
         end_time: datetime,
-        tags: Optional[Dict[str, str]] = None
-    ) -> Dict[str, Any]:
-        """Get statistics for a metric over a time period"""
+        tags: Optional[Dict[str, str]] = None,
+        limit: Optional[int] = None
+    ) -> List[float]:
+        """Get raw metric values over a time period (most recent ``limit`` when given)"""
         tags = tags or {}
         tag_string = ",".join([f"{k}={v}" for k, v in sorted(tags.items())])
         metric_key = f"{metric_name}:{tag_string}" if tag_string else metric_name
@@ -152,23 +153,40 @@ class MetricsCollector:
         if redis_client:
             try:
                 # Get metrics from Redis
-                results = await redis_client.zrangebyscore(
-                    f"metrics:{metric_key}",
-                    start_time.timestamp(),
-                    end_time.timestamp(),
-                    withscores=True
-                )
+                if limit:
+                    results = await redis_client.zrevrangebyscore(
+                        f"metrics:{metric_key}",
+                        end_time.timestamp(),
+                        start_time.timestamp(),
+                        start=0,
+                        num=limit,
+                        withscores=True
+                    )
+                else:
+                    results = await redis_client.zrangebyscore(
+                        f"metrics:{metric_key}",
+                        start_time.timestamp(),
+                        end_time.timestamp(),
+                        withscores=True
+                    )
                 
-                values = []
-                for result, score in results:
-                    data = json.loads(result)
-                    values.append(data['value'])
+                return [json.loads(result)['value'] for result, score in results]
                 
             except Exception as e:
                 logger.error(f"Failed to get metrics from Redis: {e}")
-                values = self._get_metric_stats_memory(metric_key, start_time, end_time)
-        else:
-            values = self._get_metric_stats_memory(metric_key, start_time, end_time)
+        
+        values = self._get_metric_stats_memory(metric_key, start_time, end_time)
+        return values[-limit:] if limit else values
+    
+    async def get_metric_stats(
+        self,
+        metric_name: str,
+        start_time: datetime,
+        end_time: datetime,
+        tags: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Get statistics for a metric over a time period"""
+        values = await self.get_metric_values(metric_name, start_time, end_time, tags)
         
         if not values:
             return {
@@ -325,7 +343,8 @@ class AnalyticsService:
         execution_time_ms: float,
         success: bool,
         error_type: Optional[str] = None,
-        cost_cents: Optional[float] = None
+        cost_cents: Optional[float] = None,
+        capability: Optional[str] = None
     ) -> None:
         """Record agent execution metrics"""
         tags = {
@@ -343,6 +362,14 @@ class AnalyticsService:
             tags
         )
         
+        # Latency distribution per capability (used by plan duration estimates)
+        if capability and success:
+            await self.metrics_collector.record_metric(
+                'agent_execution_time_ms',
+                execution_time_ms,
+                {'agent_id': agent_id, 'capability': capability}
+            )
+        
         # Record cost if provided
         if cost_cents is not None:
             await self.metrics_collector.record_metric(
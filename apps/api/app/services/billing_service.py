@@ -131,7 +131,8 @@ class BillingService:
         execution_id: UUID,
         success: bool,
         execution_time_ms: float,
-        additional_costs: Optional[Dict[str, int]] = None
+        additional_costs: Optional[Dict[str, int]] = None,
+        capability: Optional[str] = None
     ) -> int:
         """Record cost for agent execution"""
         # Base cost for agent execution
@@ -183,7 +184,8 @@ class BillingService:
             execution_id=execution_id,
             execution_time_ms=execution_time_ms,
             success=success,
-            cost_cents=float(total_cost_cents)
+            cost_cents=float(total_cost_cents),
+            capability=capability
         )
         
         return total_cost_cents
@@ -0,0 +1,209 @@
+"""
+Concurrency Governor
+Limites de concorrência por agente e por provedor para a execução de passos
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, Optional
+
+import structlog
+
+from app.core.config import settings
+from app.domain.agent import AgentPolicy
+from app.repositories.agent_repository import AgentRepository
+
+logger = structlog.get_logger(__name__)
+
+PolicyLoader = Callable[[str], Awaitable[Optional[AgentPolicy]]]
+
+
+class ConcurrencyLimiter:
+    """
+    Limitador FIFO de execuções simultâneas.
+
+    Quem excede o limite entra na fila (não falha) e é liberado na ordem de
+    chegada. ``can_admit`` permite delegar a decisão a uma política, por
+    exemplo ``AgentPolicy.can_execute``.
+    """
+
+    def __init__(self, name: str, limit: int, can_admit: Optional[Callable[[int], bool]] = None):
+        self.name = name
+        self.limit = max(1, limit)
+        self.can_admit = can_admit or (lambda active: active < self.limit)
+
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        self.acquisitions = 0
+        self.queued_acquisitions = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.peak_active = 0
+        self.peak_waiting = 0
+
+    async def acquire(self):
+        queued_at = time.perf_counter()
+
+        if self._waiters or not self.can_admit(self.active):
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+            self.queued_acquisitions += 1
+            self.peak_waiting = max(self.peak_waiting, len(self._waiters))
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Slot já concedido: repassar para o próximo da fila
+                    self.active -= 1
+                    self._wake_next()
+                else:
+                    self._waiters.remove(future)
+                raise
+        else:
+            self.active += 1
+
+        wait_ms = (time.perf_counter() - queued_at) * 1000
+        self.acquisitions += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self.peak_active = max(self.peak_active, self.active)
+
+    def release(self):
+        self.active -= 1
+        self._wake_next()
+
+    def _wake_next(self):
+        while self._waiters and self.can_admit(self.active):
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.active += 1
+            future.set_result(None)
+
+    def update_limit(self, limit: int, can_admit: Optional[Callable[[int], bool]] = None):
+        self.limit = max(1, limit)
+        if can_admit:
+            self.can_admit = can_admit
+        self._wake_next()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            'limit': self.limit,
+            'active': self.active,
+            'waiting': len(self._waiters),
+            'saturation': round(self.active / self.limit, 2),
+            'acquisitions': self.acquisitions,
+            'queued_acquisitions': self.queued_acquisitions,
+            'avg_wait_ms': round(self.total_wait_ms / self.acquisitions, 2) if self.acquisitions else 0.0,
+            'max_wait_ms': round(self.max_wait_ms, 2),
+            'peak_active': self.peak_active,
+            'peak_waiting': self.peak_waiting
+        }
+
+
+class ConcurrencyGovernor:
+    """
+    Governa a concorrência de chamadas a agentes.
+
+    Cada chamada ocupa um slot do agente (limite de ``AgentPolicy``) e um slot
+    de cada provedor usado pelo agente. Os slots são sempre adquiridos na mesma
+    ordem (agente, depois provedores ordenados) para evitar deadlock.
+    """
+
+    def __init__(
+        self,
+        policy_loader: Optional[PolicyLoader] = None,
+        default_agent_limit: Optional[int] = None,
+        provider_limits: Optional[Dict[str, int]] = None,
+        default_provider_limit: Optional[int] = None
+    ):
+        self.policy_loader = policy_loader
+        self.default_agent_limit = default_agent_limit or settings.EXECUTION_DEFAULT_AGENT_CONCURRENCY
+        self.provider_limits = (
+            provider_limits if provider_limits is not None
+            else dict(settings.EXECUTION_PROVIDER_CONCURRENCY)
+        )
+        self.default_provider_limit = default_provider_limit or settings.EXECUTION_DEFAULT_PROVIDER_CONCURRENCY
+
+        self._agents: Dict[str, ConcurrencyLimiter] = {}
+        self._providers: Dict[str, ConcurrencyLimiter] = {}
+        self._policy_loads: Dict[str, asyncio.Task] = {}
+
+    def set_agent_policy(self, agent_id: str, policy: AgentPolicy):
+        """Aplicar a política do agente (ex.: após atualização no registro)"""
+        limiter = self._agents.get(agent_id)
+        if limiter is None:
+            self._agents[agent_id] = ConcurrencyLimiter(
+                f"agent:{agent_id}", policy.max_concurrent_executions, policy.can_execute
+            )
+        else:
+            limiter.update_limit(policy.max_concurrent_executions, policy.can_execute)
+
+    @asynccontextmanager
+    async def slot(self, agent_id: str, providers: Iterable[str] = ()) -> AsyncIterator[None]:
+        """Ocupar slots do agente e dos provedores durante a chamada"""
+        limiters = [await self._agent_limiter(agent_id)]
+        limiters.extend(self._provider_limiter(provider) for provider in sorted(set(providers)))
+
+        acquired = []
+        try:
+            for limiter in limiters:
+                await limiter.acquire()
+                acquired.append(limiter)
+            yield
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release()
+
+    async def _agent_limiter(self, agent_id: str) -> ConcurrencyLimiter:
+        limiter = self._agents.get(agent_id)
+        if limiter is not None:
+            return limiter
+
+        policy = None
+        if self.policy_loader:
+            # Uma única consulta por agente, mesmo com várias chamadas simultâneas
+            load = self._policy_loads.get(agent_id)
+            if load is None:
+                load = self._policy_loads[agent_id] = asyncio.ensure_future(self.policy_loader(agent_id))
+            try:
+                policy = await asyncio.shield(load)
+            except Exception as e:
+                logger.warning("Falha ao carregar política do agente", agent_id=agent_id, error=str(e))
+
+        if agent_id not in self._agents:
+            self.set_agent_policy(agent_id, policy or AgentPolicy(max_concurrent_executions=self.default_agent_limit))
+        return self._agents[agent_id]
+
+    def _provider_limiter(self, provider: str) -> ConcurrencyLimiter:
+        limiter = self._providers.get(provider)
+        if limiter is None:
+            limit = self.provider_limits.get(provider, self.default_provider_limit)
+            limiter = self._providers[provider] = ConcurrencyLimiter(f"provider:{provider}", limit)
+        return limiter
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Ocupação, fila e tempo de espera por agente e por provedor"""
+        return {
+            'agents': {agent_id: limiter.get_metrics() for agent_id, limiter in sorted(self._agents.items())},
+            'providers': {provider: limiter.get_metrics() for provider, limiter in sorted(self._providers.items())}
+        }
+
+
+_concurrency_governor: Optional[ConcurrencyGovernor] = None
+
+
+def get_concurrency_governor() -> ConcurrencyGovernor:
+    """Obter governador global (compartilhado entre execuções do processo)"""
+    global _concurrency_governor
+    if _concurrency_governor is None:
+        agent_repository = AgentRepository()
+
+        async def load_policy(agent_id: str) -> Optional[AgentPolicy]:
+            agent = await agent_repository.find_by_agent_id_and_version(agent_id)
+            return agent.policy if agent else None
+
+        _concurrency_governor = ConcurrencyGovernor(policy_loader=load_policy)
+    return _concurrency_governor
@@ -0,0 +1,122 @@
+"""
+Execution Control
+Sinais de pausa, retomada e cancelamento para execuções multi-agente em andamento
+"""
+import asyncio
+import time
+from typing import Awaitable, Optional, Set, TypeVar
+
+from app.core.deadline import Deadline, DeadlineExceededError
+from app.domain.execution import MultiAgentExecution
+
+T = TypeVar('T')
+
+
+class ExecutionCancelledError(Exception):
+    """Execução cancelada enquanto uma chamada estava em andamento"""
+
+
+class ExecutionControl:
+    """
+    Sinais de controle de uma execução.
+
+    Pausa e retomada usam um ``asyncio.Event`` (sem polling): quem aguarda em
+    ``wait_if_paused`` acorda no instante da retomada. O cancelamento cancela
+    imediatamente as chamadas registradas via ``run``, liberando seus slots de
+    concorrência em vez de esperar o timeout do passo. Com ``deadline``, as
+    chamadas também são interrompidas quando o prazo da execução termina; o
+    tempo em pausa não consome o prazo.
+    """
+
+    def __init__(self, execution: MultiAgentExecution, deadline: Optional[Deadline] = None):
+        self.execution = execution
+        self.deadline = deadline
+        self._resumed = asyncio.Event()
+        self._cancelled = asyncio.Event()
+        self._in_flight: Set[asyncio.Task] = set()
+        self._paused_at: Optional[float] = None
+        self.sync()
+
+    def sync(self):
+        """Alinhar os sinais ao status atual da execução"""
+        if self.execution.is_cancelled():
+            self._cancel_in_flight()
+        elif self.execution.is_paused():
+            self._resumed.clear()
+            if self._paused_at is None:
+                self._paused_at = time.monotonic()
+        else:
+            self._resumed.set()
+            if self._paused_at is not None:
+                if self.deadline is not None:
+                    self.deadline.extend(time.monotonic() - self._paused_at)
+                self._paused_at = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    async def wait_if_paused(self):
+        """Aguardar retomada; retorna imediatamente se a execução for cancelada"""
+        if self._resumed.is_set() or self._cancelled.is_set():
+            return
+
+        waiters = [
+            asyncio.create_task(self._resumed.wait()),
+            asyncio.create_task(self._cancelled.wait())
+        ]
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def sleep(self, seconds: float):
+        """Aguardar ``seconds`` ou até o cancelamento, o que vier primeiro"""
+        try:
+            await asyncio.wait_for(self._cancelled.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        """Executar chamada cancelável; levanta ``ExecutionCancelledError`` se cancelada
+        e ``DeadlineExceededError`` se o prazo terminar antes"""
+        if self._cancelled.is_set():
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise ExecutionCancelledError("Execução cancelada")
+
+        if self.deadline is not None and self.deadline.expired:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceededError("Prazo da execução excedido")
+
+        task = asyncio.ensure_future(awaitable)
+        self._in_flight.add(task)
+        try:
+            if self.deadline is None:
+                return await task
+            return await asyncio.wait_for(task, timeout=self.deadline.timeout())
+        except asyncio.TimeoutError:
+            if self.deadline is not None and self.deadline.expired:
+                raise DeadlineExceededError("Prazo da execução excedido")
+            raise
+        except asyncio.CancelledError:
+            if self._cancelled.is_set() and not self._current_cancelling():
+                raise ExecutionCancelledError("Execução cancelada")
+            raise
+        finally:
+            self._in_flight.discard(task)
+
+    def _cancel_in_flight(self):
+        self._cancelled.set()
+        # Libera quem estiver aguardando retomada
+        self._resumed.set()
+        for task in list(self._in_flight):
+            task.cancel()
+
+    @staticmethod
+    def _current_cancelling() -> int:
+        # O próprio chamador foi cancelado (ex.: shutdown), não apenas a chamada
+        current = asyncio.current_task()
+        return current.cancelling() if current and hasattr(current, 'cancelling') else 0
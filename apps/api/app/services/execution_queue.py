@@ -0,0 +1,255 @@
+"""
+Execution Queue
+Fila distribuída de execuções multi-agente em Redis, com leasing e visibility timeout
+"""
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import redis.asyncio as redis
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+# Reivindica a próxima execução: move da fila para o conjunto de leases de forma atômica.
+# Antes, devolve à fila as execuções adiadas (nack) cujo backoff já terminou.
+_CLAIM_SCRIPT = """
+local ready = redis.call('ZRANGEBYSCORE', KEYS[6], '-inf', ARGV[3], 'LIMIT', 0, 100)
+for _, delayed_id in ipairs(ready) do
+    redis.call('ZREM', KEYS[6], delayed_id)
+    redis.call('RPUSH', KEYS[1], delayed_id)
+end
+local execution_id = redis.call('RPOP', KEYS[1])
+if not execution_id then
+    return nil
+end
+redis.call('ZADD', KEYS[2], ARGV[2], execution_id)
+redis.call('HSET', KEYS[3], execution_id, ARGV[1])
+local attempts = redis.call('HINCRBY', KEYS[4], execution_id, 1)
+local payload = redis.call('HGET', KEYS[5], execution_id)
+return {execution_id, tostring(attempts), payload or ''}
+"""
+
+# Renova o lease somente se o worker ainda for o dono
+_HEARTBEAT_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+return 1
+"""
+
+# Conclui (ack) ou devolve (nack) a execução, validando o dono do lease. O nack adia a
+# execução até ARGV[5] ou, esgotado max_attempts (ARGV[4]), envia para a dead-letter (retorna 2).
+_RELEASE_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+if ARGV[3] == 'requeue' then
+    local attempts = tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0')
+    if attempts >= tonumber(ARGV[4]) then
+        redis.call('LPUSH', KEYS[6], ARGV[1])
+        return 2
+    end
+    redis.call('ZADD', KEYS[5], ARGV[5], ARGV[1])
+else
+    redis.call('HDEL', KEYS[3], ARGV[1])
+    redis.call('HDEL', KEYS[4], ARGV[1])
+end
+return 1
+"""
+
+# Recoloca na fila execuções cujo lease expirou (ou envia para dead-letter)
+_REQUEUE_EXPIRED_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[3]))
+local requeued = {}
+for _, execution_id in ipairs(expired) do
+    redis.call('ZREM', KEYS[1], execution_id)
+    redis.call('HDEL', KEYS[2], execution_id)
+    local attempts = tonumber(redis.call('HGET', KEYS[3], execution_id) or '0')
+    if attempts >= tonumber(ARGV[2]) then
+        redis.call('LPUSH', KEYS[5], execution_id)
+    else
+        redis.call('RPUSH', KEYS[4], execution_id)
+        table.insert(requeued, execution_id)
+    end
+end
+return requeued
+"""
+
+
+@dataclass
+class QueueLease:
+    """Lease de uma execução reivindicada por um worker"""
+    execution_id: UUID
+    worker_id: str
+    attempt: int
+    payload: Dict[str, Any]
+    expires_at: float
+
+
+class ExecutionQueue:
+    """
+    Fila de execuções em Redis.
+
+    ``enqueue`` insere à esquerda da lista pendente; ``claim`` retira à direita
+    (FIFO) e registra um lease com prazo em um sorted set. Workers renovam o
+    lease com ``heartbeat``; leases vencidos são devolvidos à frente da fila por
+    ``requeue_expired`` até ``max_attempts``, depois vão para a dead-letter.
+    Execuções devolvidas com ``nack`` esperam um backoff exponencial em um
+    sorted set de adiadas antes de poderem ser reivindicadas de novo, e também
+    vão para a dead-letter ao esgotar ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        namespace: str = "renum:executions",
+        visibility_timeout_seconds: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_backoff_seconds: Optional[float] = None
+    ):
+        self.redis_url = getattr(settings, 'REDIS_URL', 'redis://localhost:6379')
+        self.redis_client = redis_client
+        self.namespace = namespace
+        self.visibility_timeout_seconds = visibility_timeout_seconds or settings.EXECUTION_QUEUE_VISIBILITY_TIMEOUT_SECONDS
+        self.max_attempts = max_attempts or settings.EXECUTION_QUEUE_MAX_ATTEMPTS
+        self.retry_backoff_seconds = (
+            retry_backoff_seconds if retry_backoff_seconds is not None
+            else settings.EXECUTION_QUEUE_RETRY_BACKOFF_SECONDS
+        )
+
+        self.pending_key = f"{namespace}:pending"
+        self.leases_key = f"{namespace}:leases"
+        self.owners_key = f"{namespace}:owners"
+        self.attempts_key = f"{namespace}:attempts"
+        self.payloads_key = f"{namespace}:payloads"
+        self.dead_key = f"{namespace}:dead"
+        self.delayed_key = f"{namespace}:delayed"
+
+        self._scripts: Dict[str, Any] = {}
+
+    async def get_redis_client(self) -> redis.Redis:
+        """Get Redis client with connection pooling"""
+        if not self.redis_client:
+            self.redis_client = redis.from_url(
+                self.redis_url,
+                encoding="utf-8",
+                decode_responses=True,
+                max_connections=20
+            )
+        return self.redis_client
+
+    async def _script(self, name: str, source: str):
+        if name not in self._scripts:
+            client = await self.get_redis_client()
+            self._scripts[name] = client.register_script(source)
+        return self._scripts[name]
+
+    async def enqueue(self, execution_id: UUID, payload: Optional[Dict[str, Any]] = None):
+        """Enfileirar execução para processamento por um worker"""
+        client = await self.get_redis_client()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.payloads_key, str(execution_id), json.dumps(payload or {}))
+            pipe.lpush(self.pending_key, str(execution_id))
+            await pipe.execute()
+
+        logger.info("Execução enfileirada", execution_id=str(execution_id))
+
+    async def claim(self, worker_id: str) -> Optional[QueueLease]:
+        """Reivindicar a próxima execução pendente"""
+        expires_at = time.time() + self.visibility_timeout_seconds
+        script = await self._script('claim', _CLAIM_SCRIPT)
+        result = await script(
+            keys=[
+                self.pending_key, self.leases_key, self.owners_key,
+                self.attempts_key, self.payloads_key, self.delayed_key
+            ],
+            args=[worker_id, expires_at, time.time()]
+        )
+        if not result:
+            return None
+
+        execution_id, attempts, payload = result
+        return QueueLease(
+            execution_id=UUID(execution_id),
+            worker_id=worker_id,
+            attempt=int(attempts),
+            payload=json.loads(payload) if payload else {},
+            expires_at=expires_at
+        )
+
+    async def heartbeat(self, lease: QueueLease) -> bool:
+        """Renovar lease; ``False`` indica que o lease foi perdido"""
+        expires_at = time.time() + self.visibility_timeout_seconds
+        script = await self._script('heartbeat', _HEARTBEAT_SCRIPT)
+        renewed = await script(
+            keys=[self.leases_key, self.owners_key],
+            args=[str(lease.execution_id), lease.worker_id, expires_at]
+        )
+        if renewed:
+            lease.expires_at = expires_at
+        return bool(renewed)
+
+    async def ack(self, lease: QueueLease) -> bool:
+        """Confirmar processamento e remover a execução da fila"""
+        return bool(await self._release(lease, 'ack'))
+
+    async def nack(self, lease: QueueLease) -> bool:
+        """Devolver a execução à fila após o backoff (ou à dead-letter, esgotadas as tentativas)"""
+        backoff = min(
+            self.retry_backoff_seconds * 2 ** max(0, lease.attempt - 1),
+            settings.EXECUTION_QUEUE_MAX_RETRY_BACKOFF_SECONDS
+        )
+        released = await self._release(lease, 'requeue', time.time() + backoff)
+        if released == 2:
+            logger.error(
+                "Execução enviada para a dead-letter após falhas",
+                execution_id=str(lease.execution_id),
+                attempts=lease.attempt
+            )
+        return bool(released)
+
+    async def _release(self, lease: QueueLease, mode: str, ready_at: float = 0) -> int:
+        script = await self._script('release', _RELEASE_SCRIPT)
+        return await script(
+            keys=[
+                self.leases_key, self.owners_key, self.attempts_key,
+                self.payloads_key, self.delayed_key, self.dead_key
+            ],
+            args=[str(lease.execution_id), lease.worker_id, mode, self.max_attempts, ready_at]
+        )
+
+    async def requeue_expired(self, now: Optional[float] = None, batch_size: int = 100) -> List[UUID]:
+        """Recolocar na fila execuções com lease expirado"""
+        script = await self._script('requeue_expired', _REQUEUE_EXPIRED_SCRIPT)
+        requeued = await script(
+            keys=[self.leases_key, self.owners_key, self.attempts_key, self.pending_key, self.dead_key],
+            args=[now if now is not None else time.time(), self.max_attempts, batch_size]
+        )
+
+        if requeued:
+            logger.warning("Leases expirados recolocados na fila", execution_ids=requeued)
+        return [UUID(execution_id) for execution_id in requeued]
+
+    async def get_stats(self) -> Dict[str, int]:
+        """Profundidade da fila, leases ativos, adiadas (backoff) e dead-letter"""
+        client = await self.get_redis_client()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.llen(self.pending_key)
+            pipe.zcard(self.leases_key)
+            pipe.zcard(self.delayed_key)
+            pipe.llen(self.dead_key)
+            pending, leased, delayed, dead = await pipe.execute()
+
+        return {'pending': pending, 'leased': leased, 'delayed': delayed, 'dead_letter': dead}
+
+    async def close(self):
+        if self.redis_client:
+            await self.redis_client.close()
@@ -0,0 +1,200 @@
+"""
+Execution Scheduler
+Admissão de execuções com classes de prioridade e fila justa ponderada por tenant
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+# Esperas recentes por classe usadas nos percentis
+_WAIT_SAMPLE_SIZE = 500
+
+
+@dataclass(order=True)
+class _Waiter:
+    finish_tag: float
+    seq: int
+    start_tag: float = field(compare=False)
+    priority: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class _ClassStats:
+    """Métricas de espera na fila de uma classe de prioridade"""
+
+    def __init__(self):
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=_WAIT_SAMPLE_SIZE)
+
+    def record_wait(self, wait_ms: float):
+        self.admitted += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self.recent_waits.append(wait_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        waits = sorted(self.recent_waits)
+        return {
+            'active': self.active,
+            'waiting': self.waiting,
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'avg_wait_ms': round(self.total_wait_ms / self.admitted, 2) if self.admitted else 0.0,
+            'p50_wait_ms': round(waits[len(waits) // 2], 2) if waits else 0.0,
+            'p95_wait_ms': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 2) if waits else 0.0,
+            'max_wait_ms': round(self.max_wait_ms, 2)
+        }
+
+
+class ExecutionScheduler:
+    """
+    Limita as execuções simultâneas do processo e decide quem entra primeiro.
+
+    Cada par (classe de prioridade, tenant) é um fluxo com peso igual ao peso
+    da classe. A ordem de admissão segue start-time fair queuing: a requisição
+    recebe ``start = max(V, fim_anterior_do_fluxo)`` e
+    ``finish = start + custo / peso``; entra quem tiver o menor ``finish``.
+    Assim um tenant com centenas de execuções bulk não atrasa um plano
+    interativo, e tenants da mesma classe dividem a capacidade igualmente.
+    ``max_share`` limita a fração das vagas que uma classe pode ocupar, para
+    que execuções longas de baixa prioridade não tomem todas as vagas.
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        weights: Optional[Dict[str, int]] = None,
+        max_share: Optional[Dict[str, float]] = None
+    ):
+        self.capacity = max(1, capacity or settings.EXECUTION_MAX_CONCURRENT)
+        self.weights = dict(weights or settings.EXECUTION_PRIORITY_WEIGHTS)
+        self.class_limits = {
+            priority: max(1, int(self.capacity * share))
+            for priority, share in (
+                max_share if max_share is not None else settings.EXECUTION_PRIORITY_MAX_SHARE
+            ).items()
+        }
+        self.default_priority = 'standard'
+
+        self.active = 0
+        self.virtual_time = 0.0
+        self._finish_tags: Dict[Tuple[str, str], float] = {}
+        self._heap: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._stats: Dict[str, _ClassStats] = {priority: _ClassStats() for priority in self.weights}
+
+    @asynccontextmanager
+    async def slot(self, priority: str, tenant_id: str, cost: float = 1.0) -> AsyncIterator[float]:
+        """Ocupar uma vaga de execução; retorna o tempo de espera na fila (ms)"""
+        priority = priority if priority in self.weights else self.default_priority
+        wait_ms = await self.acquire(priority, tenant_id, cost)
+        try:
+            yield wait_ms
+        finally:
+            self.release(priority)
+
+    async def acquire(self, priority: str, tenant_id: str, cost: float = 1.0) -> float:
+        stats = self._stats.setdefault(priority, _ClassStats())
+        queued_at = time.perf_counter()
+        start_tag, finish_tag = self._tag(priority, tenant_id, cost)
+
+        waiter = _Waiter(
+            finish_tag, next(self._seq), start_tag, priority,
+            asyncio.get_running_loop().create_future()
+        )
+        heapq.heappush(self._heap, waiter)
+        stats.waiting += 1
+        # Com vaga livre entra imediatamente quem tiver o menor finish (talvez outro)
+        self._wake_next()
+
+        if not waiter.future.done():
+            stats.queued += 1
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # Vaga já concedida: devolver para o próximo da fila
+                    self.release(priority)
+                else:
+                    stats.waiting -= 1
+                raise
+
+        wait_ms = (time.perf_counter() - queued_at) * 1000
+        stats.record_wait(wait_ms)
+        return wait_ms
+
+    def release(self, priority: str):
+        self.active -= 1
+        self._stats[priority].active -= 1
+        self._wake_next()
+
+    def _tag(self, priority: str, tenant_id: str, cost: float) -> Tuple[float, float]:
+        flow = (priority, tenant_id)
+        start_tag = max(self.virtual_time, self._finish_tags.get(flow, 0.0))
+        finish_tag = start_tag + cost / max(1, self.weights.get(priority, 1))
+        self._finish_tags[flow] = finish_tag
+        return start_tag, finish_tag
+
+    def _admit(self, priority: str, start_tag: float):
+        self.active += 1
+        self._stats[priority].active += 1
+        self.virtual_time = max(self.virtual_time, start_tag)
+        if len(self._finish_tags) > self.capacity * 100:
+            # Fluxos ociosos (fim anterior a V) não influenciam mais a ordem
+            self._finish_tags = {
+                flow: tag for flow, tag in self._finish_tags.items() if tag > self.virtual_time
+            }
+
+    def _wake_next(self):
+        deferred = []
+        while self._heap and self.active < self.capacity:
+            waiter = heapq.heappop(self._heap)
+            if waiter.future.done():
+                continue
+            if self._stats[waiter.priority].active >= self.class_limits.get(waiter.priority, self.capacity):
+                # Classe no limite: mantém a posição, as demais seguem
+                deferred.append(waiter)
+                continue
+            self._stats[waiter.priority].waiting -= 1
+            self._admit(waiter.priority, waiter.start_tag)
+            waiter.future.set_result(None)
+        for waiter in deferred:
+            heapq.heappush(self._heap, waiter)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Ocupação e tempo de espera na fila por classe de prioridade"""
+        return {
+            'capacity': self.capacity,
+            'active': self.active,
+            'waiting': sum(stats.waiting for stats in self._stats.values()),
+            'virtual_time': round(self.virtual_time, 3),
+            'class_limits': dict(self.class_limits),
+            'classes': {priority: stats.to_dict() for priority, stats in self._stats.items()}
+        }
+
+
+_execution_scheduler: Optional[ExecutionScheduler] = None
+
+
+def get_execution_scheduler() -> ExecutionScheduler:
+    """Obter escalonador global de admissão (compartilhado pelas execuções do processo)"""
+    global _execution_scheduler
+    if _execution_scheduler is None:
+        _execution_scheduler = ExecutionScheduler()
+    return _execution_scheduler
@@ -3,21 +3,38 @@ Multi-Agent Execution Service
 Handles coordination and execution of multi-agent workflows
 """
 import asyncio
+import time
+from collections import ChainMap
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Set, Tuple
 from uuid import UUID, uuid4
 import structlog
 
 from app.domain.execution import (
     MultiAgentExecution, ExecutionPlan, ExecutionStep,
-    ExecutionStatus, StepStatus, ExecutionStrategy, FailureHandling
+    ExecutionStatus, StepStatus, ExecutionStrategy, FailureHandling, ExecutionPriority
 )
+from app.domain.execution_context import ScopedContext, resolve_path, strip_reference
 from app.repositories.execution_repository import ExecutionRepository
 from app.agents.agent_registry import AgentRegistry, get_agent_registry
+from app.agents.base_agent import AgentExecutionResult
 from app.services.user_credentials_service import UserCredentialsService
+from app.services.step_scheduler import StepScheduler
+from app.services.execution_state_writer import ExecutionStateWriter
+from app.services.execution_queue import ExecutionQueue
+from app.services.execution_control import ExecutionControl, ExecutionCancelledError
+from app.services.concurrency_governor import ConcurrencyGovernor, get_concurrency_governor
+from app.services.step_result_cache import StepResultCache, get_step_result_cache
+from app.services.execution_scheduler import ExecutionScheduler, get_execution_scheduler
+from app.services.analytics_service import analytics_service
+from app.core.config import settings
+from app.core.deadline import Deadline, deadline_allows, deadline_scope, effective_timeout, get_deadline
 
 logger = structlog.get_logger(__name__)
 
+# Marcador de fim de stream entre estágios do pipeline streaming
+_END_OF_STREAM = object()
+
 class ExecutionService:
     """Service for coordinating multi-agent executions"""
     
@@ -25,17 +42,38 @@ class ExecutionService:
         self,
         execution_repository: Optional[ExecutionRepository] = None,
         agent_registry: Optional[AgentRegistry] = None,
-        credentials_service: Optional[UserCredentialsService] = None
+        credentials_service: Optional[UserCredentialsService] = None,
+        state_writer: Optional[ExecutionStateWriter] = None,
+        execution_queue: Optional[ExecutionQueue] = None,
+        concurrency_governor: Optional[ConcurrencyGovernor] = None,
+        result_cache: Optional[StepResultCache] = None,
+        execution_scheduler: Optional[ExecutionScheduler] = None
     ):
         self.execution_repo = execution_repository or ExecutionRepository()
+        self.state_writer = state_writer or ExecutionStateWriter(self.execution_repo)
+        
+        # Fila distribuída (workers); sem fila, executa no próprio processo
+        self.execution_queue = execution_queue
         self.agent_registry = agent_registry or get_agent_registry()
         self.credentials_service = credentials_service or UserCredentialsService()
         
         # Execuções ativas (em produção seria Redis/cache distribuído)
         self._active_executions: Dict[UUID, MultiAgentExecution] = {}
         
-        # Semáforo para controlar execuções paralelas
-        self._execution_semaphore = asyncio.Semaphore(10)
+        # Sinais de pausa/retomada/cancelamento das execuções ativas
+        self._controls: Dict[UUID, ExecutionControl] = {}
+        
+        # Execuções cujo lease foi perdido: o novo dono grava o estado, não este processo
+        self._abandoned: Set[UUID] = set()
+        
+        # Admissão de execuções: classes de prioridade + fila justa por tenant
+        self.execution_scheduler = execution_scheduler or get_execution_scheduler()
+        
+        # Limites por agente (AgentPolicy) e por provedor, compartilhados no processo
+        self.concurrency_governor = concurrency_governor or get_concurrency_governor()
+        
+        # Cache de resultados para passos marcados como cacheable
+        self.result_cache = result_cache or get_step_result_cache()
     
     async def create_execution_plan(
         self,
@@ -63,7 +101,14 @@ class ExecutionService:
                     retry_delay_seconds=step_data.get('retry_delay_seconds', 5),
                     condition=step_data.get('condition'),
                     credential_id=UUID(step_data['credential_id']) if step_data.get('credential_id') else None,
-                    metadata=step_data.get('metadata', {})
+                    metadata=step_data.get('metadata', {}),
+                    cacheable=step_data.get('cacheable', False),
+                    cache_ttl_seconds=step_data.get('cache_ttl_seconds'),
+                    map_over=step_data.get('map_over'),
+                    map_concurrency=step_data.get('map_concurrency', 5),
+                    map_item_key=step_data.get('map_item_key'),
+                    map_max_failures=step_data.get('map_max_failures'),
+                    inputs=step_data.get('inputs')
                 )
                 steps.append(step)
             
@@ -80,6 +125,7 @@ class ExecutionService:
                 failure_handling=FailureHandling(plan_data.get('failure_handling', 'stop_on_failure')),
                 max_parallel_steps=plan_data.get('max_parallel_steps', 5),
                 timeout_minutes=plan_data.get('timeout_minutes', 60),
+                priority=ExecutionPriority(plan_data.get('priority', 'standard')),
                 metadata=plan_data.get('metadata', {})
             )
             
@@ -107,8 +153,13 @@ class ExecutionService:
             context=context or {}
         )
         
-        # Salvar execução inicial
-        execution = await self.execution_repo.save_execution(execution)
+        # Salvar execução inicial (linha completa; depois apenas deltas)
+        execution = await self.state_writer.create(execution)
+        
+        if self.execution_queue:
+            # Workers reivindicam a execução da fila
+            await self.execution_queue.enqueue(execution.execution_id, {'user_id': str(user_id)})
+            return execution
         
         # Adicionar à lista de execuções ativas
         self._active_executions[execution_id] = execution
@@ -118,37 +169,163 @@ class ExecutionService:
         
         return execution
     
-    async def _execute_plan_async(self, execution: MultiAgentExecution):
-        """Execute plan asynchronously"""
-        async with self._execution_semaphore:
+    async def run_queued_execution(self, execution_id: UUID) -> Optional[MultiAgentExecution]:
+        """Run an execution claimed from the queue (new or recovered after a lost lease)"""
+        execution = await self.execution_repo.find_execution_by_id(execution_id)
+        if not execution or execution.is_finished():
+            return execution
+        
+        # Outputs concluídos alimentam contexto/map dos próximos passos
+        await self.execution_repo.load_payloads(execution)
+        self.state_writer.attach(execution)
+        paused = self._prepare_for_recovery(execution)
+        self._active_executions[execution.execution_id] = execution
+        
+        try:
+            await self._execute_plan_async(execution, start_paused=paused)
+        finally:
+            # Cancelada ainda na fila de admissão, antes do bloco final da execução
+            self._abandoned.discard(execution.execution_id)
+        return execution
+    
+    def abandon_execution(self, execution_id: UUID):
+        """Lease lost: the local run is being cancelled and must not persist its final state"""
+        self._abandoned.add(execution_id)
+    
+    def _prepare_for_recovery(self, execution: MultiAgentExecution) -> bool:
+        """Reset an orphaned execution so it can be started again; returns whether it was paused"""
+        if execution.status == ExecutionStatus.PENDING:
+            return False
+        
+        paused = execution.is_paused()
+        
+        # Falhas já definitivas pela política do plano não são refeitas
+        execution.restore_checkpoint(
+            retry_failed=False,
+            restart_all=execution.plan.strategy == ExecutionStrategy.STREAMING
+        )
+        execution.add_log("warning", "Execução recuperada de um worker anterior")
+        return paused
+    
+    async def _resume_from_checkpoint(self, execution: MultiAgentExecution):
+        """Restart an interrupted or failed execution, skipping checkpointed steps"""
+        await self.execution_repo.load_payloads(execution)
+        self.state_writer.attach(execution)
+        
+        # Estágios streaming não guardam posição no stream: o pipeline recomeça
+        resumed_steps = execution.restore_checkpoint(
+            retry_failed=True,
+            restart_all=execution.plan.strategy == ExecutionStrategy.STREAMING
+        )
+        completed_steps = [
+            step.step_id for step in execution.plan.steps
+            if step.status in [StepStatus.COMPLETED, StepStatus.SKIPPED]
+        ]
+        execution.add_log("info", "Execução retomada a partir do último checkpoint", metadata={
+            'resumed_steps': resumed_steps,
+            'checkpointed_steps': completed_steps
+        })
+        logger.info(
+            "Retomando execução a partir de checkpoint",
+            execution_id=str(execution.execution_id),
+            resumed_steps=len(resumed_steps),
+            checkpointed_steps=len(completed_steps)
+        )
+        
+        await self.state_writer.flush(execution, force=True)
+        
+        if self.execution_queue:
+            await self.execution_queue.enqueue(execution.execution_id, {'user_id': str(execution.user_id)})
+            return
+        
+        self._active_executions[execution.execution_id] = execution
+        asyncio.create_task(self._execute_plan_async(execution))
+    
+    async def sync_control_state(self, execution_id: UUID):
+        """Apply pause/resume/cancel requested from another process"""
+        execution = self._active_executions.get(execution_id)
+        if not execution:
+            return
+        
+        status = await self.execution_repo.get_execution_status(execution_id)
+        if status == ExecutionStatus.CANCELLED and not execution.is_cancelled():
+            execution.cancel()
+        elif status == ExecutionStatus.PAUSED and execution.status == ExecutionStatus.RUNNING:
+            execution.pause()
+        elif status == ExecutionStatus.RUNNING and execution.is_paused():
+            execution.resume()
+        else:
+            return
+        
+        self._signal_control(execution)
+    
+    def _get_control(self, execution: MultiAgentExecution) -> ExecutionControl:
+        """Controle da execução ativa (ou avulso, para passos executados isoladamente)"""
+        return self._controls.get(execution.execution_id) or ExecutionControl(execution)
+    
+    def _signal_control(self, execution: MultiAgentExecution):
+        control = self._controls.get(execution.execution_id)
+        if control:
+            control.sync()
+    
+    async def _execute_plan_async(self, execution: MultiAgentExecution, start_paused: bool = False):
+        """Execute plan asynchronously; ``start_paused`` keeps a recovered paused run waiting for resume"""
+        async with self.execution_scheduler.slot(
+            execution.plan.priority.value,
+            self._tenant_of(execution),
+            cost=len(execution.plan.steps)
+        ) as queue_wait_ms:
+            execution.metrics['queue_wait_ms'] = round(queue_wait_ms, 2)
             try:
-                # Iniciar execução
+                if execution.is_finished():
+                    # Cancelada enquanto aguardava admissão: não há o que iniciar
+                    logger.info(
+                        "Execução encerrada antes da admissão",
+                        execution_id=str(execution.execution_id),
+                        status=execution.status.value,
+                        queue_wait_ms=execution.metrics['queue_wait_ms']
+                    )
+                    return
+
+                # Iniciar execução; o prazo do plano vale para esta rodada (pausas não contam)
                 execution.start()
-                await self.execution_repo.save_execution(execution)
+                deadline = Deadline.after(execution.plan.timeout_minutes * 60)
+                if start_paused:
+                    execution.pause()
+                self._controls[execution.execution_id] = ExecutionControl(execution, deadline)
+                self.state_writer.mark_dirty(execution)
                 
                 logger.info(
                     "Iniciando execução multi-agente",
                     execution_id=str(execution.execution_id),
                     plan_id=execution.plan.plan_id,
                     strategy=execution.plan.strategy.value,
-                    total_steps=len(execution.plan.steps)
+                    total_steps=len(execution.plan.steps),
+                    priority=execution.plan.priority.value,
+                    queue_wait_ms=execution.metrics['queue_wait_ms']
                 )
                 
-                # Executar baseado na estratégia
-                if execution.plan.strategy == ExecutionStrategy.SEQUENTIAL:
-                    await self._execute_sequential(execution)
-                elif execution.plan.strategy == ExecutionStrategy.PARALLEL:
-                    await self._execute_parallel(execution)
-                elif execution.plan.strategy == ExecutionStrategy.PIPELINE:
-                    await self._execute_pipeline(execution)
-                elif execution.plan.strategy == ExecutionStrategy.CONDITIONAL:
-                    await self._execute_conditional(execution)
-                elif execution.plan.strategy == ExecutionStrategy.BATCH:
-                    await self._execute_batch(execution)
+                # Executar baseado na estratégia; agentes herdam o prazo via contextvars
+                with deadline_scope(deadline):
+                    if execution.plan.strategy == ExecutionStrategy.SEQUENTIAL:
+                        await self._execute_sequential(execution)
+                    elif execution.plan.strategy == ExecutionStrategy.PARALLEL:
+                        await self._execute_parallel(execution)
+                    elif execution.plan.strategy == ExecutionStrategy.PIPELINE:
+                        await self._execute_pipeline(execution)
+                    elif execution.plan.strategy == ExecutionStrategy.CONDITIONAL:
+                        await self._execute_conditional(execution)
+                    elif execution.plan.strategy == ExecutionStrategy.BATCH:
+                        await self._execute_batch(execution)
+                    elif execution.plan.strategy == ExecutionStrategy.STREAMING:
+                        await self._execute_streaming(execution)
                 
                 # Completar execução se não foi cancelada
                 if not execution.is_cancelled():
-                    execution.complete()
+                    if execution.metrics.get('deadline_exceeded'):
+                        execution.fail(f"Prazo de {execution.plan.timeout_minutes} min da execução excedido")
+                    else:
+                        execution.complete()
                 
             except Exception as e:
                 execution.fail(str(e))
@@ -161,21 +338,60 @@ class ExecutionService:
                 # Remover da lista de execuções ativas
                 if execution.execution_id in self._active_executions:
                     del self._active_executions[execution.execution_id]
+                self._controls.pop(execution.execution_id, None)
                 
-                # Salvar estado final
-                await self.execution_repo.save_execution(execution)
+                if execution.execution_id in self._abandoned:
+                    # Lease perdido: um flush aqui sobrescreveria o estado do novo dono
+                    self._abandoned.discard(execution.execution_id)
+                    await self.state_writer.discard(execution)
+                else:
+                    # Salvar estado final (flush forçado)
+                    await self.state_writer.close(execution)
+    
+    async def _record_agent_call(
+        self,
+        execution: MultiAgentExecution,
+        step: ExecutionStep,
+        elapsed_ms: float,
+        success: bool,
+        error_type: Optional[str]
+    ):
+        try:
+            await analytics_service.record_agent_execution(
+                agent_id=step.agent_id,
+                execution_id=execution.execution_id,
+                execution_time_ms=elapsed_ms,
+                success=success,
+                error_type=error_type,
+                capability=step.capability_name
+            )
+        except Exception as e:
+            logger.warning(
+                "Falha ao registrar métricas do agente",
+                execution_id=str(execution.execution_id),
+                step_id=step.step_id,
+                error=str(e)
+            )
+    
+    @staticmethod
+    def _tenant_of(execution: MultiAgentExecution) -> str:
+        """Fluxo da fila justa: tenant do plano, ou o próprio usuário"""
+        return str(execution.plan.metadata.get('tenant_id') or execution.user_id)
     
     async def _execute_sequential(self, execution: MultiAgentExecution):
         """Execute steps sequentially"""
         execution.add_log("info", "Iniciando execução sequencial")
+        control = self._get_control(execution)
         
         for step in execution.plan.steps:
-            if execution.is_cancelled():
-                break
+            # Passos concluídos antes de uma recuperação não são refeitos
+            if step.status in [StepStatus.COMPLETED, StepStatus.SKIPPED]:
+                continue
             
             # Aguardar se pausado
-            while execution.is_paused():
-                await asyncio.sleep(1)
+            await control.wait_if_paused()
+            if execution.is_cancelled():
+                break
             
             # Executar passo
             await self._execute_step(execution, step)
@@ -188,122 +404,314 @@ class ExecutionService:
                     await self._retry_step(execution, step)
     
     async def _execute_parallel(self, execution: MultiAgentExecution):
-        """Execute steps in parallel (respecting dependencies)"""
-        execution.add_log("info", "Iniciando execução paralela")
+        """Execute steps in parallel, dispatching each step as soon as its dependencies complete"""
+        execution.add_log(
+            "info",
+            "Iniciando execução paralela",
+            metadata={'max_parallel_steps': execution.plan.max_parallel_steps}
+        )
         
-        # Obter ordem de execução por níveis
-        execution_levels = execution.plan.get_execution_order()
+        async def run_step(step: ExecutionStep):
+            await self._execute_step(execution, step)
+            if (
+                step.status == StepStatus.FAILED
+                and execution.plan.failure_handling == FailureHandling.RETRY_ON_FAILURE
+            ):
+                await self._retry_step(execution, step)
         
-        for level_index, level_steps in enumerate(execution_levels):
-            if execution.is_cancelled():
-                break
-            
-            execution.add_log("info", f"Executando nível {level_index + 1}: {level_steps}")
-            
-            # Executar passos do nível em paralelo
-            tasks = []
-            for step_id in level_steps:
-                step = execution.plan.get_step(step_id)
-                if step:
-                    task = asyncio.create_task(self._execute_step(execution, step))
-                    tasks.append((step_id, task))
-            
-            # Aguardar conclusão de todos os passos do nível
-            results = await asyncio.gather(*[task for _, task in tasks], return_exceptions=True)
-            
-            # Processar resultados
-            for (step_id, _), result in zip(tasks, results):
-                if isinstance(result, Exception):
-                    execution.add_log("error", f"Erro no passo '{step_id}': {str(result)}")
-                    if execution.plan.failure_handling == FailureHandling.STOP_ON_FAILURE:
-                        raise result
+        def on_dispatch(step: ExecutionStep, ready_queue_depth: int):
+            execution.add_log(
+                "info",
+                f"Despachando passo '{step.step_id}'",
+                step.step_id,
+                {'wait_time_ms': step.wait_time_ms, 'ready_queue_depth': ready_queue_depth}
+            )
+        
+        scheduler = StepScheduler(
+            plan=execution.plan,
+            run_step=run_step,
+            max_parallel=execution.plan.max_parallel_steps,
+            stop_on_failure=execution.plan.failure_handling == FailureHandling.STOP_ON_FAILURE,
+            is_cancelled=execution.is_cancelled,
+            on_dispatch=on_dispatch,
+            wait_if_paused=self._get_control(execution).wait_if_paused
+        )
+        
+        try:
+            await scheduler.run()
+        finally:
+            execution.metrics['scheduler'] = scheduler.stats.to_dict()
+            logger.info(
+                "Execução paralela finalizada",
+                execution_id=str(execution.execution_id),
+                **{k: v for k, v in scheduler.stats.to_dict().items() if k != 'wait_time_ms_by_step'}
+            )
     
     async def _execute_pipeline(self, execution: MultiAgentExecution):
         """Execute steps as pipeline (output feeds into next)"""
         execution.add_log("info", "Iniciando execução em pipeline")
-        
-        context = execution.context.copy()
-        context.update(execution.input_data)
+        control = self._get_control(execution)
+        context = self._scoped_context(execution)
         
         for step in execution.plan.steps:
-            if execution.is_cancelled():
-                break
+            # Checkpoint: passo concluído apenas devolve seu output ao contexto
+            if step.status in [StepStatus.COMPLETED, StepStatus.SKIPPED]:
+                context.push(step.step_id, step.output_data)
+                context.done(step.step_id)
+                continue
             
             # Aguardar se pausado
-            while execution.is_paused():
-                await asyncio.sleep(1)
-            
-            # Usar output do passo anterior como input
-            step_input = {**step.input_data, **context}
-            
-            # Executar passo
-            await self._execute_step_with_input(execution, step, step_input)
+            await control.wait_if_paused()
+            if execution.is_cancelled():
+                break
             
-            # Atualizar contexto com output
-            if step.output_data:
-                context.update(step.output_data)
+            # Usar output dos passos anteriores como input
+            await self._execute_scoped_step(execution, step, context)
             
             # Verificar falha
             if step.status == StepStatus.FAILED:
                 if execution.plan.failure_handling == FailureHandling.STOP_ON_FAILURE:
                     raise Exception(f"Pipeline falhou no passo '{step.step_id}': {step.error_message}")
     
+    async def _execute_streaming(self, execution: MultiAgentExecution):
+        """Execute steps as a streaming pipeline: records flow between steps through bounded buffers"""
+        buffer_size = execution.plan.metadata.get('stream_buffer_size', settings.STREAM_PIPELINE_BUFFER_SIZE)
+        execution.add_log("info", "Iniciando execução em pipeline streaming", metadata={'buffer_size': buffer_size})
+        
+        steps = execution.plan.steps
+        if not steps:
+            return
+        
+        # buffers[i] liga o passo i ao passo i+1; put() bloqueia quando cheio (backpressure)
+        buffers = [asyncio.Queue(maxsize=buffer_size) for _ in steps[:-1]]
+        source_input = {**execution.context, **execution.input_data}
+        
+        stages = [
+            self._run_stream_stage(
+                execution,
+                step,
+                inbox=buffers[index - 1] if index > 0 else None,
+                outbox=buffers[index] if index < len(buffers) else None,
+                source_input=source_input
+            )
+            for index, step in enumerate(steps)
+        ]
+        
+        try:
+            await self._get_control(execution).run(self._run_stream_stages(stages))
+        except ExecutionCancelledError:
+            execution.add_log("warning", "Pipeline streaming interrompido por cancelamento")
+    
+    @staticmethod
+    async def _run_stream_stages(stages):
+        tasks = [asyncio.create_task(stage) for stage in stages]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if not task.cancelled() and task.exception():
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def _run_stream_stage(
+        self,
+        execution: MultiAgentExecution,
+        step: ExecutionStep,
+        inbox: Optional[asyncio.Queue],
+        outbox: Optional[asyncio.Queue],
+        source_input: Dict[str, Any]
+    ):
+        """Run one pipeline stage; per-record failures follow the plan's failure handling"""
+        control = self._get_control(execution)
+        stop_on_failure = execution.plan.failure_handling == FailureHandling.STOP_ON_FAILURE
+        stats = {'records_in': 0, 'records_out': 0, 'errors': 0, 'sample': []}
+        
+        step.start_execution()
+        execution.add_log("info", f"Iniciando passo '{step.step_id}' (streaming)", step.step_id)
+        
+        try:
+            agent = self.agent_registry.get_agent(step.agent_id)
+            if not agent:
+                raise Exception(f"Agente '{step.agent_id}' não encontrado")
+            
+            if inbox is None:
+                # Fonte: um único stream sobre o input do plano
+                await self._stream_records(execution, agent, step, {**step.input_data, **source_input}, outbox, stats)
+            else:
+                async def consume():
+                    while True:
+                        record = await inbox.get()
+                        if record is _END_OF_STREAM:
+                            # Repassar o marcador para os demais consumidores
+                            await inbox.put(_END_OF_STREAM)
+                            return
+                        
+                        stats['records_in'] += 1
+                        await control.wait_if_paused()
+                        try:
+                            await self._stream_records(execution, agent, step, {**step.input_data, **record}, outbox, stats)
+                        except Exception as e:
+                            if stop_on_failure:
+                                raise
+                            stats['errors'] += 1
+                            execution.add_log("error", f"Registro falhou no passo '{step.step_id}': {str(e)}", step.step_id)
+                
+                workers = max(1, int(step.metadata.get('stream_concurrency', 1)))
+                await asyncio.gather(*(consume() for _ in range(workers)))
+            
+            if outbox is not None:
+                await outbox.put(_END_OF_STREAM)
+        
+        except asyncio.CancelledError:
+            if step.status == StepStatus.RUNNING:
+                step.skip_execution("Pipeline streaming interrompido")
+            raise
+        except Exception as e:
+            step.fail_execution(str(e))
+            execution.add_log("error", f"Passo '{step.step_id}' falhou: {str(e)}", step.step_id)
+            raise Exception(f"Pipeline falhou no passo '{step.step_id}': {str(e)}")
+        
+        if outbox is not None:
+            stats.pop('sample')
+        step.complete_execution(stats)
+        execution.add_step_result(step.step_id, {'success': True, 'data': stats})
+        execution.add_log("info", f"Passo '{step.step_id}' completado", step.step_id, {
+            'records_in': stats['records_in'], 'records_out': stats['records_out'], 'errors': stats['errors']
+        })
+        self.state_writer.mark_dirty(execution)
+    
+    async def _stream_records(
+        self,
+        execution: MultiAgentExecution,
+        agent,
+        step: ExecutionStep,
+        input_data: Dict[str, Any],
+        outbox: Optional[asyncio.Queue],
+        stats: Dict[str, Any]
+    ):
+        """Pull records from the agent stream and push them downstream"""
+        stream = agent.stream_capability(
+            capability_name=step.capability_name,
+            input_data=input_data,
+            user_id=execution.user_id,
+            credential_id=step.credential_id
+        )
+        providers = agent.get_supported_providers()
+        try:
+            while True:
+                # Slot só durante a busca: esperar o consumidor não prende o provedor
+                async with self.concurrency_governor.slot(step.agent_id, providers):
+                    try:
+                        record = await asyncio.wait_for(
+                            stream.__anext__(), timeout=effective_timeout(step.timeout_seconds)
+                        )
+                    except StopAsyncIteration:
+                        return
+                
+                stats['records_out'] += 1
+                if outbox is not None:
+                    await outbox.put(record)
+                elif len(stats['sample']) < settings.STREAM_PIPELINE_SAMPLE_SIZE:
+                    stats['sample'].append(record)
+        finally:
+            await stream.aclose()
+    
     async def _execute_conditional(self, execution: MultiAgentExecution):
         """Execute steps with conditional logic"""
         execution.add_log("info", "Iniciando execução condicional")
+        control = self._get_control(execution)
+        context = self._scoped_context(execution)
         
-        context = execution.context.copy()
-        context.update(execution.input_data)
+        # Passos com checkpoint (execução retomada) contam como concluídos
         completed_steps = set()
+        pending = []
+        for step in execution.plan.steps:
+            if step.status in [StepStatus.COMPLETED, StepStatus.SKIPPED]:
+                completed_steps.add(step.step_id)
+                context.push(step.step_id, step.output_data)
+                context.done(step.step_id)
+            else:
+                pending.append(step)
         
-        while len(completed_steps) < len(execution.plan.steps):
+        while pending:
             if execution.is_cancelled():
                 break
             
-            executed_in_round = False
+            # Passos liberados nesta rodada; condições avaliadas em lote
+            ready = [step for step in pending if step.can_execute(completed_steps)]
+            if not ready:
+                break
             
-            for step in execution.plan.steps:
-                if step.step_id in completed_steps:
-                    continue
-                
-                # Verificar dependências
-                if not step.can_execute(list(completed_steps)):
-                    continue
+            conditions = execution.plan.evaluate_step_conditions(ready, context)
+            
+            for step in ready:
+                pending.remove(step)
                 
-                # Verificar condição
-                if not step.evaluate_condition(context):
+                if not conditions[step.step_id]:
                     execution.add_log("info", f"Passo '{step.step_id}' pulado por condição")
                     step.skip_execution("Condição não atendida")
                     completed_steps.add(step.step_id)
-                    executed_in_round = True
+                    context.done(step.step_id)
                     continue
                 
-                # Executar passo
-                await self._execute_step_with_input(execution, step, context)
-                completed_steps.add(step.step_id)
-                executed_in_round = True
+                # Aguardar se pausado
+                await control.wait_if_paused()
+                if execution.is_cancelled():
+                    break
                 
-                # Atualizar contexto
-                if step.output_data:
-                    context.update(step.output_data)
+                # Executar passo (output visível para as condições da próxima rodada)
+                await self._execute_scoped_step(execution, step, context, own_input=False)
+                completed_steps.add(step.step_id)
                 
                 # Verificar falha
                 if step.status == StepStatus.FAILED:
                     if execution.plan.failure_handling == FailureHandling.STOP_ON_FAILURE:
                         raise Exception(f"Passo '{step.step_id}' falhou: {step.error_message}")
-            
-            # Evitar loop infinito
-            if not executed_in_round:
-                break
+    
+    @staticmethod
+    def _scoped_context(execution: MultiAgentExecution) -> ScopedContext:
+        """Layered context over the execution input; readers are the steps still to run"""
+        pending = [
+            step for step in execution.plan.steps
+            if step.status not in [StepStatus.COMPLETED, StepStatus.SKIPPED]
+        ]
+        return ScopedContext(ChainMap(execution.input_data, execution.context), pending)
+    
+    async def _execute_scoped_step(
+        self,
+        execution: MultiAgentExecution,
+        step: ExecutionStep,
+        context: ScopedContext,
+        own_input: bool = True
+    ):
+        """Run a step on its slice of the context and publish its output as a new layer"""
+        try:
+            step_input = context.step_input(step, own_input=own_input)
+        except ValueError as e:
+            step.start_execution()
+            step.fail_execution(str(e))
+            execution.add_log("error", f"Passo '{step.step_id}' falhou: {e}", step.step_id)
+        else:
+            await self._execute_step_with_input(execution, step, step_input)
+        
+        context.push(step.step_id, step.output_data)
+        context.done(step.step_id)
     
     async def _execute_batch(self, execution: MultiAgentExecution):
         """Execute steps in batches"""
         execution.add_log("info", "Iniciando execução em lote")
         
+        control = self._get_control(execution)
         batch_size = execution.plan.max_parallel_steps
-        steps = execution.plan.steps
+        steps = [
+            step for step in execution.plan.steps
+            if step.status not in [StepStatus.COMPLETED, StepStatus.SKIPPED]
+        ]
         
         for i in range(0, len(steps), batch_size):
+            await control.wait_if_paused()
             if execution.is_cancelled():
                 break
             
@@ -350,46 +758,257 @@ class ExecutionService:
             if not agent.has_capability(step.capability_name):
                 raise Exception(f"Agente '{step.agent_id}' não tem capacidade '{step.capability_name}'")
             
-            # Executar com timeout
-            result = await asyncio.wait_for(
-                agent.execute_capability(
-                    capability_name=step.capability_name,
-                    input_data=input_data,
-                    user_id=execution.user_id,
-                    credential_id=step.credential_id
-                ),
-                timeout=step.timeout_seconds
-            )
+            if step.is_map:
+                result = await self._execute_map(agent, execution, step, input_data)
+            else:
+                # Executar com timeout; cancelamento da execução interrompe a chamada
+                result = await self._get_control(execution).run(
+                    self._call_agent(agent, execution, step, input_data)
+                )
             
             if result.success:
                 step.complete_execution(result.data)
                 execution.add_step_result(step.step_id, result.to_dict())
                 execution.add_log("info", f"Passo '{step.step_id}' completado", step.step_id)
+                await self._checkpoint_step(execution, step)
+                return
             else:
                 step.fail_execution(result.error_message or "Erro desconhecido")
+                if step.is_map:
+                    # Relatório por item também quando o limite de falhas é excedido
+                    execution.add_step_result(step.step_id, result.to_dict())
                 execution.add_log("error", f"Passo '{step.step_id}' falhou: {result.error_message}", step.step_id)
             
+        except ExecutionCancelledError:
+            step.skip_execution("Execução cancelada")
+            execution.add_log("warning", f"Passo '{step.step_id}' interrompido por cancelamento", step.step_id)
         except asyncio.TimeoutError:
-            error_msg = f"Timeout de {step.timeout_seconds}s excedido"
+            error_msg = self._timeout_message(execution, step)
             step.fail_execution(error_msg)
             execution.add_log("error", f"Passo '{step.step_id}' falhou: {error_msg}", step.step_id)
         except Exception as e:
             step.fail_execution(str(e))
             execution.add_log("error", f"Passo '{step.step_id}' falhou: {str(e)}", step.step_id)
         
-        # Salvar progresso
-        await self.execution_repo.save_execution(execution)
+        # Agendar persistência do progresso (agrupada por execução)
+        self.state_writer.mark_dirty(execution)
+    
+    async def _execute_map(
+        self,
+        agent,
+        execution: MultiAgentExecution,
+        step: ExecutionStep,
+        input_data: Dict[str, Any]
+    ) -> AgentExecutionResult:
+        """Run the step capability once per item of a list, with bounded concurrency and per-item retries"""
+        items = self._resolve_map_items(execution, step, input_data)
+        control = self._get_control(execution)
+        concurrency = max(1, min(step.map_concurrency, len(items) or 1))
+        started = time.perf_counter()
+        
+        results: List[Any] = [None] * len(items)
+        errors: List[Dict[str, Any]] = []
+        pending_indexes = iter(range(len(items)))
+        
+        execution.add_log("info", f"Passo '{step.step_id}' mapeando {len(items)} itens", step.step_id, {
+            'concurrency': concurrency
+        })
+        
+        async def run_item(index: int):
+            item_input = self._map_item_input(step, input_data, items[index])
+            error = None
+            for attempt in range(step.retry_count + 1):
+                if attempt:
+                    # Sem tempo para esperar e tentar de novo dentro do prazo
+                    if not deadline_allows(step.retry_delay_seconds):
+                        break
+                    if step.retry_delay_seconds > 0:
+                        await asyncio.sleep(step.retry_delay_seconds)
+                try:
+                    result = await self._call_agent(agent, execution, step, item_input)
+                except asyncio.TimeoutError:
+                    error = self._timeout_message(execution, step)
+                    continue
+                except Exception as e:
+                    error = str(e)
+                    continue
+                
+                if result.success:
+                    results[index] = result.data
+                    return
+                error = result.error_message or "Erro desconhecido"
+            
+            errors.append({'index': index, 'error': error, 'attempts': step.retry_count + 1})
+        
+        async def worker():
+            # Iterador compartilhado: N workers, sem uma task por item
+            for index in pending_indexes:
+                await control.wait_if_paused()
+                if control.cancelled:
+                    return
+                await run_item(index)
+        
+        # Cancelamento da execução interrompe todos os itens em andamento
+        await control.run(asyncio.gather(*(worker() for _ in range(concurrency))))
+        
+        errors.sort(key=lambda error: error['index'])
+        failed = len(errors)
+        succeeded = len(items) - failed
+        if step.map_max_failures is not None:
+            success = failed <= step.map_max_failures
+        else:
+            success = failed == 0 or succeeded > 0
+        
+        execution.add_log(
+            "info" if not failed else "warning",
+            f"Passo '{step.step_id}' mapeou {len(items)} itens: {succeeded} ok, {failed} falharam",
+            step.step_id
+        )
+        
+        return AgentExecutionResult(
+            success=success,
+            data={
+                'items_total': len(items),
+                'succeeded': succeeded,
+                'failed': failed,
+                'results': results,
+                'errors': errors
+            },
+            error_message=None if success else f"{failed} de {len(items)} itens falharam",
+            execution_time_ms=int((time.perf_counter() - started) * 1000),
+            metadata={'map': {'concurrency': concurrency}}
+        )
+    
+    @staticmethod
+    def _resolve_map_items(
+        execution: MultiAgentExecution,
+        step: ExecutionStep,
+        input_data: Dict[str, Any]
+    ) -> List[Any]:
+        """Resolve ``map_over``: a context key or ``<step_id>.<path>`` into an upstream output"""
+        reference = strip_reference(step.map_over)
+        head, _, path = reference.partition('.')
+        upstream = execution.plan.get_step(head)
+        if upstream is not None and upstream is not step:
+            value: Any = upstream.output_data or {}
+        else:
+            scope = ChainMap(input_data, execution.input_data, execution.context)
+            if head not in scope:
+                raise ValueError(f"Lista '{step.map_over}' não encontrada no contexto")
+            value = scope[head]
+        
+        value = resolve_path(value, path, step.map_over)
+        
+        if not isinstance(value, list):
+            raise ValueError(f"'{step.map_over}' não é uma lista")
+        return value
+    
+    @staticmethod
+    def _map_item_input(step: ExecutionStep, input_data: Dict[str, Any], item: Any) -> Dict[str, Any]:
+        """Input of one item: step input plus the item (merged if dict, else under ``map_item_key``/'item')"""
+        item_input = dict(input_data)
+        # A lista inteira não é repassada a cada item
+        item_input.pop(strip_reference(step.map_over), None)
+        
+        if step.map_item_key:
+            item_input[step.map_item_key] = item
+        elif isinstance(item, dict):
+            item_input.update(item)
+        else:
+            item_input['item'] = item
+        return item_input
+    
+    async def _checkpoint_step(self, execution: MultiAgentExecution, step: ExecutionStep):
+        """Persist a completed step right away so a resume never repeats its side effects"""
+        if not settings.EXECUTION_CHECKPOINT_STEPS:
+            self.state_writer.mark_dirty(execution)
+            return
+        
+        try:
+            await self.state_writer.flush(execution, force=True)
+        except Exception as e:
+            # O passo segue concluído; o próximo flush reenvia o delta
+            logger.warning(
+                "Falha ao gravar checkpoint do passo",
+                execution_id=str(execution.execution_id),
+                step_id=step.step_id,
+                error=str(e)
+            )
+            self.state_writer.mark_dirty(execution)
+    
+    async def _call_agent(
+        self,
+        agent,
+        execution: MultiAgentExecution,
+        step: ExecutionStep,
+        input_data: Dict[str, Any]
+    ):
+        """Call the agent inside its agent/provider concurrency slots"""
+        cache_key = None
+        if step.cacheable:
+            cache_key = self.result_cache.build_key(
+                step.agent_id, step.capability_name, input_data, execution.user_id, step.credential_id
+            )
+            cached = self.result_cache.get(cache_key)
+            if cached:
+                execution.add_log("info", f"Passo '{step.step_id}' atendido pelo cache", step.step_id)
+                return cached
+        
+        # A espera por slot não consome o timeout do passo (só o prazo da execução)
+        async with self.concurrency_governor.slot(step.agent_id, agent.get_supported_providers()):
+            started = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    agent.execute_capability(
+                        capability_name=step.capability_name,
+                        input_data=input_data,
+                        user_id=execution.user_id,
+                        credential_id=step.credential_id
+                    ),
+                    timeout=effective_timeout(step.timeout_seconds)
+                )
+            except Exception as e:
+                await self._record_agent_call(
+                    execution, step, (time.perf_counter() - started) * 1000, False, type(e).__name__
+                )
+                raise
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        # Latência do agente (sem a espera por slot) alimenta as estimativas de duração
+        await self._record_agent_call(
+            execution, step, elapsed_ms, result.success, None if result.success else 'agent_error'
+        )
+        
+        if cache_key:
+            self.result_cache.set(cache_key, result, step.cache_ttl_seconds)
+        return result
+    
+    @staticmethod
+    def _timeout_message(execution: MultiAgentExecution, step: ExecutionStep) -> str:
+        deadline = get_deadline()
+        if deadline is not None and deadline.expired:
+            execution.metrics['deadline_exceeded'] = True
+            return "Prazo da execução excedido"
+        return f"Timeout de {step.timeout_seconds}s excedido"
     
     async def _retry_step(self, execution: MultiAgentExecution, step: ExecutionStep):
         """Retry failed step"""
-        if step.retry_attempts >= step.retry_count:
+        # Passos map já repetem cada item; refazer o passo repetiria os itens concluídos
+        if step.is_map or step.retry_attempts >= step.retry_count:
             return
         
         execution.add_log("info", f"Tentando novamente passo '{step.step_id}' (tentativa {step.retry_attempts + 1})")
         
-        # Aguardar delay
+        # Aguardar delay (interrompido por cancelamento)
+        control = self._get_control(execution)
+        if not deadline_allows(step.retry_delay_seconds):
+            execution.add_log("warning", f"Passo '{step.step_id}' não será repetido: prazo da execução esgotado", step.step_id)
+            return
         if step.retry_delay_seconds > 0:
-            await asyncio.sleep(step.retry_delay_seconds)
+            await control.sleep(step.retry_delay_seconds)
+        await control.wait_if_paused()
+        if execution.is_cancelled():
+            return
         
         step.retry_execution()
         await self._execute_step(execution, step)
@@ -423,6 +1042,44 @@ class ExecutionService:
         
         return execution
     
+    async def get_step_output(self, execution_id: UUID, step_id: str, user_id: UUID) -> Optional[Dict[str, Any]]:
+        """Load one step's output (resolving blob references on demand)"""
+        execution = await self.get_execution_by_id(execution_id, user_id)
+        if not execution or not execution.plan.get_step(step_id):
+            return None
+        
+        if execution.execution_id not in self._active_executions:
+            await self.execution_repo.load_payloads(execution, [step_id])
+        return execution.plan.get_step(step_id).output_data
+
+    async def get_execution_logs(
+        self,
+        execution_id: UUID,
+        user_id: UUID,
+        after_seq: int = -1,
+        limit: int = 100,
+        level: Optional[str] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Paginated execution logs (``seq`` cursor); in-memory buffer for active executions"""
+        execution = await self.get_execution_by_id(execution_id, user_id)
+        if not execution:
+            return None
+
+        active = execution.execution_id in self._active_executions
+        if active and level is None and after_seq + 1 >= execution.logs.first_seq:
+            return execution.logs.page(after_seq, limit)
+
+        logs = await self.execution_repo.find_execution_logs(execution_id, after_seq, limit, level)
+        if active and len(logs) < limit:
+            # Entradas ainda não gravadas pelo writer só existem no buffer
+            last_seq = logs[-1]['seq'] if logs else after_seq
+            pending = [
+                entry for entry in execution.logs.page(last_seq, limit)
+                if level is None or entry['level'] == level
+            ]
+            logs.extend(pending[:limit - len(logs)])
+        return logs
+
     async def cancel_execution(self, execution_id: UUID, user_id: UUID) -> bool:
         """Cancel running execution"""
         execution = await self.get_execution_by_id(execution_id, user_id)
@@ -432,8 +1089,7 @@ class ExecutionService:
         if execution.status not in [ExecutionStatus.RUNNING, ExecutionStatus.PENDING]:
             return False
         
-        execution.cancel()
-        await self.execution_repo.save_execution(execution)
+        await self._apply_control_action(execution, execution.cancel)
         
         return True
     
@@ -446,25 +1102,48 @@ class ExecutionService:
         if execution.status != ExecutionStatus.RUNNING:
             return False
         
-        execution.pause()
-        await self.execution_repo.save_execution(execution)
+        await self._apply_control_action(execution, execution.pause)
         
         return True
     
     async def resume_execution(self, execution_id: UUID, user_id: UUID) -> bool:
-        """Resume paused execution"""
+        """Resume a paused execution, or restart an interrupted/failed one from its checkpoints"""
         execution = await self.get_execution_by_id(execution_id, user_id)
         if not execution:
             return False
         
+        if self._is_resumable_from_checkpoint(execution):
+            await self._resume_from_checkpoint(execution)
+            return True
+        
         if execution.status != ExecutionStatus.PAUSED:
             return False
         
-        execution.resume()
-        await self.execution_repo.save_execution(execution)
+        await self._apply_control_action(execution, execution.resume)
         
         return True
     
+    def _is_resumable_from_checkpoint(self, execution: MultiAgentExecution) -> bool:
+        """Execution restored from storage that no runner in this process owns"""
+        if execution.execution_id in self._active_executions:
+            return False
+        if execution.status == ExecutionStatus.FAILED:
+            return True
+        # Com fila, RUNNING/PAUSED podem pertencer a outro worker (recuperação via lease)
+        return not self.execution_queue and execution.status in [ExecutionStatus.RUNNING, ExecutionStatus.PAUSED]
+    
+    async def _apply_control_action(self, execution: MultiAgentExecution, action):
+        """Apply pause/resume/cancel and persist it immediately"""
+        # Rastrear antes de mutar para que a mudança entre no delta
+        self.state_writer.attach(execution)
+        action()
+        self._signal_control(execution)
+        
+        if execution.execution_id in self._active_executions:
+            await self.state_writer.flush(execution, force=True)
+        else:
+            await self.state_writer.close(execution)
+    
     async def list_user_executions(
         self,
         user_id: UUID,
@@ -508,4 +1187,5 @@ class ExecutionService:
 
 def get_execution_service() -> ExecutionService:
     """Get execution service instance"""
-    return ExecutionService()
\ No newline at end of file
+    execution_queue = ExecutionQueue() if settings.EXECUTION_QUEUE_ENABLED else None
+    return ExecutionService(execution_queue=execution_queue)
\ No newline at end of file
@@ -0,0 +1,267 @@
+"""
+Execution State Writer
+Persistência write-behind do estado de execuções multi-agente, baseada em deltas
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import structlog
+
+from app.core.config import settings
+from app.domain.execution import ExecutionStep, MultiAgentExecution
+from app.domain.execution_log import LogEntry
+from app.repositories.execution_repository import ExecutionRepository
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class _TrackedExecution:
+    """Cursores do que já foi persistido para uma execução (logs usam o ``persisted_seq`` do buffer)"""
+    step_signatures: Dict[str, Tuple] = field(default_factory=dict)
+    result_refs: Dict[str, int] = field(default_factory=dict)
+    row_snapshot: Dict[str, Any] = field(default_factory=dict)
+    flush_task: Optional[asyncio.Task] = None
+    flush_scheduled: bool = False
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class ExecutionStateWriter:
+    """
+    Persistência write-behind das execuções.
+
+    A linha completa é gravada uma única vez na criação. Depois disso cada flush
+    envia apenas as colunas escalares alteradas, os snapshots dos passos cujo
+    estado mudou e as novas linhas de log. Atualizações em rajada são agrupadas
+    em um flush a cada ``flush_interval_seconds``; estados terminais forçam o flush.
+    """
+
+    def __init__(
+        self,
+        execution_repository: ExecutionRepository,
+        flush_interval_seconds: Optional[float] = None,
+        delta_mode: Optional[bool] = None
+    ):
+        self.execution_repo = execution_repository
+        self.flush_interval_seconds = (
+            flush_interval_seconds if flush_interval_seconds is not None
+            else settings.EXECUTION_FLUSH_INTERVAL_SECONDS
+        )
+        self.delta_mode = (
+            delta_mode if delta_mode is not None
+            else settings.EXECUTION_PERSISTENCE_MODE == "delta"
+        )
+        self._tracked: Dict[UUID, _TrackedExecution] = {}
+        self.stats = {
+            'flushes': 0,
+            'full_writes': 0,
+            'step_records_written': 0,
+            'log_entries_written': 0,
+            'coalesced_updates': 0
+        }
+
+    async def create(self, execution: MultiAgentExecution) -> MultiAgentExecution:
+        """Gravar a linha inicial da execução e começar a rastrear deltas"""
+        saved = await self.execution_repo.save_execution(execution)
+        self.stats['full_writes'] += 1
+        # Logs da criação ainda precisam chegar ao log store
+        self.attach(saved, logs_persisted=False)
+        return saved
+
+    def attach(self, execution: MultiAgentExecution, logs_persisted: bool = True):
+        """Rastrear execução já persistida (ex.: carregada do banco)"""
+        if execution.execution_id in self._tracked:
+            return
+
+        tracked = _TrackedExecution()
+        row_updates, step_records, new_logs = self._collect_deltas(tracked, execution)
+        self._advance_cursors(tracked, execution, row_updates, step_records, new_logs if logs_persisted else [])
+        self._tracked[execution.execution_id] = tracked
+
+    def mark_dirty(self, execution: MultiAgentExecution):
+        """Agendar flush agrupado para a execução"""
+        tracked = self._tracked.get(execution.execution_id)
+        if tracked is None:
+            self.attach(execution)
+            tracked = self._tracked[execution.execution_id]
+
+        if tracked.flush_scheduled:
+            self.stats['coalesced_updates'] += 1
+            return
+
+        tracked.flush_scheduled = True
+        tracked.flush_task = asyncio.create_task(self._delayed_flush(execution, tracked))
+
+    async def flush(self, execution: MultiAgentExecution, force: bool = False):
+        """Persistir deltas pendentes; ``force`` cancela o agendamento e grava imediatamente"""
+        tracked = self._tracked.get(execution.execution_id)
+        if tracked is None:
+            self.attach(execution)
+            tracked = self._tracked[execution.execution_id]
+
+        if force:
+            await self._cancel_scheduled(tracked)
+
+        async with tracked.lock:
+            if not self.delta_mode:
+                # Linha completa (apenas a cauda dos logs); logs antigos vão para o log store
+                await self.execution_repo.save_execution(execution)
+                await self._spill_logs(execution, force)
+                self.stats['flushes'] += 1
+                self.stats['full_writes'] += 1
+                return
+
+            row_updates, step_records, new_logs = self._collect_deltas(tracked, execution)
+            if not row_updates and not step_records and not new_logs:
+                return
+
+            try:
+                await self.execution_repo.append_step_deltas(execution.execution_id, step_records)
+                await self.execution_repo.append_log_deltas(
+                    execution.execution_id,
+                    [entry.to_dict() for entry in new_logs],
+                    new_logs[0].seq if new_logs else execution.logs.persisted_seq
+                )
+                await self.execution_repo.update_execution_fields(execution.execution_id, row_updates)
+            except Exception as e:
+                # Cursores não avançam: o próximo flush reenvia os deltas
+                logger.error(
+                    "Falha ao persistir deltas da execução",
+                    execution_id=str(execution.execution_id),
+                    error=str(e)
+                )
+                if force:
+                    raise
+                return
+
+            self._advance_cursors(tracked, execution, row_updates, step_records, new_logs)
+            self.stats['flushes'] += 1
+            self.stats['step_records_written'] += len(step_records)
+            self.stats['log_entries_written'] += len(new_logs)
+
+    async def _spill_logs(self, execution: MultiAgentExecution, force: bool):
+        new_logs = execution.logs.unpersisted()
+        if not new_logs:
+            return
+        try:
+            await self.execution_repo.append_log_deltas(
+                execution.execution_id, [entry.to_dict() for entry in new_logs], new_logs[0].seq
+            )
+        except Exception as e:
+            logger.error("Falha ao persistir logs da execução", execution_id=str(execution.execution_id), error=str(e))
+            if force:
+                raise
+            return
+        execution.logs.mark_persisted(new_logs[-1].seq + 1)
+        self.stats['log_entries_written'] += len(new_logs)
+
+    async def close(self, execution: MultiAgentExecution):
+        """Flush final (estado terminal) e liberação dos cursores"""
+        try:
+            await self.flush(execution, force=True)
+        finally:
+            self._tracked.pop(execution.execution_id, None)
+
+    async def discard(self, execution: MultiAgentExecution):
+        """Liberar os cursores sem gravar (a execução passou a outro dono)"""
+        tracked = self._tracked.pop(execution.execution_id, None)
+        if tracked is None:
+            return
+
+        task = tracked.flush_task
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            tracked.flush_scheduled = False
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _delayed_flush(self, execution: MultiAgentExecution, tracked: _TrackedExecution):
+        await asyncio.sleep(self.flush_interval_seconds)
+        tracked.flush_scheduled = False
+        await self.flush(execution)
+
+    async def _cancel_scheduled(self, tracked: _TrackedExecution):
+        task = tracked.flush_task
+        if task is None or task.done() or task is asyncio.current_task():
+            return
+
+        if tracked.flush_scheduled:
+            # Ainda aguardando o intervalo: o flush forçado substitui este
+            tracked.flush_scheduled = False
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        else:
+            await asyncio.gather(task, return_exceptions=True)
+
+    def _collect_deltas(
+        self,
+        tracked: _TrackedExecution,
+        execution: MultiAgentExecution
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[LogEntry]]:
+        # plan_data nunca é regravado; apenas colunas escalares alteradas
+        row = self._row_fields(execution)
+        row_updates = {
+            key: value for key, value in row.items()
+            if tracked.row_snapshot.get(key, object()) != value
+        }
+
+        step_records = []
+        for step in execution.plan.steps:
+            result = execution.results.get(step.step_id)
+            if (
+                tracked.step_signatures.get(step.step_id) == self._step_signature(step)
+                and tracked.result_refs.get(step.step_id) == id(result)
+            ):
+                continue
+            step_records.append({
+                'step_id': step.step_id,
+                'state': self._step_state(step),
+                'result': result
+            })
+
+        return row_updates, step_records, execution.logs.unpersisted()
+
+    def _advance_cursors(
+        self,
+        tracked: _TrackedExecution,
+        execution: MultiAgentExecution,
+        row_updates: Dict[str, Any],
+        step_records: List[Dict[str, Any]],
+        new_logs: List[LogEntry]
+    ):
+        # Cópia rasa para detectar mutações futuras em dicts (ex.: context)
+        tracked.row_snapshot.update({
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in row_updates.items()
+        })
+        for record in step_records:
+            step = execution.plan.get_step(record['step_id'])
+            tracked.step_signatures[step.step_id] = self._step_signature(step)
+            tracked.result_refs[step.step_id] = id(record['result'])
+        if new_logs:
+            # Entradas persistidas podem sair do buffer em memória
+            execution.logs.mark_persisted(new_logs[-1].seq + 1)
+
+    @staticmethod
+    def _row_fields(execution: MultiAgentExecution) -> Dict[str, Any]:
+        return {
+            'status': execution.status.value,
+            'started_at': execution.started_at.isoformat() if execution.started_at else None,
+            'completed_at': execution.completed_at.isoformat() if execution.completed_at else None,
+            'error_message': execution.error_message,
+            'context': execution.context,
+            'updated_at': execution.updated_at.isoformat()
+        }
+
+    @staticmethod
+    def _step_signature(step: ExecutionStep) -> Tuple:
+        return (step.status, step.attempts, step.started_at, step.completed_at, step.error_message)
+
+    @staticmethod
+    def _step_state(step: ExecutionStep) -> Dict[str, Any]:
+        # input_data já está em plan_data; output_data segue no resultado do passo
+        state = step.to_dict()
+        state.pop('input_data', None)
+        state.pop('output_data', None)
+        return state
@@ -0,0 +1,192 @@
+"""
+Execution Worker
+Worker que consome a fila distribuída de execuções multi-agente
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+from typing import Dict, Optional
+from uuid import uuid4
+
+import structlog
+
+from app.core.config import settings
+from app.services.execution_queue import ExecutionQueue, QueueLease
+
+logger = structlog.get_logger(__name__)
+
+
+class ExecutionWorker:
+    """
+    Worker de execuções.
+
+    Reivindica até ``concurrency`` execuções da fila, renova o lease de cada uma
+    a cada ``heartbeat_interval_seconds`` e confirma (ack) ao terminar. Se o lease
+    for perdido, a execução local é interrompida: outro worker já a recebeu.
+    Cada worker também atua como reaper, devolvendo à fila leases vencidos de
+    workers que caíram.
+    """
+
+    def __init__(
+        self,
+        queue: ExecutionQueue,
+        execution_service=None,
+        worker_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        heartbeat_interval_seconds: Optional[float] = None,
+        poll_interval_seconds: float = 1.0
+    ):
+        if execution_service is None:
+            from app.services.execution_service import ExecutionService
+            execution_service = ExecutionService()
+
+        self.queue = queue
+        self.execution_service = execution_service
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.concurrency = concurrency or settings.EXECUTION_WORKER_CONCURRENCY
+        self.heartbeat_interval_seconds = heartbeat_interval_seconds or settings.EXECUTION_WORKER_HEARTBEAT_SECONDS
+        self.poll_interval_seconds = poll_interval_seconds
+
+        self._tasks: Dict[asyncio.Task, QueueLease] = {}
+        self._stopping = asyncio.Event()
+        self.stats = {'claimed': 0, 'acked': 0, 'nacked': 0, 'lost_leases': 0}
+
+    async def run(self):
+        """Loop principal: reaper + reivindicação respeitando a concorrência"""
+        logger.info("Worker de execução iniciado", worker_id=self.worker_id, concurrency=self.concurrency)
+
+        loop = asyncio.get_running_loop()
+        next_reap = 0.0
+
+        try:
+            while not self._stopping.is_set():
+                if loop.time() >= next_reap:
+                    await self.queue.requeue_expired()
+                    next_reap = loop.time() + self.heartbeat_interval_seconds
+
+                lease = None
+                if len(self._tasks) < self.concurrency:
+                    lease = await self.queue.claim(self.worker_id)
+
+                if lease:
+                    self.stats['claimed'] += 1
+                    task = asyncio.create_task(self._process(lease))
+                    self._tasks[task] = lease
+                    task.add_done_callback(self._tasks.pop)
+                    continue
+
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._tasks:
+                await asyncio.gather(*list(self._tasks), return_exceptions=True)
+            logger.info("Worker de execução finalizado", worker_id=self.worker_id, **self.stats)
+
+    def stop(self):
+        """Parar de reivindicar; execuções em andamento terminam normalmente"""
+        self._stopping.set()
+
+    async def _process(self, lease: QueueLease):
+        execution_id = lease.execution_id
+        logger.info(
+            "Execução reivindicada",
+            worker_id=self.worker_id,
+            execution_id=str(execution_id),
+            attempt=lease.attempt
+        )
+
+        run_task = asyncio.create_task(self.execution_service.run_queued_execution(execution_id))
+        heartbeat_task = asyncio.create_task(self._heartbeat_loop(lease, run_task))
+
+        try:
+            await run_task
+        except asyncio.CancelledError:
+            if heartbeat_task.done() and not heartbeat_task.cancelled() and heartbeat_task.result() is False:
+                # Lease perdido: outro worker é o dono agora; não confirmar
+                self.stats['lost_leases'] += 1
+                logger.warning("Lease perdido, execução interrompida", execution_id=str(execution_id))
+                return
+            raise
+        except Exception as e:
+            logger.error("Falha ao processar execução", execution_id=str(execution_id), error=str(e))
+            if await self.queue.nack(lease):
+                self.stats['nacked'] += 1
+            return
+        finally:
+            if not heartbeat_task.done():
+                heartbeat_task.cancel()
+                await asyncio.gather(heartbeat_task, return_exceptions=True)
+
+        if await self.queue.ack(lease):
+            self.stats['acked'] += 1
+
+    async def _heartbeat_loop(self, lease: QueueLease, run_task: asyncio.Task) -> bool:
+        while not run_task.done():
+            await asyncio.sleep(self.heartbeat_interval_seconds)
+
+            try:
+                renewed = await self.queue.heartbeat(lease)
+            except Exception as e:
+                # Falha transitória do Redis: o lease ainda vale até expires_at
+                logger.warning("Falha ao renovar lease", execution_id=str(lease.execution_id), error=str(e))
+                continue
+
+            if not renewed:
+                # Sem flush final: o estado agora pertence ao novo dono do lease
+                self.execution_service.abandon_execution(lease.execution_id)
+                run_task.cancel()
+                return False
+
+            try:
+                await self.execution_service.sync_control_state(lease.execution_id)
+            except Exception as e:
+                logger.warning("Falha ao sincronizar estado de controle", execution_id=str(lease.execution_id), error=str(e))
+        return True
+
+
+async def _run_worker(concurrency: Optional[int] = None):
+    queue = ExecutionQueue()
+    worker = ExecutionWorker(queue, concurrency=concurrency)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await queue.close()
+
+
+def _worker_process(concurrency: Optional[int]):
+    asyncio.run(_run_worker(concurrency))
+
+
+def main(argv=None):
+    """Iniciar N processos worker (``python -m app.services.execution_worker --processes 4``)"""
+    parser = argparse.ArgumentParser(description="Worker de execuções multi-agente")
+    parser.add_argument("--processes", type=int, default=1, help="Número de processos worker")
+    parser.add_argument("--concurrency", type=int, default=None, help="Execuções simultâneas por processo")
+    args = parser.parse_args(argv)
+
+    if args.processes <= 1:
+        _worker_process(args.concurrency)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_worker_process, args=(args.concurrency,), name=f"execution-worker-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Latency Estimator
+Estimativa de duração de planos pelo histórico de latência (p50/p95) de cada agente e capacidade
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import structlog
+
+from app.core.config import settings
+from app.domain.plan_graph import PlanGraph
+
+logger = structlog.get_logger(__name__)
+
+StatsKey = Tuple[str, str]
+
+
+@dataclass
+class LatencyStats:
+    """Distribuição de latência de um agente/capacidade"""
+    samples: int
+    p50_ms: float
+    p95_ms: float
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> 'LatencyStats':
+        ordered = sorted(values)
+        return cls(
+            samples=len(ordered),
+            p50_ms=ordered[len(ordered) // 2],
+            p95_ms=ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        )
+
+
+class LatencyEstimator:
+    """
+    Estima a duração de um plano pelo caminho crítico usando latências observadas.
+
+    Para cada par (agente, capacidade) usa a série ``agent_execution_time_ms``
+    do MetricsCollector (por capacidade; na falta dela, as execuções bem
+    sucedidas do agente), gravada por ``record_agent_execution``. As
+    estatísticas ficam em cache por ``cache_ttl_seconds`` e as consultas de
+    um plano são feitas em paralelo, uma por par distinto. Passos sem
+    histórico suficiente usam ``timeout_seconds``, como antes.
+    """
+
+    def __init__(
+        self,
+        metrics_collector=None,
+        cache_ttl_seconds: Optional[float] = None,
+        window_hours: Optional[int] = None,
+        min_samples: Optional[int] = None,
+        sample_size: Optional[int] = None
+    ):
+        if metrics_collector is None:
+            from app.services.analytics_service import analytics_service
+            metrics_collector = analytics_service.metrics_collector
+        self.metrics_collector = metrics_collector
+        self.cache_ttl_seconds = (
+            cache_ttl_seconds if cache_ttl_seconds is not None
+            else settings.LATENCY_ESTIMATOR_CACHE_TTL_SECONDS
+        )
+        self.window_hours = window_hours or settings.LATENCY_ESTIMATOR_WINDOW_HOURS
+        self.min_samples = min_samples or settings.LATENCY_ESTIMATOR_MIN_SAMPLES
+        self.sample_size = sample_size or settings.LATENCY_ESTIMATOR_SAMPLE_SIZE
+
+        self._cache: Dict[StatsKey, Tuple[float, Optional[LatencyStats]]] = {}
+
+    async def get_stats(self, agent_id: str, capability: str) -> Optional[LatencyStats]:
+        """p50/p95 do par agente/capacidade; None sem amostras suficientes"""
+        key = (agent_id, capability)
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        values = await self._load_history(agent_id, capability)
+        stats = LatencyStats.from_values(values) if len(values) >= self.min_samples else None
+
+        self._cache[key] = (time.monotonic() + self.cache_ttl_seconds, stats)
+        return stats
+
+    async def get_stats_many(self, keys: Iterable[StatsKey]) -> Dict[StatsKey, Optional[LatencyStats]]:
+        """Estatísticas de vários pares, consultando o histórico em paralelo"""
+        unique = list(dict.fromkeys(keys))
+        results = await asyncio.gather(*(self.get_stats(*key) for key in unique))
+        return dict(zip(unique, results))
+
+    async def _load_history(self, agent_id: str, capability: str) -> List[float]:
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(hours=self.window_hours)
+        try:
+            values = await self.metrics_collector.get_metric_values(
+                'agent_execution_time_ms', start_time, end_time,
+                {'agent_id': agent_id, 'capability': capability},
+                limit=self.sample_size
+            )
+            if len(values) < self.min_samples:
+                values = await self.metrics_collector.get_metric_values(
+                    'agent_execution_time_ms', start_time, end_time,
+                    {'agent_id': agent_id, 'success': 'True'},
+                    limit=self.sample_size
+                )
+            return list(values)
+        except Exception as e:
+            logger.warning("Latency history unavailable", agent_id=agent_id, error=str(e))
+            return []
+
+    async def estimate(
+        self,
+        steps: Sequence[Any],
+        capability_of: Callable[[Any], str],
+        sequential: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Duração p50/p95 do plano em segundos.
+
+        Sequencial soma todos os passos; os demais seguem o caminho crítico do
+        grafo de dependências (o p95 soma os p95 dos passos do caminho mais
+        lento, um limite superior conservador).
+        """
+        stats = await self.get_stats_many((step.agent_id, capability_of(step)) for step in steps)
+
+        per_step: Dict[str, Dict[str, Any]] = {}
+        for step in steps:
+            step_stats = stats[(step.agent_id, capability_of(step))]
+            if step_stats is None:
+                timeout_ms = step.timeout_seconds * 1000
+                per_step[step.step_id] = {'p50_ms': timeout_ms, 'p95_ms': timeout_ms, 'samples': 0, 'source': 'timeout'}
+            else:
+                per_step[step.step_id] = {
+                    'p50_ms': step_stats.p50_ms,
+                    'p95_ms': step_stats.p95_ms,
+                    'samples': step_stats.samples,
+                    'source': 'history'
+                }
+
+        if sequential:
+            path = [step.step_id for step in steps]
+            p50_ms = sum(per_step[step_id]['p50_ms'] for step_id in path)
+            p95_ms = sum(per_step[step_id]['p95_ms'] for step_id in path)
+        else:
+            graph = PlanGraph(steps)
+            path, p50_ms = graph.critical_path(steps, lambda step: per_step[step.step_id]['p50_ms'])
+            _, p95_ms = graph.critical_path(steps, lambda step: per_step[step.step_id]['p95_ms'])
+
+        return {
+            'p50_seconds': round(p50_ms / 1000, 3),
+            'p95_seconds': round(p95_ms / 1000, 3),
+            'critical_path': path,
+            'steps': per_step
+        }
+
+
+_latency_estimator: Optional[LatencyEstimator] = None
+
+
+def get_latency_estimator() -> LatencyEstimator:
+    """Obter estimador global (cache de estatísticas compartilhado pelo processo)"""
+    global _latency_estimator
+    if _latency_estimator is None:
+        _latency_estimator = LatencyEstimator()
+    return _latency_estimator
@@ -2,16 +2,19 @@
 Orchestrator Service for multi-agent system
 Handles conversational interface, plan generation, and workflow execution
 """
+from __future__ import annotations
 
-import json
+import asyncio
+import math
 import re
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import time
+from typing import Dict, List, Optional, Any, Tuple
 from uuid import UUID, uuid4
 
+from app.domain.agent import Agent
 from app.domain.orchestrator import (
     Workflow, WorkflowExecution, ConversationSession,
-    WorkflowStep, WorkflowConfig, ExecutionStrategy
+    WorkflowStep, WorkflowConfig, ExecutionStrategy, ExecutionStatus
 )
 from app.schemas.orchestrator import (
     ChatMessageSchema,
@@ -20,10 +23,12 @@ from app.schemas.orchestrator import (
     ExecuteWorkflowSchema,
     ExecutionPlanSchema
 )
+from app.agents.agent_registry import AgentRegistry, get_agent_registry
+from app.core.deadline import Deadline, deadline_allows, deadline_scope, effective_timeout, get_deadline
 from app.services.agent_registry_service import AgentRegistryService
 from app.services.integration_service import IntegrationService
+from app.services.latency_estimator import LatencyEstimator, get_latency_estimator
 from app.repositories.orchestrator_repository import OrchestratorRepository
-from app.services.manifest_cache_service import manifest_cache_service
 
 
 class OrchestratorService:
@@ -33,11 +38,17 @@ class OrchestratorService:
         self,
         orchestrator_repository: Optional[OrchestratorRepository] = None,
         agent_registry_service: Optional[AgentRegistryService] = None,
-        integration_service: Optional[IntegrationService] = None
+        integration_service: Optional[IntegrationService] = None,
+        runtime_registry: Optional[AgentRegistry] = None,
+        latency_estimator: Optional[LatencyEstimator] = None
     ):
         self.orchestrator_repo = orchestrator_repository or OrchestratorRepository()
         self.agent_registry = agent_registry_service or AgentRegistryService()
         self.integration_service = integration_service or IntegrationService()
+        # Agentes executáveis (o AgentRegistryService só conhece manifestos)
+        self.runtime_registry = runtime_registry or get_agent_registry()
+        # Latências históricas por agente/capacidade para estimar duração de planos
+        self.latency_estimator = latency_estimator or get_latency_estimator()
     
     async def process_user_message(
         self, 
@@ -90,12 +101,13 @@ class OrchestratorService:
         # Create workflow
         workflow = await self._create_workflow_from_steps(user_id, requirements, steps)
         
-        # Estimate cost and duration
-        estimated_cost = await self._estimate_workflow_cost(workflow)
-        estimated_duration = await self._estimate_workflow_duration(workflow)
+        # Estimate cost and duration (one registry lookup for all agents of the plan)
+        agents = await self._get_workflow_agents(workflow)
+        estimated_cost = await self._estimate_workflow_cost(workflow, agents)
+        estimated_duration, estimated_duration_p95 = await self._estimate_workflow_duration(workflow)
         
         # Check required connections
-        required_connections = await self._get_required_connections(workflow)
+        required_connections = await self._get_required_connections(workflow, agents)
         
         # Identify risks
         risks = await self._identify_workflow_risks(workflow, requirements)
@@ -106,6 +118,7 @@ class OrchestratorService:
             workflow=await self._workflow_to_create_schema(workflow),
             estimated_cost=estimated_cost,
             estimated_duration_minutes=estimated_duration,
+            estimated_duration_p95_minutes=estimated_duration_p95,
             required_connections=required_connections,
             risks=risks
         )
@@ -379,39 +392,61 @@ class OrchestratorService:
         
         return workflow
     
-    async def _estimate_workflow_cost(self, workflow: Workflow) -> float:
+    async def _get_workflow_agents(self, workflow: Workflow) -> Dict[str, Agent]:
+        """Latest registry entry of every agent used by the workflow, in one lookup"""
+        
+        return await self.agent_registry.get_latest_agents([step.agent_id for step in workflow.steps])
+    
+    async def _estimate_workflow_cost(
+        self,
+        workflow: Workflow,
+        agents: Optional[Dict[str, Agent]] = None
+    ) -> float:
         """Estimate workflow execution cost"""
         
+        if agents is None:
+            agents = await self._get_workflow_agents(workflow)
+        
         total_cost = 0.0
         
         for step in workflow.steps:
             # Get agent policy for cost estimation
-            agent = await self.agent_registry.get_agent_by_id_and_version(step.agent_id)
+            agent = agents.get(step.agent_id)
             if agent:
                 total_cost += agent.policy.cost_per_execution
         
         return total_cost
     
-    async def _estimate_workflow_duration(self, workflow: Workflow) -> int:
-        """Estimate workflow duration in minutes"""
+    async def _estimate_workflow_duration(self, workflow: Workflow) -> Tuple[int, int]:
+        """Estimate workflow duration in minutes (p50, p95) from recorded agent latencies"""
         
-        if workflow.config.execution_strategy == ExecutionStrategy.SEQUENTIAL:
-            # Sum all step timeouts
-            total_seconds = sum(step.timeout_seconds for step in workflow.steps)
-        else:
-            # For parallel, use maximum timeout
-            total_seconds = max(step.timeout_seconds for step in workflow.steps) if workflow.steps else 0
+        estimate = await self.latency_estimator.estimate(
+            workflow.steps,
+            capability_of=lambda step: step.action,
+            sequential=workflow.config.execution_strategy == ExecutionStrategy.SEQUENTIAL
+        )
         
-        return max(1, total_seconds // 60)  # Convert to minutes, minimum 1
+        # Convert to minutes, minimum 1
+        return (
+            max(1, math.ceil(estimate['p50_seconds'] / 60)),
+            max(1, math.ceil(estimate['p95_seconds'] / 60))
+        )
     
-    async def _get_required_connections(self, workflow: Workflow) -> List[str]:
+    async def _get_required_connections(
+        self,
+        workflow: Workflow,
+        agents: Optional[Dict[str, Agent]] = None
+    ) -> List[str]:
         """Get required connections for workflow"""
         
+        if agents is None:
+            agents = await self._get_workflow_agents(workflow)
+        
         required_connections = set()
         
         for step in workflow.steps:
             # Get agent to check required credentials
-            agent = await self.agent_registry.get_agent_by_id_and_version(step.agent_id)
+            agent = agents.get(step.agent_id)
             if agent:
                 # This would check agent.required_credentials
                 # For now, infer from agent_id
@@ -458,15 +493,17 @@ class OrchestratorService:
         workflow: Workflow, 
         execution: WorkflowExecution
     ) -> WorkflowExecution:
-        """Execute workflow steps based on strategy"""
-        
-        if workflow.config.execution_strategy == ExecutionStrategy.SEQUENTIAL:
-            return await self._execute_sequential(workflow, execution)
-        elif workflow.config.execution_strategy == ExecutionStrategy.PARALLEL:
-            return await self._execute_parallel(workflow, execution)
-        else:
-            # Default to sequential
-            return await self._execute_sequential(workflow, execution)
+        """Execute workflow steps based on strategy, bounded by the workflow timeout"""
+        
+        # Steps and agent HTTP calls inherit the deadline through contextvars
+        with deadline_scope(Deadline.after(workflow.config.timeout_minutes * 60)):
+            if workflow.config.execution_strategy == ExecutionStrategy.SEQUENTIAL:
+                return await self._execute_sequential(workflow, execution)
+            elif workflow.config.execution_strategy == ExecutionStrategy.PARALLEL:
+                return await self._execute_parallel(workflow, execution)
+            else:
+                # Default to sequential
+                return await self._execute_sequential(workflow, execution)
     
     async def _execute_sequential(
         self, 
@@ -484,26 +521,11 @@ class OrchestratorService:
                 execution.add_log('warning', f'Step {step.step_id} skipped: dependencies not met')
                 continue
             
-            # Execute step
-            try:
-                execution.add_log('info', f'Starting step: {step.step_id}')
-                step_result = await self._execute_single_step(step, execution.input_data)
-                
-                step.complete_execution(step_result, step_result.get('execution_time_ms', 0))
-                execution.add_step_result(step.to_dict())
-                execution.add_log('info', f'Step {step.step_id} completed successfully')
-                
+            if await self._run_workflow_step(step, execution, workflow.config.retry_policy):
                 completed_steps.append(step.step_id)
-                
-            except Exception as e:
-                step.fail_execution(str(e), 0)
-                execution.add_step_result(step.to_dict())
-                execution.add_log('error', f'Step {step.step_id} failed: {str(e)}')
-                
-                # Handle failure based on strategy
-                if workflow.config.failure_strategy == 'stop':
-                    execution.fail_execution(f"Step {step.step_id} failed: {str(e)}")
-                    break
+            elif workflow.config.failure_strategy == 'stop':
+                execution.fail_execution(f"Step {step.step_id} failed: {step.error_message}")
+                break
         
         # Complete execution if all steps processed
         if execution.status == ExecutionStatus.RUNNING:
@@ -517,33 +539,153 @@ class OrchestratorService:
         workflow: Workflow, 
         execution: WorkflowExecution
     ) -> WorkflowExecution:
-        """Execute steps in parallel (simplified implementation)"""
+        """Execute steps concurrently, starting each step as soon as its dependencies complete"""
+        
+        max_parallel = max(1, workflow.config.max_parallel_steps or 1)
+        execution.add_log('info', 'Executing steps in parallel mode', {'max_parallel_steps': max_parallel})
+        
+        pending = list(workflow.steps)
+        completed_steps: List[str] = []
+        running: Dict[asyncio.Task, WorkflowStep] = {}
+        failed_step: Optional[WorkflowStep] = None
+        
+        try:
+            while pending or running:
+                # Dispatch ready steps up to the concurrency limit
+                if failed_step is None:
+                    for step in list(pending):
+                        if len(running) >= max_parallel:
+                            break
+                        if step.can_execute(completed_steps):
+                            pending.remove(step)
+                            running[asyncio.create_task(self._run_workflow_step(step, execution, workflow.config.retry_policy))] = step
+                
+                if not running:
+                    break
+                
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step = running.pop(task)
+                    if task.result():
+                        completed_steps.append(step.step_id)
+                    elif workflow.config.failure_strategy == 'stop' and failed_step is None:
+                        failed_step = step
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+        
+        # Steps whose dependencies never completed (or not dispatched after a stop)
+        for step in pending:
+            step.skip_execution("Dependencies not met")
+            execution.add_log('warning', f'Step {step.step_id} skipped: dependencies not met')
+        
+        if failed_step is not None:
+            execution.fail_execution(f"Step {failed_step.step_id} failed: {failed_step.error_message}")
+        elif execution.status == ExecutionStatus.RUNNING:
+            execution.complete_execution(execution.results)
+            execution.add_log('info', 'Workflow execution completed successfully')
         
-        # For now, execute sequentially but log as parallel
-        execution.add_log('info', 'Executing steps in parallel mode')
-        return await self._execute_sequential(workflow, execution)
+        return execution
+    
+    async def _run_workflow_step(
+        self,
+        step: WorkflowStep,
+        execution: WorkflowExecution,
+        retry_policy: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Run a step, record its result and return whether it succeeded"""
+        
+        step.start_execution()
+        execution.add_log('info', f'Starting step: {step.step_id}')
+        started = time.monotonic()
+        
+        try:
+            step_result = await self._execute_single_step(
+                step, execution.input_data, execution.user_id, retry_policy
+            )
+        except Exception as e:
+            step.fail_execution(str(e), int((time.monotonic() - started) * 1000))
+            execution.add_step_result(step.to_dict())
+            execution.add_log('error', f'Step {step.step_id} failed: {str(e)}')
+            return False
+        
+        step.complete_execution(step_result, step_result.get('execution_time_ms', 0))
+        execution.add_step_result(step.to_dict())
+        execution.add_log('info', f'Step {step.step_id} completed successfully')
+        return True
     
     async def _execute_single_step(
         self, 
         step: WorkflowStep, 
-        global_input: Dict[str, Any]
+        global_input: Dict[str, Any],
+        user_id: UUID,
+        retry_policy: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """Execute a single workflow step"""
-        
-        # This would call the actual agent execution
-        # For now, return mock result
+        """Execute a single workflow step, retrying with the workflow's delay/backoff policy"""
+        
+        agent = self.runtime_registry.get_agent(step.agent_id)
+        if not agent:
+            raise ValueError(f"Agent {step.agent_id} not found")
+        
+        if not agent.has_capability(step.action):
+            raise ValueError(f"Agent {step.agent_id} does not support action '{step.action}'")
+        
+        input_data = {**global_input, **step.input_data}
+        started = time.monotonic()
+        error_message = None
+        
+        for attempt in range(step.retry_count + 1):
+            if attempt:
+                delay = self._retry_delay(retry_policy or {}, attempt)
+                if not deadline_allows(delay):
+                    # Waiting would outlive the workflow deadline: fail with the last error
+                    raise RuntimeError(error_message)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                result = await asyncio.wait_for(
+                    agent.execute_capability(
+                        capability_name=step.action,
+                        input_data=input_data,
+                        user_id=user_id
+                    ),
+                    timeout=effective_timeout(step.timeout_seconds)
+                )
+            except asyncio.TimeoutError:
+                deadline = get_deadline()
+                if deadline is not None and deadline.expired:
+                    # No budget left for this attempt or further retries
+                    raise RuntimeError("Workflow timeout exceeded")
+                error_message = f"Timeout of {step.timeout_seconds}s exceeded"
+                continue
+            except Exception as e:
+                # A raised agent error consumes an attempt like a failed result
+                error_message = str(e) or type(e).__name__
+                continue
+            
+            if result.success:
+                return {
+                    'step_id': step.step_id,
+                    'agent_id': step.agent_id,
+                    'action': step.action,
+                    'success': True,
+                    'output': result.data,
+                    'execution_time_ms': result.execution_time_ms or int((time.monotonic() - started) * 1000)
+                }
+            error_message = result.error_message or "Unknown error"
         
-        return {
-            'step_id': step.step_id,
-            'agent_id': step.agent_id,
-            'action': step.action,
-            'success': True,
-            'output': {
-                'message': f'Step {step.step_id} executed successfully',
-                'data': step.input_data
-            },
-            'execution_time_ms': 1500
-        }
+        raise RuntimeError(error_message)
+    
+    @staticmethod
+    def _retry_delay(retry_policy: Dict[str, Any], attempt: int) -> float:
+        """Delay before retry ``attempt`` (1-based): ``delay_seconds`` grown by ``backoff_multiplier``"""
+        delay = float(retry_policy.get('delay_seconds', 0))
+        multiplier = float(retry_policy.get('backoff_multiplier', 2.0))
+        delay *= multiplier ** (attempt - 1)
+        max_delay = retry_policy.get('max_delay_seconds')
+        return min(delay, float(max_delay)) if max_delay is not None else delay
     
     async def _dry_run_workflow(
         self, 
@@ -700,8 +842,9 @@ class OrchestratorService:
         """Extract numbers from text"""
         number_pattern = r'\b\d+(?:\.\d+)?\b'
         matches = re.findall(number_pattern, text)
-        return [float(match) for match in matches]    asy
-nc def list_user_workflows(
+        return [float(match) for match in matches]
+    
+    async def list_user_workflows(
         self,
         user_id: UUID,
         status: Optional[str] = None,
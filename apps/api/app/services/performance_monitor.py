@@ -287,7 +287,8 @@ class PerformanceMonitor:
         success: bool,
         memory_usage_mb: Optional[float] = None,
         error_type: Optional[str] = None,
-        cost_cents: Optional[float] = None
+        cost_cents: Optional[float] = None,
+        capability: Optional[str] = None
     ) -> None:
         """Record detailed agent execution performance"""
         execution_time_ms = (end_time - start_time).total_seconds() * 1000
@@ -299,7 +300,8 @@ class PerformanceMonitor:
             execution_time_ms=execution_time_ms,
             success=success,
             error_type=error_type,
-            cost_cents=cost_cents
+            cost_cents=cost_cents,
+            capability=capability
         )
         
         # Record memory usage if provided
@@ -0,0 +1,134 @@
+"""
+Step Result Cache
+Cache opt-in de resultados de capacidades determinísticas (somente leitura)
+"""
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+import structlog
+
+from app.agents.base_agent import AgentExecutionResult
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class _CacheEntry:
+    data: Dict[str, Any]
+    metadata: Dict[str, Any]
+    execution_time_ms: Optional[int]
+    stored_at: float
+    expires_at: float
+
+
+class StepResultCache:
+    """
+    Cache LRU com TTL de resultados de passos.
+
+    A chave combina agente, capacidade, hash canônico do input, credencial e
+    usuário (agentes resolvem credenciais padrão pelo usuário quando o passo não
+    informa ``credential_id``). Apenas resultados de sucesso são armazenados.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, default_ttl_seconds: Optional[int] = None):
+        self.max_entries = max_entries or settings.STEP_RESULT_CACHE_MAX_ENTRIES
+        self.default_ttl_seconds = default_ttl_seconds or settings.STEP_RESULT_CACHE_DEFAULT_TTL_SECONDS
+        self._entries: 'OrderedDict[str, _CacheEntry]' = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'expirations': 0}
+
+    @staticmethod
+    def build_key(
+        agent_id: str,
+        capability_name: str,
+        input_data: Dict[str, Any],
+        user_id: UUID,
+        credential_id: Optional[UUID] = None
+    ) -> str:
+        """Chave estável: JSON canônico (chaves ordenadas) + SHA-256"""
+        canonical_input = json.dumps(input_data, sort_keys=True, separators=(',', ':'), default=str)
+        input_hash = hashlib.sha256(canonical_input.encode('utf-8')).hexdigest()
+        return f"{agent_id}:{capability_name}:{input_hash}:{credential_id or '-'}:{user_id}"
+
+    def get(self, key: str) -> Optional[AgentExecutionResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+
+        now = time.time()
+        if entry.expires_at <= now:
+            del self._entries[key]
+            self.stats['expirations'] += 1
+            self.stats['misses'] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+
+        return AgentExecutionResult(
+            success=True,
+            data=copy.deepcopy(entry.data),
+            execution_time_ms=0,
+            metadata={
+                **entry.metadata,
+                'cache': {
+                    'hit': True,
+                    'age_seconds': round(now - entry.stored_at, 3),
+                    'original_execution_time_ms': entry.execution_time_ms
+                }
+            }
+        )
+
+    def set(self, key: str, result: AgentExecutionResult, ttl_seconds: Optional[int] = None):
+        if not result.success:
+            return
+
+        now = time.time()
+        self._entries[key] = _CacheEntry(
+            data=copy.deepcopy(result.data),
+            metadata=dict(result.metadata),
+            execution_time_ms=result.execution_time_ms,
+            stored_at=now,
+            expires_at=now + (ttl_seconds or self.default_ttl_seconds)
+        )
+        self._entries.move_to_end(key)
+        self.stats['stores'] += 1
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def invalidate(self, agent_id: Optional[str] = None):
+        """Remover entradas (de um agente ou todas)"""
+        if agent_id is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key.startswith(f"{agent_id}:")]:
+            del self._entries[key]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0
+        }
+
+
+_step_result_cache: Optional[StepResultCache] = None
+
+
+def get_step_result_cache() -> StepResultCache:
+    """Obter cache global de resultados de passos"""
+    global _step_result_cache
+    if _step_result_cache is None:
+        _step_result_cache = StepResultCache()
+    return _step_result_cache
@@ -0,0 +1,193 @@
+"""
+Dependency-driven Step Scheduler
+Escalonador de passos que despacha cada passo assim que suas dependências são satisfeitas
+"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+import structlog
+
+from app.domain.execution import ExecutionPlan, ExecutionStep, StepStatus
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class SchedulerStats:
+    """Métricas coletadas durante uma execução do escalonador"""
+    dispatched_steps: int = 0
+    skipped_steps: int = 0
+    max_ready_queue_depth: int = 0
+    max_running_steps: int = 0
+    total_wait_time_ms: int = 0
+    max_wait_time_ms: int = 0
+    wait_time_ms_by_step: Dict[str, int] = field(default_factory=dict)
+    makespan_ms: int = 0
+
+    @property
+    def avg_wait_time_ms(self) -> float:
+        if not self.dispatched_steps:
+            return 0.0
+        return self.total_wait_time_ms / self.dispatched_steps
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'dispatched_steps': self.dispatched_steps,
+            'skipped_steps': self.skipped_steps,
+            'max_ready_queue_depth': self.max_ready_queue_depth,
+            'max_running_steps': self.max_running_steps,
+            'avg_wait_time_ms': self.avg_wait_time_ms,
+            'max_wait_time_ms': self.max_wait_time_ms,
+            'wait_time_ms_by_step': dict(self.wait_time_ms_by_step),
+            'makespan_ms': self.makespan_ms
+        }
+
+
+class StepFailedError(Exception):
+    """Passo falhou e a política do plano exige interrupção"""
+
+    def __init__(self, step: ExecutionStep):
+        self.step = step
+        super().__init__(f"Passo '{step.step_id}' falhou: {step.error_message}")
+
+
+class StepScheduler:
+    """
+    Escalonador orientado a dependências (DAG).
+
+    Mantém o grau de entrada de cada passo e uma fila de prontos; um passo é
+    despachado assim que todas as suas dependências completam, sem esperar pelo
+    restante do "nível". O número de passos em execução simultânea nunca excede
+    ``max_parallel``.
+    """
+
+    def __init__(
+        self,
+        plan: ExecutionPlan,
+        run_step: Callable[[ExecutionStep], Awaitable[None]],
+        max_parallel: Optional[int] = None,
+        stop_on_failure: bool = True,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        on_dispatch: Optional[Callable[[ExecutionStep, int], None]] = None,
+        wait_if_paused: Optional[Callable[[], Awaitable[None]]] = None
+    ):
+        self.plan = plan
+        self.run_step = run_step
+        self.max_parallel = max(1, max_parallel or plan.max_parallel_steps or 1)
+        self.stop_on_failure = stop_on_failure
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.on_dispatch = on_dispatch
+        self.wait_if_paused = wait_if_paused
+        self.stats = SchedulerStats()
+
+    async def run(self) -> SchedulerStats:
+        """Executar o plano respeitando dependências e o limite de concorrência"""
+        steps: Dict[str, ExecutionStep] = {step.step_id: step for step in self.plan.steps}
+        dependents = self.plan.get_dependents()
+        pending_deps: Dict[str, int] = {
+            step_id: len(set(step.depends_on)) for step_id, step in steps.items()
+        }
+
+        ready: Deque[str] = deque()
+        ready_since: Dict[str, float] = {}
+        started = time.monotonic()
+
+        def mark_ready(step_id: str):
+            ready.append(step_id)
+            ready_since[step_id] = time.monotonic()
+
+        # Passos já concluídos (ex.: execução restaurada) liberam seus dependentes
+        for step in self.plan.steps:
+            if step.status in (StepStatus.COMPLETED, StepStatus.SKIPPED):
+                for dependent_id in dependents[step.step_id]:
+                    pending_deps[dependent_id] -= 1
+
+        for step in self.plan.steps:
+            if step.status in (StepStatus.COMPLETED, StepStatus.SKIPPED):
+                continue
+            if pending_deps[step.step_id] == 0:
+                mark_ready(step.step_id)
+
+        running: Dict[asyncio.Task, str] = {}
+        failure: Optional[ExecutionStep] = None
+        halted = False
+
+        def skip_dependents(step_id: str, reason: str):
+            stack = list(dependents[step_id])
+            while stack:
+                dependent_id = stack.pop()
+                dependent = steps[dependent_id]
+                if dependent.status != StepStatus.PENDING:
+                    continue
+                dependent.skip_execution(reason)
+                self.stats.skipped_steps += 1
+                stack.extend(dependents[dependent_id])
+
+        try:
+            while ready or running:
+                # Pausa segura apenas novos despachos; passos em execução seguem
+                if ready and self.wait_if_paused and len(running) < self.max_parallel:
+                    await self.wait_if_paused()
+                if self.is_cancelled():
+                    halted = True
+
+                # Despachar enquanto houver capacidade
+                while ready and not halted and len(running) < self.max_parallel:
+                    self.stats.max_ready_queue_depth = max(self.stats.max_ready_queue_depth, len(ready))
+                    step_id = ready.popleft()
+                    step = steps[step_id]
+
+                    wait_ms = int((time.monotonic() - ready_since.pop(step_id)) * 1000)
+                    step.wait_time_ms = wait_ms
+                    self.stats.dispatched_steps += 1
+                    self.stats.total_wait_time_ms += wait_ms
+                    self.stats.max_wait_time_ms = max(self.stats.max_wait_time_ms, wait_ms)
+                    self.stats.wait_time_ms_by_step[step_id] = wait_ms
+
+                    if self.on_dispatch:
+                        self.on_dispatch(step, len(ready))
+
+                    running[asyncio.create_task(self.run_step(step))] = step_id
+                    self.stats.max_running_steps = max(self.stats.max_running_steps, len(running))
+
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    step_id = running.pop(task)
+                    step = steps[step_id]
+
+                    error = task.exception()
+                    if error is not None and step.status != StepStatus.FAILED:
+                        step.fail_execution(str(error))
+
+                    if step.status == StepStatus.COMPLETED:
+                        for dependent_id in dependents[step_id]:
+                            pending_deps[dependent_id] -= 1
+                            if pending_deps[dependent_id] == 0 and steps[dependent_id].status == StepStatus.PENDING:
+                                mark_ready(dependent_id)
+                    elif step.status == StepStatus.FAILED and self.stop_on_failure:
+                        failure = failure or step
+                        halted = True
+                    else:
+                        skip_dependents(step_id, f"Dependência '{step_id}' não foi concluída")
+
+                if halted:
+                    ready.clear()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+
+            self.stats.makespan_ms = int((time.monotonic() - started) * 1000)
+
+        if failure is not None:
+            raise StepFailedError(failure)
+
+        return self.stats
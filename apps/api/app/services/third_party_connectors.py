@@ -403,7 +403,7 @@ class ThirdPartyConnectorsService:
     ) -> Any:  # Would return AgentExecutionResult in real implementation
         """Execute webhook call to third-party connector"""
         try:
-            import httpx
+            from app.infra.http_transport import get_http_transport
             
             # Prepare headers
             headers = {
@@ -436,7 +436,7 @@ class ThirdPartyConnectorsService:
                 headers['X-Test-Request'] = 'true'
             
             # Make HTTP request
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with get_http_transport().client(timeout=30.0) as client:
                 response = await client.post(
                     connector.webhook_url,
                     json=payload,
@@ -7,13 +7,13 @@ import secrets
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from uuid import UUID, uuid4
-import httpx
 
 from app.domain.credentials import (
     UserCredential, OAuthFlow, CredentialValidationResult,
     ProviderType, CredentialType, CredentialStatus,
     get_credential_metadata, CREDENTIAL_METADATA
 )
+from app.infra.http_transport import get_http_transport
 from app.repositories.credentials_repository import CredentialsRepository
 from app.services.encryption_service import EncryptionService, CredentialEncryption
 
@@ -30,7 +30,7 @@ class UserCredentialsService:
         self.credential_encryption = CredentialEncryption(self.encryption_service)
         
         # HTTP client for validation requests
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        self.http_client = get_http_transport().client(timeout=30.0)
     
     async def create_oauth_credential(
         self,
@@ -0,0 +1,358 @@
+"""
+Workflow Scheduler
+Disparo de workflows agendados (cron ou intervalo) com um único heap de prazos
+"""
+import asyncio
+import heapq
+import itertools
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import structlog
+
+from app.core.config import settings
+from app.domain.schedule import WorkflowSchedule
+from app.repositories.workflow_schedule_repository import WorkflowScheduleRepository
+
+logger = structlog.get_logger(__name__)
+
+Dispatcher = Callable[[WorkflowSchedule], Awaitable[Any]]
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch(moment: datetime) -> float:
+    return (moment - _EPOCH).total_seconds()
+
+
+def _spread(schedule_id: UUID, salt: str, seconds: float) -> float:
+    """Deslocamento determinístico em [0, seconds) por agendamento"""
+    if seconds <= 0:
+        return 0.0
+    bucket = zlib.crc32(f"{schedule_id}:{salt}".encode()) % 10_000
+    return seconds * bucket / 10_000
+
+
+class WorkflowScheduler:
+    """
+    Mantém todos os agendamentos ativos em memória e dispara os que vencem.
+
+    Em vez de uma task por agendamento, os próximos disparos ficam num heap
+    ``(vence_em, seq, schedule_id, geração)`` e uma única task dorme até o
+    topo vencer (ou até um novo agendamento entrar na frente). Alterações e
+    remoções só incrementam a geração; entradas antigas são descartadas ao
+    sair do heap. Os disparos vencidos vão para uma fila atendida por um
+    número fixo de workers, então o custo por agendamento é O(log n) e a
+    concorrência de disparos é limitada.
+
+    Cada disparo avança ``next_fire_at`` no banco com compare-and-set antes
+    de executar o workflow: com várias instâncias carregando os mesmos
+    agendamentos, apenas uma dispara cada ocorrência. Após indisponibilidade,
+    as ocorrências perdidas viram um único disparo, espalhado em
+    ``catchup_spread_seconds`` para não sobrecarregar a retomada.
+
+    A cada ``reload_interval_seconds`` as linhas alteradas desde a última
+    leitura (``updated_at``) são recarregadas, de modo que agendamentos
+    criados, editados ou desativados por outra instância entram em vigor sem
+    reiniciar o processo. Remoções feitas em outra instância são detectadas no
+    disparo, quando o compare-and-set não encontra a linha.
+    """
+
+    def __init__(
+        self,
+        repository: Optional[WorkflowScheduleRepository] = None,
+        dispatcher: Optional[Dispatcher] = None,
+        max_concurrent_dispatches: Optional[int] = None,
+        catchup_spread_seconds: Optional[float] = None,
+        default_jitter_seconds: Optional[float] = None,
+        reload_interval_seconds: Optional[float] = None,
+        clock: Optional[Callable[[], datetime]] = None
+    ):
+        self.repository = repository or WorkflowScheduleRepository()
+        self.dispatcher = dispatcher or self._execute_workflow
+        self.max_concurrent_dispatches = max(
+            1, max_concurrent_dispatches or settings.WORKFLOW_SCHEDULER_MAX_CONCURRENT_DISPATCHES
+        )
+        self.catchup_spread_seconds = (
+            catchup_spread_seconds if catchup_spread_seconds is not None
+            else settings.WORKFLOW_SCHEDULER_CATCHUP_SPREAD_SECONDS
+        )
+        self.default_jitter_seconds = (
+            default_jitter_seconds if default_jitter_seconds is not None
+            else settings.WORKFLOW_SCHEDULER_DEFAULT_JITTER_SECONDS
+        )
+        self.reload_interval_seconds = (
+            reload_interval_seconds if reload_interval_seconds is not None
+            else settings.WORKFLOW_SCHEDULER_RELOAD_SECONDS
+        )
+        self._clock = clock or datetime.utcnow
+        self._synced_at: Optional[datetime] = None
+
+        self._schedules: Dict[UUID, WorkflowSchedule] = {}
+        self._generations: Dict[UUID, int] = {}
+        self._heap: List[Tuple[float, int, UUID, int]] = []
+        self._seq = itertools.count()
+        self._wake: Optional[asyncio.Event] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running = False
+
+        self._metrics = {
+            'fired': 0,
+            'coalesced_missed': 0,
+            'claim_conflicts': 0,
+            'dispatch_errors': 0,
+            'reloaded': 0,
+            'last_lag_ms': 0.0,
+            'max_lag_ms': 0.0
+        }
+
+    async def start(self):
+        """Carregar agendamentos e iniciar o laço de disparo"""
+        if self._running:
+            return
+
+        self._running = True
+        self._wake = asyncio.Event()
+        self._queue = asyncio.Queue()
+        loaded = await self.load()
+
+        self._tasks = [asyncio.create_task(self._run())]
+        self._tasks += [
+            asyncio.create_task(self._worker()) for _ in range(self.max_concurrent_dispatches)
+        ]
+        if self.reload_interval_seconds > 0:
+            self._tasks.append(asyncio.create_task(self._reload_loop()))
+        logger.info("Workflow scheduler started", schedules=loaded, workers=self.max_concurrent_dispatches)
+
+    async def stop(self):
+        """Parar o laço e os workers de disparo"""
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Workflow scheduler stopped")
+
+    async def load(self) -> int:
+        """Carregar os agendamentos ativos; ocorrências perdidas viram um disparo espalhado"""
+        now = self._clock()
+        loaded = 0
+        async for schedule in self.repository.iter_enabled_schedules():
+            self._activate(schedule, now)
+            loaded += 1
+        self._synced_at = now
+        return loaded
+
+    async def reload(self) -> int:
+        """Aplicar agendamentos criados, alterados ou desativados desde a última leitura"""
+        now = self._clock()
+        # Margem de um intervalo para relógios de outras instâncias um pouco atrasados
+        since = (self._synced_at or now) - timedelta(seconds=self.reload_interval_seconds)
+        changed = 0
+        async for stored in self.repository.iter_schedules_updated_since(since):
+            current = self._schedules.get(stored.id)
+            if not stored.enabled:
+                if current is None:
+                    continue
+                self.remove(stored.id)
+            elif current is not None and stored.updated_at <= current.updated_at:
+                continue
+            else:
+                self._activate(stored, now)
+            changed += 1
+        self._synced_at = now
+        self._metrics['reloaded'] += changed
+        return changed
+
+    def _activate(self, schedule: WorkflowSchedule, now: datetime):
+        overdue = schedule.next_fire_at <= now
+        catchup = _spread(schedule.id, 'catchup', self.catchup_spread_seconds) if overdue else None
+        self.add(schedule, catchup_delay=catchup)
+
+    def add(self, schedule: WorkflowSchedule, catchup_delay: Optional[float] = None):
+        """Incluir ou substituir um agendamento em memória"""
+        if not schedule.enabled:
+            self.remove(schedule.id)
+            return
+
+        self._schedules[schedule.id] = schedule
+        self._generations[schedule.id] = self._generations.get(schedule.id, 0) + 1
+
+        if catchup_delay is not None:
+            due = _epoch(self._clock()) + catchup_delay
+        else:
+            due = _epoch(schedule.next_fire_at) + self._jitter(schedule)
+        self._push(schedule.id, due)
+
+    def remove(self, schedule_id: UUID):
+        """Retirar agendamento (a entrada no heap é descartada quando chegar ao topo)"""
+        self._schedules.pop(schedule_id, None)
+        self._generations[schedule_id] = self._generations.get(schedule_id, 0) + 1
+
+    async def create_schedule(self, schedule: WorkflowSchedule) -> WorkflowSchedule:
+        """Persistir e ativar um agendamento"""
+        saved = await self.repository.save_schedule(schedule)
+        self.add(saved)
+        return saved
+
+    async def delete_schedule(self, schedule_id: UUID) -> bool:
+        """Remover agendamento do banco e da memória"""
+        self.remove(schedule_id)
+        return await self.repository.delete_schedule(schedule_id)
+
+    def _jitter(self, schedule: WorkflowSchedule) -> float:
+        # Agendamentos com a mesma expressão (ex.: "0 * * * *") não disparam no mesmo instante
+        seconds = schedule.jitter_seconds or self.default_jitter_seconds
+        return _spread(schedule.id, str(schedule.next_fire_at), seconds)
+
+    def _push(self, schedule_id: UUID, due: float):
+        heapq.heappush(self._heap, (due, next(self._seq), schedule_id, self._generations[schedule_id]))
+        if len(self._heap) > 2 * len(self._schedules) + 1000:
+            self._compact()
+        if self._wake and self._heap[0][2] == schedule_id:
+            self._wake.set()
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._is_current(entry)]
+        heapq.heapify(self._heap)
+
+    def _is_current(self, entry: Tuple[float, int, UUID, int]) -> bool:
+        _, _, schedule_id, generation = entry
+        return schedule_id in self._schedules and self._generations.get(schedule_id) == generation
+
+    async def _reload_loop(self):
+        while self._running:
+            await asyncio.sleep(self.reload_interval_seconds)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.warning("Workflow schedule reload failed", error=str(e))
+
+    async def _run(self):
+        while self._running:
+            self._wake.clear()
+            delay = self._enqueue_due()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _enqueue_due(self) -> Optional[float]:
+        """Enfileirar os disparos vencidos; retorna quanto dormir até o próximo"""
+        now = _epoch(self._clock())
+        while self._heap:
+            due, _, schedule_id, generation = self._heap[0]
+            if not self._is_current(self._heap[0]):
+                heapq.heappop(self._heap)
+                continue
+            if due > now:
+                return due - now
+            heapq.heappop(self._heap)
+            self._queue.put_nowait((schedule_id, generation, due))
+        return None
+
+    async def _worker(self):
+        while True:
+            schedule_id, generation, due = await self._queue.get()
+            try:
+                lag_ms = max(0.0, (_epoch(self._clock()) - due) * 1000)
+                self._metrics['last_lag_ms'] = round(lag_ms, 2)
+                self._metrics['max_lag_ms'] = round(max(self._metrics['max_lag_ms'], lag_ms), 2)
+                await self._fire(schedule_id, generation)
+            except Exception as e:
+                logger.error("Scheduled fire failed", schedule_id=str(schedule_id), error=str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _fire(self, schedule_id: UUID, generation: int):
+        schedule = self._schedules.get(schedule_id)
+        if not schedule or self._generations.get(schedule_id) != generation:
+            return
+
+        now = self._clock()
+        expected = schedule.next_fire_at
+        next_fire_at = schedule.next_fire_after(now)
+        if schedule.next_fire_after(expected) < now:
+            # Várias ocorrências passaram (indisponibilidade ou atraso): dispara uma só
+            self._metrics['coalesced_missed'] += 1
+
+        try:
+            claimed = await self.repository.advance_next_fire(schedule.id, expected, next_fire_at, now)
+        except Exception:
+            # Banco indisponível: tenta a mesma ocorrência após um intervalo
+            if self._generations.get(schedule_id) == generation:
+                self._push(schedule_id, _epoch(now) + max(1.0, self.catchup_spread_seconds / 10))
+            raise
+
+        if self._generations.get(schedule_id) != generation:
+            # Removido ou substituído enquanto o banco respondia
+            return
+
+        if not claimed:
+            # Outra instância disparou esta ocorrência: seguir o estado do banco
+            self._metrics['claim_conflicts'] += 1
+            stored = await self.repository.find_schedule_by_id(schedule_id)
+            if self._generations.get(schedule_id) != generation:
+                return
+            if not stored:
+                self.remove(schedule_id)
+                return
+            self.add(stored)
+            return
+
+        schedule.next_fire_at = next_fire_at
+        schedule.last_fired_at = now
+        schedule.updated_at = now
+        self.add(schedule)
+        self._metrics['fired'] += 1
+
+        try:
+            await self.dispatcher(schedule)
+        except Exception as e:
+            self._metrics['dispatch_errors'] += 1
+            logger.error(
+                "Scheduled workflow dispatch failed",
+                schedule_id=str(schedule.id),
+                workflow_id=str(schedule.workflow_id),
+                error=str(e)
+            )
+
+    async def _execute_workflow(self, schedule: WorkflowSchedule):
+        from app.repositories.orchestrator_repository import OrchestratorRepository
+        from app.schemas.orchestrator import ExecuteWorkflowSchema
+        from app.services.orchestrator_service import OrchestratorService
+
+        service = OrchestratorService(OrchestratorRepository(self.repository.supabase))
+        await service.execute_workflow(
+            ExecuteWorkflowSchema(workflow_id=schedule.workflow_id, input_data=schedule.input_data),
+            schedule.user_id
+        )
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Agendamentos carregados, fila de disparo e atrasos"""
+        next_due = None
+        if self._heap:
+            next_due = (_EPOCH + timedelta(seconds=self._heap[0][0])).isoformat()
+        return {
+            'running': self._running,
+            'schedules': len(self._schedules),
+            'heap_size': len(self._heap),
+            'dispatch_queue': self._queue.qsize() if self._queue else 0,
+            'next_due_at': next_due,
+            **self._metrics
+        }
+
+
+_workflow_scheduler: Optional[WorkflowScheduler] = None
+
+
+def get_workflow_scheduler() -> WorkflowScheduler:
+    """Obter o agendador global de workflows"""
+    global _workflow_scheduler
+    if _workflow_scheduler is None:
+        from app.core.security import get_supabase_client
+        _workflow_scheduler = WorkflowScheduler(WorkflowScheduleRepository(get_supabase_client()))
+    return _workflow_scheduler
@@ -18,6 +18,7 @@ from app.schemas.team import TeamResponse
 from app.usecases.team_service import TeamService
 from app.infra.suna.client import SunaClient
 from app.core.security import get_supabase_client
+from app.infra.database import get_async_supabase
 
 
 class ExecutionService:
@@ -27,6 +28,7 @@ class ExecutionService:
         self.suna_client = suna_client
         self.team_service = team_service
         self.supabase = get_supabase_client()
+        self.db = get_async_supabase(self.supabase)
     
     async def start_execution(
         self, 
@@ -89,7 +91,7 @@ class ExecutionService:
         
         try:
             # Insere no banco
-            response = self.supabase.table('executions').insert(execution_db_data).execute()
+            response = await self.db.table('executions').insert(execution_db_data).execute()
             
             if not response.data:
                 raise Exception("Failed to create execution in database")
@@ -112,7 +114,7 @@ class ExecutionService:
     async def get_execution(self, execution_id: UUID, user_id: UUID) -> Optional[ExecutionResponse]:
         """Obtém uma execução por ID."""
         try:
-            response = self.supabase.table('executions').select('*').eq('id', str(execution_id)).eq('user_id', str(user_id)).execute()
+            response = await self.db.table('executions').select('*').eq('id', str(execution_id)).eq('user_id', str(user_id)).execute()
             
             if response.data:
                 return self._db_to_response(response.data[0])
@@ -132,7 +134,7 @@ class ExecutionService:
         """Lista execuções do usuário com filtros."""
         try:
             # Query base
-            query = self.supabase.table('executions').select('*, teams(name)').eq('user_id', str(user_id))
+            query = self.db.table('executions').select('*, teams(name)').eq('user_id', str(user_id))
             
             # Aplica filtros
             if team_id:
@@ -141,14 +143,14 @@ class ExecutionService:
                 query = query.eq('status', status.value)
             
             # Conta total
-            count_response = query.execute()
+            count_response = await query.execute()
             total = len(count_response.data) if count_response.data else 0
             
             # Aplica paginação
             start = (page - 1) * limit
             paginated_query = query.range(start, start + limit - 1).order('created_at', desc=True)
             
-            response = paginated_query.execute()
+            response = await paginated_query.execute()
             
             # Converte para response
             executions_response = [self._db_to_list_item(exec_data) for exec_data in response.data] if response.data else []
@@ -183,7 +185,7 @@ class ExecutionService:
                 "completed_at": datetime.utcnow().isoformat()
             }
             
-            response = self.supabase.table('executions').update(update_data).eq('id', str(execution_id)).eq('user_id', str(user_id)).execute()
+            response = await self.db.table('executions').update(update_data).eq('id', str(execution_id)).eq('user_id', str(user_id)).execute()
             
             if response.data:
                 return ExecutionCancelResponse(
@@ -373,7 +375,7 @@ class ExecutionService:
                 }
             }
             
-            self.supabase.table('executions').update(update_data).eq('id', str(execution_id)).execute()
+            await self.db.table('executions').update(update_data).eq('id', str(execution_id)).execute()
         except Exception:
             pass  # Ignora erros de atualização
     
@@ -391,7 +393,7 @@ class ExecutionService:
                 }
             }
             
-            self.supabase.table('executions').update(update_data).eq('id', str(execution_id)).execute()
+            await self.db.table('executions').update(update_data).eq('id', str(execution_id)).execute()
         except Exception:
             pass  # Ignora erros de atualização
     
@@ -426,7 +428,7 @@ class ExecutionService:
                 }
             }
             
-            self.supabase.table('executions').update(update_data).eq('id', str(execution_id)).execute()
+            await self.db.table('executions').update(update_data).eq('id', str(execution_id)).execute()
         except Exception:
             pass  # Ignora erros de atualização
     
@@ -14,6 +14,7 @@ from app.schemas.team import (
 )
 from app.infra.suna.client import SunaClient
 from app.core.security import get_supabase_client
+from app.infra.database import get_async_supabase
 
 
 class TeamService:
@@ -22,6 +23,7 @@ class TeamService:
     def __init__(self, suna_client: SunaClient):
         self.suna_client = suna_client
         self.supabase = get_supabase_client()
+        self.db = get_async_supabase(self.supabase)
     
     async def create_team(self, user_id: UUID, team_data: TeamCreate) -> TeamResponse:
         """Cria uma nova equipe."""
@@ -49,7 +51,7 @@ class TeamService:
         
         # Insere no Supabase
         try:
-            response = self.supabase.table('teams').insert({
+            response = await self.db.table('teams').insert({
                 "name": team_data.name,
                 "description": team_data.description,
                 "workflow_type": team_data.workflow_type.value,
@@ -70,7 +72,7 @@ class TeamService:
     async def get_team(self, team_id: UUID, user_id: UUID) -> Optional[TeamResponse]:
         """Obtém uma equipe por ID."""
         try:
-            response = self.supabase.table('teams').select('*').eq('id', str(team_id)).eq('user_id', str(user_id)).execute()
+            response = await self.db.table('teams').select('*').eq('id', str(team_id)).eq('user_id', str(user_id)).execute()
             
             if response.data:
                 return self._db_to_response(response.data[0])
@@ -89,21 +91,21 @@ class TeamService:
         """Lista equipes do usuário com paginação."""
         try:
             # Query base
-            query = self.supabase.table('teams').select('*').eq('user_id', str(user_id))
+            query = self.db.table('teams').select('*').eq('user_id', str(user_id))
             
             # Aplica filtro de busca
             if search:
                 query = query.or_(f'name.ilike.%{search}%,description.ilike.%{search}%')
             
             # Conta total
-            count_response = query.execute()
+            count_response = await query.execute()
             total = len(count_response.data) if count_response.data else 0
             
             # Aplica paginação
             start = (page - 1) * limit
             paginated_query = query.range(start, start + limit - 1).order('created_at', desc=True)
             
-            response = paginated_query.execute()
+            response = await paginated_query.execute()
             
             # Converte para response
             teams_response = [self._db_to_list_item(team_data) for team_data in response.data] if response.data else []
@@ -175,7 +177,7 @@ class TeamService:
                 update_data["agents"] = agents_json
             
             # Atualiza no banco
-            response = self.supabase.table('teams').update(update_data).eq('id', str(team_id)).eq('user_id', str(user_id)).execute()
+            response = await self.db.table('teams').update(update_data).eq('id', str(team_id)).eq('user_id', str(user_id)).execute()
             
             if response.data:
                 return self._db_to_response(response.data[0])
@@ -187,7 +189,7 @@ class TeamService:
     async def delete_team(self, team_id: UUID, user_id: UUID) -> bool:
         """Remove uma equipe."""
         try:
-            response = self.supabase.table('teams').delete().eq('id', str(team_id)).eq('user_id', str(user_id)).execute()
+            response = await self.db.table('teams').delete().eq('id', str(team_id)).eq('user_id', str(user_id)).execute()
             return len(response.data) > 0 if response.data else False
         except Exception:
             return False
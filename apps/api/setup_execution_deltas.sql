@@ -0,0 +1,55 @@
+-- Tabelas append-only para persistência por deltas das execuções multi-agente
+-- Execute este script no Supabase SQL Editor
+
+-- Snapshots de estado/resultado de passos (o último por step_id prevalece)
+CREATE TABLE IF NOT EXISTS multi_agent_execution_steps (
+    id BIGSERIAL PRIMARY KEY,
+    execution_id UUID NOT NULL REFERENCES multi_agent_executions(id) ON DELETE CASCADE,
+    step_id VARCHAR(255) NOT NULL,
+    status VARCHAR(20),
+    state JSONB NOT NULL DEFAULT '{}',
+    result JSONB,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Linhas de log anexadas após a criação da execução
+CREATE TABLE IF NOT EXISTS multi_agent_execution_logs (
+    id BIGSERIAL PRIMARY KEY,
+    execution_id UUID NOT NULL REFERENCES multi_agent_executions(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    level VARCHAR(20) NOT NULL,
+    message TEXT,
+    step_id VARCHAR(255),
+    metadata JSONB NOT NULL DEFAULT '{}',
+    logged_at TIMESTAMPTZ
+);
+
+-- Índices para leitura por execução
+CREATE INDEX IF NOT EXISTS idx_ma_execution_steps_execution ON multi_agent_execution_steps(execution_id, id);
+CREATE INDEX IF NOT EXISTS idx_ma_execution_logs_execution ON multi_agent_execution_logs(execution_id, seq);
+
+-- RLS: acesso apenas via service role (mesmo padrão de multi_agent_executions)
+ALTER TABLE multi_agent_execution_steps ENABLE ROW LEVEL SECURITY;
+ALTER TABLE multi_agent_execution_logs ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE multi_agent_execution_steps IS 'Deltas de estado e resultado de passos das execuções multi-agente';
+COMMENT ON TABLE multi_agent_execution_logs IS 'Deltas de log das execuções multi-agente';
+
+-- Logs das execuções de workflow descartados do buffer em memória
+CREATE TABLE IF NOT EXISTS workflow_run_logs (
+    id BIGSERIAL PRIMARY KEY,
+    run_id UUID NOT NULL REFERENCES workflow_runs(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    level VARCHAR(20) NOT NULL,
+    message TEXT,
+    step_id VARCHAR(255),
+    metadata JSONB NOT NULL DEFAULT '{}',
+    logged_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_workflow_run_logs_run ON workflow_run_logs(run_id, seq);
+CREATE INDEX IF NOT EXISTS idx_ma_execution_logs_level ON multi_agent_execution_logs(execution_id, level, seq);
+
+ALTER TABLE workflow_run_logs ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE workflow_run_logs IS 'Logs das execuções de workflow (a linha de workflow_runs guarda só a cauda)';
@@ -0,0 +1,22 @@
+-- Agendamentos (cron ou intervalo) de workflows
+-- Execute este script no Supabase SQL Editor
+
+CREATE TABLE IF NOT EXISTS workflow_schedules (
+    id UUID PRIMARY KEY,
+    workflow_id UUID NOT NULL,
+    user_id UUID NOT NULL,
+    cron_expression VARCHAR(120),
+    interval_seconds INTEGER CHECK (interval_seconds IS NULL OR interval_seconds > 0),
+    input_data JSONB NOT NULL DEFAULT '{}',
+    jitter_seconds INTEGER NOT NULL DEFAULT 0,
+    enabled BOOLEAN NOT NULL DEFAULT TRUE,
+    next_fire_at TIMESTAMPTZ NOT NULL,
+    last_fired_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    CHECK ((cron_expression IS NULL) <> (interval_seconds IS NULL))
+);
+
+-- Carga paginada dos agendamentos ativos e consulta por workflow
+CREATE INDEX IF NOT EXISTS idx_workflow_schedules_due ON workflow_schedules(enabled, next_fire_at, id);
+CREATE INDEX IF NOT EXISTS idx_workflow_schedules_workflow ON workflow_schedules(workflow_id);
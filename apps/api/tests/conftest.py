@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 import os
 import tempfile
 import json
+import httpx
 
 # Set test environment
 os.environ["TESTING"] = "true"
@@ -325,6 +326,79 @@ def mock_external_services():
         
         yield mock_client
 
+# Cliente real, capturado antes do patch automático acima
+REAL_ASYNC_CLIENT = httpx.AsyncClient
+
+@pytest.fixture
+def real_http_client(monkeypatch):
+    """Desfaz o mock automático do httpx.AsyncClient (testes com transportes locais)"""
+    monkeypatch.setattr(httpx, "AsyncClient", REAL_ASYNC_CLIENT)
+
+@pytest.fixture
+def agent_factory(real_http_client, monkeypatch):
+    """
+    Cria agentes reais falando com um servidor local: ``server`` é um handler
+    do ``httpx.MockTransport`` ou um transporte próprio. Baldes de ritmo
+    compartilhados começam vazios em cada teste.
+    """
+    from app.core import token_bucket
+
+    monkeypatch.setenv("CREDENTIAL_MASTER_KEY", "test-master-key")
+    monkeypatch.setattr(token_bucket, "_buckets", {})
+
+    def make(agent_class, server, credentials):
+        transport = server if isinstance(server, httpx.AsyncBaseTransport) else httpx.MockTransport(server)
+        agent = agent_class()
+        agent.http_client = httpx.AsyncClient(transport=transport)
+        agent.get_user_credential = AsyncMock(return_value=credentials)
+        return agent
+
+    return make
+
+@pytest.fixture
+def execution_service_factory():
+    """
+    Cria ``ExecutionService`` com agente, registro e writer simulados. Passe
+    ``execute_capability`` para o agente padrão ou ``agent`` pronto; demais
+    dependências podem ser sobrescritas por nome. Governador de concorrência,
+    cache de resultados e escalonador são sempre novos (nada dos singletons).
+    """
+    from app.agents.base_agent import AgentExecutionResult
+    from app.services.concurrency_governor import ConcurrencyGovernor
+    from app.services.execution_scheduler import ExecutionScheduler
+    from app.services.execution_service import ExecutionService
+    from app.services.step_result_cache import StepResultCache
+
+    def make(execute_capability=None, agent=None, **overrides):
+        if agent is None:
+            agent = MagicMock()
+            agent.has_capability.return_value = True
+            agent.get_supported_providers.return_value = []
+            agent.execute_capability = execute_capability or AsyncMock(
+                return_value=AgentExecutionResult(success=True, data={})
+            )
+        registry = MagicMock()
+        registry.get_agent.return_value = agent
+
+        writer = MagicMock()
+        writer.flush = AsyncMock()
+        writer.close = AsyncMock()
+        writer.discard = AsyncMock()
+
+        dependencies = {
+            "execution_repository": MagicMock(),
+            "agent_registry": registry,
+            "credentials_service": MagicMock(),
+            "state_writer": writer,
+            "concurrency_governor": ConcurrencyGovernor(),
+            "result_cache": StepResultCache(),
+            "execution_scheduler": ExecutionScheduler(),
+        }
+        dependencies.update(overrides)
+        return ExecutionService(**dependencies)
+
+    return make
+
 @pytest.fixture
 def performance_timer():
     """Timer fixture for performance testing"""
@@ -0,0 +1,99 @@
+"""
+Tests for the async Supabase data-access layer
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock
+
+from app.infra.database import AsyncSupabase, QueryExecutor, QueryTimeoutError
+from app.repositories.credentials_repository import CredentialsRepository
+
+
+def slow_client(delay: float, data=None):
+    """Sync supabase client stand-in whose execute() blocks like a network call"""
+    client = MagicMock()
+
+    def blocking_execute():
+        time.sleep(delay)
+        return MagicMock(data=data or [])
+
+    client.table.return_value.select.return_value.eq.return_value.execute.side_effect = blocking_execute
+    return client
+
+
+class TestAsyncDataAccess:
+
+    @pytest.mark.asyncio
+    async def test_queries_do_not_block_event_loop(self):
+        """Blocking execute() runs off the loop, so other tasks keep running"""
+        db = AsyncSupabase(slow_client(0.2), QueryExecutor(max_workers=4, max_in_flight=4))
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await db.table('workflows').select('*').eq('id', '1').execute()
+        task.cancel()
+
+        assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_in_flight_queries_are_bounded(self):
+        """No more than max_in_flight queries execute at the same time"""
+        executor = QueryExecutor(max_workers=8, max_in_flight=2)
+        db = AsyncSupabase(slow_client(0.1), executor)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            db.table('workflows').select('*').eq('id', str(i)).execute() for i in range(4)
+        ])
+        elapsed = time.perf_counter() - started
+
+        assert elapsed >= 0.2
+        metrics = executor.get_metrics()['operations']['workflows.select']
+        assert metrics['count'] == 4
+        assert metrics['avg_wait_ms'] > 0
+
+    @pytest.mark.asyncio
+    async def test_query_timeout(self):
+        """Slow queries fail with QueryTimeoutError and are counted"""
+        executor = QueryExecutor(max_workers=2, max_in_flight=2, default_timeout_seconds=0.05)
+        db = AsyncSupabase(slow_client(0.3), executor)
+
+        with pytest.raises(QueryTimeoutError):
+            await db.table('workflows').select('*').eq('id', '1').execute()
+
+        assert executor.get_metrics()['operations']['workflows.select']['timeouts'] == 1
+
+    @pytest.mark.asyncio
+    async def test_operation_is_tracked_per_table(self):
+        """Metrics are keyed by table and the builder operation"""
+        executor = QueryExecutor(max_workers=2, max_in_flight=2)
+        client = MagicMock()
+        db = AsyncSupabase(client, executor)
+
+        await db.table('oauth_flows').delete().eq('id', '1').execute()
+        await db.table('user_credentials').upsert({'id': '1'}).execute()
+
+        operations = executor.get_metrics()['operations']
+        assert 'oauth_flows.delete' in operations
+        assert 'user_credentials.upsert' in operations
+
+    @pytest.mark.asyncio
+    async def test_repository_uses_async_layer(self):
+        """Repositories await queries through the shared layer"""
+        client = MagicMock()
+        client.table.return_value.select.return_value.eq.return_value.eq.return_value.execute.return_value = MagicMock(data=[])
+        repository = CredentialsRepository(client)
+
+        result = await repository.find_credential_by_id(
+            '00000000-0000-0000-0000-000000000001', '00000000-0000-0000-0000-000000000002'
+        )
+
+        assert result is None
+        client.table.assert_called_with('user_credentials')
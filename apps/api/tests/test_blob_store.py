@@ -0,0 +1,137 @@
+"""
+Tests for content-addressed blob storage of large payloads
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from app.domain.execution import ExecutionPlan, ExecutionStep, MultiAgentExecution
+from app.infra.blob_store import BlobNotFoundError, LocalBlobStore, PayloadStore
+from app.repositories.execution_repository import ExecutionRepository
+
+
+LARGE_OUTPUT = {"rows": [{"id": i, "name": f"customer-{i}"} for i in range(500)]}
+
+
+@pytest.fixture
+def payloads(tmp_path):
+    return PayloadStore(LocalBlobStore(str(tmp_path)), inline_threshold_bytes=1024)
+
+
+def build_repository(payloads):
+    repository = ExecutionRepository(supabase_client=MagicMock(), payload_store=payloads)
+    repository.db = MagicMock()
+    repository.db.table.return_value.insert.return_value.execute = AsyncMock()
+    repository.db.table.return_value.upsert.return_value.execute = AsyncMock(return_value=MagicMock(data=[]))
+    return repository
+
+
+def completed_execution():
+    step = ExecutionStep(step_id="fetch", agent_id="sa-supabase", capability_name="select_data", input_data={})
+    plan = ExecutionPlan(plan_id="plan-1", name="Plan", description="", steps=[step])
+    execution = MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan)
+    step.start_execution()
+    step.complete_execution(LARGE_OUTPUT)
+    execution.add_step_result("fetch", {"success": True, "data": LARGE_OUTPUT})
+    return execution
+
+
+class TestLocalBlobStore:
+
+    @pytest.mark.asyncio
+    async def test_content_addressed_compressed_and_deduplicated(self, tmp_path):
+        store = LocalBlobStore(str(tmp_path))
+        data = b'{"payload": "' + b"x" * 10000 + b'"}'
+
+        digest = await store.put(data)
+        assert await store.put(data) == digest
+        assert await store.get(digest) == data
+
+        files = [path for path in tmp_path.rglob("*") if path.is_file()]
+        assert len(files) == 1
+        assert files[0].name == digest
+        assert files[0].stat().st_size < len(data) / 10
+
+    @pytest.mark.asyncio
+    async def test_missing_blob(self, tmp_path):
+        with pytest.raises(BlobNotFoundError):
+            await LocalBlobStore(str(tmp_path)).get("0" * 64)
+
+    @pytest.mark.asyncio
+    async def test_invalid_digest_never_becomes_a_path(self, tmp_path):
+        with pytest.raises(ValueError):
+            await LocalBlobStore(str(tmp_path / "blobs")).get("ab/../../" + "0" * 55)
+
+
+class TestPayloadStore:
+
+    @pytest.mark.asyncio
+    async def test_only_large_values_are_externalized(self, payloads):
+        small = {"count": 3}
+        assert await payloads.externalize(small) is small
+
+        ref = await payloads.externalize(LARGE_OUTPUT)
+        assert payloads.is_ref(ref)
+        assert ref["size"] > 1024
+        assert await payloads.externalize(ref) is ref
+        assert await payloads.resolve(ref) == LARGE_OUTPUT
+
+    @pytest.mark.asyncio
+    async def test_agent_output_cannot_forge_a_reference(self, payloads):
+        ref = await payloads.externalize(LARGE_OUTPUT)
+        forged = [
+            {"$blob": ref["$blob"], "size": ref["size"]},
+            {**ref, "$sig": "0" * 64},
+            {**ref, "size": ref["size"] + 1},
+            {"$blob": "../" * 20 + "etc/passwd", "size": 1, "$sig": ref["$sig"]}
+        ]
+
+        for value in forged:
+            assert not payloads.is_ref(value)
+            assert await payloads.externalize(value) is value
+            assert await payloads.resolve(value) is value
+        # Outra chave de assinatura (outro armazenamento) também não vale
+        other = PayloadStore(payloads.blob_store, inline_threshold_bytes=1024, signing_key="other-key")
+        assert not other.is_ref(ref)
+
+
+class TestExecutionRepositoryPayloads:
+
+    @pytest.mark.asyncio
+    async def test_row_and_step_deltas_keep_only_references(self, payloads):
+        repository = build_repository(payloads)
+        execution = completed_execution()
+
+        await repository.save_execution(execution)
+        row = repository.db.table.return_value.upsert.call_args.args[0]
+        assert payloads.is_ref(row["results"]["fetch"]["data"])
+        assert row["results"]["fetch"]["success"] is True
+        assert payloads.is_ref(row["plan_data"]["steps"][0]["output_data"])
+        # Mesmo conteúdo, mesmo blob
+        assert row["plan_data"]["steps"][0]["output_data"] == row["results"]["fetch"]["data"]
+        # O domínio em memória não é alterado
+        assert execution.results["fetch"]["data"] == LARGE_OUTPUT
+
+        await repository.append_step_deltas(
+            execution.execution_id,
+            [{"step_id": "fetch", "state": {"status": "completed"}, "result": execution.results["fetch"]}]
+        )
+        rows = repository.db.table.return_value.insert.call_args.args[0]
+        assert payloads.is_ref(rows[0]["result"]["data"])
+        assert payloads.stats["externalized"] == 3
+
+    @pytest.mark.asyncio
+    async def test_payloads_are_loaded_on_demand(self, payloads):
+        repository = build_repository(payloads)
+        execution = completed_execution()
+        ref = await payloads.externalize(LARGE_OUTPUT)
+        execution.results["fetch"]["data"] = ref
+        execution.plan.get_step("fetch").output_data = ref
+
+        await repository.load_payloads(execution, step_ids=["other"])
+        assert payloads.stats["resolved"] == 0
+
+        await repository.load_payloads(execution)
+        assert execution.results["fetch"]["data"] == LARGE_OUTPUT
+        assert execution.plan.get_step("fetch").output_data == LARGE_OUTPUT
+        assert payloads.stats["resolved"] == 1
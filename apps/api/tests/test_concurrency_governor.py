@@ -0,0 +1,130 @@
+"""
+Tests for per-agent and per-provider concurrency governors
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from app.agents.base_agent import AgentExecutionResult
+from app.domain.agent import AgentPolicy
+from app.domain.execution import ExecutionPlan, ExecutionStep, MultiAgentExecution
+from app.services.concurrency_governor import ConcurrencyGovernor, ConcurrencyLimiter
+
+
+async def hold(governor, agent_id, providers, tracker, key, delay=0.02):
+    async with governor.slot(agent_id, providers):
+        tracker[key] = tracker.get(key, 0) + 1
+        tracker[f"{key}_peak"] = max(tracker.get(f"{key}_peak", 0), tracker[key])
+        await asyncio.sleep(delay)
+        tracker[key] -= 1
+
+
+class TestConcurrencyLimiter:
+
+    @pytest.mark.asyncio
+    async def test_queues_in_fifo_order_instead_of_failing(self):
+        limiter = ConcurrencyLimiter("test", 1)
+        order = []
+
+        async def worker(n):
+            await limiter.acquire()
+            order.append(n)
+            await asyncio.sleep(0.01)
+            limiter.release()
+
+        await asyncio.gather(*(worker(n) for n in range(5)))
+
+        assert order == [0, 1, 2, 3, 4]
+        metrics = limiter.get_metrics()
+        assert metrics["queued_acquisitions"] == 4
+        assert metrics["peak_waiting"] == 4
+        assert metrics["max_wait_ms"] > 0
+        assert metrics["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        limiter = ConcurrencyLimiter("test", 1)
+        await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        limiter.release()
+        assert limiter.active == 0
+        await asyncio.wait_for(limiter.acquire(), timeout=0.1)
+
+
+class TestConcurrencyGovernor:
+
+    @pytest.mark.asyncio
+    async def test_agent_policy_limits_only_that_agent(self):
+        policies = {"sa-whatsapp": AgentPolicy(max_concurrent_executions=2)}
+        loader = AsyncMock(side_effect=lambda agent_id: policies.get(agent_id))
+        governor = ConcurrencyGovernor(policy_loader=loader, default_agent_limit=10, default_provider_limit=100)
+        tracker = {}
+
+        await asyncio.gather(
+            *(hold(governor, "sa-whatsapp", ["whatsapp_business"], tracker, "whatsapp") for _ in range(6)),
+            *(hold(governor, "sa-supabase", ["supabase"], tracker, "supabase") for _ in range(6))
+        )
+
+        assert tracker["whatsapp_peak"] == 2
+        assert tracker["supabase_peak"] == 6
+        # Política carregada uma vez por agente
+        assert loader.await_count == 2
+
+        metrics = governor.get_metrics()
+        assert metrics["agents"]["sa-whatsapp"]["limit"] == 2
+        assert metrics["agents"]["sa-whatsapp"]["queued_acquisitions"] == 4
+        assert metrics["agents"]["sa-supabase"]["queued_acquisitions"] == 0
+
+    @pytest.mark.asyncio
+    async def test_provider_limit_is_shared_across_agents(self):
+        governor = ConcurrencyGovernor(
+            default_agent_limit=10,
+            provider_limits={"telegram": 3},
+            default_provider_limit=100
+        )
+        tracker = {}
+
+        async def track_provider(agent_id):
+            async with governor.slot(agent_id, ["telegram"]):
+                tracker["active"] = tracker.get("active", 0) + 1
+                tracker["peak"] = max(tracker.get("peak", 0), tracker["active"])
+                await asyncio.sleep(0.02)
+                tracker["active"] -= 1
+
+        await asyncio.gather(*(track_provider(f"sa-telegram-{i % 2}") for i in range(8)))
+
+        assert tracker["peak"] == 3
+        assert governor.get_metrics()["providers"]["telegram"]["peak_waiting"] > 0
+
+    @pytest.mark.asyncio
+    async def test_execution_service_runs_agent_calls_inside_slots(self, execution_service_factory):
+        governor = ConcurrencyGovernor(default_agent_limit=1, default_provider_limit=10)
+        running = 0
+        peak = 0
+
+        async def execute_capability(**kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return AgentExecutionResult(success=True, data={})
+
+        service = execution_service_factory(execute_capability, concurrency_governor=governor)
+        service.agent_registry.get_agent.return_value.get_supported_providers.return_value = ["google"]
+        steps = [
+            ExecutionStep(step_id=f"s{i}", agent_id="sa-gmail", capability_name="run", input_data={})
+            for i in range(4)
+        ]
+        plan = ExecutionPlan(plan_id="plan-1", name="Plan", description="", steps=steps)
+        execution = MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan)
+        await asyncio.gather(*(service._execute_step(execution, step) for step in steps))
+
+        assert peak == 1
+        assert governor.get_metrics()["providers"]["google"]["acquisitions"] == 4
@@ -0,0 +1,117 @@
+"""
+Tests for compiled step conditions
+"""
+import pytest
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from app.agents.base_agent import AgentExecutionResult
+from app.domain.conditions import (
+    ConditionSyntaxError, _compile_cached, compile_condition, evaluate_condition, evaluate_conditions
+)
+from app.domain.execution import (
+    ExecutionPlan, ExecutionStep, ExecutionStrategy, MultiAgentExecution, StepStatus
+)
+
+
+class TestCompiledCondition:
+
+    @pytest.mark.parametrize("expression,context,expected", [
+        ("${count} > 5", {"count": 10}, True),
+        ("${count} > 5", {"count": "3"}, False),
+        ("${status} == 'active' and ${retries} < 3", {"status": "active", "retries": 1}, True),
+        ("'${status}' == 'active'", {"status": "inactive"}, False),
+        ("not ${flag}", {"flag": False}, True),
+        ("'vip' in ${tags}", {"tags": ["new", "vip"]}, True),
+        ("len(${items}) >= 2", {"items": [1]}, False),
+        ("${order}['total'] * 2 > 100", {"order": {"total": 60}}, True),
+        ("1 < ${n} <= 3", {"n": 4}, False),
+    ])
+    def test_evaluates_expressions(self, expression, context, expected):
+        assert evaluate_condition(expression, context) is expected
+
+    def test_missing_variable_or_empty_condition_allows_step(self):
+        assert evaluate_condition("${missing} == 1", {}) is True
+        assert evaluate_condition(None, {}) is True
+
+    def test_rejects_code_execution(self):
+        with pytest.raises(ConditionSyntaxError):
+            compile_condition("__import__('os').system('true')")
+        with pytest.raises(ConditionSyntaxError):
+            compile_condition("${x}.__class__")
+
+        # Condições inválidas não executam nada e liberam o passo (comportamento anterior)
+        assert evaluate_condition("().__class__.__bases__", {}) is True
+
+    def test_rejects_unbounded_sequence_growth(self):
+        with pytest.raises(ConditionSyntaxError):
+            compile_condition("2 ** ${n} > 0")
+
+        repeat = compile_condition("len('x' * ${n}) > 0")
+        assert repeat._evaluate({"n": 3}) is True
+        with pytest.raises(ValueError):
+            repeat._evaluate({"n": 10 ** 9})
+        with pytest.raises(ValueError):
+            compile_condition("${n} * [0] == []")._evaluate({"n": 10 ** 9})
+        with pytest.raises(ValueError):
+            compile_condition("'%0999999999d' % 1 == ''")._evaluate({})
+        assert evaluate_condition("${v} % 2 == 0", {"v": 4}) is True
+
+    def test_compiled_once_per_expression(self):
+        _compile_cached.cache_clear()
+        for value in range(50):
+            evaluate_condition("${v} % 2 == 0", {"v": value})
+
+        info = _compile_cached.cache_info()
+        assert info.misses == 1
+        assert info.hits == 49
+
+    def test_invalid_expression_is_parsed_once(self):
+        _compile_cached.cache_clear()
+        for _ in range(20):
+            assert evaluate_condition("${v} ==", {"v": 1}) is True
+
+        info = _compile_cached.cache_info()
+        assert info.misses == 1
+        assert info.hits == 19
+        with pytest.raises(ConditionSyntaxError):
+            compile_condition("${v} ==")
+
+    def test_batch_evaluation_uses_one_snapshot(self):
+        results = evaluate_conditions(["${a} == 1", None, "${a} > 1"], {"a": 1})
+        assert results == [True, True, False]
+
+
+class TestConditionalExecution:
+
+    @pytest.mark.asyncio
+    async def test_conditional_plan_skips_false_branches(self, execution_service_factory):
+        service = execution_service_factory(AsyncMock(
+            return_value=AgentExecutionResult(success=True, data={"score": 80})
+        ))
+
+        def step(step_id, condition=None, depends_on=None):
+            return ExecutionStep(
+                step_id=step_id, agent_id="sa-test", capability_name="run",
+                input_data={}, condition=condition, depends_on=depends_on or []
+            )
+
+        plan = ExecutionPlan(
+            plan_id="plan-1",
+            name="Plan",
+            description="",
+            steps=[
+                step("score"),
+                step("high", "${score} >= 50", ["score"]),
+                step("low", "${score} < 50", ["score"]),
+                step("notify", None, ["high"]),
+            ],
+            strategy=ExecutionStrategy.CONDITIONAL
+        )
+        execution = MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan)
+
+        await service._execute_plan_async(execution)
+
+        assert plan.get_step("high").status == StepStatus.COMPLETED
+        assert plan.get_step("low").status == StepStatus.SKIPPED
+        assert plan.get_step("notify").status == StepStatus.COMPLETED
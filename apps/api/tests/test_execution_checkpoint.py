@@ -0,0 +1,132 @@
+"""
+Tests for checkpointed execution resume
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from app.agents.base_agent import AgentExecutionResult
+from app.domain.execution import (
+    ExecutionPlan, ExecutionStatus, ExecutionStep, ExecutionStrategy, FailureHandling,
+    MultiAgentExecution, StepStatus
+)
+
+
+def build_execution(strategy=ExecutionStrategy.SEQUENTIAL, failure_handling=FailureHandling.STOP_ON_FAILURE):
+    steps = [
+        ExecutionStep(step_id="fetch", agent_id="sa-test", capability_name="fetch", input_data={}),
+        ExecutionStep(step_id="send", agent_id="sa-test", capability_name="send", input_data={}, depends_on=["fetch"]),
+        ExecutionStep(step_id="log", agent_id="sa-test", capability_name="log", input_data={}, depends_on=["send"]),
+    ]
+    plan = ExecutionPlan(
+        plan_id="plan-1", name="Plan", description="", steps=steps,
+        strategy=strategy, failure_handling=failure_handling
+    )
+    return MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan)
+
+
+def fail_at_send(execution):
+    """Estado restaurado do banco: fetch concluído, send falhou, log pulado"""
+    fetch, send, log = execution.plan.steps
+    fetch.start_execution()
+    fetch.complete_execution({"email_ids": [1, 2]})
+    execution.add_step_result("fetch", {"success": True, "data": {"email_ids": [1, 2]}})
+    send.start_execution()
+    send.fail_execution("SMTP indisponível")
+    log.skip_execution("Dependência 'send' não foi concluída")
+    execution.status = ExecutionStatus.FAILED
+    execution.error_message = "Passo 'send' falhou"
+
+
+@pytest.fixture
+def checkpoint_service_factory(execution_service_factory):
+    def make(execution, calls):
+        async def execute_capability(capability_name, input_data, user_id, credential_id=None):
+            calls.append((capability_name, dict(input_data)))
+            return AgentExecutionResult(success=True, data={f"{capability_name}_done": True})
+
+        repository = MagicMock()
+        repository.find_execution_by_id = AsyncMock(return_value=execution)
+        repository.load_payloads = AsyncMock(return_value=execution)
+        service = execution_service_factory(execute_capability, execution_repository=repository)
+        return service, service.state_writer
+
+    return make
+
+
+async def wait_finished(execution):
+    for _ in range(200):
+        if execution.is_finished():
+            return
+        await asyncio.sleep(0.01)
+
+
+class TestRestoreCheckpoint:
+
+    def test_keeps_completed_steps_and_resets_failed_branch(self):
+        execution = build_execution()
+        fail_at_send(execution)
+
+        resumed = execution.restore_checkpoint()
+
+        fetch, send, log = execution.plan.steps
+        assert resumed == ["send", "log"]
+        assert fetch.status == StepStatus.COMPLETED
+        assert fetch.output_data == {"email_ids": [1, 2]}
+        assert send.status == StepStatus.PENDING
+        assert send.attempts == 1  # histórico de tentativas preservado
+        assert send.error_message is None
+        assert log.status == StepStatus.PENDING
+        assert execution.status == ExecutionStatus.PENDING
+        assert execution.error_message is None
+
+    def test_recovery_without_retry_keeps_failed_steps(self):
+        execution = build_execution()
+        fail_at_send(execution)
+
+        assert execution.restore_checkpoint(retry_failed=False) == []
+        assert execution.plan.get_step("send").status == StepStatus.FAILED
+
+
+class TestResumeExecution:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("strategy", [
+        ExecutionStrategy.SEQUENTIAL, ExecutionStrategy.PARALLEL, ExecutionStrategy.PIPELINE
+    ])
+    async def test_resume_skips_checkpointed_steps(self, checkpoint_service_factory, strategy):
+        execution = build_execution(strategy)
+        fail_at_send(execution)
+        calls = []
+        service, _ = checkpoint_service_factory(execution, calls)
+
+        assert await service.resume_execution(execution.execution_id, execution.user_id) is True
+        await wait_finished(execution)
+
+        assert execution.status == ExecutionStatus.COMPLETED
+        assert [name for name, _ in calls] == ["send", "log"]
+        if strategy == ExecutionStrategy.PIPELINE:
+            # Contexto reconstruído a partir do output com checkpoint
+            assert calls[0][1]["email_ids"] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_completed_steps_are_flushed_immediately(self, checkpoint_service_factory):
+        execution = build_execution()
+        calls = []
+        service, writer = checkpoint_service_factory(execution, calls)
+        execution.status = ExecutionStatus.RUNNING
+
+        await service._execute_step(execution, execution.plan.get_step("fetch"))
+
+        writer.flush.assert_awaited_with(execution, force=True)
+        writer.mark_dirty.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_running_execution_owned_by_this_process_is_not_restarted(self, checkpoint_service_factory):
+        execution = build_execution()
+        execution.status = ExecutionStatus.RUNNING
+        service, _ = checkpoint_service_factory(execution, [])
+        service._active_executions[execution.execution_id] = execution
+
+        assert await service.resume_execution(execution.execution_id, execution.user_id) is False
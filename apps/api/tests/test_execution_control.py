@@ -0,0 +1,131 @@
+"""
+Tests for event-driven pause/resume/cancel of multi-agent executions
+"""
+import asyncio
+import pytest
+from uuid import uuid4
+
+from app.agents.base_agent import AgentExecutionResult
+from app.domain.execution import (
+    ExecutionPlan, ExecutionStep, ExecutionStrategy, ExecutionStatus,
+    MultiAgentExecution, StepStatus
+)
+from app.services.execution_control import ExecutionControl, ExecutionCancelledError
+
+
+def make_execution(strategy=ExecutionStrategy.SEQUENTIAL, step_count=2):
+    steps = [
+        ExecutionStep(
+            step_id=f"s{i}",
+            agent_id="sa-test",
+            capability_name="run",
+            input_data={},
+            timeout_seconds=60
+        )
+        for i in range(step_count)
+    ]
+    plan = ExecutionPlan(
+        plan_id="plan-1",
+        name="Plan",
+        description="",
+        steps=steps,
+        strategy=strategy,
+        max_parallel_steps=step_count
+    )
+    return MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan)
+
+
+async def wait_until(predicate, timeout=1.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condition not reached"
+        await asyncio.sleep(0.005)
+
+
+class TestExecutionControl:
+
+    @pytest.mark.asyncio
+    async def test_cancel_interrupts_in_flight_call(self):
+        execution = make_execution()
+        execution.start()
+        control = ExecutionControl(execution)
+
+        call = asyncio.create_task(control.run(asyncio.sleep(10)))
+        await asyncio.sleep(0)
+
+        execution.cancel()
+        control.sync()
+
+        with pytest.raises(ExecutionCancelledError):
+            await asyncio.wait_for(call, timeout=0.5)
+
+    @pytest.mark.asyncio
+    async def test_resume_wakes_waiter_without_polling(self):
+        execution = make_execution()
+        execution.start()
+        execution.pause()
+        control = ExecutionControl(execution)
+
+        waiter = asyncio.create_task(control.wait_if_paused())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        execution.resume()
+        control.sync()
+        await asyncio.wait_for(waiter, timeout=0.05)
+
+
+class TestServiceControl:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("strategy", [ExecutionStrategy.SEQUENTIAL, ExecutionStrategy.PARALLEL])
+    async def test_cancel_releases_running_execution(self, execution_service_factory, strategy):
+        started = asyncio.Event()
+
+        async def hang(**kwargs):
+            started.set()
+            await asyncio.sleep(60)
+
+        service = execution_service_factory(hang)
+        execution = make_execution(strategy)
+        service._active_executions[execution.execution_id] = execution
+
+        runner = asyncio.create_task(service._execute_plan_async(execution))
+        await asyncio.wait_for(started.wait(), timeout=1)
+
+        assert await service.cancel_execution(execution.execution_id, execution.user_id)
+        await asyncio.wait_for(runner, timeout=0.5)
+
+        assert execution.status == ExecutionStatus.CANCELLED
+        assert all(step.status != StepStatus.RUNNING for step in execution.plan.steps)
+        assert service.execution_scheduler.active == 0
+
+    @pytest.mark.asyncio
+    async def test_pause_holds_next_step_until_resume(self, execution_service_factory):
+        release_first = asyncio.Event()
+        calls = []
+
+        async def run(**kwargs):
+            calls.append(len(calls))
+            if len(calls) == 1:
+                await release_first.wait()
+            return AgentExecutionResult(success=True, data={})
+
+        service = execution_service_factory(run)
+        execution = make_execution()
+        service._active_executions[execution.execution_id] = execution
+
+        runner = asyncio.create_task(service._execute_plan_async(execution))
+        await wait_until(lambda: calls)
+
+        assert await service.pause_execution(execution.execution_id, execution.user_id)
+        release_first.set()
+        await asyncio.sleep(0.05)
+        assert len(calls) == 1
+
+        assert await service.resume_execution(execution.execution_id, execution.user_id)
+        await asyncio.wait_for(runner, timeout=0.5)
+
+        assert len(calls) == 2
+        assert execution.status == ExecutionStatus.COMPLETED
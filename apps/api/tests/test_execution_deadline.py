@@ -0,0 +1,126 @@
+"""
+Tests for execution-wide deadline propagation
+"""
+import asyncio
+import time
+import httpx
+import pytest
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from app.agents.base_agent import AgentExecutionResult
+from app.core.deadline import (
+    Deadline, DeadlineExceededError, apply_deadline_to_request,
+    deadline_allows, deadline_scope, effective_timeout
+)
+from app.domain.execution import (
+    ExecutionPlan, ExecutionStatus, ExecutionStep, FailureHandling, MultiAgentExecution, StepStatus
+)
+from app.services.execution_control import ExecutionControl
+
+
+def make_execution(timeout_seconds, failure_handling=FailureHandling.STOP_ON_FAILURE, retry_delay_seconds=0):
+    steps = [
+        ExecutionStep(
+            step_id=f"s{i}", agent_id="sa-test", capability_name="run", input_data={},
+            timeout_seconds=60, retry_count=2, retry_delay_seconds=retry_delay_seconds
+        )
+        for i in range(2)
+    ]
+    plan = ExecutionPlan(
+        plan_id="plan-1", name="Plan", description="", steps=steps,
+        failure_handling=failure_handling, timeout_minutes=timeout_seconds / 60
+    )
+    return MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan)
+
+
+class TestDeadline:
+
+    def test_timeout_is_bounded_by_remaining_budget(self):
+        with deadline_scope(Deadline.after(0.5)):
+            assert effective_timeout(30) <= 0.5
+            assert effective_timeout(0.1) == 0.1
+            assert not deadline_allows(5)
+
+        assert effective_timeout(30) == 30
+        assert deadline_allows(5)
+
+    def test_inner_scope_cannot_extend_outer_deadline(self):
+        outer = Deadline.after(1)
+        with deadline_scope(outer):
+            with deadline_scope(Deadline.after(60)) as inner:
+                assert inner is outer
+
+    def test_expired_deadline_raises(self):
+        with deadline_scope(Deadline(time.monotonic() - 1)):
+            with pytest.raises(DeadlineExceededError):
+                effective_timeout(30)
+
+    @pytest.mark.asyncio
+    async def test_http_hook_clamps_request_timeouts(self):
+        request = httpx.Request("GET", "https://example.com", extensions={
+            "timeout": httpx.Timeout(30.0, connect=0.2).as_dict()
+        })
+        with deadline_scope(Deadline.after(1)):
+            await apply_deadline_to_request(request)
+
+        timeouts = request.extensions["timeout"]
+        assert timeouts["connect"] == 0.2
+        assert 0 < timeouts["read"] <= 1
+
+    @pytest.mark.asyncio
+    async def test_pause_does_not_consume_deadline(self):
+        execution = make_execution(timeout_seconds=60)
+        execution.start()
+        deadline = Deadline.after(60)
+        control = ExecutionControl(execution, deadline)
+        expires_at = deadline.expires_at
+
+        execution.pause()
+        control.sync()
+        await asyncio.sleep(0.05)
+        execution.resume()
+        control.sync()
+
+        assert deadline.expires_at >= expires_at + 0.05
+
+
+class TestExecutionDeadline:
+
+    @pytest.mark.asyncio
+    async def test_plan_timeout_interrupts_runaway_step(self, execution_service_factory):
+        calls = []
+
+        async def execute_capability(**kwargs):
+            calls.append(kwargs)
+            await asyncio.sleep(10)
+
+        service = execution_service_factory(execute_capability)
+        execution = make_execution(timeout_seconds=0.1)
+
+        started = time.monotonic()
+        await service._execute_plan_async(execution)
+
+        assert time.monotonic() - started < 1
+        assert len(calls) == 1
+        assert execution.status == ExecutionStatus.FAILED
+        assert execution.plan.steps[0].error_message == "Prazo da execução excedido"
+        assert execution.plan.steps[1].status == StepStatus.PENDING
+
+    @pytest.mark.asyncio
+    async def test_retries_stop_when_budget_is_exhausted(self, execution_service_factory):
+        execute_capability = AsyncMock(return_value=AgentExecutionResult(success=False, error_message="boom"))
+        service = execution_service_factory(execute_capability)
+        execution = make_execution(
+            timeout_seconds=0.5,
+            failure_handling=FailureHandling.RETRY_ON_FAILURE,
+            retry_delay_seconds=5
+        )
+
+        started = time.monotonic()
+        await service._execute_plan_async(execution)
+
+        assert time.monotonic() - started < 1
+        # Um atraso de 5s não cabe no prazo: nenhum passo é repetido
+        assert execute_capability.await_count == 2
+        assert all(step.retry_attempts == 0 for step in execution.plan.steps)
@@ -0,0 +1,152 @@
+"""
+Tests for the bounded execution log buffer and paginated log reads
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from app.domain.execution import ExecutionPlan, ExecutionStep, MultiAgentExecution
+from app.domain.execution_log import HARD_LIMIT_FACTOR, ExecutionLogBuffer
+from app.services.execution_state_writer import ExecutionStateWriter
+
+
+def make_execution():
+    step = ExecutionStep(step_id="s0", agent_id="sa-test", capability_name="run", input_data={})
+    plan = ExecutionPlan(plan_id="p", name="Plan", description="", steps=[step])
+    return MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan)
+
+
+class TestExecutionLogBuffer:
+
+    def test_entries_are_kept_until_persisted(self):
+        buffer = ExecutionLogBuffer(capacity=3)
+        for i in range(6):
+            buffer.append("info", f"log {i}")
+
+        assert len(buffer) == 6
+        assert [entry.seq for entry in buffer.unpersisted()] == list(range(6))
+
+        buffer.mark_persisted(6)
+
+        assert len(buffer) == 3
+        assert buffer.first_seq == 3
+        assert buffer.unpersisted() == []
+
+    def test_hard_limit_drops_oldest_unpersisted_entries(self):
+        buffer = ExecutionLogBuffer(capacity=2)
+        total = 2 * HARD_LIMIT_FACTOR + 3
+        for i in range(total):
+            buffer.append("info", f"log {i}")
+
+        assert len(buffer) == 2 * HARD_LIMIT_FACTOR
+        assert buffer.dropped == 3
+        assert buffer.unpersisted()[0].seq == 3
+
+    def test_page_and_tail(self):
+        buffer = ExecutionLogBuffer(capacity=4)
+        for i in range(4):
+            buffer.append("info", f"log {i}", metadata={"i": i} if i == 0 else None)
+
+        page = buffer.page(after_seq=0, limit=2)
+        assert [entry["seq"] for entry in page] == [1, 2]
+        assert page[0]["metadata"] == {}
+        assert [entry["message"] for entry in buffer.tail(2)] == ["log 2", "log 3"]
+
+    def test_restore_continues_sequence(self):
+        source = ExecutionLogBuffer()
+        source.append("info", "a")
+        source.append("error", "b", step_id="s0")
+
+        restored = ExecutionLogBuffer()
+        restored.restore(source.tail())
+        restored.append("info", "c")
+
+        assert restored.unpersisted()[0].seq == 2
+        assert restored.tail()[1]["timestamp"] == source.tail()[1]["timestamp"]
+
+    def test_execution_logs_property_is_bounded(self):
+        execution = make_execution()
+        execution.logs = ExecutionLogBuffer(capacity=5)
+        for i in range(20):
+            execution.add_log("info", f"log {i}")
+        execution.logs.mark_persisted(execution.logs.next_seq)
+
+        assert len(execution.execution_logs) == 5
+        assert execution.execution_logs[-1]["message"] == "log 19"
+
+
+class TestLogSpill:
+
+    @pytest.mark.asyncio
+    async def test_writer_spills_and_trims_buffer(self):
+        repository = AsyncMock()
+        repository.save_execution.side_effect = lambda execution: execution
+        execution = make_execution()
+        execution.logs = ExecutionLogBuffer(capacity=3)
+
+        writer = ExecutionStateWriter(repository, flush_interval_seconds=60, delta_mode=True)
+        await writer.create(execution)
+        for i in range(10):
+            execution.add_log("info", f"log {i}")
+        await writer.flush(execution, force=True)
+
+        logs, start_seq = repository.append_log_deltas.await_args.args[1:]
+        assert start_seq == 0
+        assert [entry["seq"] for entry in logs] == list(range(10))
+        assert len(execution.logs) == 3
+
+    @pytest.mark.asyncio
+    async def test_full_mode_writes_only_tail_in_row(self):
+        repository = AsyncMock()
+        repository.save_execution.side_effect = lambda execution: execution
+        execution = make_execution()
+        execution.logs = ExecutionLogBuffer(capacity=2)
+
+        writer = ExecutionStateWriter(repository, flush_interval_seconds=60, delta_mode=False)
+        await writer.create(execution)
+        for i in range(5):
+            execution.add_log("info", f"log {i}")
+        await writer.flush(execution, force=True)
+
+        assert [entry["seq"] for entry in repository.append_log_deltas.await_args.args[1]] == list(range(5))
+        assert len(execution.execution_logs) == 2
+
+
+class TestPaginatedLogReads:
+
+    @pytest.mark.asyncio
+    async def test_active_execution_reads_from_buffer(self, execution_service_factory):
+        execution = make_execution()
+        repository = MagicMock()
+        repository.find_execution_logs = AsyncMock()
+        service = execution_service_factory(execution_repository=repository)
+        service._active_executions[execution.execution_id] = execution
+        service.get_execution_by_id = AsyncMock(return_value=execution)
+        for i in range(4):
+            execution.add_log("info", f"log {i}")
+
+        logs = await service.get_execution_logs(execution.execution_id, execution.user_id, after_seq=1, limit=2)
+
+        assert [entry["seq"] for entry in logs] == [2, 3]
+        repository.find_execution_logs.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_evicted_entries_come_from_store_and_pending_from_buffer(self, execution_service_factory):
+        execution = make_execution()
+        execution.logs = ExecutionLogBuffer(capacity=2)
+        for i in range(6):
+            execution.add_log("info", f"log {i}")
+        execution.logs.mark_persisted(4)
+
+        repository = MagicMock()
+        repository.find_execution_logs = AsyncMock(return_value=[
+            {"seq": seq, "level": "info", "message": f"log {seq}"} for seq in range(4)
+        ])
+        service = execution_service_factory(execution_repository=repository)
+        service._active_executions[execution.execution_id] = execution
+        service.get_execution_by_id = AsyncMock(return_value=execution)
+
+        logs = await service.get_execution_logs(execution.execution_id, execution.user_id, limit=10)
+
+        assert [entry["seq"] for entry in logs] == list(range(6))
+        repository.find_execution_logs.assert_awaited_once_with(execution.execution_id, -1, 10, None)
@@ -0,0 +1,251 @@
+"""
+Tests for the Redis-backed execution queue and its workers
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from fakeredis import aioredis
+
+from app.services.execution_queue import ExecutionQueue
+from app.services.execution_worker import ExecutionWorker
+
+
+@pytest.fixture
+def queue():
+    return ExecutionQueue(
+        redis_client=aioredis.FakeRedis(decode_responses=True),
+        namespace=f"test:{uuid4().hex}",
+        visibility_timeout_seconds=30,
+        max_attempts=2,
+        retry_backoff_seconds=0.05
+    )
+
+
+class TestExecutionQueue:
+
+    @pytest.mark.asyncio
+    async def test_claim_is_fifo_and_leases_execution(self, queue):
+        first, second = uuid4(), uuid4()
+        await queue.enqueue(first, {"user_id": "u1"})
+        await queue.enqueue(second)
+
+        lease = await queue.claim("worker-a")
+
+        assert lease.execution_id == first
+        assert lease.attempt == 1
+        assert lease.payload == {"user_id": "u1"}
+        assert await queue.get_stats() == {"pending": 1, "leased": 1, "delayed": 0, "dead_letter": 0}
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_and_ack_require_lease_owner(self, queue):
+        await queue.enqueue(uuid4())
+        lease = await queue.claim("worker-a")
+
+        assert await queue.heartbeat(lease)
+
+        lease.worker_id = "worker-b"
+        assert not await queue.heartbeat(lease)
+        assert not await queue.ack(lease)
+
+        lease.worker_id = "worker-a"
+        assert await queue.ack(lease)
+        assert await queue.get_stats() == {"pending": 0, "leased": 0, "delayed": 0, "dead_letter": 0}
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_requeued_then_dead_lettered(self, queue):
+        execution_id = uuid4()
+        await queue.enqueue(execution_id)
+
+        # Worker "morre" sem heartbeat: o lease vence e volta para a fila
+        lease = await queue.claim("worker-a")
+        assert await queue.requeue_expired(now=time.time() + 60) == [execution_id]
+
+        retry = await queue.claim("worker-b")
+        assert retry.execution_id == execution_id
+        assert retry.attempt == 2
+        assert not await queue.heartbeat(lease)
+
+        # Esgotou max_attempts: vai para a dead-letter
+        assert await queue.requeue_expired(now=time.time() + 60) == []
+        assert await queue.get_stats() == {"pending": 0, "leased": 0, "delayed": 0, "dead_letter": 1}
+
+
+class TestExecutionWorker:
+
+    @pytest.mark.asyncio
+    async def test_worker_processes_and_acks(self, queue):
+        execution_id = uuid4()
+        await queue.enqueue(execution_id)
+
+        service = MagicMock()
+        service.run_queued_execution = AsyncMock()
+        worker = ExecutionWorker(queue, service, worker_id="worker-a", concurrency=2, poll_interval_seconds=0.01)
+
+        runner = asyncio.create_task(worker.run())
+        for _ in range(100):
+            if worker.stats["acked"]:
+                break
+            await asyncio.sleep(0.01)
+        worker.stop()
+        await runner
+
+        service.run_queued_execution.assert_awaited_once_with(execution_id)
+        assert worker.stats == {"claimed": 1, "acked": 1, "nacked": 0, "lost_leases": 0}
+        assert await queue.get_stats() == {"pending": 0, "leased": 0, "delayed": 0, "dead_letter": 0}
+
+    @pytest.mark.asyncio
+    async def test_failing_execution_backs_off_then_is_dead_lettered(self, queue):
+        execution_id = uuid4()
+        await queue.enqueue(execution_id)
+
+        service = MagicMock()
+        service.run_queued_execution = AsyncMock(side_effect=LookupError("execution row missing"))
+        worker = ExecutionWorker(queue, service, worker_id="worker-a", poll_interval_seconds=0.01)
+
+        runner = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.02)
+        # Após o primeiro nack a execução fica adiada, não volta direto para a fila
+        assert (await queue.get_stats())["delayed"] == 1
+        assert service.run_queued_execution.await_count == 1
+
+        for _ in range(100):
+            if (await queue.get_stats())["dead_letter"]:
+                break
+            await asyncio.sleep(0.01)
+        worker.stop()
+        await runner
+
+        assert service.run_queued_execution.await_count == 2
+        assert worker.stats["nacked"] == 2
+        assert await queue.get_stats() == {"pending": 0, "leased": 0, "delayed": 0, "dead_letter": 1}
+
+    @pytest.mark.asyncio
+    async def test_lost_lease_cancels_local_execution(self, queue):
+        await queue.enqueue(uuid4())
+        lease = await queue.claim("worker-a")
+
+        cancelled = asyncio.Event()
+
+        async def run_forever(execution_id):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        service = MagicMock()
+        service.run_queued_execution = run_forever
+        service.sync_control_state = AsyncMock()
+        worker = ExecutionWorker(queue, service, worker_id="worker-a", heartbeat_interval_seconds=0.01)
+
+        # Outro worker assume o lease após expiração
+        await queue.requeue_expired(now=time.time() + 60)
+        await queue.claim("worker-b")
+
+        await worker._process(lease)
+
+        assert cancelled.is_set()
+        service.abandon_execution.assert_called_once_with(lease.execution_id)
+        assert worker.stats["lost_leases"] == 1
+        assert worker.stats["acked"] == 0
+
+
+@pytest.fixture
+def recovery_service_factory(execution_service_factory):
+    def make(execution, execute_capability):
+        repo = MagicMock()
+        repo.find_execution_by_id = AsyncMock(return_value=execution)
+        repo.load_payloads = AsyncMock(return_value=execution)
+        service = execution_service_factory(execute_capability, execution_repository=repo)
+        return service, service.agent_registry.get_agent.return_value, service.state_writer
+
+    return make
+
+
+def make_recovered_execution():
+    from app.domain.execution import ExecutionPlan, ExecutionStep, ExecutionStrategy, MultiAgentExecution
+
+    plan = ExecutionPlan(
+        plan_id="plan-1",
+        name="Plan",
+        description="",
+        steps=[
+            ExecutionStep(step_id="a", agent_id="sa-test", capability_name="run", input_data={}),
+            ExecutionStep(step_id="b", agent_id="sa-test", capability_name="run", input_data={}, depends_on=["a"]),
+        ],
+        strategy=ExecutionStrategy.SEQUENTIAL
+    )
+    execution = MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan)
+    execution.start()
+    plan.get_step("a").start_execution()
+    plan.get_step("a").complete_execution({"done": True})
+    plan.get_step("b").start_execution()
+    return execution
+
+
+class TestQueuedExecutionRecovery:
+
+    @pytest.mark.asyncio
+    async def test_orphaned_steps_are_reset_and_rerun(self, recovery_service_factory):
+        from app.agents.base_agent import AgentExecutionResult
+        from app.domain.execution import ExecutionStatus, StepStatus
+
+        execution = make_recovered_execution()
+        plan = execution.plan
+        service, agent, writer = recovery_service_factory(
+            execution, AsyncMock(return_value=AgentExecutionResult(success=True, data={"ok": True}))
+        )
+
+        await service.run_queued_execution(execution.execution_id)
+
+        assert execution.status == ExecutionStatus.COMPLETED
+        assert plan.get_step("b").status == StepStatus.COMPLETED
+        assert agent.execute_capability.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_paused_execution_stays_paused_after_recovery(self, recovery_service_factory):
+        from app.agents.base_agent import AgentExecutionResult
+        from app.domain.execution import ExecutionStatus
+
+        execution = make_recovered_execution()
+        execution.pause()
+        service, agent, writer = recovery_service_factory(
+            execution, AsyncMock(return_value=AgentExecutionResult(success=True, data={"ok": True}))
+        )
+
+        run = asyncio.create_task(service.run_queued_execution(execution.execution_id))
+        await asyncio.sleep(0.05)
+
+        assert execution.status == ExecutionStatus.PAUSED
+        assert agent.execute_capability.await_count == 0
+
+        execution.resume()
+        service._signal_control(execution)
+        await asyncio.wait_for(run, timeout=1)
+
+        assert execution.status == ExecutionStatus.COMPLETED
+        assert agent.execute_capability.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_lost_lease_skips_final_flush(self, recovery_service_factory):
+        execution = make_recovered_execution()
+        started = asyncio.Event()
+
+        async def run_forever(*args, **kwargs):
+            started.set()
+            await asyncio.sleep(10)
+
+        service, agent, writer = recovery_service_factory(execution, run_forever)
+
+        run = asyncio.create_task(service.run_queued_execution(execution.execution_id))
+        await asyncio.wait_for(started.wait(), timeout=1)
+        service.abandon_execution(execution.execution_id)
+        run.cancel()
+        await asyncio.gather(run, return_exceptions=True)
+
+        writer.close.assert_not_awaited()
+        writer.discard.assert_awaited_once_with(execution)
+        assert execution.execution_id not in service._abandoned
@@ -0,0 +1,141 @@
+"""
+Tests for priority classes and weighted fair admission of executions
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from app.domain.execution import (
+    ExecutionPlan, ExecutionPriority, ExecutionStep, MultiAgentExecution
+)
+from app.services.execution_scheduler import ExecutionScheduler
+
+
+WEIGHTS = {"interactive": 8, "standard": 3, "bulk": 1}
+
+
+async def admit_in_order(scheduler, requests):
+    """Occupy the only slot, queue ``requests`` and return the admission order"""
+    order = []
+    await scheduler.acquire("standard", "blocker")
+
+    async def run(priority, tenant, label):
+        async with scheduler.slot(priority, tenant):
+            order.append(label)
+            await asyncio.sleep(0)
+
+    tasks = [asyncio.create_task(run(*request)) for request in requests]
+    await asyncio.sleep(0)
+    scheduler.release("standard")
+    await asyncio.gather(*tasks)
+    return order
+
+
+class TestExecutionScheduler:
+
+    @pytest.mark.asyncio
+    async def test_interactive_overtakes_queued_bulk(self):
+        scheduler = ExecutionScheduler(capacity=1, weights=WEIGHTS, max_share={})
+        requests = [("bulk", "tenant-a", f"bulk-{i}") for i in range(5)]
+        requests.append(("interactive", "tenant-b", "interactive"))
+
+        order = await admit_in_order(scheduler, requests)
+
+        assert order.index("interactive") <= 1
+
+    @pytest.mark.asyncio
+    async def test_tenants_in_same_class_are_interleaved(self):
+        scheduler = ExecutionScheduler(capacity=1, weights=WEIGHTS, max_share={})
+        requests = [("bulk", "tenant-a", f"a{i}") for i in range(4)]
+        requests += [("bulk", "tenant-b", f"b{i}") for i in range(2)]
+
+        order = await admit_in_order(scheduler, requests)
+
+        # tenant-b não espera o lote inteiro de tenant-a
+        assert order[:4] in (["a0", "b0", "a1", "b1"], ["b0", "a0", "b1", "a1"])
+
+    @pytest.mark.asyncio
+    async def test_class_share_keeps_slots_for_interactive(self):
+        scheduler = ExecutionScheduler(capacity=4, weights=WEIGHTS, max_share={"bulk": 0.5})
+        release = asyncio.Event()
+        admitted = []
+
+        async def run(priority, label):
+            async with scheduler.slot(priority, "tenant"):
+                admitted.append(label)
+                await release.wait()
+
+        tasks = [asyncio.create_task(run("bulk", f"bulk-{i}")) for i in range(4)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(run("interactive", "interactive")))
+        await asyncio.sleep(0)
+
+        assert admitted == ["bulk-0", "bulk-1", "interactive"]
+
+        release.set()
+        await asyncio.gather(*tasks)
+        metrics = scheduler.get_metrics()
+        assert metrics["active"] == 0
+        assert metrics["classes"]["bulk"]["admitted"] == 4
+        assert metrics["classes"]["bulk"]["queued"] == 2
+        assert metrics["classes"]["interactive"]["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_releases_its_place(self):
+        scheduler = ExecutionScheduler(capacity=1, weights=WEIGHTS, max_share={})
+        await scheduler.acquire("standard", "t1")
+
+        waiter = asyncio.create_task(scheduler.acquire("standard", "t2"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        scheduler.release("standard")
+
+        assert await asyncio.wait_for(scheduler.acquire("bulk", "t3"), timeout=0.5) >= 0
+        assert scheduler.get_metrics()["waiting"] == 0
+
+
+class TestServiceAdmission:
+
+    @staticmethod
+    def make_execution(priority=ExecutionPriority.INTERACTIVE):
+        step = ExecutionStep(step_id="s0", agent_id="sa-test", capability_name="run", input_data={})
+        plan = ExecutionPlan(
+            plan_id="p", name="Plan", description="", steps=[step],
+            priority=priority, metadata={"tenant_id": "acme"}
+        )
+        return MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan)
+
+    @pytest.mark.asyncio
+    async def test_execution_records_queue_wait_and_uses_plan_priority(self, execution_service_factory):
+        scheduler = ExecutionScheduler(capacity=2, weights=WEIGHTS, max_share={})
+        service = execution_service_factory(execution_scheduler=scheduler)
+        execution = self.make_execution()
+
+        await service._execute_plan_async(execution)
+
+        assert "queue_wait_ms" in execution.metrics
+        assert scheduler.get_metrics()["classes"]["interactive"]["admitted"] == 1
+        assert ExecutionPlan.from_dict(execution.plan.to_dict()).priority == ExecutionPriority.INTERACTIVE
+
+    @pytest.mark.asyncio
+    async def test_execution_cancelled_while_queued_is_not_started(self, execution_service_factory):
+        scheduler = ExecutionScheduler(capacity=1, weights=WEIGHTS, max_share={})
+        execute_capability = AsyncMock()
+        service = execution_service_factory(execute_capability, execution_scheduler=scheduler)
+        execution = self.make_execution()
+
+        await scheduler.acquire("standard", "blocker")
+        task = asyncio.create_task(service._execute_plan_async(execution))
+        await asyncio.sleep(0)
+        execution.cancel()
+        scheduler.release("standard")
+        await task
+
+        assert execution.is_cancelled()
+        assert execution.error_message is None
+        execute_capability.assert_not_awaited()
+        service.state_writer.close.assert_awaited_once_with(execution)
+        # O slot volta ao escalonador mesmo sem a execução ter começado
+        await asyncio.wait_for(scheduler.acquire("bulk", "other"), timeout=1)
@@ -0,0 +1,116 @@
+"""
+Tests for write-behind, delta-based execution persistence
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from app.domain.execution import (
+    ExecutionPlan, ExecutionStep, MultiAgentExecution, ExecutionStatus
+)
+from app.services.execution_state_writer import ExecutionStateWriter
+
+
+@pytest.fixture
+def repository():
+    repo = AsyncMock()
+    repo.save_execution.side_effect = lambda execution: execution
+    return repo
+
+
+@pytest.fixture
+def execution():
+    steps = [
+        ExecutionStep(step_id=f"s{i}", agent_id="sa-test", capability_name="run", input_data={"i": i})
+        for i in range(3)
+    ]
+    plan = ExecutionPlan(plan_id="p", name="Plan", description="", steps=steps)
+    return MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan)
+
+
+class TestExecutionStateWriter:
+
+    @pytest.mark.asyncio
+    async def test_full_row_written_once_then_only_deltas(self, repository, execution):
+        """Creation writes the whole row; later flushes append only new data"""
+        writer = ExecutionStateWriter(repository, flush_interval_seconds=60, delta_mode=True)
+        await writer.create(execution)
+
+        execution.start()
+        step = execution.plan.steps[0]
+        step.start_execution()
+        step.complete_execution({"ok": True})
+        execution.add_step_result(step.step_id, {"success": True, "data": {"ok": True}})
+        execution.add_log("info", "passo concluído", step.step_id)
+
+        await writer.flush(execution, force=True)
+
+        repository.save_execution.assert_awaited_once()
+        step_records = repository.append_step_deltas.await_args.args[1]
+        assert [record["step_id"] for record in step_records] == ["s0"]
+        assert "input_data" not in step_records[0]["state"]
+
+        logs, start_seq = repository.append_log_deltas.await_args.args[1:]
+        assert start_seq == 0
+        assert [entry["message"] for entry in logs] == ["Execução iniciada", "passo concluído"]
+
+        fields = repository.update_execution_fields.await_args.args[1]
+        assert fields["status"] == ExecutionStatus.RUNNING.value
+        assert "plan_data" not in fields
+
+    @pytest.mark.asyncio
+    async def test_unchanged_state_is_not_rewritten(self, repository, execution):
+        """A flush with nothing new issues no writes"""
+        writer = ExecutionStateWriter(repository, flush_interval_seconds=60, delta_mode=True)
+        await writer.create(execution)
+
+        await writer.flush(execution, force=True)
+
+        repository.append_step_deltas.assert_not_awaited()
+        repository.update_execution_fields.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_bursts_are_coalesced_into_one_flush(self, repository, execution):
+        """Many mark_dirty calls within the interval become a single flush"""
+        writer = ExecutionStateWriter(repository, flush_interval_seconds=0.05, delta_mode=True)
+        await writer.create(execution)
+        execution.start()
+
+        for i in range(20):
+            execution.add_log("info", f"linha {i}")
+            writer.mark_dirty(execution)
+
+        await asyncio.sleep(0.1)
+
+        assert repository.update_execution_fields.await_count == 1
+        assert writer.stats["coalesced_updates"] == 19
+        logs = repository.append_log_deltas.await_args.args[1]
+        assert len(logs) == 21
+
+    @pytest.mark.asyncio
+    async def test_close_forces_flush_of_terminal_state(self, repository, execution):
+        """Terminal states are flushed immediately, cancelling the pending timer"""
+        writer = ExecutionStateWriter(repository, flush_interval_seconds=60, delta_mode=True)
+        await writer.create(execution)
+        execution.start()
+        writer.mark_dirty(execution)
+        execution.complete()
+
+        await writer.close(execution)
+
+        fields = repository.update_execution_fields.await_args.args[1]
+        assert fields["status"] == ExecutionStatus.COMPLETED.value
+        assert repository.update_execution_fields.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_full_mode_saves_whole_row(self, repository, execution):
+        """Legacy full mode keeps upserting the whole execution"""
+        writer = ExecutionStateWriter(repository, flush_interval_seconds=60, delta_mode=False)
+        await writer.create(execution)
+        execution.start()
+
+        await writer.close(execution)
+
+        assert repository.save_execution.await_count == 2
+        repository.update_execution_fields.assert_not_awaited()
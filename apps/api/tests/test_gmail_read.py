@@ -0,0 +1,133 @@
+"""
+Tests for Gmail read_emails: concurrent detail fetch, metadata format and pageToken streaming
+"""
+import asyncio
+import base64
+import time
+import httpx
+import pytest
+from uuid import uuid4
+
+from app.agents.sa_gmail import GmailAgent
+
+class MockGmailServer:
+    """Gmail API local: messages.list paginado e messages.get com atraso artificial"""
+
+    def __init__(self, total, delay=0.02, unreachable=()):
+        self.ids = [f"m{i}" for i in range(total)]
+        self.delay = delay
+        self.unreachable = set(unreachable)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.list_calls = []
+        self.get_calls = []
+
+    async def __call__(self, request):
+        path = request.url.path
+        params = request.url.params
+        if path.endswith("/messages"):
+            self.list_calls.append(dict(params))
+            start = int(params.get("pageToken") or 0)
+            end = min(start + int(params["maxResults"]), len(self.ids))
+            body = {"messages": [{"id": mid, "threadId": f"t-{mid}"} for mid in self.ids[start:end]]}
+            if end < len(self.ids):
+                body["nextPageToken"] = str(end)
+            return httpx.Response(200, json=body)
+
+        message_id = path.rsplit("/", 1)[-1]
+        self.get_calls.append(params)
+        if message_id in self.unreachable:
+            raise httpx.ReadTimeout("timed out", request=request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        payload = {
+            "mimeType": "text/plain",
+            "headers": [{"name": "Subject", "value": f"Subject {message_id}"}, {"name": "To", "value": "a@x.com, b@x.com"}],
+            "body": {"data": base64.urlsafe_b64encode(f"body {message_id}".encode()).decode()}
+        }
+        return httpx.Response(200, json={"id": message_id, "threadId": f"t-{message_id}", "snippet": "hi", "payload": payload})
+
+
+@pytest.fixture
+def gmail(agent_factory):
+    return lambda server: agent_factory(GmailAgent, server, {"access_token": "token"})
+
+
+class TestGmailReadEmails:
+
+    @pytest.mark.asyncio
+    async def test_bodies_are_fetched_concurrently_in_list_order(self, gmail):
+        server = MockGmailServer(total=50, delay=0.02)
+        agent = gmail(server)
+        agent.FETCH_CONCURRENCY = 10
+
+        started = time.perf_counter()
+        result = await agent._read_emails({"max_results": 50, "include_body": True}, {"access_token": "token"})
+        elapsed = time.perf_counter() - started
+
+        assert result.success
+        assert [e["id"] for e in result.data["emails"]] == server.ids
+        assert result.data["emails"][0]["body"] == "body m0"
+        assert result.data["emails"][0]["to"] == ["a@x.com", "b@x.com"]
+        assert server.max_in_flight == 10
+        # Serial seria ~1s (50 x 20ms)
+        assert elapsed < 0.5
+        assert server.get_calls[0]["format"] == "full"
+
+    @pytest.mark.asyncio
+    async def test_metadata_format_requests_headers_only(self, gmail):
+        server = MockGmailServer(total=3, delay=0)
+        agent = gmail(server)
+
+        result = await agent._read_emails({"format": "metadata"}, {"access_token": "token"})
+
+        assert result.data["emails"][2] == {
+            "id": "m2", "thread_id": "t-m2", "subject": "Subject m2", "from": "",
+            "to": ["a@x.com", "b@x.com"], "date": "", "snippet": "hi"
+        }
+        params = server.get_calls[0]
+        assert params["format"] == "metadata"
+        assert params.get_list("metadataHeaders") == ["Subject", "From", "To", "Date"]
+        assert params["fields"] == "id,threadId,snippet,payload/headers"
+
+    @pytest.mark.asyncio
+    async def test_network_error_on_one_message_skips_only_that_message(self, gmail):
+        server = MockGmailServer(total=4, delay=0, unreachable={"m1"})
+        agent = gmail(server)
+
+        result = await agent._read_emails({"max_results": 4, "format": "metadata"}, {"access_token": "token"})
+
+        assert result.success
+        assert [e["id"] for e in result.data["emails"]] == ["m0", "m2", "m3"]
+
+    @pytest.mark.asyncio
+    async def test_list_follows_page_tokens_up_to_max_results(self, gmail):
+        server = MockGmailServer(total=12, delay=0)
+        agent = gmail(server)
+        agent.LIST_PAGE_SIZE = 5
+
+        result = await agent._read_emails({"max_results": 7}, {"access_token": "token"})
+
+        assert [e["id"] for e in result.data["emails"]] == server.ids[:7]
+        assert [call["maxResults"] for call in server.list_calls] == ["5", "2"]
+        assert result.data["next_page_token"] == "7"
+        assert server.get_calls == []
+
+    @pytest.mark.asyncio
+    async def test_stream_capability_iterates_the_whole_mailbox(self, gmail):
+        server = MockGmailServer(total=23, delay=0)
+        agent = gmail(server)
+
+        streamed = [
+            email_info async for email_info in agent.stream_capability(
+                "read_emails", {"format": "metadata", "page_size": 10}, uuid4()
+            )
+        ]
+
+        assert [e["id"] for e in streamed] == server.ids
+        assert [call.get("pageToken") for call in server.list_calls] == [None, "10", "20"]
+        assert agent.get_user_credential.await_count == 3
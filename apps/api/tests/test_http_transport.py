@@ -0,0 +1,106 @@
+"""
+Tests for the shared outbound HTTP transport
+"""
+import asyncio
+import httpx
+import pytest
+
+from app.infra.http_transport import HttpTransportManager
+
+pytestmark = pytest.mark.usefixtures("real_http_client")
+
+
+class RecordingTransport(httpx.MockTransport):
+    def __init__(self, handler):
+        super().__init__(handler)
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+def ok(request):
+    return httpx.Response(200 if request.url.path != "/fail" else 503, json={"path": request.url.path})
+
+
+class TestHttpTransportManager:
+
+    @pytest.mark.asyncio
+    async def test_clients_share_the_pool_and_closing_one_keeps_it_open(self):
+        inner = RecordingTransport(ok)
+        manager = HttpTransportManager(transport=inner)
+
+        first = manager.client(base_url="https://api.example.com", headers={"X-Agent": "a"})
+        second = manager.client()
+        assert (await first.get("/ok")).json() == {"path": "/ok"}
+        await first.aclose()
+
+        response = await second.get("https://api.example.com/fail")
+
+        assert response.status_code == 503
+        assert not inner.closed
+        host = manager.get_metrics()["hosts"]["api.example.com"]
+        assert host["requests"] == 2
+        assert host["errors"] == 1
+        assert host["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_per_host_limit_queues_only_that_host(self):
+        release = asyncio.Event()
+
+        async def body():
+            yield b"chunk"
+
+        async def handler(request):
+            if request.url.host == "slow.example.com":
+                await release.wait()
+                # Corpo em streaming: a vaga só volta quando a resposta é lida/fechada
+                return httpx.Response(200, content=body())
+            return httpx.Response(200)
+
+        manager = HttpTransportManager(transport=httpx.MockTransport(handler), max_connections_per_host=1)
+        client = manager.client()
+
+        first = asyncio.create_task(client.get("https://slow.example.com/a"))
+        second = asyncio.create_task(client.get("https://slow.example.com/b"))
+        await asyncio.sleep(0.05)
+
+        # Outro host não espera pela vaga do host lento
+        assert (await client.get("https://fast.example.com/")).status_code == 200
+        assert manager.get_metrics()["hosts"]["slow.example.com"]["in_flight"] == 1
+
+        release.set()
+        await asyncio.gather(first, second)
+        slow = manager.get_metrics()["hosts"]["slow.example.com"]
+        assert slow["requests"] == 2
+        assert slow["max_pool_wait_ms"] >= 40
+
+    @pytest.mark.asyncio
+    async def test_shutdown_drains_in_flight_requests(self):
+        release = asyncio.Event()
+
+        async def handler(request):
+            await release.wait()
+            return httpx.Response(200)
+
+        inner = RecordingTransport(handler)
+        manager = HttpTransportManager(transport=inner)
+        client = manager.client()
+
+        pending = asyncio.create_task(client.get("https://api.example.com/"))
+        await asyncio.sleep(0)
+        closing = asyncio.create_task(manager.aclose(drain_timeout=1))
+        await asyncio.sleep(0.01)
+
+        assert not inner.closed
+        with pytest.raises(httpx.ConnectError):
+            await client.get("https://api.example.com/new")
+
+        release.set()
+        assert (await pending).status_code == 200
+        await closing
+        assert inner.closed
+        assert manager.get_metrics()["draining"] is False
+
+        manager._transport = httpx.MockTransport(ok)
+        assert (await client.get("https://api.example.com/again")).status_code == 200
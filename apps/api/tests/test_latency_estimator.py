@@ -0,0 +1,153 @@
+"""
+Tests for the historical-latency plan estimator
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from app.domain.execution import ExecutionPlan, ExecutionStep, ExecutionStrategy
+from app.domain.orchestrator import Workflow, WorkflowConfig, WorkflowStep, ExecutionStrategy as WorkflowStrategy
+from app.services.latency_estimator import LatencyEstimator, LatencyStats
+from app.services.orchestrator_service import OrchestratorService
+
+
+def make_collector(series):
+    """Fake MetricsCollector: ``series`` maps frozenset(tags) -> values"""
+    async def get_metric_values(metric_name, start_time, end_time, tags=None, limit=None):
+        return list(series.get(frozenset(tags.items()), []))
+
+    collector = MagicMock()
+    collector.get_metric_values = AsyncMock(side_effect=get_metric_values)
+    return collector
+
+
+def capability_series(agent_id, capability, values):
+    return {frozenset({"agent_id": agent_id, "capability": capability}.items()): values}
+
+
+def make_step(step_id, agent_id, depends_on=None, timeout_seconds=300):
+    return ExecutionStep(
+        step_id=step_id, agent_id=agent_id, capability_name="run", input_data={},
+        depends_on=depends_on, timeout_seconds=timeout_seconds
+    )
+
+
+class TestLatencyEstimator:
+
+    def test_percentiles(self):
+        stats = LatencyStats.from_values(range(1, 101))
+
+        assert stats.samples == 100
+        assert stats.p50_ms == 51
+        assert stats.p95_ms == 96
+
+    @pytest.mark.asyncio
+    async def test_estimate_follows_critical_path_with_history(self):
+        series = {}
+        series.update(capability_series("fetch", "run", [1000] * 10))
+        series.update(capability_series("slow", "run", [20000] * 9 + [60000]))
+        series.update(capability_series("fast", "run", [500] * 10))
+        estimator = LatencyEstimator(metrics_collector=make_collector(series), min_samples=5)
+
+        steps = [
+            make_step("a", "fetch"),
+            make_step("b", "slow", ["a"]),
+            make_step("c", "fast", ["a"]),
+            make_step("d", "unknown", ["b", "c"], timeout_seconds=2)
+        ]
+        estimate = await estimator.estimate(steps, capability_of=lambda step: step.capability_name)
+
+        assert estimate["critical_path"] == ["a", "b", "d"]
+        assert estimate["p50_seconds"] == 23.0
+        assert estimate["p95_seconds"] == 63.0
+        assert estimate["steps"]["d"]["source"] == "timeout"
+        assert estimate["steps"]["b"]["samples"] == 10
+
+    @pytest.mark.asyncio
+    async def test_stats_are_cached_and_fall_back_to_agent_series(self):
+        collector = make_collector({
+            frozenset({"agent_id": "mail", "success": "True"}.items()): [200] * 6
+        })
+        estimator = LatencyEstimator(metrics_collector=collector, min_samples=5, cache_ttl_seconds=60)
+
+        stats = await estimator.get_stats_many([("mail", "send"), ("mail", "send")])
+        await estimator.get_stats("mail", "send")
+
+        assert stats[("mail", "send")].p50_ms == 200
+        # Série por capacidade vazia + série do agente, uma única vez (cache)
+        assert collector.get_metric_values.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_agent_calls_are_recorded_per_capability(self, monkeypatch, execution_service_factory):
+        from app.agents.base_agent import AgentExecutionResult
+        from app.domain.execution import MultiAgentExecution
+        from app.services import execution_service as execution_service_module
+        from app.services.analytics_service import AnalyticsService
+
+        analytics = AnalyticsService()
+        analytics.metrics_collector.get_redis_client = AsyncMock(return_value=None)
+        monkeypatch.setattr(execution_service_module, "analytics_service", analytics)
+
+        service = execution_service_factory(AsyncMock(return_value=AgentExecutionResult(success=True, data={})))
+        agent = service.agent_registry.get_agent.return_value
+        step = make_step("a", "sa-test")
+        execution = MultiAgentExecution(
+            execution_id=uuid4(), user_id=uuid4(),
+            plan=ExecutionPlan(plan_id="p", name="Plan", description="", steps=[step])
+        )
+        for _ in range(3):
+            await service._call_agent(agent, execution, step, {})
+
+        estimator = LatencyEstimator(metrics_collector=analytics.metrics_collector, min_samples=3)
+        stats = await estimator.get_stats("sa-test", "run")
+
+        assert stats.samples == 3
+
+    def test_plan_estimate_uses_given_durations(self):
+        steps = [make_step("a", "x"), make_step("b", "x", ["a"]), make_step("c", "x", ["a"], timeout_seconds=10)]
+        plan = ExecutionPlan(plan_id="p", name="Plan", description="", steps=steps, strategy=ExecutionStrategy.PARALLEL)
+
+        assert plan.estimate_execution_time() == 600
+        assert plan.estimate_execution_time({"a": 1, "b": 2}) == 11
+
+
+class TestOrchestratorEstimates:
+
+    @pytest.mark.asyncio
+    async def test_plan_preview_uses_one_registry_lookup(self):
+        agent = MagicMock()
+        agent.policy.cost_per_execution = 0.5
+        registry = MagicMock()
+        registry.get_latest_agents = AsyncMock(return_value={"sa-email-basic": agent, "sa-whatsapp": agent})
+        registry.get_agent_by_id_and_version = AsyncMock()
+        estimator = LatencyEstimator(
+            metrics_collector=make_collector(capability_series("sa-email-basic", "send_email", [90000] * 5)),
+            min_samples=5
+        )
+        service = OrchestratorService(
+            orchestrator_repository=MagicMock(),
+            agent_registry_service=registry,
+            integration_service=MagicMock(),
+            runtime_registry=MagicMock(),
+            latency_estimator=estimator
+        )
+        workflow = Workflow(
+            user_id=uuid4(), name="wf", description="",
+            steps=[
+                WorkflowStep(step_id="s1", agent_id="sa-email-basic", action="send_email", timeout_seconds=600),
+                WorkflowStep(step_id="s2", agent_id="sa-whatsapp", action="send_message", depends_on=["s1"], timeout_seconds=60)
+            ],
+            config=WorkflowConfig(execution_strategy=WorkflowStrategy.SEQUENTIAL)
+        )
+
+        agents = await service._get_workflow_agents(workflow)
+        cost = await service._estimate_workflow_cost(workflow, agents)
+        connections = await service._get_required_connections(workflow, agents)
+        duration = await service._estimate_workflow_duration(workflow)
+
+        registry.get_latest_agents.assert_awaited_once()
+        registry.get_agent_by_id_and_version.assert_not_awaited()
+        assert cost == 1.0
+        assert sorted(connections) == ["gmail", "whatsapp"]
+        # 90s (histórico) + 60s (timeout, sem histórico)
+        assert duration == (3, 3)
@@ -0,0 +1,116 @@
+"""
+Tests for map (fan-out) steps
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from app.agents.base_agent import AgentExecutionResult
+from app.domain.execution import (
+    ExecutionPlan, ExecutionStep, ExecutionStrategy, MultiAgentExecution, StepStatus
+)
+
+
+def build_execution(steps, strategy=ExecutionStrategy.SEQUENTIAL, input_data=None):
+    plan = ExecutionPlan(plan_id="plan-1", name="Plan", description="", steps=steps, strategy=strategy)
+    return MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan, input_data=input_data or {})
+
+
+class TestMapStep:
+
+    @pytest.mark.asyncio
+    async def test_maps_upstream_output_with_bounded_concurrency(self, execution_service_factory):
+        running = peak = 0
+        calls = []
+
+        async def execute_capability(capability_name, input_data, user_id, credential_id=None):
+            nonlocal running, peak
+            if capability_name == "select_data":
+                return AgentExecutionResult(success=True, data={"data": [{"id": i} for i in range(20)]})
+            running += 1
+            peak = max(peak, running)
+            calls.append(input_data)
+            await asyncio.sleep(0.005)
+            running -= 1
+            return AgentExecutionResult(success=True, data={"sent_to": input_data["id"]})
+
+        service = execution_service_factory(execute_capability)
+        execution = build_execution([
+            ExecutionStep(step_id="rows", agent_id="sa-supabase", capability_name="select_data", input_data={}),
+            ExecutionStep(
+                step_id="notify", agent_id="sa-whatsapp", capability_name="send_message",
+                input_data={"template": "promo"}, depends_on=["rows"],
+                map_over="rows.data", map_concurrency=4
+            ),
+        ])
+
+        await service._execute_plan_async(execution)
+
+        notify = execution.plan.get_step("notify")
+        assert notify.status == StepStatus.COMPLETED
+        assert peak == 4
+        assert calls[0] == {"template": "promo", "id": 0}
+        assert notify.output_data["succeeded"] == 20
+        assert notify.output_data["results"][19] == {"sent_to": 19}
+        # Um único passo persistido, não um por item
+        assert len(execution.plan.steps) == 2
+
+    @pytest.mark.asyncio
+    async def test_retries_items_and_reports_partial_failures(self, execution_service_factory):
+        attempts = {}
+
+        async def execute_capability(capability_name, input_data, user_id, credential_id=None):
+            email = input_data["email"]
+            attempts[email] = attempts.get(email, 0) + 1
+            if email == "flaky" and attempts[email] == 1:
+                raise ConnectionError("reset")
+            if email == "bad":
+                return AgentExecutionResult(success=False, error_message="endereço inválido")
+            return AgentExecutionResult(success=True, data={"ok": email})
+
+        service = execution_service_factory(execute_capability)
+        step = ExecutionStep(
+            step_id="send", agent_id="sa-gmail", capability_name="send_email", input_data={},
+            map_over="${emails}", map_item_key="email", retry_count=1, retry_delay_seconds=0
+        )
+        execution = build_execution([step], input_data={"emails": ["a", "flaky", "bad"]})
+
+        await service._execute_step_with_input(execution, step, {**execution.input_data})
+
+        assert step.status == StepStatus.COMPLETED
+        assert attempts == {"a": 1, "flaky": 2, "bad": 2}
+        assert step.output_data["results"] == [{"ok": "a"}, {"ok": "flaky"}, None]
+        assert step.output_data["errors"] == [{"index": 2, "error": "endereço inválido", "attempts": 2}]
+
+    @pytest.mark.asyncio
+    async def test_failure_threshold_fails_step_with_report(self, execution_service_factory):
+        async def execute_capability(capability_name, input_data, user_id, credential_id=None):
+            return AgentExecutionResult(success=input_data["item"] % 2 == 0, error_message="falhou")
+
+        service = execution_service_factory(execute_capability)
+        step = ExecutionStep(
+            step_id="enrich", agent_id="sa-http-generic", capability_name="request", input_data={},
+            map_over="numbers", map_max_failures=1
+        )
+        execution = build_execution([step], input_data={"numbers": [0, 1, 2, 3]})
+
+        await service._execute_step_with_input(execution, step, {**execution.input_data})
+
+        assert step.status == StepStatus.FAILED
+        assert step.error_message == "2 de 4 itens falharam"
+        assert execution.results["enrich"]["data"]["failed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_missing_list_fails_step(self, execution_service_factory):
+        service = execution_service_factory(AsyncMock())
+        step = ExecutionStep(
+            step_id="enrich", agent_id="sa-http-generic", capability_name="request", input_data={},
+            map_over="numbers"
+        )
+        execution = build_execution([step])
+
+        await service._execute_step(execution, step)
+
+        assert step.status == StepStatus.FAILED
+        assert "numbers" in step.error_message
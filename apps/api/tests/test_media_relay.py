@@ -0,0 +1,185 @@
+"""
+Tests for the streaming media relay used by WhatsApp/Telegram uploads
+"""
+import email.parser
+import tracemalloc
+import httpx
+import pytest
+from uuid import uuid4
+
+from app.agents.sa_telegram import TelegramAgent
+from app.agents.sa_whatsapp import WhatsAppAgent
+from app.infra.media_relay import MediaRelay
+
+CHUNK = 64 * 1024
+
+
+def pattern(size):
+    """Conteúdo determinístico gerado em blocos (nunca inteiro em memória)"""
+    block = bytes(range(256)) * (CHUNK // 256)
+    remaining = size
+    while remaining > 0:
+        piece = block[:min(CHUNK, remaining)]
+        remaining -= len(piece)
+        yield piece
+
+
+class MediaServer(httpx.AsyncBaseTransport):
+    """
+    Origem da mídia + destino do upload. Ao contrário do MockTransport, não
+    lê o corpo do upload de uma vez: consome em blocos e só conta os bytes.
+    """
+
+    def __init__(self, size, content_length=True, keep_body=False, upload_response=None):
+        self.size = size
+        self.content_length = content_length
+        self.keep_body = keep_body
+        self.upload_response = upload_response or {"id": "media-123"}
+        self.upload_headers = None
+        self.upload_bytes = 0
+        self.body = b""
+
+    async def handle_async_request(self, request):
+        if request.method == "GET":
+            if request.url.path == "/missing":
+                return httpx.Response(404)
+
+            async def content():
+                for piece in pattern(self.size):
+                    yield piece
+
+            headers = {"Content-Type": "video/mp4"}
+            if self.content_length:
+                headers["Content-Length"] = str(self.size)
+            return httpx.Response(200, headers=headers, stream=AsyncBody(content()))
+
+        self.upload_headers = request.headers
+        async for chunk in request.stream:
+            self.upload_bytes += len(chunk)
+            if self.keep_body:
+                self.body += chunk
+        return httpx.Response(200, json=self.upload_response)
+
+
+class AsyncBody(httpx.AsyncByteStream):
+    def __init__(self, iterator):
+        self._iterator = iterator
+
+    async def __aiter__(self):
+        async for chunk in self._iterator:
+            yield chunk
+
+
+def parse_multipart(headers, body):
+    message = email.parser.BytesParser().parsebytes(
+        b"Content-Type: " + headers["content-type"].encode() + b"\r\n\r\n" + body
+    )
+    return {part.get_param("name", header="content-disposition"): part for part in message.get_payload()}
+
+
+async def relay_peak(relay, server, source="https://cdn.example.com/video.mp4", **kwargs):
+    client = httpx.AsyncClient(transport=server)
+    tracemalloc.start()
+    try:
+        response = await relay.upload(client, source, "https://upload.example.com/media", field_name="file", **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return response, peak
+
+
+@pytest.mark.usefixtures("real_http_client")
+class TestMediaRelay:
+
+    @pytest.mark.asyncio
+    async def test_multipart_body_carries_fields_and_file(self):
+        server = MediaServer(size=1000, keep_body=True)
+        client = httpx.AsyncClient(transport=server)
+
+        response = await MediaRelay().upload(
+            client, "https://cdn.example.com/a%20clip.mp4", "https://upload.example.com/media",
+            field_name="file", data={"messaging_product": "whatsapp"}, headers={"Authorization": "Bearer t"}
+        )
+
+        assert response.status_code == 200
+        assert server.upload_headers["authorization"] == "Bearer t"
+        assert int(server.upload_headers["content-length"]) == len(server.body)
+        parts = parse_multipart(server.upload_headers, server.body)
+        assert parts["messaging_product"].get_payload() == "whatsapp"
+        assert parts["file"].get_filename() == "a clip.mp4"
+        assert parts["file"].get_content_type() == "video/mp4"
+        assert parts["file"].get_payload(decode=True) == b"".join(pattern(1000))
+
+    @pytest.mark.asyncio
+    async def test_peak_memory_does_not_depend_on_file_size(self):
+        relay = MediaRelay(chunk_size=CHUNK, buffer_chunks=4)
+        size = 24 * 1024 * 1024
+        server = MediaServer(size=size)
+
+        response, peak = await relay_peak(relay, server)
+
+        assert response.status_code == 200
+        assert server.upload_bytes == int(server.upload_headers["content-length"]) > size
+        assert peak < 2 * 1024 * 1024
+
+    @pytest.mark.asyncio
+    async def test_unknown_length_spools_to_disk_above_threshold(self):
+        relay = MediaRelay(chunk_size=CHUNK, spool_threshold=1024 * 1024)
+        size = 12 * 1024 * 1024
+        server = MediaServer(size=size, content_length=False)
+
+        response, peak = await relay_peak(relay, server)
+
+        assert response.status_code == 200
+        assert int(server.upload_headers["content-length"]) == server.upload_bytes
+        assert server.upload_bytes > size
+        assert peak < 3 * 1024 * 1024
+
+    @pytest.mark.asyncio
+    async def test_size_limit_is_enforced_before_uploading(self):
+        from app.infra.media_relay import MediaTooLargeError
+
+        server = MediaServer(size=5000)
+        with pytest.raises(MediaTooLargeError):
+            await MediaRelay(max_bytes=4096).upload(
+                httpx.AsyncClient(transport=server), "https://cdn.example.com/v.mp4",
+                "https://upload.example.com/media", field_name="file"
+            )
+        assert server.upload_headers is None
+
+
+class TestAgentUploads:
+
+    @pytest.mark.asyncio
+    async def test_whatsapp_upload_media_streams_through_the_relay(self, agent_factory):
+        server = MediaServer(size=300000)
+        credentials = {"access_token": "token", "phone_number_id": "555"}
+        agent = agent_factory(WhatsAppAgent, server, credentials)
+
+        result = await agent._upload_media({"media_url": "https://cdn.example.com/v.mp4", "media_type": "video/mp4"}, credentials)
+        missing = await agent._upload_media({"media_url": "https://cdn.example.com/missing", "media_type": "video/mp4"}, credentials)
+
+        assert result.success
+        assert result.data == {"media_id": "media-123"}
+        assert server.upload_headers["content-type"].startswith("multipart/form-data; boundary=")
+        assert not missing.success
+        assert missing.error_message == "Erro ao baixar mídia: 404"
+
+    @pytest.mark.asyncio
+    async def test_telegram_document_upload_is_opt_in(self, agent_factory):
+        server = MediaServer(size=2000, keep_body=True, upload_response={
+            "ok": True, "result": {"message_id": 9, "chat": {"id": 1}, "document": {"file_id": "doc"}}
+        })
+        agent = agent_factory(TelegramAgent, server, {"bot_token": "123:secret"})
+
+        result = await agent.execute_capability("send_document", {
+            "chat_id": "1", "document": "https://cdn.example.com/report.pdf",
+            "filename": "report.pdf", "caption": "Relatório", "disable_notification": True, "upload": True
+        }, uuid4())
+
+        assert result.success
+        assert result.data["document"] == {"file_id": "doc"}
+        parts = parse_multipart(server.upload_headers, server.body)
+        assert parts["document"].get_filename() == "report.pdf"
+        assert parts["chat_id"].get_payload() == "1"
+        assert parts["disable_notification"].get_payload() == "true"
@@ -0,0 +1,182 @@
+"""
+Tests for workflow step execution in the orchestrator service
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from app.agents.base_agent import AgentExecutionResult
+from app.core.deadline import Deadline, deadline_scope
+from app.domain.orchestrator import (
+    Workflow, WorkflowExecution, WorkflowStep, WorkflowConfig,
+    ExecutionStrategy, ExecutionStatus, StepStatus
+)
+from app.services.orchestrator_service import OrchestratorService
+
+
+def make_service(execute_capability):
+    agent = MagicMock()
+    agent.has_capability.return_value = True
+    agent.execute_capability = execute_capability
+    registry = MagicMock()
+    registry.get_agent.return_value = agent
+
+    return OrchestratorService(
+        orchestrator_repository=AsyncMock(),
+        agent_registry_service=AsyncMock(),
+        integration_service=MagicMock(),
+        runtime_registry=registry
+    )
+
+
+def make_workflow(steps, max_parallel_steps=5, failure_strategy="stop"):
+    return Workflow(
+        user_id=uuid4(),
+        name="Workflow",
+        steps=steps,
+        config=WorkflowConfig(
+            execution_strategy=ExecutionStrategy.PARALLEL,
+            max_parallel_steps=max_parallel_steps,
+            failure_strategy=failure_strategy
+        )
+    )
+
+
+def make_execution(workflow):
+    execution = WorkflowExecution(workflow_id=workflow.id, user_id=workflow.user_id)
+    execution.start_execution()
+    return execution
+
+
+class TestParallelWorkflowExecution:
+
+    @pytest.mark.asyncio
+    async def test_independent_steps_run_concurrently_within_limit(self):
+        running = 0
+        peak = 0
+
+        async def run(capability_name, input_data, user_id, credential_id=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return AgentExecutionResult(success=True, data={"step": input_data["n"]})
+
+        service = make_service(run)
+        workflow = make_workflow(
+            [WorkflowStep(step_id=f"s{i}", agent_id="sa-test", action="run", input_data={"n": i}) for i in range(6)],
+            max_parallel_steps=3
+        )
+        execution = make_execution(workflow)
+
+        await service._execute_workflow_steps(workflow, execution)
+
+        assert peak == 3
+        assert execution.status == ExecutionStatus.COMPLETED
+        assert len(execution.results) == 6
+        assert all(step.output_data["output"] == {"step": step.input_data["n"]} for step in workflow.steps)
+
+    @pytest.mark.asyncio
+    async def test_dependent_step_waits_for_its_dependencies(self):
+        order = []
+
+        async def run(capability_name, input_data, user_id, credential_id=None):
+            await asyncio.sleep(input_data.get("delay", 0))
+            order.append(input_data["name"])
+            return AgentExecutionResult(success=True, data={})
+
+        service = make_service(run)
+        workflow = make_workflow([
+            WorkflowStep(step_id="slow", agent_id="sa-test", action="run", input_data={"name": "slow", "delay": 0.05}),
+            WorkflowStep(step_id="fast", agent_id="sa-test", action="run", input_data={"name": "fast"}),
+            WorkflowStep(step_id="after", agent_id="sa-test", action="run", input_data={"name": "after"}, depends_on=["fast"]),
+        ])
+        execution = make_execution(workflow)
+
+        await service._execute_workflow_steps(workflow, execution)
+
+        assert order == ["fast", "after", "slow"]
+
+    @pytest.mark.asyncio
+    async def test_failure_with_stop_skips_dependents(self):
+        async def run(capability_name, input_data, user_id, credential_id=None):
+            if input_data["name"] == "bad":
+                return AgentExecutionResult(success=False, error_message="boom")
+            return AgentExecutionResult(success=True, data={})
+
+        service = make_service(run)
+        workflow = make_workflow([
+            WorkflowStep(step_id="bad", agent_id="sa-test", action="run", input_data={"name": "bad"}),
+            WorkflowStep(step_id="child", agent_id="sa-test", action="run", input_data={"name": "child"}, depends_on=["bad"]),
+        ])
+        execution = make_execution(workflow)
+
+        await service._execute_workflow_steps(workflow, execution)
+
+        assert execution.status == ExecutionStatus.FAILED
+        assert workflow.steps[0].status == StepStatus.FAILED
+        assert workflow.steps[0].error_message == "boom"
+        assert workflow.steps[1].status == StepStatus.SKIPPED
+
+    @pytest.mark.asyncio
+    async def test_agent_exception_is_retried(self):
+        failures = 1
+        attempts = 0
+
+        async def run(capability_name, input_data, user_id, credential_id=None):
+            nonlocal attempts
+            attempts += 1
+            if attempts <= failures:
+                raise ConnectionError("connection reset")
+            return AgentExecutionResult(success=True, data={"ok": True})
+
+        service = make_service(run)
+        step = WorkflowStep(step_id="s", agent_id="sa-test", action="run", retry_count=1)
+
+        result = await service._execute_single_step(step, {}, uuid4())
+
+        assert attempts == 2
+        assert result["output"] == {"ok": True}
+
+        failures, attempts = 2, 0
+        with pytest.raises(RuntimeError, match="connection reset"):
+            await service._execute_single_step(step, {}, uuid4())
+        assert attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_retries_wait_with_policy_backoff(self):
+        loop = asyncio.get_running_loop()
+        calls = []
+
+        async def run(capability_name, input_data, user_id, credential_id=None):
+            calls.append(loop.time())
+            return AgentExecutionResult(success=False, error_message="busy")
+
+        service = make_service(run)
+        step = WorkflowStep(step_id="s", agent_id="sa-test", action="run", retry_count=2)
+        policy = {"delay_seconds": 0.02, "backoff_multiplier": 3}
+
+        with pytest.raises(RuntimeError, match="busy"):
+            await service._execute_single_step(step, {}, uuid4(), policy)
+
+        assert len(calls) == 3
+        assert calls[1] - calls[0] >= 0.02
+        assert calls[2] - calls[1] >= 0.06
+        assert OrchestratorService._retry_delay({"delay_seconds": 1, "max_delay_seconds": 3}, 4) == 3
+
+    @pytest.mark.asyncio
+    async def test_retry_delay_is_bounded_by_workflow_deadline(self):
+        execute_capability = AsyncMock(return_value=AgentExecutionResult(success=False, error_message="busy"))
+        service = make_service(execute_capability)
+        step = WorkflowStep(step_id="s", agent_id="sa-test", action="run", retry_count=3)
+
+        with deadline_scope(Deadline.after(1)):
+            with pytest.raises(RuntimeError, match="busy"):
+                await asyncio.wait_for(
+                    service._execute_single_step(step, {}, uuid4(), {"delay_seconds": 30}),
+                    timeout=0.5
+                )
+
+        assert execute_capability.await_count == 1
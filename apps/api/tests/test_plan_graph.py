@@ -0,0 +1,100 @@
+"""
+Tests for the indexed execution plan graph
+"""
+import time
+
+import pytest
+
+from app.domain.execution import ExecutionPlan, ExecutionStep, ExecutionStrategy
+
+
+def step(step_id, depends_on=None, timeout_seconds=300):
+    return ExecutionStep(
+        step_id=step_id, agent_id="sa-test", capability_name="run",
+        input_data={}, depends_on=depends_on or [], timeout_seconds=timeout_seconds
+    )
+
+
+def plan(steps, strategy=ExecutionStrategy.PARALLEL):
+    return ExecutionPlan(plan_id="plan-1", name="Plan", description="", steps=steps, strategy=strategy)
+
+
+def layered_steps(width, depth):
+    """Plano gerado: cada passo depende de dois passos do nível anterior"""
+    steps = []
+    for level in range(depth):
+        for index in range(width):
+            depends_on = [] if level == 0 else [
+                f"s{level - 1}-{index}", f"s{level - 1}-{(index + 1) % width}"
+            ]
+            steps.append(step(f"s{level}-{index}", depends_on, timeout_seconds=1 + (index % 7)))
+    return steps
+
+
+class TestPlanGraph:
+
+    def test_levels_follow_dependencies_and_plan_order(self):
+        execution_plan = plan([
+            step("c", ["a"]), step("a"), step("b"), step("d", ["c", "b"]), step("e", ["a"])
+        ])
+
+        assert execution_plan.get_execution_levels() == [["a", "b"], ["c", "e"], ["d"]]
+        assert execution_plan.get_topological_order() == ["a", "b", "c", "e", "d"]
+        assert execution_plan.get_dependents()["a"] == ["c", "e"]
+        assert execution_plan.get_step("d").depends_on == ["c", "b"]
+        assert execution_plan.get_step("missing") is None
+
+    def test_validation_errors(self):
+        with pytest.raises(ValueError, match="únicos"):
+            plan([step("a"), step("a")])
+        with pytest.raises(ValueError, match="'x' não encontrada"):
+            plan([step("a", ["x"])])
+        with pytest.raises(ValueError, match="circulares"):
+            plan([step("a", ["c"]), step("b", ["a"]), step("c", ["b"]), step("d")])
+
+    def test_critical_path_and_estimate(self):
+        execution_plan = plan([
+            step("fetch", timeout_seconds=10),
+            step("enrich", ["fetch"], timeout_seconds=50),
+            step("notify", ["fetch"], timeout_seconds=5),
+            step("report", ["enrich", "notify"], timeout_seconds=20),
+        ])
+
+        path, total = execution_plan.get_critical_path()
+        assert path == ["fetch", "enrich", "report"]
+        assert total == 80
+
+        path, total = execution_plan.get_critical_path(weight=lambda s: 1)
+        assert total == 3
+        assert execution_plan.estimate_execution_time() == 80
+
+    def test_index_follows_replaced_or_extended_steps(self):
+        execution_plan = plan([step("a")])
+        execution_plan.steps.append(step("b", ["a"]))
+
+        assert execution_plan.get_step("b") is execution_plan.steps[1]
+        assert execution_plan.get_execution_levels() == [["a"], ["b"]]
+
+    @pytest.mark.performance
+    def test_ten_thousand_step_plan_benchmark(self):
+        steps = layered_steps(width=100, depth=100)
+
+        started = time.perf_counter()
+        execution_plan = plan(steps)
+        validate_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        levels = execution_plan.get_execution_levels()
+        path, total = execution_plan.get_critical_path()
+        estimate = execution_plan.estimate_execution_time()
+        for item in steps:
+            execution_plan.get_step(item.step_id)
+        query_ms = (time.perf_counter() - started) * 1000
+
+        assert len(levels) == 100
+        assert all(len(level) == 100 for level in levels)
+        assert len(path) == 100
+        assert total <= estimate
+        # Limites folgados para CI; na prática ambos ficam na casa de dezenas de ms
+        assert validate_ms < 1000
+        assert query_ms < 1000
@@ -0,0 +1,119 @@
+"""
+Tests for the layered copy-on-write context used by pipeline/conditional executions
+"""
+import pytest
+from uuid import uuid4
+
+from app.agents.base_agent import AgentExecutionResult
+from app.domain.execution import (
+    ExecutionPlan, ExecutionStatus, ExecutionStep, ExecutionStrategy, MultiAgentExecution, StepStatus
+)
+from app.domain.execution_context import ScopedContext
+
+
+def make_step(step_id, inputs=None, **kwargs):
+    return ExecutionStep(
+        step_id=step_id, agent_id="sa-test", capability_name="run",
+        input_data=kwargs.pop("input_data", {}), inputs=inputs, **kwargs
+    )
+
+
+@pytest.fixture
+def context_service_factory(execution_service_factory):
+    def make(outputs):
+        calls = {}
+
+        async def execute_capability(capability_name, input_data, user_credentials=None, **kwargs):
+            step_id = input_data.get("_step")
+            calls[step_id] = dict(input_data)
+            return AgentExecutionResult(success=True, data=outputs.get(step_id, {}))
+
+        return execution_service_factory(execute_capability), calls
+
+    return make
+
+
+class TestScopedContext:
+
+    def test_newest_layer_wins_without_copying_outputs(self):
+        output = {"status": "new", "rows": [1, 2]}
+        context = ScopedContext({"status": "initial", "tenant": "acme"}, [])
+        context.push("fetch", output)
+
+        assert context["status"] == "new"
+        assert context["rows"] is output["rows"]
+        assert dict(context) == {"status": "new", "rows": [1, 2], "tenant": "acme"}
+
+    def test_declared_inputs_resolve_only_consumed_fields(self):
+        consumer = make_step("report", inputs={"first": "fetch.rows.0", "who": "${tenant}"}, input_data={"fmt": "csv"})
+        context = ScopedContext({"tenant": "acme"}, [consumer])
+        context.push("fetch", {"rows": [{"id": 7}], "blob": "x" * 1000})
+
+        assert context.step_input(consumer) == {"fmt": "csv", "first": {"id": 7}, "who": "acme"}
+        with pytest.raises(ValueError):
+            context.step_input(make_step("bad", inputs={"x": "fetch.missing"}))
+
+    def test_layers_without_pending_readers_are_released(self):
+        fetch = make_step("fetch", inputs={})
+        enrich = make_step("enrich", inputs={"rows": "fetch.rows"})
+        report = make_step("report", inputs={"total": "enrich.total"})
+        context = ScopedContext({}, [fetch, enrich, report])
+
+        context.push("fetch", {"rows": [1, 2, 3], "status": "a"})
+        context.done("fetch")
+        assert context.layer_ids == ["fetch"]
+
+        context.push("enrich", {"total": 3, "status": "b"})
+        context.done("enrich")
+        assert context.layer_ids == ["enrich"]
+        assert "rows" not in context
+
+        context.push("report", {"ok": True})
+        context.done("report")
+        assert context.layer_ids == []
+
+    def test_undeclared_reader_keeps_every_layer(self):
+        legacy = make_step("legacy")
+        context = ScopedContext({}, [make_step("a", inputs={}), legacy])
+        context.push("a", {"value": 1})
+        context.done("a")
+
+        assert context.layer_ids == ["a"]
+        assert context.step_input(legacy) == {"value": 1}
+
+
+class TestScopedExecution:
+
+    @pytest.mark.asyncio
+    async def test_pipeline_passes_declared_fields_and_legacy_context(self, context_service_factory):
+        service, calls = context_service_factory({
+            "fetch": {"rows": [1, 2], "cursor": "abc"},
+            "count": {"total": 2}
+        })
+        steps = [
+            make_step("fetch", input_data={"_step": "fetch"}),
+            make_step("count", inputs={"rows": "fetch.rows"}, input_data={"_step": "count"}),
+            make_step("notify", input_data={"_step": "notify"})
+        ]
+        plan = ExecutionPlan(plan_id="p", name="Plan", description="", steps=steps, strategy=ExecutionStrategy.PIPELINE)
+        execution = MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan, input_data={"user": "u1"})
+
+        await service._execute_plan_async(execution)
+
+        assert execution.status == ExecutionStatus.COMPLETED
+        assert calls["count"] == {"_step": "count", "rows": [1, 2]}
+        assert calls["notify"] == {"_step": "notify", "user": "u1", "rows": [1, 2], "cursor": "abc", "total": 2}
+
+    @pytest.mark.asyncio
+    async def test_missing_declared_input_fails_the_step(self, context_service_factory):
+        service, calls = context_service_factory({})
+        steps = [make_step("only", inputs={"rows": "absent.rows"}, input_data={"_step": "only"})]
+        plan = ExecutionPlan(plan_id="p", name="Plan", description="", steps=steps, strategy=ExecutionStrategy.PIPELINE)
+        execution = MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan)
+
+        await service._execute_plan_async(execution)
+
+        assert "only" not in calls
+        assert steps[0].status == StepStatus.FAILED
+        assert "absent.rows" in steps[0].error_message
+        assert ExecutionStep.from_dict(steps[0].to_dict()).inputs == {"rows": "absent.rows"}
@@ -0,0 +1,92 @@
+"""
+Tests for the idempotent step-result cache
+"""
+import pytest
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+from app.agents.base_agent import AgentExecutionResult
+from app.domain.execution import ExecutionPlan, ExecutionStep, MultiAgentExecution
+from app.services.step_result_cache import StepResultCache
+
+
+USER_ID = uuid4()
+
+
+class TestStepResultCache:
+
+    def test_key_is_canonical_for_input_order(self):
+        first = StepResultCache.build_key("sa-supabase", "select_data", {"table": "t", "limit": 10}, USER_ID)
+        second = StepResultCache.build_key("sa-supabase", "select_data", {"limit": 10, "table": "t"}, USER_ID)
+        other_credential = StepResultCache.build_key(
+            "sa-supabase", "select_data", {"table": "t", "limit": 10}, USER_ID, uuid4()
+        )
+
+        assert first == second
+        assert first != other_credential
+
+    def test_hit_returns_copy_with_cache_metadata(self):
+        cache = StepResultCache(max_entries=10, default_ttl_seconds=60)
+        cache.set("k", AgentExecutionResult(success=True, data={"rows": [1, 2]}, execution_time_ms=120))
+
+        hit = cache.get("k")
+        hit.data["rows"].append(3)
+
+        assert hit.metadata["cache"]["hit"] is True
+        assert hit.metadata["cache"]["original_execution_time_ms"] == 120
+        assert cache.get("k").data == {"rows": [1, 2]}
+
+    def test_failures_are_not_cached(self):
+        cache = StepResultCache(max_entries=10, default_ttl_seconds=60)
+        cache.set("k", AgentExecutionResult(success=False, error_message="boom"))
+
+        assert cache.get("k") is None
+
+    def test_ttl_expiration_and_lru_eviction(self):
+        cache = StepResultCache(max_entries=2, default_ttl_seconds=60)
+
+        with patch("app.services.step_result_cache.time.time", return_value=1000.0):
+            cache.set("a", AgentExecutionResult(success=True, data={}))
+            cache.set("b", AgentExecutionResult(success=True, data={}), ttl_seconds=5)
+            cache.get("a")
+            cache.set("c", AgentExecutionResult(success=True, data={}))
+
+        with patch("app.services.step_result_cache.time.time", return_value=1010.0):
+            assert cache.get("b") is None  # evicted (least recently used)
+            assert cache.get("a") is not None
+            assert cache.get("c") is not None
+
+        with patch("app.services.step_result_cache.time.time", return_value=1100.0):
+            assert cache.get("a") is None  # expired
+
+        metrics = cache.get_metrics()
+        assert metrics["evictions"] == 1
+        assert metrics["expirations"] == 1
+
+
+class TestCachedSteps:
+
+    @pytest.mark.asyncio
+    async def test_cacheable_step_skips_repeated_agent_calls(self, execution_service_factory):
+        service = execution_service_factory(
+            AsyncMock(return_value=AgentExecutionResult(success=True, data={"rows": [{"id": 1}]})),
+            result_cache=StepResultCache(max_entries=10, default_ttl_seconds=60)
+        )
+        agent = service.agent_registry.get_agent.return_value
+        agent.get_supported_providers.return_value = ["supabase"]
+
+        results = []
+        for _ in range(3):
+            step = ExecutionStep(
+                step_id="read", agent_id="sa-supabase", capability_name="select_data",
+                input_data={"table": "users"}, cacheable=True
+            )
+            plan = ExecutionPlan(plan_id="plan-1", name="Plan", description="", steps=[step])
+            execution = MultiAgentExecution(execution_id=uuid4(), user_id=USER_ID, plan=plan)
+            await service._execute_step(execution, step)
+            results.append(execution.results["read"])
+
+        assert agent.execute_capability.await_count == 1
+        assert "cache" not in results[0]["metadata"]
+        assert results[1]["metadata"]["cache"]["hit"] is True
+        assert results[2]["data"] == {"rows": [{"id": 1}]}
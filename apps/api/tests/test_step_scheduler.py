@@ -0,0 +1,160 @@
+"""
+Tests for the dependency-driven step scheduler used by parallel execution plans
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from app.agents.base_agent import AgentExecutionResult
+from app.domain.execution import (
+    ExecutionPlan, ExecutionStep, ExecutionStrategy, FailureHandling,
+    MultiAgentExecution, StepStatus, ExecutionStatus
+)
+from app.services.step_scheduler import StepScheduler, StepFailedError
+
+
+def make_plan(steps, max_parallel_steps=5, failure_handling=FailureHandling.STOP_ON_FAILURE):
+    return ExecutionPlan(
+        plan_id="plan-1",
+        name="Plan",
+        description="",
+        steps=steps,
+        strategy=ExecutionStrategy.PARALLEL,
+        failure_handling=failure_handling,
+        max_parallel_steps=max_parallel_steps
+    )
+
+
+def make_step(step_id, depends_on=None, delay=0.0):
+    return ExecutionStep(
+        step_id=step_id,
+        agent_id="sa-test",
+        capability_name="run",
+        input_data={"delay": delay},
+        depends_on=depends_on or []
+    )
+
+
+async def run_with_delay(step):
+    step.start_execution()
+    await asyncio.sleep(step.input_data["delay"])
+    step.complete_execution({"step": step.step_id})
+
+
+class TestStepScheduler:
+
+    @pytest.mark.asyncio
+    async def test_dependent_starts_before_slow_sibling_finishes(self):
+        """A step starts as soon as its own dependencies are done, not its level"""
+        started = {}
+
+        async def run_step(step):
+            started[step.step_id] = asyncio.get_running_loop().time()
+            await run_with_delay(step)
+
+        plan = make_plan([
+            make_step("slow", delay=0.3),
+            make_step("fast", delay=0.01),
+            make_step("after_fast", depends_on=["fast"], delay=0.01),
+        ])
+
+        stats = await StepScheduler(plan, run_step).run()
+
+        assert started["after_fast"] - started["slow"] < 0.2
+        assert all(step.status == StepStatus.COMPLETED for step in plan.steps)
+        assert stats.dispatched_steps == 3
+
+    @pytest.mark.asyncio
+    async def test_respects_max_parallel(self):
+        """Never runs more than max_parallel steps at once"""
+        running = 0
+        peak = 0
+
+        async def run_step(step):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await run_with_delay(step)
+            running -= 1
+
+        plan = make_plan([make_step(f"s{i}", delay=0.02) for i in range(10)], max_parallel_steps=3)
+
+        stats = await StepScheduler(plan, run_step, max_parallel=plan.max_parallel_steps).run()
+
+        assert peak == 3
+        assert stats.max_running_steps == 3
+        assert stats.max_ready_queue_depth == 10
+        assert stats.max_wait_time_ms > 0
+        assert all(step.wait_time_ms is not None for step in plan.steps)
+
+    @pytest.mark.asyncio
+    async def test_stop_on_failure_raises_and_stops_dispatch(self):
+        """Failure halts dispatch of new steps when plan stops on failure"""
+        async def run_step(step):
+            step.start_execution()
+            if step.step_id == "bad":
+                step.fail_execution("boom")
+            else:
+                step.complete_execution({})
+
+        plan = make_plan([
+            make_step("bad"),
+            make_step("child", depends_on=["bad"]),
+        ])
+
+        with pytest.raises(StepFailedError):
+            await StepScheduler(plan, run_step).run()
+
+        assert plan.get_step("child").status == StepStatus.PENDING
+
+    @pytest.mark.asyncio
+    async def test_continue_on_failure_skips_only_dependents(self):
+        """Downstream steps of a failed step are skipped, independent ones still run"""
+        async def run_step(step):
+            step.start_execution()
+            if step.step_id == "bad":
+                step.fail_execution("boom")
+            else:
+                step.complete_execution({})
+
+        plan = make_plan(
+            [
+                make_step("bad"),
+                make_step("child", depends_on=["bad"]),
+                make_step("grandchild", depends_on=["child"]),
+                make_step("other"),
+            ],
+            failure_handling=FailureHandling.CONTINUE_ON_FAILURE
+        )
+
+        stats = await StepScheduler(plan, run_step, stop_on_failure=False).run()
+
+        assert plan.get_step("child").status == StepStatus.SKIPPED
+        assert plan.get_step("grandchild").status == StepStatus.SKIPPED
+        assert plan.get_step("other").status == StepStatus.COMPLETED
+        assert stats.skipped_steps == 2
+
+
+class TestParallelExecution:
+
+    @pytest.mark.asyncio
+    async def test_execute_parallel_through_service(self, execution_service_factory):
+        """ExecutionService runs parallel plans through the scheduler"""
+        service = execution_service_factory(AsyncMock(
+            return_value=AgentExecutionResult(success=True, data={"ok": True})
+        ))
+
+        plan = make_plan([
+            make_step("a"),
+            make_step("b", depends_on=["a"]),
+            make_step("c", depends_on=["a"]),
+        ], max_parallel_steps=2)
+        execution = MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan)
+
+        await service._execute_plan_async(execution)
+
+        assert execution.status == ExecutionStatus.COMPLETED
+        assert set(execution.results) == {"a", "b", "c"}
+        assert execution.metrics["scheduler"]["dispatched_steps"] == 3
+        assert execution.metrics["scheduler"]["max_running_steps"] <= 2
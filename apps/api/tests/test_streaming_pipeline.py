@@ -0,0 +1,166 @@
+"""
+Tests for the streaming pipeline strategy
+"""
+import asyncio
+import pytest
+from uuid import uuid4
+
+from app.agents.base_agent import AgentExecutionResult
+from app.agents.sa_supabase import SupabaseAgent
+from app.domain.execution import (
+    ExecutionPlan, ExecutionStep, ExecutionStrategy, FailureHandling, MultiAgentExecution, StepStatus
+)
+
+
+class StreamingAgent:
+    """Agente de teste: cada capacidade é um gerador assíncrono"""
+
+    def __init__(self, capabilities):
+        self.capabilities = capabilities
+
+    def has_capability(self, capability_name):
+        return capability_name in self.capabilities
+
+    def get_supported_providers(self):
+        return []
+
+    def stream_capability(self, capability_name, input_data, user_id, credential_id=None):
+        return self.capabilities[capability_name](input_data)
+
+
+def build_execution(steps, buffer_size=2, failure_handling=FailureHandling.STOP_ON_FAILURE):
+    plan = ExecutionPlan(
+        plan_id="plan-1",
+        name="Plan",
+        description="",
+        steps=[
+            ExecutionStep(step_id=step_id, agent_id="sa-test", capability_name=step_id, input_data=input_data)
+            for step_id, input_data in steps
+        ],
+        strategy=ExecutionStrategy.STREAMING,
+        failure_handling=failure_handling,
+        metadata={'stream_buffer_size': buffer_size}
+    )
+    return MultiAgentExecution(execution_id=uuid4(), user_id=uuid4(), plan=plan, input_data={"count": 10})
+
+
+class TestStreamingPipeline:
+
+    @pytest.mark.asyncio
+    async def test_downstream_starts_before_upstream_finishes_with_bounded_lead(self, execution_service_factory):
+        events = []
+
+        async def produce(input_data):
+            for n in range(input_data["count"]):
+                events.append(("produced", n))
+                yield {"n": n}
+
+        async def transform(input_data):
+            events.append(("consumed", input_data["n"]))
+            await asyncio.sleep(0.001)
+            yield {"n": input_data["n"], "double": input_data["n"] * input_data["factor"]}
+
+        agent = StreamingAgent({"produce": produce, "transform": transform})
+        service = execution_service_factory(agent=agent)
+        execution = build_execution([("produce", {}), ("transform", {"factor": 2})], buffer_size=2)
+
+        await service._execute_plan_async(execution)
+
+        assert execution.status.value == "completed"
+        # Consumidor começou antes do produtor terminar
+        assert events.index(("consumed", 0)) < events.index(("produced", 9))
+
+        # Produtor nunca se adianta mais que o buffer (+ item em mãos de cada lado)
+        produced = consumed = max_lead = 0
+        for kind, _ in events:
+            if kind == "produced":
+                produced += 1
+            else:
+                consumed += 1
+            max_lead = max(max_lead, produced - consumed)
+        assert max_lead <= 4
+
+        transform_step = execution.plan.get_step("transform")
+        assert transform_step.output_data["records_in"] == 10
+        assert transform_step.output_data["records_out"] == 10
+        assert transform_step.output_data["sample"][1] == {"n": 1, "double": 2}
+        assert "sample" not in execution.plan.get_step("produce").output_data
+
+    @pytest.mark.asyncio
+    async def test_continue_on_failure_skips_bad_records(self, execution_service_factory):
+        async def produce(input_data):
+            for n in range(5):
+                yield {"n": n}
+
+        async def check(input_data):
+            if input_data["n"] == 2:
+                raise ValueError("registro inválido")
+            yield input_data
+
+        service = execution_service_factory(agent=StreamingAgent({"produce": produce, "check": check}))
+        execution = build_execution(
+            [("produce", {}), ("check", {})], failure_handling=FailureHandling.CONTINUE_ON_FAILURE
+        )
+
+        await service._execute_plan_async(execution)
+
+        output = execution.plan.get_step("check").output_data
+        assert output["records_in"] == 5
+        assert output["records_out"] == 4
+        assert output["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stop_on_failure_fails_step_and_stops_other_stages(self, execution_service_factory):
+        async def produce(input_data):
+            n = 0
+            while True:
+                yield {"n": n}
+                n += 1
+
+        async def check(input_data):
+            if input_data["n"] == 3:
+                raise ValueError("registro inválido")
+            yield input_data
+
+        service = execution_service_factory(agent=StreamingAgent({"produce": produce, "check": check}))
+        execution = build_execution([("produce", {}), ("check", {})])
+
+        await asyncio.wait_for(service._execute_plan_async(execution), timeout=2)
+
+        assert execution.status.value == "failed"
+        assert execution.plan.get_step("check").status == StepStatus.FAILED
+        assert execution.plan.get_step("produce").status == StepStatus.SKIPPED
+
+
+class TestSupabaseStreaming:
+
+    @pytest.mark.asyncio
+    async def test_select_data_streams_page_by_page(self, monkeypatch):
+        monkeypatch.setenv("CREDENTIAL_MASTER_KEY", "test-master-key")
+        agent = SupabaseAgent()
+        rows = [{"id": i} for i in range(7)]
+        pages = []
+
+        async def execute_capability(capability_name, input_data, user_id, credential_id=None):
+            pages.append((input_data["limit"], input_data["offset"]))
+            page = rows[input_data["offset"]:input_data["offset"] + input_data["limit"]]
+            return AgentExecutionResult(success=True, data={"data": page, "count": len(page)})
+
+        agent.execute_capability = execute_capability
+
+        streamed = [
+            row async for row in agent.stream_capability(
+                "select_data", {"table": "users", "page_size": 3}, uuid4()
+            )
+        ]
+        assert streamed == rows
+        assert pages == [(3, 0), (3, 3), (3, 6)]
+
+        pages.clear()
+        limited = [
+            row async for row in agent.stream_capability(
+                "select_data", {"table": "users", "page_size": 3, "limit": 4}, uuid4()
+            )
+        ]
+        assert limited == rows[:4]
+        assert pages == [(3, 0), (1, 3)]
@@ -0,0 +1,126 @@
+"""
+Tests for the Telegram broadcast capability
+"""
+import json
+import time
+import httpx
+import pytest
+from uuid import uuid4
+
+from app.agents.sa_telegram import TelegramAgent
+from app.core import token_bucket
+
+class MockBotApi:
+    """Bot API local: registra envios, devolve file_id de mídia e 429/400 configuráveis"""
+
+    def __init__(self, flood=None, blocked=()):
+        self.flood = dict(flood or {})
+        self.blocked = set(blocked)
+        self.calls = []
+        self.next_id = 0
+
+    async def __call__(self, request):
+        method = request.url.path.rsplit("/", 1)[-1]
+        payload = json.loads(request.content)
+        chat_id = str(payload["chat_id"])
+        self.calls.append((time.perf_counter(), method, payload))
+
+        if chat_id in self.blocked:
+            return httpx.Response(403, json={"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"})
+        if chat_id in self.flood:
+            retry_after = self.flood.pop(chat_id)
+            return httpx.Response(429, json={
+                "ok": False, "error_code": 429, "description": "Too Many Requests",
+                "parameters": {"retry_after": retry_after}
+            })
+
+        self.next_id += 1
+        message = {"message_id": self.next_id, "chat": {"id": chat_id}}
+        if method == "sendPhoto":
+            message["photo"] = [{"file_id": "small"}, {"file_id": "photo-file-id"}]
+        return httpx.Response(200, json={"ok": True, "result": message})
+
+
+@pytest.fixture
+def telegram(agent_factory):
+    return lambda server: agent_factory(TelegramAgent, server, {"bot_token": "123:secret"})
+
+
+class TestTelegramBroadcast:
+
+    @pytest.mark.asyncio
+    async def test_media_is_uploaded_once_and_reused_by_file_id(self, telegram):
+        server = MockBotApi()
+        agent = telegram(server)
+
+        result = await agent.execute_capability("broadcast", {
+            "chat_ids": ["1", "2", "3", "4"],
+            "photo": "https://cdn.example.com/banner.png",
+            "caption": "Promo"
+        }, uuid4())
+
+        assert result.success
+        assert result.data["sent"] == 4
+        assert result.data["file_ids"] == {"https://cdn.example.com/banner.png": "photo-file-id"}
+        photos = [payload["photo"] for _, _, payload in server.calls]
+        assert photos.count("https://cdn.example.com/banner.png") == 1
+        assert photos.count("photo-file-id") == 3
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_honored_and_failures_are_reported(self, telegram):
+        server = MockBotApi(flood={"2": 0.2}, blocked={"3"})
+        agent = telegram(server)
+
+        result = await agent.execute_capability("broadcast", {
+            "chat_ids": ["1", "2", "3"], "text": "hi"
+        }, uuid4())
+
+        results = result.data["results"]
+        assert [r["success"] for r in results] == [True, True, False]
+        assert results[1]["attempts"] == 2
+        assert results[2]["attempts"] == 1
+        assert "blocked" in results[2]["error"]
+
+        sends_to_2 = [at for at, _, payload in server.calls if payload["chat_id"] == "2"]
+        assert sends_to_2[1] - sends_to_2[0] >= 0.2
+
+    @pytest.mark.asyncio
+    async def test_per_chat_interval_and_progress_stream(self, telegram):
+        server = MockBotApi()
+        agent = telegram(server)
+
+        streamed = [
+            result async for result in agent.stream_capability("broadcast", {
+                "chat_ids": [{"chat_id": "1", "variables": {"name": "Ana"}}, {"chat_id": "-100", "variables": {"name": "Grupo"}}],
+                "messages": [{"type": "text", "text": "Olá {name}"}, {"type": "text", "text": "Tchau"}],
+                "per_chat_interval_seconds": 0.1
+            }, uuid4())
+        ]
+
+        assert [r["completed"] for r in streamed] == [1, 2]
+        assert all(r["total"] == 2 and len(r["message_ids"]) == 2 for r in streamed)
+        texts = [payload["text"] for _, _, payload in server.calls if payload["chat_id"] == "1"]
+        assert texts == ["Olá Ana", "Tchau"]
+        sends_to_1 = [at for at, _, payload in server.calls if payload["chat_id"] == "1"]
+        assert sends_to_1[1] - sends_to_1[0] >= 0.1
+
+    @pytest.mark.asyncio
+    async def test_global_bot_limit_paces_dispatch(self, telegram):
+        server = MockBotApi()
+        agent = telegram(server)
+        token_bucket.get_token_bucket("telegram:123", 50, capacity=1)
+
+        started = time.perf_counter()
+        result = await agent.execute_capability("broadcast", {
+            "chat_ids": [str(i) for i in range(11)], "text": "hi", "messages_per_second": 50
+        }, uuid4())
+
+        assert result.data["sent"] == 11
+        assert time.perf_counter() - started >= 0.18
+
+    def test_group_chats_use_the_slower_interval(self, telegram):
+        agent = telegram(MockBotApi())
+
+        assert agent._chat_interval(42) == agent.PRIVATE_CHAT_INTERVAL_SECONDS
+        assert agent._chat_interval("-100123") == agent.GROUP_CHAT_INTERVAL_SECONDS
+        assert agent._chat_interval("@channel") == agent.GROUP_CHAT_INTERVAL_SECONDS
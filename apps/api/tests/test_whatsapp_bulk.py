@@ -0,0 +1,147 @@
+"""
+Tests for the token bucket and the WhatsApp send_bulk capability
+"""
+import json
+import time
+import httpx
+import pytest
+from uuid import uuid4
+
+from app.agents.sa_whatsapp import WhatsAppAgent
+from app.core import token_bucket
+from app.core.token_bucket import TokenBucket
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+
+    def test_refills_at_rate_up_to_capacity(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == pytest.approx(0.5)
+
+        clock.now += 10
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() > 0
+
+    def test_pause_blocks_until_retry_after(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, clock=clock)
+
+        bucket.pause(3)
+        assert bucket.try_acquire() == pytest.approx(3.1)
+
+        clock.now += 3.5
+        assert bucket.try_acquire() == 0
+
+
+class MockGraphApi:
+    """Graph API local: 429 na primeira tentativa de alguns números, 400 para inválidos"""
+
+    def __init__(self, throttle=(), invalid=()):
+        self.throttle = set(throttle)
+        self.invalid = set(invalid)
+        self.sent = []
+        self.lookups = 0
+
+    async def __call__(self, request):
+        if request.method == "GET":
+            self.lookups += 1
+            return httpx.Response(200, json={"throughput": {"level": "STANDARD"}, "messaging_limit_tier": "TIER_1K"})
+
+        payload = json.loads(request.content)
+        to = payload["to"]
+        if to in self.invalid:
+            return httpx.Response(400, json={"error": {"code": 131026, "message": "undeliverable"}})
+        if to in self.throttle:
+            self.throttle.discard(to)
+            return httpx.Response(429, headers={"Retry-After": "0"}, json={"error": {"code": 130429}})
+        self.sent.append(payload)
+        return httpx.Response(200, json={"messages": [{"id": f"wamid.{to}"}]})
+
+
+@pytest.fixture
+def whatsapp(agent_factory):
+    def make(server):
+        agent = agent_factory(WhatsAppAgent, server, {"access_token": "token", "phone_number_id": "555"})
+        agent.RETRY_BACKOFF_SECONDS = 0.01
+        return agent
+
+    return make
+
+
+class TestWhatsAppSendBulk:
+
+    @pytest.mark.asyncio
+    async def test_template_per_recipient_parameters_and_retries(self, whatsapp):
+        server = MockGraphApi(throttle={"2"}, invalid={"3"})
+        agent = whatsapp(server)
+
+        result = await agent.execute_capability("send_bulk", {
+            "recipients": ["1", {"to": "2", "parameters": ["Ana"]}, "3"],
+            "template_name": "promo",
+            "parameters": ["cliente"]
+        }, uuid4())
+
+        assert result.success
+        data = result.data
+        assert (data["total"], data["sent"], data["failed"]) == (3, 2, 1)
+        assert data["messages_per_second"] == 80
+        assert [r["recipient"] for r in data["results"]] == ["1", "2", "3"]
+        assert data["results"][1] == {"index": 1, "recipient": "2", "success": True, "message_id": "wamid.2", "attempts": 2}
+        assert data["results"][2]["attempts"] == 1
+        assert "400" in data["results"][2]["error"]
+
+        params = {p["to"]: p["template"]["components"][0]["parameters"][0]["text"] for p in server.sent}
+        assert params == {"1": "cliente", "2": "Ana"}
+        assert server.lookups == 1
+
+    @pytest.mark.asyncio
+    async def test_sends_are_paced_by_the_token_bucket(self, whatsapp):
+        server = MockGraphApi()
+        agent = whatsapp(server)
+
+        started = time.perf_counter()
+        result = await agent.execute_capability("send_bulk", {
+            "recipients": [{"to": str(i), "variables": {"name": f"n{i}"}} for i in range(30)],
+            "message": "Olá {name}",
+            "messages_per_second": 100
+        }, uuid4())
+        elapsed = time.perf_counter() - started
+
+        assert result.data["sent"] == 30
+        # 100 fichas de saldo inicial: as 30 saem de imediato; com taxa 100/s e saldo 1 levariam ~0.3s
+        assert elapsed < 0.25
+        assert server.sent[0]["text"]["body"] == "Olá n0"
+
+        token_bucket.get_token_bucket("whatsapp:555", 100, capacity=1)
+        started = time.perf_counter()
+        await agent.execute_capability("send_bulk", {
+            "recipients": [str(i) for i in range(21)], "message": "x", "messages_per_second": 100
+        }, uuid4())
+        assert time.perf_counter() - started >= 0.15
+        assert server.lookups == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_emits_each_result_as_it_completes(self, whatsapp):
+        server = MockGraphApi(invalid={"b"})
+        agent = whatsapp(server)
+
+        streamed = [
+            result async for result in agent.stream_capability(
+                "send_bulk", {"recipients": ["a", "b", "c"], "message": "hi", "messages_per_second": 50}, uuid4()
+            )
+        ]
+
+        assert sorted(r["recipient"] for r in streamed) == ["a", "b", "c"]
+        assert [r["success"] for r in sorted(streamed, key=lambda r: r["index"])] == [True, False, True]
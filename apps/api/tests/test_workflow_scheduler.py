@@ -0,0 +1,228 @@
+"""
+Tests for cron/interval workflow schedules and the heap-based scheduler
+"""
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from app.domain.schedule import CronExpression, WorkflowSchedule
+from app.services.workflow_scheduler import WorkflowScheduler, _epoch
+
+
+NOW = datetime(2024, 5, 10, 12, 0, 30)
+
+
+def make_schedule(**kwargs):
+    kwargs.setdefault("interval_seconds", 60)
+    return WorkflowSchedule(workflow_id=uuid4(), user_id=uuid4(), **kwargs)
+
+
+def make_repository(schedules=(), claimed=True):
+    async def iter_enabled_schedules(page_size=1000):
+        for schedule in schedules:
+            yield schedule
+
+    repository = MagicMock()
+    repository.iter_enabled_schedules = iter_enabled_schedules
+    repository.advance_next_fire = AsyncMock(return_value=claimed)
+    repository.find_schedule_by_id = AsyncMock()
+    return repository
+
+
+class TestCronExpression:
+
+    def test_next_after_steps_and_ranges(self):
+        cron = CronExpression("*/15 9-17 * * 1-5")
+
+        assert cron.next_after(datetime(2024, 5, 10, 12, 7)) == datetime(2024, 5, 10, 12, 15)
+        # Sexta 17:45 -> segunda 09:00
+        assert cron.next_after(datetime(2024, 5, 10, 17, 45)) == datetime(2024, 5, 13, 9, 0)
+
+    def test_day_of_month_or_weekday(self):
+        cron = CronExpression("0 0 1 * 0")
+
+        # Domingo 5 de maio vem antes de 1º de junho
+        assert cron.next_after(datetime(2024, 5, 2)) == datetime(2024, 5, 5)
+        assert CronExpression("0 0 29 2 *").next_after(datetime(2023, 3, 1)) == datetime(2024, 2, 29)
+
+    def test_invalid_expressions(self):
+        for expression in ("* * * *", "60 * * * *", "*/0 * * * *", "0 0 31 2 *"):
+            with pytest.raises(ValueError):
+                CronExpression(expression).next_after(NOW)
+
+
+class TestWorkflowSchedule:
+
+    def test_requires_exactly_one_trigger(self):
+        with pytest.raises(ValueError):
+            WorkflowSchedule(workflow_id=uuid4(), user_id=uuid4())
+        with pytest.raises(ValueError):
+            make_schedule(cron_expression="* * * * *")
+
+    def test_interval_keeps_phase_after_missed_fires(self):
+        schedule = make_schedule(interval_seconds=300, next_fire_at=datetime(2024, 5, 10, 11, 2))
+
+        assert schedule.next_fire_after(NOW) == datetime(2024, 5, 10, 12, 2)
+        assert WorkflowSchedule.from_dict(schedule.to_dict()).next_fire_at == schedule.next_fire_at
+
+
+class TestWorkflowScheduler:
+
+    def test_catchup_coalesces_and_spreads_overdue_schedules(self):
+        overdue = [make_schedule(next_fire_at=NOW - timedelta(hours=6)) for _ in range(50)]
+        future = make_schedule(next_fire_at=NOW + timedelta(minutes=5))
+        scheduler = WorkflowScheduler(
+            repository=make_repository(overdue + [future]),
+            dispatcher=AsyncMock(),
+            catchup_spread_seconds=60,
+            default_jitter_seconds=0,
+            clock=lambda: NOW
+        )
+
+        assert asyncio.run(scheduler.load()) == 51
+
+        due = {schedule_id: at for at, _, schedule_id, _ in scheduler._heap}
+        catchup = [due[schedule.id] - _epoch(NOW) for schedule in overdue]
+        assert all(0 <= delay < 60 for delay in catchup)
+        assert len({round(delay) for delay in catchup}) > 10
+        assert due[future.id] == _epoch(future.next_fire_at)
+
+    @pytest.mark.asyncio
+    async def test_fire_dispatches_once_and_reschedules(self):
+        schedule = make_schedule(interval_seconds=60, next_fire_at=NOW - timedelta(minutes=10, seconds=30))
+        repository = make_repository()
+        dispatcher = AsyncMock()
+        scheduler = WorkflowScheduler(repository=repository, dispatcher=dispatcher, clock=lambda: NOW)
+        scheduler.add(schedule)
+
+        await scheduler._fire(schedule.id, scheduler._generations[schedule.id])
+
+        dispatcher.assert_awaited_once_with(schedule)
+        _, expected, next_fire_at, _ = repository.advance_next_fire.await_args.args
+        assert expected == NOW - timedelta(minutes=10, seconds=30)
+        assert next_fire_at == datetime(2024, 5, 10, 12, 1)
+        metrics = scheduler.get_metrics()
+        assert metrics["fired"] == 1
+        assert metrics["coalesced_missed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_lost_claim_skips_dispatch_and_follows_stored_state(self):
+        schedule = make_schedule(next_fire_at=NOW)
+        stored = WorkflowSchedule.from_dict({**schedule.to_dict(), "next_fire_at": (NOW + timedelta(minutes=1)).isoformat()})
+        repository = make_repository(claimed=False)
+        repository.find_schedule_by_id.return_value = stored
+        dispatcher = AsyncMock()
+        scheduler = WorkflowScheduler(repository=repository, dispatcher=dispatcher, clock=lambda: NOW)
+        scheduler.add(schedule)
+
+        await scheduler._fire(schedule.id, scheduler._generations[schedule.id])
+
+        dispatcher.assert_not_awaited()
+        assert scheduler.get_metrics()["claim_conflicts"] == 1
+        assert scheduler._schedules[schedule.id].next_fire_at == NOW + timedelta(minutes=1)
+
+    @pytest.mark.asyncio
+    async def test_running_scheduler_fires_due_schedules_and_skips_removed(self):
+        fired = []
+        scheduler = WorkflowScheduler(
+            repository=make_repository(),
+            dispatcher=AsyncMock(side_effect=lambda schedule: fired.append(schedule.id)),
+            max_concurrent_dispatches=2,
+            default_jitter_seconds=0
+        )
+        await scheduler.start()
+        try:
+            due = [make_schedule(next_fire_at=datetime.utcnow() + timedelta(milliseconds=50)) for _ in range(3)]
+            removed = make_schedule(next_fire_at=datetime.utcnow())
+            later = make_schedule(next_fire_at=datetime.utcnow() + timedelta(hours=1))
+            for schedule in due + [removed, later]:
+                scheduler.add(schedule)
+            scheduler.remove(removed.id)
+
+            for _ in range(50):
+                if len(fired) == 3:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            await scheduler.stop()
+
+        assert sorted(fired) == sorted(schedule.id for schedule in due)
+        assert scheduler.get_metrics()["schedules"] == 4
+
+    @pytest.mark.asyncio
+    async def test_reload_applies_rows_changed_by_other_instances(self):
+        kept = make_schedule(next_fire_at=NOW + timedelta(minutes=5), updated_at=NOW - timedelta(hours=1))
+        edited = make_schedule(next_fire_at=NOW + timedelta(minutes=5), updated_at=NOW - timedelta(hours=1))
+        disabled = make_schedule(next_fire_at=NOW + timedelta(minutes=5), updated_at=NOW - timedelta(hours=1))
+        repository = make_repository([kept, edited, disabled])
+        scheduler = WorkflowScheduler(
+            repository=repository, dispatcher=AsyncMock(), default_jitter_seconds=0, clock=lambda: NOW
+        )
+        await scheduler.load()
+
+        created = make_schedule(next_fire_at=NOW + timedelta(minutes=1), updated_at=NOW)
+        changed = [
+            WorkflowSchedule.from_dict({**kept.to_dict()}),
+            WorkflowSchedule.from_dict({**edited.to_dict(), "next_fire_at": (NOW + timedelta(hours=2)).isoformat(), "updated_at": NOW.isoformat()}),
+            WorkflowSchedule.from_dict({**disabled.to_dict(), "enabled": False, "updated_at": NOW.isoformat()}),
+            created
+        ]
+
+        async def iter_schedules_updated_since(since, page_size=1000):
+            for schedule in changed:
+                yield schedule
+
+        repository.iter_schedules_updated_since = iter_schedules_updated_since
+
+        assert await scheduler.reload() == 3
+        assert set(scheduler._schedules) == {kept.id, edited.id, created.id}
+        assert scheduler._schedules[edited.id].next_fire_at == NOW + timedelta(hours=2)
+        assert scheduler.get_metrics()["reloaded"] == 3
+
+
+class TestScheduleEndpoints:
+
+    def test_create_list_and_delete_schedule(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from app.api.v1 import orchestrator as orchestrator_api
+
+        workflow_id = uuid4()
+        stored = {}
+
+        async def save_schedule(schedule):
+            stored[schedule.id] = schedule
+            return schedule
+
+        async def delete_schedule(schedule_id):
+            return stored.pop(schedule_id, None) is not None
+
+        repository = make_repository()
+        repository.save_schedule = save_schedule
+        repository.delete_schedule = delete_schedule
+        repository.find_schedules_by_workflow = AsyncMock(side_effect=lambda _: list(stored.values()))
+        scheduler = WorkflowScheduler(repository=repository, dispatcher=AsyncMock())
+        service = MagicMock()
+        service.get_workflow_by_id = AsyncMock(side_effect=lambda wid: MagicMock() if wid == workflow_id else None)
+
+        app = FastAPI()
+        app.include_router(orchestrator_api.router)
+        app.dependency_overrides[orchestrator_api.get_orchestrator_service] = lambda: service
+        app.dependency_overrides[orchestrator_api.get_workflow_scheduler] = lambda: scheduler
+        client = TestClient(app)
+
+        response = client.post(f"/orchestrator/workflows/{workflow_id}/schedules", json={"cron_expression": "0 9 * * 1-5"})
+        assert response.status_code == 201
+        schedule_id = response.json()["id"]
+        assert scheduler.get_metrics()["schedules"] == 1
+
+        assert client.post(f"/orchestrator/workflows/{workflow_id}/schedules", json={}).status_code == 400
+        assert client.post(f"/orchestrator/workflows/{uuid4()}/schedules", json={"interval_seconds": 60}).status_code == 404
+        assert [s["id"] for s in client.get(f"/orchestrator/workflows/{workflow_id}/schedules").json()] == [schedule_id]
+
+        assert client.delete(f"/orchestrator/schedules/{schedule_id}").status_code == 204
+        assert client.delete(f"/orchestrator/schedules/{schedule_id}").status_code == 404
+        assert scheduler.get_metrics()["schedules"] == 0